@@ -8,6 +8,14 @@ import { useState, useEffect, useMemo } from "react";
 import { useToast } from "@/hooks/use-toast";
 import { makeApi } from "@/lib/apiClient";
 
+const formatDuration = (seconds) => {
+  if (!seconds || seconds <= 0) return null;
+  const total = Math.round(seconds);
+  const m = Math.floor(total / 60);
+  const s = String(total % 60).padStart(2, "0");
+  return `${m}:${s}`;
+};
+
 export default function MediaLibrary({ onBack, token }) {
   const [mediaFiles, setMediaFiles] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
@@ -196,6 +204,7 @@ export default function MediaLibrary({ onBack, token }) {
                             <div className="flex items-center gap-2">
                               <span className="text-sm">{file.friendly_name || file.filename.split('_').slice(1).join('_')}</span>
                               {file.trigger_keyword && <span className="text-[10px] uppercase tracking-wide bg-blue-100 text-blue-700 px-2 py-0.5 rounded">{file.trigger_keyword}</span>}
+                              {formatDuration(file.duration_s) && <span className="text-xs text-gray-500">{formatDuration(file.duration_s)}</span>}
                             </div>
                           )}
                         </div>
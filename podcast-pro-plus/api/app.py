@@ -23,6 +23,7 @@ from api.exceptions import install_exception_handlers
 from api.limits import limiter, DISABLE as RL_DISABLED
 from api.startup_tasks import run_startup_tasks, _compute_pt_expiry
 from api.routing import attach_routers
+from api.core.loop_monitor import install_loop_block_detector
 
 # --- logging ASAP ---
 configure_logging()
@@ -67,6 +68,9 @@ app = FastAPI(title="Podcast Pro Plus API")
 # DB/tables and additive migrations
 run_startup_tasks()
 
+# Dev/test only: flag handlers that block the event loop (sync I/O inside async def)
+install_loop_block_detector(app)
+
 # --- Middleware ---
 app.add_middleware(SessionMiddleware,
     secret_key=settings.SESSION_SECRET_KEY,
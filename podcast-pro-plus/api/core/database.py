@@ -9,6 +9,8 @@ from urllib.parse import quote_plus
 from ..models import user, podcast, settings as _app_settings  # noqa: F401
 # Import usage ledger model so metadata contains it during create_all
 from ..models import usage as _usage_models  # noqa: F401
+from ..models import metrics as _metrics_models  # noqa: F401
+from ..models import job as _job_models  # noqa: F401
 from pathlib import Path
 from .config import settings
 
@@ -146,11 +148,76 @@ def _ensure_template_new_columns():
         log.error(f"[migrate] PodcastTemplate column introspection failed: {e}")
 
 
+def _ensure_columns(table: str, wanted: dict) -> None:
+    """Add missing nullable columns to ``table`` on SQLite (PRAGMA) or Postgres (IF NOT EXISTS)."""
+    try:
+        with engine.connect() as conn:
+            if engine.url.get_backend_name() == "sqlite":
+                res = conn.execute(text(f"PRAGMA table_info({table})"))
+                existing = {row[1] for row in res}
+                for col, ddl in wanted.items():
+                    if col not in existing:
+                        try:
+                            log.info(f"[migrate] Adding missing column {table}.{col}")
+                            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} {ddl}"))
+                        except Exception as e:  # pragma: no cover
+                            log.error(f"[migrate] Failed adding {table} column {col}: {e}")
+            else:
+                for col, ddl in wanted.items():
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {col} {ddl}"))
+            conn.commit()
+    except Exception as e:  # pragma: no cover
+        log.error(f"[migrate] {table} column introspection failed: {e}")
+
+
+def _ensure_mediaitem_new_columns():
+    """Add MediaItem probe columns (duration, format, content hash) if missing."""
+    _ensure_columns("mediaitem", {
+        "duration_s": "FLOAT",
+        "sample_rate": "INTEGER",
+        "channels": "INTEGER",
+        "codec": "VARCHAR",
+        "bit_rate": "INTEGER",
+        "content_hash": "VARCHAR",
+        "probe_fingerprint": "VARCHAR",
+    })
+
+
+def _ensure_subscription_snapshot_columns():
+    """Add Stripe snapshot columns used by admin billing reporting if missing."""
+    _ensure_columns("subscription", {
+        "amount_cents": "INTEGER",
+        "billing_interval": "VARCHAR(16)",
+        "mrr_cents": "INTEGER",
+        "trial_end": "TIMESTAMP",
+        "canceled_at": "TIMESTAMP",
+    })
+
+
+def _ensure_purge_indexes():
+    """Indexes backing the expired-upload purge anti-join (create_all only covers new tables)."""
+    wanted = {
+        "ix_mediaitem_expires_at": "mediaitem (expires_at)",
+        "ix_episode_working_audio_name": "episode (working_audio_name)",
+        "ix_episode_final_audio_path": "episode (final_audio_path)",
+    }
+    try:
+        with engine.connect() as conn:
+            for name, target in wanted.items():
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target}"))
+            conn.commit()
+    except Exception as e:  # pragma: no cover
+        log.error(f"[migrate] Failed ensuring purge indexes: {e}")
+
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
     _ensure_episode_new_columns()
     _ensure_podcast_new_columns()
     _ensure_template_new_columns()
+    _ensure_mediaitem_new_columns()
+    _ensure_subscription_snapshot_columns()
+    _ensure_purge_indexes()
     if _is_sqlite_engine():
         try:
             with engine.connect() as conn:
@@ -0,0 +1,115 @@
+"""Thread-safe lazy values for heavy imports and client construction.
+
+Module import should stay cheap so a new instance serves /api/health quickly;
+SDK imports (Google Cloud, Celery, authlib) and client construction happen on
+first use instead, exactly once per process even under concurrent requests.
+
+``LazyModule`` stands in for a module-level ``import sdk`` whose callers use
+``sdk.attr`` throughout: the import happens on the first attribute access.
+
+Values created with ``fork_safe=True`` are dropped in a forked child (Celery
+prefork workers) so gRPC channels and HTTP sessions are never shared across
+processes; the child builds its own on first use.
+"""
+from __future__ import annotations
+
+import importlib
+import os
+import threading
+import weakref
+from types import ModuleType
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+_FORK_SAFE: "weakref.WeakSet[LazyValue]" = weakref.WeakSet()
+
+
+class LazyValue(Generic[T]):
+    """Build a value with ``factory`` on first ``get()``; later calls return the same object."""
+
+    __slots__ = ("_factory", "_lock", "_value", "_built", "name", "__weakref__")
+
+    def __init__(self, factory: Callable[[], T], name: Optional[str] = None, *, fork_safe: bool = False) -> None:
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._built = False
+        self.name = name or getattr(factory, "__name__", "lazy")
+        if fork_safe:
+            _FORK_SAFE.add(self)
+
+    def get(self) -> T:
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._value = self._factory()
+                    self._built = True
+        return self._value  # type: ignore[return-value]
+
+    __call__ = get
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def reset(self) -> None:
+        """Drop the cached value so the next ``get()`` builds a new one (tests, credential rotation)."""
+        with self._lock:
+            self._value = None
+            self._built = False
+
+    def _forget_after_fork(self) -> None:
+        # Another parent thread may have held the lock at fork time; never acquire it here
+        self._lock = threading.Lock()
+        self._value = None
+        self._built = False
+
+    def __repr__(self) -> str:
+        return f"LazyValue({self.name!r}, built={self._built})"
+
+
+class LazyModule:
+    """Module ``name``, imported on first attribute access; ``setup`` then runs once with it.
+
+    Attribute reads and writes go to the real module, so ``sdk.api_key = ...`` and
+    test patches of ``sdk.Client.method`` behave as on the module itself.
+    """
+
+    def __init__(self, name: str, setup: Optional[Callable[[ModuleType], None]] = None) -> None:
+        def _load() -> ModuleType:
+            module = importlib.import_module(name)
+            if setup is not None:
+                setup(module)
+            return module
+
+        object.__setattr__(self, "_module", LazyValue(_load, name=name))
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._module.get(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._module.get(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._module.get(), attr)
+
+    def __repr__(self) -> str:
+        return f"LazyModule({self._module.name!r}, loaded={self._module.built})"
+
+
+def _reset_after_fork() -> None:
+    for value in list(_FORK_SAFE):
+        value._forget_after_fork()
+
+
+if hasattr(os, "register_at_fork"):  # POSIX only; Windows has no fork
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def lazy(factory: Callable[[], T]) -> LazyValue[T]:
+    """Decorator form: ``@lazy`` over a zero-argument factory returns its LazyValue."""
+    return LazyValue(factory)
+
+
+__all__ = ["LazyModule", "LazyValue", "lazy"]
@@ -0,0 +1,183 @@
+"""Event-loop blocking detector for dev/test.
+
+A heartbeat coroutine ticks on the server's event loop while a watchdog thread
+watches the ticks. When a tick is late by more than the threshold, the watchdog
+captures the loop thread's stack (which points at the offending handler) and
+the heartbeat records a ``BlockEvent`` once the loop comes back.
+
+Enabled automatically when the app runs in dev/test; tune or force with env:
+- LOOP_BLOCK_DETECT=0|1          explicit off/on (overrides env detection)
+- LOOP_BLOCK_THRESHOLD_MS=100    stall threshold in milliseconds
+
+Tests call ``app.state.loop_block_detector.assert_no_blocking()`` so a
+coroutine that blocks the loop fails the run; in dev the events are logged.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from fastapi import FastAPI
+
+log = logging.getLogger("api.loop_monitor")
+
+_DEV_ENVS = ("dev", "development", "test", "testing", "local")
+
+
+class EventLoopBlocked(AssertionError):
+    """Raised by ``assert_no_blocking`` when the loop stalled past the threshold."""
+
+
+@dataclass
+class BlockEvent:
+    duration_ms: float
+    stack: str = ""
+    at: float = field(default_factory=time.time)
+
+
+class LoopBlockDetector:
+    def __init__(self, threshold_ms: float = 100.0, interval_ms: Optional[float] = None):
+        self.threshold = max(1.0, float(threshold_ms)) / 1000.0
+        # Tick several times per threshold window so stalls are caught while they happen
+        self.interval = (float(interval_ms) / 1000.0) if interval_ms else max(self.threshold / 4.0, 0.005)
+        self.events: List[BlockEvent] = []
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._pending_stack: str = ""
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- lifecycle ---------------------------------------------------------
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._stop.clear()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-block-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    # --- internals ---------------------------------------------------------
+    async def _heartbeat(self) -> None:
+        while not self._stop.is_set():
+            expected = time.monotonic() + self.interval
+            with self._lock:
+                self._beat = expected
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - expected
+            with self._lock:
+                stack, self._pending_stack = self._pending_stack, ""
+            if lag > self.threshold:
+                if stack and _is_idle_wait(stack):
+                    # Loop was parked in select() and merely starved of the GIL/CPU by
+                    # threadpool work; no coroutine was holding it.
+                    log.debug("[loop-block] heartbeat late by %.1f ms while loop idle", lag * 1000.0)
+                    continue
+                self._record(BlockEvent(duration_ms=lag * 1000.0, stack=stack))
+
+    def _watch(self) -> None:
+        poll = max(self.interval / 2.0, 0.002)
+        while not self._stop.wait(poll):
+            with self._lock:
+                overdue = time.monotonic() - self._beat
+                already = bool(self._pending_stack)
+            if overdue > self.threshold and not already:
+                stack = self._capture_loop_stack()
+                with self._lock:
+                    self._pending_stack = stack
+
+    def _capture_loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id or -1)
+        if frame is None:
+            return ""
+        return "".join(traceback.format_stack(frame))
+
+    def _record(self, event: BlockEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+        last = event.stack.strip().splitlines()[-2:] if event.stack else []
+        log.warning(
+            "[loop-block] event loop blocked for %.1f ms (threshold %.0f ms) at: %s",
+            event.duration_ms, self.threshold * 1000.0, " | ".join(s.strip() for s in last) or "<unknown>",
+        )
+
+    # --- assertions --------------------------------------------------------
+    def reset(self) -> None:
+        with self._lock:
+            self.events.clear()
+            self._pending_stack = ""
+
+    def assert_no_blocking(self) -> None:
+        with self._lock:
+            events = list(self.events)
+        if events:
+            worst = max(events, key=lambda e: e.duration_ms)
+            raise EventLoopBlocked(
+                f"event loop blocked {len(events)} time(s); worst {worst.duration_ms:.1f} ms "
+                f"(threshold {self.threshold * 1000.0:.0f} ms)\n{worst.stack}"
+            )
+
+
+def _is_idle_wait(stack: str) -> bool:
+    lines = [ln for ln in stack.strip().splitlines() if ln.lstrip().startswith("File ")]
+    return bool(lines) and "selectors.py" in lines[-1]
+
+
+def _detection_enabled() -> bool:
+    explicit = os.getenv("LOOP_BLOCK_DETECT")
+    if explicit is not None:
+        return explicit.strip().lower() in ("1", "true", "yes", "on")
+    env = (os.getenv("PPP_ENV") or os.getenv("APP_ENV") or os.getenv("ENV") or "").strip().lower()
+    return env in _DEV_ENVS
+
+
+def install_loop_block_detector(app: FastAPI, *, force: bool = False) -> Optional[LoopBlockDetector]:
+    """Attach a detector to ``app`` startup/shutdown; no-op outside dev/test.
+
+    The detector is exposed as ``app.state.loop_block_detector``.
+    """
+    existing = getattr(app.state, "loop_block_detector", None)
+    if existing is not None:
+        return existing
+    if not (force or _detection_enabled()):
+        return None
+    try:
+        threshold = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+    except ValueError:
+        threshold = 100.0
+    detector = LoopBlockDetector(threshold_ms=threshold)
+    app.state.loop_block_detector = detector
+    app.router.add_event_handler("startup", detector.start)
+    app.router.add_event_handler("shutdown", detector.stop)
+    return detector
+
+
+__all__ = [
+    "BlockEvent",
+    "EventLoopBlocked",
+    "LoopBlockDetector",
+    "install_loop_block_detector",
+]
@@ -8,3 +8,5 @@ from .user import User, UserCreate, UserPublic, UserTermsAcceptance  # noqa: F40
 from .subscription import Subscription  # noqa: F401
 from .settings import AppSetting  # noqa: F401
 from .usage import ProcessingMinutesLedger, LedgerDirection, LedgerReason  # noqa: F401
+from .metrics import DailyMetricsRollup  # noqa: F401
+from .job import Job  # noqa: F401
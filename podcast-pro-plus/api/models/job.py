@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlmodel import SQLModel, Field
+
+# Values of Job.state; the status API returns them as-is
+JOB_QUEUED = "queued"
+JOB_PROCESSING = "processing"
+JOB_PROCESSED = "processed"
+JOB_ERROR = "error"
+JOB_STATES = (JOB_QUEUED, JOB_PROCESSING, JOB_PROCESSED, JOB_ERROR)
+
+
+class Job(SQLModel, table=True):
+    """Durable state of a background job, keyed by its Celery task id.
+
+    The worker updates the row at stage boundaries; the status endpoint reads it
+    by primary key, so results survive the result backend losing its consumer.
+    """
+    id: str = Field(primary_key=True, max_length=64)
+    kind: str = Field(default="assemble", index=True)
+    episode_id: Optional[UUID] = Field(default=None, index=True)
+    user_id: Optional[UUID] = Field(default=None, index=True)
+    state: str = Field(default=JOB_QUEUED, max_length=16)
+    stage: Optional[str] = Field(default=None, max_length=32)
+    percent: int = Field(default=0)
+    stats_json: Optional[str] = Field(default=None, description="JSON of cleanup stats reported by the worker")
+    message: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
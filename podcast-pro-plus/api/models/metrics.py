@@ -0,0 +1,17 @@
+from datetime import date, datetime
+
+from sqlmodel import SQLModel, Field
+
+
+class DailyMetricsRollup(SQLModel, table=True):
+    """Finalized per-day platform counters (UTC days) for the admin dashboard.
+
+    Rows are written by ``maintenance.finalize_metrics_rollups`` once a day has
+    closed; the current day is always computed live.
+    """
+    day: date = Field(primary_key=True)
+    signups: int = Field(default=0)
+    episodes: int = Field(default=0)
+    active_users: int = Field(default=0)
+    minutes: int = Field(default=0, description="Net processing minutes (debits minus credits)")
+    finalized_at: datetime = Field(default_factory=datetime.utcnow)
@@ -169,7 +169,16 @@ class MediaItem(SQLModel, table=True):
     user: Optional[User] = Relationship()
     created_at: datetime = Field(default_factory=datetime.utcnow)
     # When to expire this raw upload (UTC). For main_content, defaults to the first 2am PT boundary after upload + 14 days.
-    expires_at: Optional[datetime] = Field(default=None, description="UTC timestamp when this media item should be purged if unused")
+    expires_at: Optional[datetime] = Field(default=None, index=True, description="UTC timestamp when this media item should be purged if unused")
+    # Probed once at ingest (api/services/media_probe.py) and reused by billing, the worker and the UI.
+    duration_s: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    codec: Optional[str] = None
+    bit_rate: Optional[int] = None
+    content_hash: Optional[str] = Field(default=None, description="sha256 of the stored file")
+    # "<size>:<mtime_ns>" of the probed file; a mismatch triggers a hash check / re-probe
+    probe_fingerprint: Optional[str] = None
 
 class MusicAssetSource(str, Enum):
     builtin = "builtin"  # bundled curated loop
@@ -216,7 +225,7 @@ class Episode(SQLModel, table=True):
     image_crop: Optional[str] = Field(default=None, description="Crop rectangle 'x1,y1,x2,y2' for square extraction when pushing to Spreaker")
     
     status: EpisodeStatus = Field(default=EpisodeStatus.pending)
-    final_audio_path: Optional[str] = Field(default=None)
+    final_audio_path: Optional[str] = Field(default=None, index=True)
     spreaker_episode_id: Optional[str] = Field(default=None)
     is_published_to_spreaker: bool = Field(default=False)
     remote_cover_url: Optional[str] = Field(default=None, description="Spreaker-hosted cover image URL after publish")
@@ -226,7 +235,7 @@ class Episode(SQLModel, table=True):
     needs_republish: bool = Field(default=False, description="Set true when assembly succeeded but publish failed; UI can offer retry without reassembly")
     # Audio pipeline metadata & working filename for in-progress/cleaned content
     meta_json: Optional[str] = Field(default="{}", description="Arbitrary JSON metadata for processing (flubber contexts, cuts, etc.)")
-    working_audio_name: Optional[str] = Field(default=None, description="Current working audio basename (e.g., cleaned content) used as source for final mixing")
+    working_audio_name: Optional[str] = Field(default=None, index=True, description="Current working audio basename (e.g., cleaned content) used as source for final mixing")
 
     processed_at: datetime = Field(default_factory=datetime.utcnow)
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation timestamp (added via migration)")
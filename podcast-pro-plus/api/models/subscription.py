@@ -14,6 +14,12 @@ class Subscription(SQLModel, table=True):
     cancel_at_period_end: bool = Field(default=False)
     billing_cycle: Optional[str] = Field(default=None, description="monthly|annual")
     subscription_started_at: Optional[datetime] = Field(default=None, description="When this subscription (plan+cycle) was first started")
+    # Snapshot of the Stripe object (webhook + periodic reconciliation) for admin reporting
+    amount_cents: Optional[int] = Field(default=None, description="Recurring amount per billing interval (all items)")
+    billing_interval: Optional[str] = Field(default=None, description="Stripe price interval: month|year")
+    mrr_cents: Optional[int] = Field(default=None, description="Monthly-normalized recurring amount")
+    trial_end: Optional[datetime] = Field(default=None)
+    canceled_at: Optional[datetime] = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from typing import List, Optional, Dict, Any
 from sqlmodel import Session, select
-from sqlalchemy import func
+from sqlalchemy import case, func
 from sqlalchemy import inspect as sa_inspect
 
 from ..core.config import settings
@@ -10,19 +10,21 @@ from ..core.database import get_session
 from ..core import crud
 from .auth import get_current_user
 from ..models.podcast import Podcast, PodcastTemplate, TemplateSegment, StaticSegmentSource, SegmentTiming, BackgroundMusicRule, PodcastTemplateCreate
-from ..models.podcast import Episode, MusicAsset, MusicAssetSource
+from ..models.podcast import Episode, EpisodeStatus, MusicAsset, MusicAssetSource
 from pydantic import BaseModel
 from uuid import uuid4, UUID
 import json
 import logging
 from sqlalchemy import text as _sql_text
 from ..models.settings import AppSetting, AdminSettings, load_admin_settings, save_admin_settings
+from ..services import metrics_rollup
+from ..services.billing import subscriptions as billing_subscriptions
 from datetime import datetime, timedelta, timezone
 import os
-try:
-    import stripe as _stripe
-except Exception:  # pragma: no cover
-    _stripe = None
+from ..core.lazy import LazyModule
+
+# Imported on first use; a missing SDK surfaces inside the guarded revenue lookup
+_stripe = LazyModule("stripe")
 
 # Whitelisted tables for admin DB explorer (avoid arbitrary SQL injection surface)
 DB_EXPLORER_TABLES = ["user", "podcast", "episode", "podcasttemplate", "podcast_template"]
@@ -108,41 +110,23 @@ def admin_metrics(
 
     - daily_signups_30d: list[{date, count}] from User.created_at
     - daily_active_users_30d: list[{date, count}] unique Episode.user_id with processed_at on each date
-    - mrr_cents, arr_cents: from Stripe (active subscriptions), None if unavailable
+    - daily_episodes_30d: list[{date, count}] processed/published episodes by processed_at
+    - daily_minutes_30d: list[{date, count}] net processing minutes from the usage ledger
+    - mrr_cents, arr_cents: from the local subscription snapshot, None without active subscriptions
     - revenue_30d_cents: from Stripe charges/refunds net last 30d, None if unavailable
     """
-    # Build date buckets
+    # Daily series: SQL GROUP BY per day; finalized days come from the rollup table
     days = _date_range_30d()
-    # Signups: fetch and bucket in Python (avoids dialect-specific func/date typing issues)
     since_dt = datetime.strptime(days[0], "%Y-%m-%d").replace(tzinfo=timezone.utc)
-    signup_map: Dict[str, int] = {d: 0 for d in days}
-    signup_users = session.exec(select(User).where(User.created_at >= since_dt)).all()
-    for u in signup_users:
-        try:
-            d = u.created_at.date().isoformat()
-            if d in signup_map:
-                signup_map[d] += 1
-        except Exception:
-            continue
-    daily_signups_30d = [{"date": d, "count": signup_map[d]} for d in days]
-
-    # Active users: distinct user_ids per day with processed episodes
-    active_sets: Dict[str, set] = {d: set() for d in days}
-    eps = session.exec(
-        select(Episode).where((Episode.processed_at != None) & (Episode.processed_at >= since_dt))  # noqa: E711
-    ).all()
-    for ep in eps:
-        try:
-            d = ep.processed_at.date().isoformat()
-            if d in active_sets:
-                active_sets[d].add(ep.user_id)
-        except Exception:
-            continue
-    daily_active_users_30d = [{"date": d, "count": len(active_sets[d])} for d in days]
+    series = metrics_rollup.daily_series(session, days=len(days))
+    daily_signups_30d = series["signups"]
+    daily_active_users_30d = series["active_users"]
+
+    # Recurring revenue from the webhook/reconciler-maintained snapshot
+    mrr_cents: Optional[int] = billing_subscriptions.billing_overview(session)["gross_mrr_cents"]
+    arr_cents: Optional[int] = mrr_cents * 12 if mrr_cents is not None else None
 
     # Stripe-derived metrics (optional)
-    mrr_cents: Optional[int] = None
-    arr_cents: Optional[int] = None
     revenue_30d_cents: Optional[int] = None
 
     try:
@@ -150,39 +134,6 @@ def admin_metrics(
             # Ensure api key set
             if not getattr(_stripe, "api_key", None):
                 _stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
-            # Subscriptions -> normalized monthly revenue
-            monthly_total = 0.0
-            try:
-                subs = _stripe.Subscription.list(status="active", limit=100, expand=["data.items.data.price"])  # type: ignore
-                for s in subs.auto_paging_iter():  # type: ignore[attr-defined]
-                    items = getattr(s, "items", {}).get("data", []) if hasattr(s, "items") else []
-                    for it in items:
-                        price = getattr(it, "price", None)
-                        qty = int(getattr(it, "quantity", 1) or 1)
-                        unit = None
-                        interval = None
-                        if price:
-                            unit = getattr(price, "unit_amount", None)
-                            recurring = getattr(price, "recurring", None)
-                            if recurring:
-                                interval = getattr(recurring, "interval", None)
-                        if unit is None or interval is None:
-                            continue
-                        amt = float(unit) * qty
-                        if interval == "month":
-                            monthly_total += amt
-                        elif interval == "year":
-                            monthly_total += amt / 12.0
-                        else:
-                            # Unknown cadence; skip to avoid skew
-                            continue
-                mrr_cents = int(round(monthly_total))
-                arr_cents = int(round(monthly_total * 12.0))
-            except Exception:
-                # Leave as None if subscription fetch fails
-                mrr_cents = None
-                arr_cents = None
-
             # Revenue last 30 days (charges - refunds)
             try:
                 since_ts = int(since_dt.timestamp())
@@ -198,13 +149,13 @@ def admin_metrics(
                 revenue_30d_cents = None
     except Exception:
         # Any Stripe import/config error: keep None values
-        mrr_cents = mrr_cents if mrr_cents is not None else None
-        arr_cents = arr_cents if arr_cents is not None else None
         revenue_30d_cents = revenue_30d_cents if revenue_30d_cents is not None else None
 
     return {
         "daily_signups_30d": daily_signups_30d,
         "daily_active_users_30d": daily_active_users_30d,
+        "daily_episodes_30d": series["episodes"],
+        "daily_minutes_30d": series["minutes"],
         "mrr_cents": mrr_cents,
         "arr_cents": arr_cents,
         "revenue_30d_cents": revenue_30d_cents,
@@ -421,120 +372,42 @@ def update_tier_config(
 
 @router.get("/billing/overview", status_code=200)
 def admin_billing_overview(
-    session: Session = Depends(get_session),  # kept for parity/future use
+    session: Session = Depends(get_session),
     admin_user: User = Depends(get_current_admin_user),
 ) -> Dict[str, Any]:
-    """Return minimal billing overview derived from Stripe.
+    """Return the billing overview from the local subscription snapshot.
 
     Fields:
     - active_subscriptions: count of active subscriptions
     - trialing: count of subscriptions in trial
     - canceled_last_30d: count of subs canceled in the last 30 days
     - trial_expiring_7d: count of trialing subs whose trial ends within 7 days
-    - gross_mrr_cents: sum of monthly-equivalent recurring revenue (active subs)
+    - gross_mrr_cents: sum of monthly-equivalent recurring revenue (active subs), null if none
+    - plan_mix: {plan_key: {active, trialing}}
+    - snapshot_updated_at: most recent webhook/reconciliation write
 
-    Behavior without Stripe (no library or API key): counts are 0 and gross_mrr_cents is null.
+    The snapshot is kept current by the Stripe webhook and the periodic
+    ``maintenance.reconcile_stripe_subscriptions`` task; no Stripe calls are made here.
     Also returns optional dashboard_url if STRIPE_DASHBOARD_URL is set in the environment.
     """
-    # Defaults for the no-Stripe case
-    out: Dict[str, Any] = {
-        "active_subscriptions": 0,
-        "trialing": 0,
-        "canceled_last_30d": 0,
-        "trial_expiring_7d": 0,
-        "gross_mrr_cents": None,
-    }
+    out: Dict[str, Any] = billing_subscriptions.billing_overview(session)
     dash_url = os.getenv("STRIPE_DASHBOARD_URL")
     if dash_url:
         out["dashboard_url"] = dash_url
+    return out
 
-    # Stripe missing or not configured -> return defaults
-    if not _stripe or not (os.getenv("STRIPE_SECRET_KEY") or getattr(_stripe, "api_key", None)):
-        return out
-
-    # Ensure API key set
-    try:
-        if not getattr(_stripe, "api_key", None):
-            _stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
-    except Exception:
-        return out
-
-    # Time windows
-    now = datetime.now(timezone.utc)
-    since_30 = int((now - timedelta(days=30)).timestamp())
-    in_7d = int((now + timedelta(days=7)).timestamp())
-
-    # Counts and MRR
-    try:
-        # Active subscriptions and MRR
-        active_count = 0
-        monthly_total = 0.0
-        try:
-            subs = _stripe.Subscription.list(status="active", limit=100, expand=["data.items.data.price"])  # type: ignore
-            for s in subs.auto_paging_iter():  # type: ignore[attr-defined]
-                active_count += 1
-                items = getattr(s, "items", {}).get("data", []) if hasattr(s, "items") else []
-                for it in items:
-                    price = getattr(it, "price", None)
-                    qty = int(getattr(it, "quantity", 1) or 1)
-                    unit = None
-                    interval = None
-                    if price:
-                        unit = getattr(price, "unit_amount", None)
-                        recurring = getattr(price, "recurring", None)
-                        if recurring:
-                            interval = getattr(recurring, "interval", None)
-                    if unit is None or interval is None:
-                        continue
-                    amt = float(unit) * qty
-                    if interval == "month":
-                        monthly_total += amt
-                    elif interval == "year":
-                        monthly_total += amt / 12.0
-        except Exception:
-            pass
-
-        out["active_subscriptions"] = int(active_count)
-        out["gross_mrr_cents"] = int(round(monthly_total)) if monthly_total > 0 else 0 if active_count > 0 else None
 
-        # Trialing count and trial-expiring-in-7-days
-        trialing = 0
-        trial_expiring = 0
-        try:
-            trials = _stripe.Subscription.list(status="trialing", limit=100)
-            for t in trials.auto_paging_iter():  # type: ignore[attr-defined]
-                trialing += 1
-                try:
-                    te = int(getattr(t, "trial_end", 0) or 0)
-                    # trial_end is a unix timestamp in seconds
-                    if te and te <= in_7d and te >= int(now.timestamp()):
-                        trial_expiring += 1
-                except Exception:
-                    continue
-        except Exception:
-            pass
-        out["trialing"] = int(trialing)
-        out["trial_expiring_7d"] = int(trial_expiring)
+# ---------------- Admin Worker Queues ----------------
 
-        # Canceled in last 30 days (use canceled_at when available)
-        canceled_30d = 0
-        try:
-            canceled = _stripe.Subscription.list(status="canceled", limit=100)
-            for c in canceled.auto_paging_iter():  # type: ignore[attr-defined]
-                try:
-                    ca = int(getattr(c, "canceled_at", 0) or 0)
-                    if ca and ca >= since_30:
-                        canceled_30d += 1
-                except Exception:
-                    continue
-        except Exception:
-            pass
-        out["canceled_last_30d"] = int(canceled_30d)
-    except Exception:
-        # On any Stripe error return the defaults (possibly with partial fields already set)
-        return out
+@router.get("/queues", status_code=200)
+def admin_queue_depths(admin_user: User = Depends(get_current_admin_user)) -> Dict[str, Any]:
+    """Ready-message count per Celery workload queue (cpu, io, maintenance); null if the broker is unreachable."""
+    from worker.tasks.app import WORKLOADS, queue_depths
 
-    return out
+    return {
+        "queues": queue_depths(),
+        "workers": {name: {"pool": wl["pool"], "concurrency": wl["concurrency"]} for name, wl in WORKLOADS.items()},
+    }
 
 
 # ---------------- Admin Podcasts Listing ----------------
@@ -549,7 +422,10 @@ def admin_list_podcasts(
 ):
     """List podcasts for admins with optional owner email filter and pagination.
     Returns { items, total, limit, offset } where each item has:
-      id, name, owner_email, episode_count, created_at, last_episode_at
+      id, name, owner_email, episode_count, published_count, created_at, last_episode_at
+
+    Runs two statements per page (total count, page joined to a grouped episode
+    aggregate) regardless of how many episodes the podcasts have.
     """
     # Total count with optional filter
     like = None
@@ -565,46 +441,50 @@ def admin_list_podcasts(
             count_stmt = count_stmt.where(func.lower(User.email).like((owner_email or '').lower()))
     total = session.exec(count_stmt).one() or 0
 
-    # Page data query
-    data_stmt = select(Podcast, User.email).join(User, Podcast.user_id == User.id)
+    # Page of podcast ids, then one grouped episode aggregate restricted to that page
+    page_stmt = select(Podcast.id).join(User, Podcast.user_id == User.id)
     if like:
-        data_stmt = data_stmt.where(User.email.ilike(like))
-    # Order by created_at desc if available, else id desc
+        page_stmt = page_stmt.where(User.email.ilike(like))
+    # Order by created_at desc if available, else id desc; id breaks ties so pages neither repeat nor skip rows
     try:
-        data_stmt = data_stmt.order_by(Podcast.created_at.desc())
+        order = (Podcast.created_at.desc(), Podcast.id.desc())
     except Exception:
-        data_stmt = data_stmt.order_by(Podcast.id.desc())
-    data_stmt = data_stmt.offset(offset).limit(limit)
+        order = (Podcast.id.desc(),)
+    page = page_stmt.order_by(*order).offset(offset).limit(limit).subquery()
+    last_ts = func.coalesce(Episode.processed_at, Episode.created_at)
+    stats = (
+        select(
+            Episode.podcast_id.label("podcast_id"),
+            func.count(Episode.id).label("episode_count"),
+            func.max(last_ts).label("last_episode_at"),
+            func.sum(case((Episode.status == EpisodeStatus.published, 1), else_=0)).label("published_count"),
+        )
+        .join(page, Episode.podcast_id == page.c.id)
+        .group_by(Episode.podcast_id)
+        .subquery()
+    )
+    data_stmt = (
+        select(Podcast, User.email, stats.c.episode_count, stats.c.last_episode_at, stats.c.published_count)
+        .join(page, Podcast.id == page.c.id)
+        .join(User, Podcast.user_id == User.id)
+        .outerjoin(stats, stats.c.podcast_id == Podcast.id)
+        .order_by(*order)
+    )
     rows = session.exec(data_stmt).all()
 
     # Normalize rows
     page_podcasts = []  # list[Podcast]
     owner_map: Dict[str, str] = {}
-    for row in rows:
-        try:
-            pod, email = row  # select(Podcast, User.email)
-        except Exception:
-            # Fallback if row is RowMapping
-            pod = row[0]
-            email = row[1]
+    count_map: Dict[str, int] = {}
+    last_map: Dict[str, Optional[datetime]] = {}
+    published_map: Dict[str, int] = {}
+    for pod, email, n, last, published in rows:
+        pid = str(pod.id)
         page_podcasts.append(pod)
-        owner_map[str(pod.id)] = email
-
-    # Episode aggregates for page podcasts only
-    ids = [p.id for p in page_podcasts]
-    count_map: Dict[str, int] = {str(pid): 0 for pid in ids}
-    last_map: Dict[str, Optional[datetime]] = {str(pid): None for pid in ids}
-    if ids:
-        eps = session.exec(select(Episode).where(Episode.podcast_id.in_(ids))).all()
-        for ep in eps:
-            pid = str(ep.podcast_id)
-            if pid not in count_map:
-                continue
-            count_map[pid] += 1
-            ts = getattr(ep, 'processed_at', None) or getattr(ep, 'created_at', None)
-            cur = last_map.get(pid)
-            if ts and (cur is None or ts > cur):
-                last_map[pid] = ts
+        owner_map[pid] = email
+        count_map[pid] = int(n or 0)
+        last_map[pid] = last
+        published_map[pid] = int(published or 0)
 
     items = []
     for p in page_podcasts:
@@ -626,6 +506,7 @@ def admin_list_podcasts(
             "name": getattr(p, 'name', None),
             "owner_email": owner_map.get(pid),
             "episode_count": int(count_map.get(pid, 0)),
+            "published_count": int(published_map.get(pid, 0)),
             "created_at": created_iso,
             "last_episode_at": last_iso,
         })
@@ -649,30 +530,33 @@ class UserAdminUpdate(BaseModel):
     is_active: Optional[bool] = None
     subscription_expires_at: Optional[str] = None  # ISO8601 string
 
+def _user_episode_stats(session: Session, user_ids: Optional[List[UUID]] = None) -> Dict[UUID, tuple]:
+    """{user_id: (episode_count, max processed_at)} from a single grouped query."""
+    stmt = select(Episode.user_id, func.count(Episode.id), func.max(Episode.processed_at)).group_by(Episode.user_id)
+    if user_ids is not None:
+        stmt = stmt.where(Episode.user_id.in_(user_ids))
+    return {uid: (int(n or 0), latest) for uid, n, latest in session.exec(stmt).all()}
+
+
 @router.get("/users/full", response_model=List[UserAdminOut])
 def admin_users_full(
     session: Session = Depends(get_session),
     admin_user: User = Depends(get_current_admin_user)
 ):
-    # Preload episode counts grouped by user
-    counts = dict(
-        session.exec(select(Episode.user_id, func.count(Episode.id)).group_by(Episode.user_id)).all()
-    )
-    # Latest activity per user (max processed_at)
-    latest = dict(
-        session.exec(select(Episode.user_id, func.max(Episode.processed_at)).group_by(Episode.user_id)).all()
-    )
+    # Episode count and latest activity (max processed_at) for every user in one grouped query
+    stats = _user_episode_stats(session)
     users = crud.get_all_users(session)
     out: List[UserAdminOut] = []
     for u in users:
-        last_activity = latest.get(u.id) or u.created_at
+        count, latest = stats.get(u.id, (0, None))
+        last_activity = latest or u.created_at
         out.append(UserAdminOut(
             id=str(u.id),
             email=u.email,
             tier=u.tier,
             is_active=u.is_active,
             created_at=u.created_at.isoformat(),
-            episode_count=int(counts.get(u.id, 0)),
+            episode_count=int(count),
             last_activity=last_activity.isoformat() if last_activity else None,
             subscription_expires_at=u.subscription_expires_at.isoformat() if getattr(u,'subscription_expires_at', None) else None,
             last_login=u.last_login.isoformat() if getattr(u,'last_login', None) else None,
@@ -730,8 +614,8 @@ def admin_update_user(
         session.commit()
         session.refresh(user)
     # compute counts/activity
-    episode_count = session.exec(select(func.count(Episode.id)).where(Episode.user_id==user.id)).scalar_one_or_none() or 0
-    last_activity = session.exec(select(func.max(Episode.processed_at)).where(Episode.user_id==user.id)).scalar_one_or_none() or user.created_at
+    episode_count, latest = _user_episode_stats(session, [user.id]).get(user.id, (0, None))
+    last_activity = latest or user.created_at
     return UserAdminOut(
         id=str(user.id),
         email=user.email,
@@ -1,22 +1,24 @@
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from jose import JWTError, jwt
-from authlib.integrations.starlette_client import OAuth
 from sqlmodel import Session
 
 from ..core.config import settings
 import logging
-import httpx
 from ..core.security import verify_password
 from ..models.user import User, UserCreate, UserPublic
 from ..core.database import get_session
 from ..core import crud
 from ..models.settings import load_admin_settings
 
+if TYPE_CHECKING:  # authlib's Starlette client is only needed by the Google login routes
+    from authlib.integrations.starlette_client import OAuth
+
 # --- Router Setup ---
 logger = logging.getLogger(__name__)
 
@@ -29,8 +31,10 @@ router = APIRouter(
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
 # --- OAuth Client Setup ---
-def _build_oauth_client() -> tuple[OAuth, str]:
+def _build_oauth_client() -> tuple["OAuth", str]:
     """Construct a new OAuth client registered for Google."""
+    from authlib.integrations.starlette_client import OAuth
+
     o = OAuth()
     o.register(
         name='google',
@@ -65,7 +69,7 @@ def _to_user_public(user: User) -> UserPublic:
     return UserPublic(**data)
 
 # --- Dependency for getting current user ---
-async def get_current_user(
+def get_current_user(
     request: Request, session: Session = Depends(get_session), token: str = Depends(oauth2_scheme)
 ) -> User:
     """Decodes the JWT token to get the current user."""
@@ -4,7 +4,7 @@ from sqlmodel import Session
 from ..core.database import get_session
 from ..models.user import User
 from .auth import get_current_user
-import os, stripe
+import os
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
 from ..core.constants import TIER_LIMITS
@@ -13,8 +13,15 @@ from uuid import UUID
 from sqlmodel import select
 from ..services.billing import usage as usage_svc
 from ..core.config import settings
+from ..core.lazy import LazyModule
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+
+def _configure_stripe(module) -> None:
+    module.api_key = settings.STRIPE_SECRET_KEY
+
+
+# The Stripe SDK (and requests/httpx with it) loads with the first billing call, not at app boot
+stripe = LazyModule("stripe", _configure_stripe)
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
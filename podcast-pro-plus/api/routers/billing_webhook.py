@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Request, HTTPException
-import os, stripe, json, datetime, logging
+import os, json, datetime, logging
 from ..core.database import get_session
 from ..core import crud
 from ..core.constants import ALLOWED_PLANS
@@ -7,8 +7,17 @@ from sqlmodel import Session
 from ..models.user import User
 from ..models.notification import Notification
 from ..core.config import settings
+from ..services.billing import subscriptions as subscriptions_svc
+from ..services import events
+from ..core.lazy import LazyModule
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+
+def _configure_stripe(module) -> None:
+    module.api_key = settings.STRIPE_SECRET_KEY
+
+
+# Loaded with the first webhook, not at app boot (see api.routers.billing)
+stripe = LazyModule("stripe", _configure_stripe)
 WEBHOOK_SECRET = settings.STRIPE_WEBHOOK_SECRET
 
 logger = logging.getLogger(__name__)
@@ -58,7 +67,7 @@ async def stripe_webhook(request: Request):
             plan_key = raw_plan_key if raw_plan_key in ALLOWED_PLANS else 'unknown'
             if plan_key == 'unknown' and raw_plan_key not in (None, ''):
                 logger.warning("Rejected unknown plan_key '%s' (sub %s)", raw_plan_key, sub_id)
-            current_period_end = datetime.datetime.fromtimestamp(data.get('current_period_end')) if data.get('current_period_end') else None
+            current_period_end = subscriptions_svc.utc_from_timestamp(data.get('current_period_end'))
             cancel_at_period_end = bool(data.get('cancel_at_period_end'))
             from uuid import UUID
             try:
@@ -66,6 +75,7 @@ async def stripe_webhook(request: Request):
             except Exception:
                 logger.error("Webhook subscription event with invalid user_id '%s'", user_id)
                 return {"received": True}
+            snapshot = subscriptions_svc.snapshot_fields(data)
             crud.upsert_subscription(
                 session,
                 user_id=user_uuid,
@@ -76,6 +86,8 @@ async def stripe_webhook(request: Request):
                 current_period_end=current_period_end,
                 cancel_at_period_end=cancel_at_period_end,
                 billing_cycle=metadata.get('cycle'),
+                updated_at=datetime.datetime.utcnow(),
+                **{k: snapshot[k] for k in subscriptions_svc.SNAPSHOT_COLUMNS},
             )
             user = session.get(User, user_uuid)
             if user:
@@ -133,6 +145,7 @@ async def stripe_webhook(request: Request):
                     if new_exp:
                         user.subscription_expires_at = new_exp
                     # Create notification for upgrade/activation
+                    note = None
                     try:
                         title = f"Subscription updated to {plan_key.capitalize()} ({cycle or 'monthly'})"
                         body = None
@@ -148,6 +161,8 @@ async def stripe_webhook(request: Request):
                         pass
                     session.add(user)
                     session.commit()
+                    if note is not None:
+                        events.publish_notification(note)
                 # Downgrade / cancellation
                 if status in ('canceled','incomplete_expired') and plan_key in ALLOWED_PLANS and plan_key == user.tier:
                     if status == 'incomplete_expired' or (status == 'canceled' and not data.get('cancel_at_period_end')):
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlmodel import Session
+
+from ..core import database
+from ..core.config import settings
+from ..models.user import User
+from ..services import events
+from .auth import get_current_user
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+_optional_bearer = OAuth2PasswordBearer(tokenUrl="/api/auth/token", auto_error=False)
+
+# EventSource cannot send an Authorization header. Browsers get a ticket instead of putting their
+# access token in the URL: it expires quickly and only opens this user's stream (no "sub" claim,
+# so get_current_user rejects it everywhere else).
+TICKET_TTL = timedelta(seconds=60)
+_TICKET_CLAIM = "events"
+
+
+def _issue_ticket(user_id: str) -> str:
+    claims = {_TICKET_CLAIM: user_id, "exp": datetime.utcnow() + TICKET_TTL}
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def _ticket_user_id(ticket: str) -> Optional[str]:
+    try:
+        payload = jwt.decode(ticket, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get(_TICKET_CLAIM)
+    return user_id if isinstance(user_id, str) and user_id else None
+
+
+def _stream_user_id(
+    request: Request,
+    bearer: Optional[str] = Depends(_optional_bearer),
+    ticket: Optional[str] = Query(None, description="Ticket from POST /api/events/ticket"),
+) -> str:
+    """Authenticate with a short-lived session; a stream must not hold a DB connection open."""
+    if bearer:
+        with Session(database.engine) as session:
+            return str(get_current_user(request, session, bearer).id)
+    user_id = _ticket_user_id(ticket) if ticket else None
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return user_id
+
+
+@router.post("/ticket")
+def create_stream_ticket(current_user: User = Depends(get_current_user)) -> dict:
+    """A ticket for ``GET /stream?ticket=...``, valid for ``TICKET_TTL``; fetch a new one per (re)connect."""
+    return {"ticket": _issue_ticket(str(current_user.id)), "expires_in": int(TICKET_TTL.total_seconds())}
+
+
+@router.get("/stream")
+async def stream_events(
+    user_id: str = Depends(_stream_user_id),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    since: Optional[int] = Query(None, description="Resume cursor for clients that cannot set Last-Event-ID"),
+):
+    """Server-sent events for the current user: ``job`` stage transitions and new ``notification`` rows.
+
+    Sends ``: ping`` comments as heartbeats and closes after ``EVENTS_MAX_STREAM_S``;
+    EventSource reconnects with ``Last-Event-ID`` and missed events are replayed.
+    """
+    resume = since
+    if last_event_id:
+        try:
+            resume = int(last_event_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID") from exc
+    return StreamingResponse(
+        events.event_stream(user_id, last_event_id=resume),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
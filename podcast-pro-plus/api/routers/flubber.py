@@ -9,7 +9,6 @@ from api.models.podcast import Episode
 from sqlmodel import select
 from api.core.auth import get_current_user
 from api.models.user import User
-from pydub import AudioSegment
 import shutil
 
 from api.services import flubber_helper
@@ -167,6 +166,9 @@ def apply_flubber_cuts(
             base_path = alt
     if not base_path.is_file():
         raise HTTPException(status_code=404, detail="Working audio file missing")
+    # pydub pulls in the audio stack; load it with the first cut, not at app boot
+    from pydub import AudioSegment
+
     audio = AudioSegment.from_file(base_path)
     # Helper to load words for this audio (prefer precomputed transcript if available)
     def _load_words_for_audio(name: str) -> List[Dict[str, Any]]:
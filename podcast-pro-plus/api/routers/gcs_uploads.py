@@ -6,10 +6,7 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-try:
-    from google.cloud import storage  # type: ignore
-except Exception:  # pragma: no cover - optional at import, runtime will error if used without package
-    storage = None  # type: ignore
+from infrastructure.google_clients import get_storage_client
 
 router = APIRouter(prefix="/gcs", tags=["gcs"])
 
@@ -50,7 +47,9 @@ def _validate_filename(name: str) -> str:
 
 @router.post("/signed-resumable", response_model=SignedResumableResponse)
 def create_signed_resumable(req: SignedResumableRequest):
-    if storage is None:
+    try:
+        client = get_storage_client()  # shared; uses ADC (e.g., Cloud Run service account)
+    except ImportError:
         raise HTTPException(status_code=500, detail="google-cloud-storage not installed")
 
     bucket_name = os.getenv("GCS_UPLOAD_BUCKET")
@@ -71,7 +70,6 @@ def create_signed_resumable(req: SignedResumableRequest):
     else:
         key = filename
 
-    client = storage.Client()  # uses ADC (e.g., Cloud Run service account)
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(key)
 
@@ -1,5 +1,3 @@
-import httpx
-import feedparser
 from fastapi import APIRouter, Depends, HTTPException, Body
 from pydantic import BaseModel
 from sqlmodel import Session, select
@@ -23,11 +21,15 @@ class RssPayload(BaseModel):
     rss_url: str
 
 @router.post("/rss", status_code=201)
-async def import_from_rss(
+def import_from_rss(
     payload: RssPayload,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
+    # The HTTP client and feed parser load with the first import, not at app boot
+    import feedparser
+    import httpx
+
     logger = logging.getLogger("api.importer")
     logger.info(f"Starting RSS import for user {current_user.id} with URL: {payload.rss_url}")
     try:
@@ -36,9 +38,11 @@ async def import_from_rss(
             logger.warning(f"Podcast with RSS URL {payload.rss_url} already exists for user {current_user.id}")
             raise HTTPException(status_code=409, detail=f"Podcast '{existing_podcast.name}' has already been imported.")
 
-        async with httpx.AsyncClient() as client:
+        # Sync handler: FastAPI runs it in the threadpool, so the blocking fetch,
+        # feed parse and DB writes below stay off the event loop.
+        with httpx.Client() as client:
             try:
-                response = await client.get(payload.rss_url, timeout=30.0, follow_redirects=True)
+                response = client.get(payload.rss_url, timeout=30.0, follow_redirects=True)
                 response.raise_for_status()
                 logger.info(f"Successfully fetched RSS feed from {payload.rss_url}")
             except httpx.RequestError as e:
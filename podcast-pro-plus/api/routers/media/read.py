@@ -13,7 +13,7 @@ router = APIRouter(prefix="/media", tags=["Media Library"])
 
 
 @router.get("/", response_model=List[MediaItem])
-async def list_user_media(
+def list_user_media(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
@@ -2,7 +2,7 @@
 
 import json
 from uuid import uuid4, UUID
-from typing import List, Optional
+from typing import List
 from pathlib import Path
 from datetime import datetime
 import logging
@@ -13,11 +13,9 @@ from fastapi import (
     HTTPException,
     status,
     Depends,
-    UploadFile,
-    File,
-    Form,
     Request,
 )
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 
 from api.core.paths import MEDIA_DIR
@@ -26,10 +24,18 @@ from api.models.user import User
 from api.core.database import get_session
 from api.routers.auth import get_current_user
 from infrastructure.tasks_client import enqueue_http_task
-from infrastructure.gcs import upload_bytes
+from api.services.media_ingest import (
+    GcsSink,
+    LocalSink,
+    MultipartError,
+    UploadTooLarge,
+    ingest_multipart,
+)
+from api.services.media_probe import record_probe
+from api.services.media_index import invalidate_media_index
 
 from .schemas import MediaItemUpdate
-from .common import sanitize_name, copy_with_limit
+from .common import sanitize_name
 
 # Optional rate limiter (SlowAPI); only decorate if available and app wired it
 try:
@@ -66,107 +72,154 @@ def parse_friendly_names(raw: str | None) -> list[str]:
         return [p.strip() for p in s.split(",") if p.strip()]
 
 
-@router.post("/upload/{category}", response_model=List[MediaItem], status_code=status.HTTP_201_CREATED)
+MB = 1024 * 1024
+CATEGORY_SIZE_LIMITS = {
+    MediaCategory.main_content: 500 * MB,
+    MediaCategory.intro: 50 * MB,
+    MediaCategory.outro: 50 * MB,
+    MediaCategory.music: 50 * MB,
+    MediaCategory.commercial: 50 * MB,
+    MediaCategory.sfx: 25 * MB,
+    MediaCategory.podcast_cover: 10 * MB,
+    MediaCategory.episode_cover: 10 * MB,
+}
+
+AUDIO_PREFIX = "audio/"
+IMAGE_PREFIX = "image/"
+CATEGORY_TYPE_PREFIX = {
+    MediaCategory.main_content: AUDIO_PREFIX,
+    MediaCategory.intro: AUDIO_PREFIX,
+    MediaCategory.outro: AUDIO_PREFIX,
+    MediaCategory.music: AUDIO_PREFIX,
+    MediaCategory.commercial: AUDIO_PREFIX,
+    MediaCategory.sfx: AUDIO_PREFIX,
+    MediaCategory.podcast_cover: IMAGE_PREFIX,
+    MediaCategory.episode_cover: IMAGE_PREFIX,
+}
+
+AUDIO_EXTS = {".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg", ".webm", ".mp4"}
+IMAGE_EXTS = {".png", ".jpg", ".jpeg"}
+
+
+def _validate_meta(filename: str, content_type: str, cat: MediaCategory) -> None:
+    ct = (content_type or "").lower()
+    type_prefix = CATEGORY_TYPE_PREFIX.get(cat)
+    if type_prefix and not ct.startswith(type_prefix):
+        expected = "audio" if type_prefix == AUDIO_PREFIX else "image"
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type '{ct or 'unknown'}'. Expected {expected} file for category '{cat.value}'.",
+        )
+    ext = Path(filename or "").suffix.lower()
+    if not ext:
+        raise HTTPException(status_code=400, detail="File must have an extension.")
+    allowed = AUDIO_EXTS if type_prefix == AUDIO_PREFIX else IMAGE_EXTS
+    if ext not in allowed:
+        raise HTTPException(status_code=400, detail=f"Unsupported file extension '{ext}'.")
+
+
+def _storage_backend() -> str:
+    """'gcs' (default) or 'local' (MEDIA_DIR on disk, for dev/self-hosted)."""
+    return (os.getenv("MEDIA_STORAGE_BACKEND") or "gcs").strip().lower()
+
+
+# The handler parses the multipart body itself (see upload_media_files), so the
+# form schema is declared here for the OpenAPI docs.
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {
+                        "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                        "friendly_names": {"type": "string"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post(
+    "/upload/{category}",
+    response_model=List[MediaItem],
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_UPLOAD_OPENAPI,
+)
 @(_limiter.limit("30/hour") if _limiter and hasattr(_limiter, "limit") else (lambda f: f))
 async def upload_media_files(
     request: Request,                              # <-- required so SlowAPI can see "request"
     category: MediaCategory,
-    files: List[UploadFile] = File(...),
-    friendly_names: Optional[str] = Form(None),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> List[MediaItem]:
     """
-    Upload one or more media files with optional friendly names.
+    Upload one or more media files (form field ``files``) with optional ``friendly_names``.
     - Enforces type/extension by category
-    - Per-category size caps
+    - Per-category size caps, enforced while the body streams in
     - For main_content, assigns expires_at and fires async transcription task
-    """
-    created_items: List[MediaItem] = []
-    names = parse_friendly_names(friendly_names)
-
-    MB = 1024 * 1024
-    CATEGORY_SIZE_LIMITS = {
-        MediaCategory.main_content: 500 * MB,
-        MediaCategory.intro: 50 * MB,
-        MediaCategory.outro: 50 * MB,
-        MediaCategory.music: 50 * MB,
-        MediaCategory.commercial: 50 * MB,
-        MediaCategory.sfx: 25 * MB,
-        MediaCategory.podcast_cover: 10 * MB,
-        MediaCategory.episode_cover: 10 * MB,
-    }
+    - Stores the content hash and (local backend) probed duration/format on the item
 
-    AUDIO_PREFIX = "audio/"
-    IMAGE_PREFIX = "image/"
-    CATEGORY_TYPE_PREFIX = {
-        MediaCategory.main_content: AUDIO_PREFIX,
-        MediaCategory.intro: AUDIO_PREFIX,
-        MediaCategory.outro: AUDIO_PREFIX,
-        MediaCategory.music: AUDIO_PREFIX,
-        MediaCategory.commercial: AUDIO_PREFIX,
-        MediaCategory.sfx: AUDIO_PREFIX,
-        MediaCategory.podcast_cover: IMAGE_PREFIX,
-        MediaCategory.episode_cover: IMAGE_PREFIX,
-    }
+    The multipart body is parsed incrementally and each file streams straight into a
+    GCS resumable upload (or a local file when MEDIA_STORAGE_BACKEND=local) while the
+    client is still sending, with size and sha256 computed on the fly. Blocking calls
+    (Cloud Tasks enqueue, DB commit) run in the threadpool to keep the event loop free.
+    """
+    backend = _storage_backend()
+    bucket = _require_bucket() if backend != "local" else None
+
+    def _open_sink(field: str, filename: str, content_type: str):
+        if field != "files":
+            return None
+        _validate_meta(filename, content_type, category)
+        safe_orig = sanitize_name(filename)
+        if bucket:
+            # GCS object key: user_id/category/uuid4_safe_filename
+            gcs_key = f"{current_user.id}/{category.value}/{uuid4().hex}_{safe_orig}"
+            sink = GcsSink(bucket, gcs_key, content_type or "application/octet-stream")
+        else:
+            sink = LocalSink(MEDIA_DIR, f"{current_user.id.hex}_{uuid4().hex}_{safe_orig}")
+        return sink, CATEGORY_SIZE_LIMITS.get(category, 50 * MB)
 
-    AUDIO_EXTS = {".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg", ".webm", ".mp4"}
-    IMAGE_EXTS = {".png", ".jpg", ".jpeg"}
-
-    def _validate_meta(f: UploadFile, cat: MediaCategory) -> None:
-        ct = (getattr(f, "content_type", None) or "").lower()
-        type_prefix = CATEGORY_TYPE_PREFIX.get(cat)
-        if type_prefix and not ct.startswith(type_prefix):
-            expected = "audio" if type_prefix == AUDIO_PREFIX else "image"
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type '{ct or 'unknown'}'. Expected {expected} file for category '{cat.value}'.",
-            )
-        ext = Path(f.filename or "").suffix.lower()
-        if not ext:
-            raise HTTPException(status_code=400, detail="File must have an extension.")
-        allowed = AUDIO_EXTS if type_prefix == AUDIO_PREFIX else IMAGE_EXTS
-        if ext not in allowed:
-            raise HTTPException(status_code=400, detail=f"Unsupported file extension '{ext}'.")
-
-    for i, file in enumerate(files):
-        if not file.filename:
-            continue
-
-        _validate_meta(file, category)
-
-        original_filename = Path(file.filename).stem
-        default_friendly_name = " ".join(original_filename.split("_")).title()
+    try:
+        uploads, fields = await ingest_multipart(
+            request.stream(), request.headers.get("content-type", ""), _open_sink
+        )
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail="File too large.") from exc
+    except MultipartError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-        safe_orig = sanitize_name(file.filename)
-        # GCS object key: user_id/category/uuid4_safe_filename
-        gcs_key = f"{current_user.id}/{category.value}/{uuid4().hex}_{safe_orig}"
-
-        max_bytes = CATEGORY_SIZE_LIMITS.get(category, 50 * MB)
-        bytes_written = 0
-        data = bytearray()
-        while True:
-            chunk = await file.read(1024 * 1024)
-            if not chunk:
-                break
-            bytes_written += len(chunk)
-            if bytes_written > max_bytes:
-                raise HTTPException(status_code=413, detail="File too large.")
-            data.extend(chunk)
-        bucket = _require_bucket()
-        # Write to GCS
-        gcs_uri = upload_bytes(bucket, gcs_key, bytes(data), file.content_type or "application/octet-stream")
+    if not uploads:
+        raise HTTPException(status_code=422, detail="No files uploaded (expected form field 'files').")
 
+    names = parse_friendly_names(fields.get("friendly_names"))
+    created_items: List[MediaItem] = []
+    for i, up in enumerate(uploads):
+        original_filename = Path(up.filename).stem
+        default_friendly_name = " ".join(original_filename.split("_")).title()
         friendly_name = names[i] if i < len(names) and str(names[i]).strip() else default_friendly_name
 
         media_item = MediaItem(
-            filename=gcs_uri,  # Store gs:// URI
+            filename=up.stored_as,  # gs:// URI (or bare filename under MEDIA_DIR for local)
             friendly_name=str(friendly_name),
-            content_type=(file.content_type or None),
-            filesize=bytes_written,
+            content_type=(up.content_type or None),
+            filesize=up.size,
+            content_hash=up.sha256,
             user_id=current_user.id,
             category=category,
         )
+        # Probe duration/format once here so billing and the worker never have to.
+        # GCS uploads are probed by the transcribe task once it has the file locally.
+        if backend == "local" and CATEGORY_TYPE_PREFIX.get(category) == AUDIO_PREFIX:
+            try:
+                await run_in_threadpool(record_probe, media_item, MEDIA_DIR / up.stored_as, content_hash=up.sha256)
+            except Exception:
+                logging.warning("event=upload.probe ok=false filename=%s", up.stored_as, exc_info=True)
 
         # Assign expires_at for raw uploads (main_content): 2am PT +14 days rule
         try:
@@ -184,22 +237,35 @@ async def upload_media_files(
         # Kick transcription (best-effort)
         try:
             if category == MediaCategory.main_content:
-                task = enqueue_http_task("/api/tasks/transcribe", {"filename": gcs_uri})
-                logging.info("event=upload.enqueue ok=true filename=%s task_name=%s", gcs_uri, task.get("name"))
+                task = await run_in_threadpool(enqueue_http_task, "/api/tasks/transcribe", {"filename": up.stored_as})
+                logging.info("event=upload.enqueue ok=true filename=%s task_name=%s", up.stored_as, task.get("name"))
         except Exception:
             # background task is best-effort; never fail the upload
             pass
-
         # Structured log: upload.receive
         logging.info(
-            "event=upload.receive user_id=%s category=%s filename=%s size=%d content_type=%s",
-            current_user.id, category.value, file.filename, bytes_written, file.content_type or ""
+            "event=upload.receive user_id=%s category=%s filename=%s size=%d sha256=%s content_type=%s",
+            current_user.id, category.value, up.filename, up.size, up.sha256, up.content_type or ""
         )
 
-    session.commit()
-    for item in created_items:
-        session.refresh(item)
-
+    def _commit_and_refresh() -> None:
+        session.commit()
+        for item in created_items:
+            session.refresh(item)
+
+    await run_in_threadpool(_commit_and_refresh)
+    if backend == "local":
+        invalidate_media_index(MEDIA_DIR)
+        # Pre-analyse on the maintenance queue so assembly finds the upload decoded and measured.
+        # Only after the commit: the task looks up the MediaItem for its owner's settings.
+        if category == MediaCategory.main_content:
+            from api.services import preanalysis
+
+            for item in created_items:
+                try:
+                    await run_in_threadpool(preanalysis.enqueue, item.filename)
+                except Exception:
+                    logging.warning("event=upload.preanalysis ok=false filename=%s", item.filename, exc_info=True)
     return created_items
 
 
@@ -247,6 +313,7 @@ def delete_media_item(
         except Exception:
             # don't block DB delete if FS cleanup fails
             pass
+        invalidate_media_index(MEDIA_DIR)
 
     session.delete(media_item)
     session.commit()
@@ -9,7 +9,7 @@ from typing import List
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 @router.get("/", response_model=List[NotificationPublic])
-async def list_notifications(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def list_notifications(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
     """Return recent notifications. Opportunistically purge read>1h old to keep table small."""
     from datetime import datetime, timedelta
     cutoff = datetime.utcnow() - timedelta(hours=1)
@@ -31,7 +31,7 @@ async def list_notifications(current_user: User = Depends(get_current_user), ses
     rows = session.exec(q).all()
     return [NotificationPublic(**r.dict()) for r in rows]
 @router.delete("/purge")
-async def purge_old_read(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def purge_old_read(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
     """Explicit purge endpoint (optional) to delete read notifications older than 1 hour."""
     from datetime import datetime, timedelta
     cutoff = datetime.utcnow() - timedelta(hours=1)
@@ -46,7 +46,7 @@ async def purge_old_read(current_user: User = Depends(get_current_user), session
     return {"deleted": count}
 
 @router.post("/{notification_id}/read")
-async def mark_read(notification_id: str, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def mark_read(notification_id: str, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
     from uuid import UUID
     try:
         nid = UUID(str(notification_id))
@@ -63,7 +63,7 @@ async def mark_read(notification_id: str, current_user: User = Depends(get_curre
     return {"ok": True, "id": str(note.id), "already_read": note.read_at is not None}
 
 @router.post("/read-all")
-async def mark_all_read(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+def mark_all_read(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
     from datetime import datetime
     q = select(Notification).where(Notification.user_id == current_user.id, Notification.read_at == None)  # noqa: E711
     rows = session.exec(q).all()
@@ -2,7 +2,7 @@ from __future__ import annotations
 import os, json, uuid, logging, pathlib
 from fastapi import APIRouter, Header, HTTPException
 from pydantic import BaseModel
-from api.services.transcription import get_word_timestamps
+from infrastructure.google_clients import get_storage_client
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
@@ -13,18 +13,34 @@ def _download_if_gcs(src: str) -> tuple[str, dict]:
     meta: dict = {}
     if not src.startswith("gs://"):
         return src, meta
-    from google.cloud import storage  # lazy import
     _, _, rest = src.partition("gs://")
     bucket, _, key = rest.partition("/")
     suffix = pathlib.Path(key).suffix or ".wav"
     local = f"/tmp/media/tasks/{uuid.uuid4().hex}{suffix}"
     os.makedirs(os.path.dirname(local), exist_ok=True)
-    storage.Client().bucket(bucket).blob(key).download_to_filename(local)
+    get_storage_client().bucket(bucket).blob(key).download_to_filename(local)
     return local, {"bucket": bucket, "key": key}
 
+def _probe_source(filename: str, local_path: str) -> None:
+    """Store duration/format on the MediaItem for this upload (first time the file is local)."""
+    from sqlmodel import select
+    from api.core.database import get_session
+    from api.models.podcast import MediaItem
+    from api.services.media_probe import ensure_probe
+
+    session = next(get_session())
+    try:
+        item = session.exec(select(MediaItem).where(MediaItem.filename == filename)).first()
+        if item is not None:
+            ensure_probe(session, item, pathlib.Path(local_path))
+    except Exception:
+        session.rollback()
+        logging.warning("event=tasks.transcribe.probe ok=false filename=%s", filename, exc_info=True)
+    finally:
+        session.close()
+
 def _upload_json_gcs(obj: dict, bucket: str, key: str) -> str:
-    from google.cloud import storage
-    storage.Client().bucket(bucket).blob(key) \
+    get_storage_client().bucket(bucket).blob(key) \
         .upload_from_string(json.dumps(obj, ensure_ascii=False), content_type="application/json")
     return f"gs://{bucket}/{key}"
 
@@ -38,6 +54,10 @@ def transcribe(payload: TranscribeIn,
     logging.info("event=tasks.transcribe.start filename=%s request_id=%s", payload.filename, request_id)
 
     local_path, meta = _download_if_gcs(payload.filename)
+    _probe_source(payload.filename, local_path)
+    # The transcription clients (requests, AssemblyAI) load with the first task, not at app boot
+    from api.services.transcription import get_word_timestamps
+
     words = get_word_timestamps(local_path)  # uses AssemblyAI (if key) else Google STT
 
     result = {
@@ -63,10 +83,6 @@ def transcribe(payload: TranscribeIn,
 # --- added: GET /api/tasks/result?path=gs://bucket/key.json ---
 import json as _json
 from fastapi import HTTPException as _HTTPException
-try:
-    from google.cloud import storage as _gcs
-except Exception as _e:
-    _gcs = None
 
 @router.get("/result")
 def read_result(path: str):
@@ -76,15 +92,15 @@ def read_result(path: str):
     """
     if not path.startswith("gs://"):
         raise _HTTPException(400, "path must start with gs://")
-    if _gcs is None:
-        raise _HTTPException(500, "google-cloud-storage not available in this build")
-
     rest = path[5:]
     if "/" not in rest:
         raise _HTTPException(400, "malformed gs:// path")
     bucket, key = rest.split("/", 1)
 
-    client = _gcs.Client()
+    try:
+        client = get_storage_client()
+    except ImportError:
+        raise _HTTPException(500, "google-cloud-storage not available in this build")
     blob = client.bucket(bucket).blob(key)
     try:
         text = blob.download_as_text()
@@ -3,6 +3,7 @@ from typing import List
 from uuid import UUID
 from sqlmodel import Session, select
 import json
+import logging
 
 from ..models.podcast import PodcastTemplate, PodcastTemplateCreate, PodcastTemplatePublic
 from ..models.user import User
@@ -31,8 +32,16 @@ def convert_db_template_to_public(db_template: PodcastTemplate) -> PodcastTempla
     is_active=getattr(db_template, 'is_active', True)
     )
 
+def _queue_stem_render(template_id: UUID) -> None:
+    """Pre-render the template's static segments and music beds for its next assembly (best-effort)."""
+    try:
+        from ..services.audio import template_stems
+        template_stems.enqueue(template_id)
+    except Exception:
+        logging.warning("event=template.stems ok=false template_id=%s", template_id, exc_info=True)
+
 @router.get("/", response_model=List[PodcastTemplatePublic])
-async def list_user_templates(
+def list_user_templates(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -42,7 +51,7 @@ async def list_user_templates(
 
 
 @router.post("/", response_model=PodcastTemplatePublic, status_code=status.HTTP_201_CREATED)
-async def create_template(
+def create_template(
     template_in: PodcastTemplateCreate,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
@@ -62,11 +71,12 @@ async def create_template(
         db_template = crud.create_user_template(session=session, template_in=template_in, user_id=current_user.id)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
+    _queue_stem_render(db_template.id)
     return convert_db_template_to_public(db_template)
 
 
 @router.get("/{template_id}", response_model=PodcastTemplatePublic)
-async def get_template(
+def get_template(
     template_id: UUID,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
@@ -81,7 +91,7 @@ async def get_template(
 
 
 @router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_template(
+def delete_template(
     template_id: UUID,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
@@ -99,7 +109,7 @@ async def delete_template(
 
 
 @router.put("/{template_id}", response_model=PodcastTemplatePublic)
-async def update_template(
+def update_template(
     template_id: UUID,
     template_in: PodcastTemplateCreate,
     session: Session = Depends(get_session),
@@ -147,4 +157,5 @@ async def update_template(
     session.add(db_template)
     session.commit()
     session.refresh(db_template)
+    _queue_stem_render(db_template.id)
     return convert_db_template_to_public(db_template)
\ No newline at end of file
@@ -75,6 +75,7 @@ debug                  = _safe_import("api.routers.debug")
 billing_router         = _safe_import("api.routers.billing")
 billing_webhook_router = _safe_import("api.routers.billing_webhook")
 notifications_router   = _safe_import("api.routers.notifications")
+events_router          = _safe_import("api.routers.events")
 music_router           = _safe_import("api.routers.music")
 ai_metadata            = _safe_import("api.routers.ai_metadata")
 sections_router        = _safe_import("api.routers.sections")
@@ -136,6 +137,8 @@ def attach_routers(app: FastAPI) -> dict:
     availability['billing_webhook_router'] = billing_webhook_router is not None
     _maybe(app, notifications_router)
     availability['notifications_router'] = notifications_router is not None
+    _maybe(app, events_router)
+    availability['events_router'] = events_router is not None
     _maybe(app, ai_metadata)
     availability['ai_metadata'] = ai_metadata is not None
     _maybe(app, sections_router)
@@ -4,9 +4,10 @@ import io
 import json
 import logging
 import time
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-from pydub import AudioSegment
+if TYPE_CHECKING:  # pydub pulls in the audio stack; only speech synthesis needs it
+	from pydub import AudioSegment
 
 try:  # ElevenLabs SDK is optional
 	from elevenlabs.client import ElevenLabs
@@ -185,6 +186,8 @@ def generate_speech_from_text(
 					audio_bytes = b"".join(chunk for chunk in stream)
 					if not audio_bytes:
 						raise AIEnhancerError("Empty audio stream from ElevenLabs")
+					from pydub import AudioSegment
+
 					buf = io.BytesIO(audio_bytes)
 					return AudioSegment.from_file(buf, format="mp3")
 				except ApiError as e:  # type: ignore[misc]
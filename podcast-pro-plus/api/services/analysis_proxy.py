@@ -0,0 +1,209 @@
+"""Low-resolution analysis proxy for detection-only passes.
+
+Silence detection, energy envelopes and loudness matching only ever look at
+the RMS of millisecond-aligned windows, yet pydub answers each question by
+re-reading the full-rate PCM: ``detect_silence`` slices and measures the whole
+window at every seek step, and ``dBFS``/``rms``/``max`` are full passes each
+time they are read. ``AnalysisProxy`` folds a segment once into a mono 1 kHz
+energy signal: per millisecond, the sum of squared samples over all channels,
+plus the peak. Any window's RMS is then two lookups in a cumulative sum.
+
+The millisecond bins use pydub's own slice boundaries
+(``int(ms * frame_rate / 1000)`` frames), so window statistics equal what pydub
+computes on ``segment[start:end]`` and results map back to full-rate frames
+with ``to_frames``. The proxy is built on first use and kept on the segment
+(segments are immutable; edits spawn new ones), so every pass over the same
+audio shares it. Segments it cannot represent (rates under 1 kHz, stand-ins
+without PCM) fall back to pydub. A proxy measured elsewhere from the same audio
+(``preanalysis`` stores the upload's) can be put on a segment with ``attach``.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from pydub.silence import detect_silence as _pydub_detect_silence
+from pydub.utils import db_to_float
+
+_ATTR = "_analysis_proxy"
+# Milliseconds folded per pass, so a long episode is never squared in one array
+_BLOCK_MS = 60_000
+_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+class AnalysisProxy:
+    """Per-millisecond energy and peak of a segment, with its loudness and peak statistics."""
+
+    def __init__(self, power: Any, peak: Any, frame_rate: int, channels: int, sample_width: int) -> None:
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.max_possible_amplitude = float(1 << (8 * sample_width)) / 2
+        self._peak = peak
+        # Only the running sum is kept: about 12 bytes per millisecond with the peaks
+        self._csum = np.concatenate(([0], np.cumsum(power)))
+        total = self._csum[-1]
+        samples = int(self.to_frames(len(power))) * channels
+        self.rms = int(math.sqrt(total / samples)) if samples else 0
+        self.max = int(peak.max()) if len(peak) else 0
+
+    @classmethod
+    def from_segment(cls, seg: Any) -> Optional["AnalysisProxy"]:
+        """Fold ``seg`` into a proxy, or None when it has no PCM the proxy can read."""
+        dtype = _DTYPES.get(getattr(seg, "sample_width", None))
+        data = getattr(seg, "raw_data", None)
+        if dtype is None or data is None or int(getattr(seg, "frame_rate", 0) or 0) < 1000:
+            return None
+        frame_rate, channels = int(seg.frame_rate), int(seg.channels)
+        samples = np.frombuffer(data, dtype=dtype)
+        length = len(seg)
+        bounds = (np.arange(length + 1) * frame_rate / 1000.0).astype(np.int64) * channels
+        wide = np.float64 if dtype is np.int32 else np.int64  # int32 squares overflow int64 sums
+        power = np.zeros(length, dtype=wide)
+        peak = np.zeros(length, dtype=np.int64 if dtype is np.int32 else np.int32)
+        for m0 in range(0, length, _BLOCK_MS):
+            m1 = min(length, m0 + _BLOCK_MS)
+            lo, hi = int(bounds[m0]), int(bounds[m1])
+            chunk = samples[lo:hi].astype(wide)
+            if len(chunk) < hi - lo:
+                # The rounded length can overshoot the last frame; pydub pads slices with silence
+                chunk = np.concatenate((chunk, np.zeros(hi - lo - len(chunk), dtype=wide)))
+            offsets = bounds[m0:m1] - lo
+            power[m0:m1] = np.add.reduceat(chunk * chunk, offsets)
+            peak[m0:m1] = np.maximum.reduceat(np.abs(chunk), offsets)
+        return cls(power, peak, frame_rate, channels, int(seg.sample_width))
+
+    def __len__(self) -> int:
+        return len(self._peak)
+
+    def arrays(self) -> Tuple[Any, Any]:
+        """``(power, peak)`` per millisecond, as the constructor takes them."""
+        return np.diff(self._csum), self._peak
+
+    def to_frames(self, ms: Any) -> Any:
+        """Full-rate frame index of millisecond position(s) ``ms``, as pydub slices them."""
+        return (np.asarray(ms, dtype=np.int64) * self.frame_rate / 1000.0).astype(np.int64)
+
+    # --- statistics ---
+
+    @property
+    def dBFS(self) -> float:
+        if not self.rms:
+            return -float("infinity")
+        return 20 * math.log10(self.rms / self.max_possible_amplitude)
+
+    @property
+    def max_dBFS(self) -> float:
+        if not self.max:
+            return -float("infinity")
+        return 20 * math.log10(self.max / self.max_possible_amplitude)
+
+    def window_rms(self, starts: Any, ends: Any) -> Any:
+        """``segment[s:e].rms`` for each window, truncated to int like audioop."""
+        starts = np.minimum(np.asarray(starts, dtype=np.int64), len(self))
+        ends = np.minimum(np.asarray(ends, dtype=np.int64), len(self))
+        sums = self._csum[ends] - self._csum[starts]
+        counts = (self.to_frames(ends) - self.to_frames(starts)) * self.channels
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rms = np.floor(np.sqrt(sums / counts))
+        return np.where(counts > 0, rms, 0)
+
+    # --- detection passes ---
+
+    def detect_silence(self, min_silence_len: int = 1000, silence_thresh: float = -16, seek_step: int = 1) -> List[List[int]]:
+        """``pydub.silence.detect_silence`` on the proxy: silent ``[start_ms, end_ms]`` ranges."""
+        seg_len = len(self)
+        if seg_len < min_silence_len:
+            return []
+        thresh = db_to_float(silence_thresh) * self.max_possible_amplitude
+        last_start = seg_len - min_silence_len
+        starts = np.arange(0, last_start + 1, seek_step, dtype=np.int64)
+        if last_start % seek_step:
+            starts = np.append(starts, last_start)
+        silent = starts[self.window_rms(starts, starts + min_silence_len) <= thresh]
+        if not len(silent):
+            return []
+        # pydub merges consecutive hits, and overlapping ones separated by a short blip
+        gaps = np.diff(silent)
+        breaks = np.flatnonzero((gaps != seek_step) & (gaps > min_silence_len))
+        firsts = np.concatenate(([0], breaks + 1))
+        lasts = np.concatenate((breaks, [len(silent) - 1]))
+        return [[int(silent[f]), int(silent[l]) + min_silence_len] for f, l in zip(firsts, lasts)]
+
+    def envelope(self, frame_ms: int = 50) -> List[float]:
+        """RMS of consecutive ``frame_ms`` frames (the last one may be shorter)."""
+        starts = np.arange(0, len(self), max(1, frame_ms), dtype=np.int64)
+        return [float(v) for v in self.window_rms(starts, starts + frame_ms)]
+
+
+def proxy_for(seg: Any) -> Optional[AnalysisProxy]:
+    """The segment's proxy, built on first use and kept on the segment."""
+    proxy = getattr(seg, _ATTR, None)
+    if proxy is None:
+        try:
+            proxy = AnalysisProxy.from_segment(seg)
+        except (ValueError, TypeError, MemoryError):
+            proxy = None
+        if proxy is not None:
+            try:
+                setattr(seg, _ATTR, proxy)
+            except AttributeError:
+                pass
+    return proxy
+
+
+def attach(seg: Any, proxy: Optional[AnalysisProxy]) -> bool:
+    """Use ``proxy`` as the segment's own; False (and nothing kept) unless its format and length match."""
+    if proxy is None or len(proxy) != len(seg):
+        return False
+    if (proxy.frame_rate, proxy.channels, proxy.sample_width) != (
+        getattr(seg, "frame_rate", None), getattr(seg, "channels", None), getattr(seg, "sample_width", None)
+    ):
+        return False
+    try:
+        setattr(seg, _ATTR, proxy)
+    except AttributeError:
+        return False
+    return True
+
+
+def dbfs(seg: Any) -> float:
+    proxy = proxy_for(seg)
+    return proxy.dBFS if proxy is not None else seg.dBFS
+
+
+def rms(seg: Any) -> int:
+    proxy = proxy_for(seg)
+    return proxy.rms if proxy is not None else seg.rms
+
+
+def detect_silence(seg: Any, min_silence_len: int = 1000, silence_thresh: float = -16, seek_step: int = 1) -> List[List[int]]:
+    proxy = proxy_for(seg)
+    if proxy is None:
+        return _pydub_detect_silence(seg, min_silence_len=min_silence_len, silence_thresh=silence_thresh, seek_step=seek_step)
+    return proxy.detect_silence(min_silence_len, silence_thresh, seek_step)
+
+
+def energy_envelope(seg: Any, frame_ms: int = 50) -> List[float]:
+    proxy = proxy_for(seg)
+    if proxy is not None:
+        return proxy.envelope(frame_ms)
+    vals = []
+    for i in range(0, len(seg), max(1, frame_ms)):
+        try:
+            vals.append(float(seg[i:i + frame_ms].rms))
+        except Exception:
+            vals.append(0.0)
+    return vals
+
+
+__all__ = [
+    "AnalysisProxy",
+    "attach",
+    "dbfs",
+    "detect_silence",
+    "energy_envelope",
+    "proxy_for",
+    "rms",
+]
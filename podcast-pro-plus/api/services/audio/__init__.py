@@ -4,5 +4,12 @@ This package contains modularized pieces of the former monolithic
 audio_processor.py to improve maintainability and testability.
 """
 
-# Re-export main orchestration for convenience if importing from package
-from .processor import process_and_assemble_episode  # noqa: F401
+# Re-export main orchestration for convenience if importing from package. Resolved on
+# first access: importing any submodule (e.g. transcript_io) must not load the mixer,
+# pydub and numpy into the web app.
+def __getattr__(name):
+    if name == "process_and_assemble_episode":
+        from .processor import process_and_assemble_episode
+
+        return process_and_assemble_episode
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,35 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from pydub import AudioSegment
 
+# Audio handed from one pipeline stage to the next (clean engine -> mixer, cleaned-content
+# reference, precut) stays lossless; mp3 is encoded once, for the published episode.
+# AUDIO_INTERMEDIATE_FORMAT=flac halves the disk use at the cost of an ffmpeg encode/decode;
+# mp3 restores the old lossy handoff.
+INTERMEDIATE_FORMATS = ("wav", "flac", "mp3")
+
+
+def intermediate_format() -> str:
+    fmt = (os.getenv("AUDIO_INTERMEDIATE_FORMAT") or "wav").strip().lower().lstrip(".")
+    return fmt if fmt in INTERMEDIATE_FORMATS else "wav"
+
+
+def intermediate_name(stem: str) -> str:
+    """File name for an intermediate of ``stem`` in the configured format."""
+    return f"{stem}.{intermediate_format()}"
+
+
+def export_by_suffix(seg: AudioSegment, out_path: Path) -> Path:
+    """Export ``seg`` in the format named by ``out_path``'s suffix (mp3 without one)."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    seg.export(out_path, format=out_path.suffix.lstrip(".").lower() or "mp3")
+    return out_path
+
 
 def normalize_master(audio_in: Path, audio_out: Path, cfg: Dict[str, Any], log: List[str]) -> Dict[str, Any]:
     """Parity-preserving master step.
@@ -32,6 +57,9 @@ def mux_tracks(program_in: Path, bed_in: Optional[Path], out_path: Path, cfg: Di
     Maintain behavior by copying the program track to out_path (no extra logs here).
     If a bed is provided and cfg requests it at export-time, overlay at 0ms.
     """
+    if not (bed_in and cfg.get("apply_bed_at_export")) and Path(program_in) == Path(out_path):
+        # Nothing to mux into the program already at out_path; re-encoding it would only lose quality
+        return {"bed_applied": False, "duration_ms": None}
     prog = AudioSegment.from_file(program_in)
     if bed_in and cfg.get("apply_bed_at_export"):
         bed = AudioSegment.from_file(bed_in)
@@ -57,9 +85,15 @@ def write_derivatives(master_in: Path, outputs: Dict[str, Path], cfg: Dict[str,
     The current monolith emits a single mp3 via pydub. Preserve behavior by exporting
     to the provided targets without emitting additional logs.
     """
-    seg = AudioSegment.from_file(master_in)
     metrics: Dict[str, Any] = {"written": []}
+    seg = None
     for label, out_path in (outputs or {}).items():
+        if Path(out_path) == Path(master_in):
+            # The master already is this derivative
+            metrics["written"].append({"label": label, "path": str(out_path)})
+            continue
+        if seg is None:
+            seg = AudioSegment.from_file(master_in)
         try:
             fmt = out_path.suffix.lstrip(".") or "mp3"
             out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -82,6 +116,10 @@ def embed_metadata(final_path: Path, metadata: Dict[str, Any], cover_path: Optio
 
 
 __all__ = [
+    "INTERMEDIATE_FORMATS",
+    "intermediate_format",
+    "intermediate_name",
+    "export_by_suffix",
     "normalize_master",
     "mux_tracks",
     "write_derivatives",
@@ -3,13 +3,13 @@ from __future__ import annotations
 import math
 from typing import Any, Dict, List, Optional, Tuple, cast
 
-from pydub.silence import detect_silence
 import re
 # Normalize by removing ALL non-word characters and lowercasing to ignore punctuation and case.
 _NONWORD = re.compile(r'\W+')
 def _norm(w: str) -> str:
     return _NONWORD.sub('', (w or '').lower())
 from .common import AudioSegment, FILLER_LEAD_TRIM_DEFAULT_MS
+from api.services import analysis_proxy
 from .ai_fillers import compute_filler_spans
 
 
@@ -23,12 +23,18 @@ def rebuild_audio_from_words(
 ) -> Tuple[AudioSegment, Dict[str, int], int]:
     """Rebuild audio by stitching inter-word gaps and words, with optional filler removal.
     Returns (result_audio, filler_freq_map, filler_removed_count).
+
+    When nothing is removed and the words tile the audio in order, the stitched result
+    would equal the input sample for sample; the input segment itself is returned so
+    analysis already attached to it (see ``analysis_proxy``) carries over.
     """
     if log is None:
         log = []
     result_audio: AudioSegment = AudioSegment.empty()
     cursor_ms = 0
     last_appended_segment_ms = 0
+    # Still a plain copy of main_content_audio: nothing dropped, repeated or padded
+    unchanged = True
     filler_removed_count = 0
     filler_freq: Dict[str, int] = {}
     # Precompute which indices are fillers using the same phrase-aware logic as transcripts
@@ -45,6 +51,8 @@ def rebuild_audio_from_words(
     for idx, w in enumerate(mutable_words):
         start_ms = int(w['start'] * 1000)
         end_ms = int(w['end'] * 1000)
+        if start_ms < cursor_ms or end_ms < start_ms or end_ms > len(main_content_audio):
+            unchanged = False
         if start_ms > cursor_ms:
             gap_ms = start_ms - cursor_ms
             gap_seg: AudioSegment = cast(AudioSegment, main_content_audio[cursor_ms:cursor_ms + gap_ms])
@@ -54,7 +62,7 @@ def rebuild_audio_from_words(
         if sfx_file:
             # SFX handling is done upstream; here we only stitch voice content.
             # Keep the placeholder as zero-length; caller inserts SFX audio directly.
-            pass
+            unchanged = False
         else:
             # Always keep the original audio segment unless it's a filler to remove
             # (word text may be blanked for command tokens; audio must still pass through)
@@ -63,6 +71,7 @@ def rebuild_audio_from_words(
             # Remove if this index is marked as filler by phrase-aware spans, otherwise fall back to token match
             is_filler_here = (idx in filler_idx) or (word_text and remove_fillers and normalized_fillers and lw in normalized_fillers)
             if is_filler_here:
+                unchanged = False
                 if filler_lead_trim_ms > 0 and last_appended_segment_ms > 0:
                     trim_amt = min(filler_lead_trim_ms, last_appended_segment_ms, len(result_audio))
                     if trim_amt > 0:
@@ -87,6 +96,8 @@ def rebuild_audio_from_words(
     if cursor_ms < len(main_content_audio):
         tail_seg: AudioSegment = cast(AudioSegment, main_content_audio[cursor_ms:])
         result_audio += tail_seg
+    if unchanged:
+        return main_content_audio, filler_freq, filler_removed_count
     return result_audio, filler_freq, filler_removed_count
 
 
@@ -118,14 +129,14 @@ def compress_long_pauses_guarded(
 
         # Silence threshold relative to average; guard for -inf
         try:
-            base_dbfs = audio.dBFS
+            base_dbfs = analysis_proxy.dbfs(audio)
             if math.isinf(base_dbfs):
                 base_dbfs = -50.0
         except Exception:
             base_dbfs = -50.0
         silence_thresh = int(base_dbfs - abs(rel_db))
 
-        pauses = detect_silence(
+        pauses = analysis_proxy.detect_silence(
             audio,
             min_silence_len=int(max_pause_s * 1000),
             silence_thresh=silence_thresh,
@@ -181,17 +192,7 @@ def _energy_envelope(a: AudioSegment, frame_ms: int = 50) -> List[float]:
     """Compute a simple RMS envelope over fixed-size frames."""
     if frame_ms <= 0:
         frame_ms = 50
-    vals: List[float] = []
-    n = len(a)
-    step = max(1, frame_ms)
-    for i in range(0, n, step):
-        chunk: AudioSegment = cast(AudioSegment, a[i:i + frame_ms])
-        try:
-            v = float(chunk.rms)
-        except Exception:
-            v = 0.0
-        vals.append(v)
-    return vals or [0.0]
+    return analysis_proxy.energy_envelope(a, frame_ms) or [0.0]
 
 
 def _cosine(v1: List[float], v2: List[float]) -> float:
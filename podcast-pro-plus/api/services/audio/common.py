@@ -30,11 +30,15 @@ if _ffprobe:
 # --- Small helpers ---
 def match_target_dbfs(segment: AudioSegment, target_dbfs: float = DEFAULT_TARGET_DBFS) -> AudioSegment:
     """Nudge segment average dBFS toward target without extreme jumps."""
+    # numpy comes with the proxy; keep it out of everything that merely imports this module
+    from api.services import analysis_proxy
+
     try:
-        current = segment.dBFS
+        # Loudness from the segment's analysis proxy: measured once however often it is matched
+        current = analysis_proxy.dbfs(segment)
     except Exception:
         return segment
-    if segment.rms < MIN_RMS_THRESHOLD:
+    if analysis_proxy.rms(segment) < MIN_RMS_THRESHOLD:
         return segment
     change_needed = target_dbfs - current
     if change_needed > MAX_GAIN_DB:
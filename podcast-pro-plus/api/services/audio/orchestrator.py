@@ -31,8 +31,11 @@ from api.services.audio.orchestrator_steps import (
     do_fillers,
     do_silence,
     do_tts,
+    do_template,
+    do_music_beds,
     do_export,
 )
+from api.services.audio.stage_graph import Stage, StageGraph
 
 
 # Export/IO dirs (centralized under workspace root)
@@ -42,11 +45,57 @@ CLEANED_DIR = _CLEANED_DIR
 TRANSCRIPTS_DIR = _TRANSCRIPTS_DIR
 
 
+def _intern_stage(
+    paths: Dict[str, Any],
+    cfg: Dict[str, Any],
+    log: List[str],
+    *,
+    ai_cmds: List[Dict[str, Any]],
+    cleaned_audio: AudioSegment,
+    content_path: Path,
+    mutable_words: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """do_tts, checkpointed in the job workspace (``cfg["checkpoints"]``) when there is TTS to synthesize.
+
+    A redelivered job reloads the audio with the synthesized segments inserted
+    instead of paying for the TTS calls again.
+    """
+    workspace = cfg.get("checkpoints")
+    if workspace is None or not ai_cmds:
+        return do_tts(paths, cfg, log, ai_cmds=ai_cmds, cleaned_audio=cleaned_audio,
+                      content_path=content_path, mutable_words=mutable_words)
+    fresh: Dict[str, Any] = {}
+
+    def _synthesize(stage_dir: Path):
+        fresh.update(do_tts(paths, cfg, log, ai_cmds=ai_cmds, cleaned_audio=cleaned_audio,
+                            content_path=content_path, mutable_words=mutable_words))
+        wav = stage_dir / "audio.wav"
+        fresh["cleaned_audio"].export(wav, format="wav")
+        return {"ai_note_additions": fresh.get("ai_note_additions", []), "mutable_words": mutable_words}, {"audio": wav}
+
+    data, files = workspace.run("intern", {
+        "content": content_path,
+        "audio": cleaned_audio.raw_data,
+        "commands": ai_cmds,
+        "words": mutable_words,
+        "provider": cfg.get("tts_provider"),
+        "tts_overrides": cfg.get("tts_overrides") or {},
+    }, _synthesize)
+    if fresh:
+        return fresh
+    mutable_words[:] = data.get("mutable_words") or mutable_words
+    log.append("[CHECKPOINT] intern commands restored from the job workspace")
+    return {"cleaned_audio": AudioSegment.from_file(files["audio"]), "ai_note_additions": data.get("ai_note_additions", [])}
+
+
 def run_episode_pipeline(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[str]) -> Dict[str, Any]:
     """Orchestrate the entire pipeline in the same order as the monolith.
 
     This function mirrors processor.process_and_assemble_episode behavior,
-    preserving filenames and log text/order.
+    preserving filenames and log text. The steps run as a stage graph
+    (stage_graph): the template's segments and music beds are prepared while
+    the content is cleaned, and the log keeps the declared stage order.
+    ``cfg["stage_workers"]`` overrides ASSEMBLY_STAGE_WORKERS (1 runs in order).
     """
     # Unpack inputs
     template = paths.get("template")
@@ -70,6 +119,15 @@ def run_episode_pipeline(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[s
         except Exception:
             return None
 
+    def _stage_done() -> None:
+        # Stage boundary: push buffered assembly-log lines (StreamingLog) to disk
+        flush = getattr(log, "flush", None)
+        if callable(flush):
+            try:
+                flush()
+            except Exception:
+                pass
+
     total_start_time = time.time()
     log.append(f"Workflow started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     if cover_image_path:
@@ -136,112 +194,103 @@ def run_episode_pipeline(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[s
             })
         return out
 
-    # 1) Load content & words + initial transcripts
-    _out = do_transcript_io(paths, cfg, log)
-    content_path = _out.get('content_path') or (MEDIA_DIR / main_content_filename)
-    main_content_audio = _out.get('main_content_audio') or AudioSegment.from_file(content_path)
-    words = _out.get('words') or []
-    sanitized_output_filename = _out.get('sanitized_output_filename') or sanitize_filename(output_filename)
-
-    # 2) Commands config & extraction
-    # 2) Commands config & extraction (intern/flubber) -> SFX markers and ai_cmds
-    _ai = do_intern_sfx(paths, cfg, log, words=words)
-    mutable_words = _ai.get('mutable_words', [dict(w) for w in words])
-    commands_cfg = _ai.get('commands_cfg', {})
-    ai_cmds = _ai.get('ai_cmds', [])
-    intern_count = _ai.get('intern_count', 0)
-    flubber_count = _ai.get('flubber_count', 0)
-
-    # Optional explicit flubber phase (no-op; already handled in do_intern_sfx)
-    _ = do_flubber(paths, cfg, log, mutable_words=mutable_words, commands_cfg=commands_cfg)
-
-    # 3) Primary cleanup and rebuild
-    # 3) Primary cleanup and rebuild (fillers)
-    _f = do_fillers(paths, cfg, log, content_path=content_path, mutable_words=mutable_words)
-    cleaned_audio = _f.get('cleaned_audio', AudioSegment.from_file(content_path))
-    mutable_words = _f.get('mutable_words', mutable_words)
-    filler_freq_map = _f.get('filler_freq_map', {})
-    filler_removed_count = _f.get('filler_removed_count', 0)
-
-    # 4) Execute Intern commands
-    # 4) Execute Intern commands (may synthesize TTS)
-    _tts = do_tts(paths, cfg, log, ai_cmds=ai_cmds, cleaned_audio=cleaned_audio, content_path=content_path, mutable_words=mutable_words)
-    cleaned_audio = _tts.get('cleaned_audio', cleaned_audio)
-    ai_note_additions: List[str] = _tts.get('ai_note_additions', [])
-
-    # 5) Optional pause compression
-    log.append("[ORDER_CHECK] before_pause_compress")
-    # 5) Optional pause compression
-    log.append("[ORDER_CHECK] before_pause_compress")
-    _sil = do_silence(paths, cfg, log, cleaned_audio=cleaned_audio, mutable_words=mutable_words)
-    cleaned_audio = _sil.get('cleaned_audio', cleaned_audio)
-    mutable_words = _sil.get('mutable_words', mutable_words)
-
-    # 6) Export cleaned audio (diagnostic/reference)
-    # 6) Export cleaned + template/final mix, transcripts, cleanup
-    _exp = do_export(
-        paths,
-        cfg,
-        log,
-        template=template,
-        cleaned_audio=cleaned_audio,
-        main_content_filename=main_content_filename,
-        output_filename=output_filename,
-        cover_image_path=cover_image_path,
-        mutable_words=mutable_words,
-        sanitized_output_filename=sanitized_output_filename,
-    )
-    final_path = _exp.get('final_path')
-    cleaned_filename = _exp.get('cleaned_filename')
-    cleaned_path = _exp.get('cleaned_path')
-
-    # 6b) Prepare template segments & build final mix
-    # The rest of template/mix/export/transcripts are handled in do_export
-
-    # Media roots: rely on centralized MEDIA_DIR only (no ad-hoc roots)
-    _MEDIA_ROOTS: List[Path] = []
-    try:
-        _MEDIA_ROOTS.append(MEDIA_DIR.resolve())
-    except Exception:
-        _MEDIA_ROOTS.append(MEDIA_DIR)
-
-    def _resolve_media_file(name: Optional[str]) -> Optional[Path]:
-        if not name:
-            return None
-        try:
-            base = Path(name).name
-            base_lower = base.lower()
-            base_noext = Path(base_lower).stem
-            best: Optional[Path] = None
-            best_mtime = -1.0
-            for root in _MEDIA_ROOTS:
-                try:
-                    direct = root / base
-                    if direct.exists():
-                        mt = direct.stat().st_mtime
-                        if mt > best_mtime:
-                            best, best_mtime = direct, mt
-                    for p in root.glob('*'):
-                        try:
-                            nm = p.name.lower()
-                            if nm.endswith(base_lower) or Path(nm).stem.endswith(base_noext):
-                                mt = p.stat().st_mtime
-                                if mt > best_mtime:
-                                    best, best_mtime = p, mt
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-            return best
-        except Exception:
-            return None
-        return None
+    # The steps as a stage graph, declared in the monolith's order. The template's
+    # segments and music beds need nothing from the content cleanup, so they run
+    # alongside it; their log lines still land after it, just before the mix.
+    def _load(v: Dict[str, Any], slog: List[str]) -> Dict[str, Any]:
+        # 1) Load content & words + initial transcripts
+        _out = do_transcript_io(paths, cfg, slog)
+        return {
+            'content_path': _out.get('content_path') or (MEDIA_DIR / main_content_filename),
+            'words': _out.get('words') or [],
+            'sanitized_output_filename': _out.get('sanitized_output_filename') or sanitize_filename(output_filename),
+        }
+
+    def _commands(v: Dict[str, Any], slog: List[str]) -> Dict[str, Any]:
+        # 2) Commands config & extraction (intern/flubber) -> SFX markers and ai_cmds
+        _ai = do_intern_sfx(paths, cfg, slog, words=v['words'])
+        mutable_words = _ai.get('mutable_words', [dict(w) for w in v['words']])
+        # Optional explicit flubber phase (no-op; already handled in do_intern_sfx)
+        _ = do_flubber(paths, cfg, slog, mutable_words=mutable_words, commands_cfg=_ai.get('commands_cfg', {}))
+        return {'command_words': mutable_words, 'ai_cmds': _ai.get('ai_cmds', [])}
+
+    def _fillers(v: Dict[str, Any], slog: List[str]) -> Dict[str, Any]:
+        # 3) Primary cleanup and rebuild (fillers)
+        _f = do_fillers(paths, cfg, slog, content_path=v['content_path'], mutable_words=v['command_words'])
+        cleaned_audio = _f['cleaned_audio'] if 'cleaned_audio' in _f else AudioSegment.from_file(v['content_path'])
+        return {'filler_audio': cleaned_audio, 'filler_words': _f.get('mutable_words', v['command_words'])}
+
+    def _intern(v: Dict[str, Any], slog: List[str]) -> Dict[str, Any]:
+        # 4) Execute Intern commands (may synthesize TTS); updates the words in place
+        _tts = _intern_stage(paths, cfg, slog, ai_cmds=v['ai_cmds'], cleaned_audio=v['filler_audio'],
+                             content_path=v['content_path'], mutable_words=v['filler_words'])
+        return {
+            'intern_audio': _tts.get('cleaned_audio', v['filler_audio']),
+            'intern_words': v['filler_words'],
+            'ai_note_additions': _tts.get('ai_note_additions', []),
+        }
+
+    def _silence(v: Dict[str, Any], slog: List[str]) -> Dict[str, Any]:
+        # 5) Optional pause compression
+        slog.append("[ORDER_CHECK] before_pause_compress")
+        slog.append("[ORDER_CHECK] before_pause_compress")
+        _sil = do_silence(paths, cfg, slog, cleaned_audio=v['intern_audio'], mutable_words=v['intern_words'])
+        return {
+            'cleaned_audio': _sil.get('cleaned_audio', v['intern_audio']),
+            'cleaned_words': _sil.get('mutable_words', v['intern_words']),
+        }
+
+    def _template_segments(v: Dict[str, Any], slog: List[str]) -> Dict[str, Any]:
+        # 6a) Template segments: static files and TTS, loudness-matched
+        return do_template(paths, cfg, slog, template=template)
+
+    def _music_beds(v: Dict[str, Any], slog: List[str]) -> Dict[str, Any]:
+        # 6b) Music beds of the template's background-music rules
+        return do_music_beds(paths, cfg, slog, template=template)
+
+    def _export(v: Dict[str, Any], slog: List[str]) -> Dict[str, Any]:
+        # 6c) Export cleaned + template/final mix, transcripts, cleanup
+        _exp = do_export(
+            paths,
+            cfg,
+            slog,
+            template=template,
+            cleaned_audio=v['cleaned_audio'],
+            main_content_filename=main_content_filename,
+            output_filename=output_filename,
+            cover_image_path=cover_image_path,
+            mutable_words=v['cleaned_words'],
+            sanitized_output_filename=v['sanitized_output_filename'],
+            template_segments=v['template_segments'],
+            music_beds=v['music_beds'],
+        )
+        return {'final_path': _exp.get('final_path')}
+
+    graph = StageGraph([
+        Stage('transcript_io', _load, outputs=('content_path', 'words', 'sanitized_output_filename')),
+        Stage('commands', _commands, inputs=('words',), outputs=('command_words', 'ai_cmds')),
+        Stage('fillers', _fillers, inputs=('content_path', 'command_words'), outputs=('filler_audio', 'filler_words')),
+        Stage('intern', _intern, inputs=('ai_cmds', 'filler_audio', 'content_path', 'filler_words'),
+              outputs=('intern_audio', 'intern_words', 'ai_note_additions')),
+        Stage('silence', _silence, inputs=('intern_audio', 'intern_words'), outputs=('cleaned_audio', 'cleaned_words')),
+        Stage('template_segments', _template_segments, outputs=('template_segments',)),
+        Stage('music_beds', _music_beds, outputs=('music_beds',)),
+        Stage('export', _export,
+              inputs=('cleaned_audio', 'cleaned_words', 'sanitized_output_filename', 'template_segments', 'music_beds'),
+              outputs=('final_path',)),
+    ])
+    values: Dict[str, Any] = {}
+    timings = graph.run(values, log, workers=cfg.get('stage_workers'), on_stage_done=lambda _stage: _stage_done())
+    final_path = values['final_path']
+    ai_note_additions: List[str] = values['ai_note_additions']
 
     log.append(f"[TIMING] Workflow completed in {time.time() - total_start_time:.2f}s")
+    _stage_done()
     return {
         "final_path": final_path,
         "log": log,
         "ai_note_additions": ai_note_additions,
+        "stage_timings": [t.as_dict() for t in timings],
     }
 
 
@@ -14,11 +14,14 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, cast
 import json
 import re
+import tempfile
 
 from pydub import AudioSegment
 
-from api.services import transcription, ai_enhancer
+from api.services import transcription, ai_enhancer, preanalysis
+from api.services.stage_cache import StageCache, cache_root, code_stamp
 from api.services.audio.common import MEDIA_DIR, match_target_dbfs, sanitize_filename
+from api.services.media_index import resolve_media_file
 from api.core.paths import (
     FINAL_DIR as _FINAL_DIR,
     CLEANED_DIR as _CLEANED_DIR,
@@ -49,7 +52,11 @@ from api.services.audio.tts_pipeline import (
     synthesize_chunks,
 )
 from api.services.audio.transcript_io import write_working_json
+from api.services.audio.mixer import MixBuffer
+from api.services.audio import template_stems
 from api.services.audio.audio_export import (
+    export_by_suffix,
+    intermediate_name,
     normalize_master,
     mux_tracks,
     write_derivatives,
@@ -63,6 +70,21 @@ AI_SEGMENTS_DIR = _AI_SEGMENTS_DIR
 CLEANED_DIR = _CLEANED_DIR
 TRANSCRIPTS_DIR = _TRANSCRIPTS_DIR
 
+# Rebuilt content keyed by audio + words + filler settings (see api.services.stage_cache)
+_PRIMARY_CACHE = StageCache("primary_cleanup")
+_PRIMARY_CODE = (
+    "api.services.audio.orchestrator_steps",
+    "api.services.audio.cleanup",
+    "api.services.audio.filler_pipeline",
+)
+# Template segments and music beds as rendered by this module (see api.services.audio.template_stems)
+_STEMS_CODE = (
+    "api.services.audio.orchestrator_steps",
+    "api.services.audio.common",
+    "api.services.audio.tts_pipeline",
+    "api.services.analysis_proxy",
+)
+
 
 # --- Shared small helpers (kept local to match orchestrator behavior) ---
 def _fmt_ts(s: float) -> str:
@@ -160,6 +182,15 @@ def _write_nopunct_sidecar(words_json_path: Path, out_basename: str, dest_dir: P
     return out_path
 
 # --- Step helpers ---
+def _load_content_audio(content_path: Path) -> AudioSegment:
+    """Decode the main content; a stored pre-analysis of the same file supplies its loudness and silence analysis."""
+    audio = AudioSegment.from_file(content_path)
+    record = preanalysis.lookup(content_path)
+    if record is not None:
+        record.attach(audio)
+    return audio
+
+
 def load_content_and_init_transcripts(
     main_content_filename: str,
     words_json_path: Optional[str],
@@ -178,7 +209,7 @@ def load_content_and_init_transcripts(
             content_path = alt
         else:
             raise RuntimeError(f"Main content file not found: {main_content_filename}")
-    main_content_audio = AudioSegment.from_file(content_path)
+    main_content_audio = _load_content_audio(content_path)
     log.append(f"Loaded main content: {main_content_filename}")
 
     # Words
@@ -358,7 +389,50 @@ def primary_cleanup_and_rebuild(
     mix_only: bool,
     log: List[str],
 ) -> Tuple[AudioSegment, List[Dict[str, Any]], Dict[str, int], int]:
-    """Remove fillers per config and rebuild audio; also update words if needed."""
+    """Remove fillers per config and rebuild audio; also update words if needed.
+
+    Served from the stage cache when the same audio and words were rebuilt with
+    the same filler settings before (e.g. a re-assembly with another template).
+    """
+    opts = cleanup_options if isinstance(cleanup_options, dict) else {}
+    inputs = {
+        "content": Path(content_path),
+        "words": mutable_words,
+        "fillers": [opts.get('fillerWords'), opts.get('removeFillers', True), opts.get('fillerLeadTrimMs', 60)],
+        "mix_only": bool(mix_only),
+        "code": code_stamp(*_PRIMARY_CODE),
+    }
+    first_line = len(log)
+    fresh: Dict[str, Any] = {}
+
+    def _rebuild():
+        audio, words, freq, count = _rebuild_primary(content_path, mutable_words, cleanup_options, mix_only, log)
+        fresh['audio'] = audio
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as fh:
+            wav = Path(fh.name)
+        audio.export(wav, format="wav")
+        data = {"words": words, "filler_freq_map": freq, "filler_removed_count": count, "log": list(log[first_line:])}
+        return data, {"audio": wav}
+
+    data, files = _PRIMARY_CACHE.cached(inputs, _rebuild, restore=False, move=True)
+    if fresh:
+        if cache_root() not in files["audio"].parents:  # cache off or the entry could not be stored
+            files["audio"].unlink(missing_ok=True)
+        return fresh['audio'], data["words"], data["filler_freq_map"], int(data["filler_removed_count"])
+    for line in data.get("log") or []:
+        log.append(line)
+    log.append("[STAGE_CACHE] primary cleanup restored from cache")
+    mutable_words[:] = data["words"]
+    return AudioSegment.from_file(files["audio"]), mutable_words, dict(data["filler_freq_map"] or {}), int(data["filler_removed_count"])
+
+
+def _rebuild_primary(
+    content_path: Path,
+    mutable_words: List[Dict[str, Any]],
+    cleanup_options: Dict[str, Any],
+    mix_only: bool,
+    log: List[str],
+) -> Tuple[AudioSegment, List[Dict[str, Any]], Dict[str, int], int]:
     raw_filler_list = (cleanup_options.get('fillerWords', []) or []) if isinstance(cleanup_options, dict) else []
     filler_words = set([str(w).strip().lower() for w in raw_filler_list if str(w).strip()])
     remove_fillers_flag = bool((cleanup_options or {}).get('removeFillers', True)) if isinstance(cleanup_options, dict) else True
@@ -379,7 +453,7 @@ def primary_cleanup_and_rebuild(
     except Exception:
         pass
     result_audio, filler_freq_map, filler_removed_count = rebuild_audio_from_words(
-        AudioSegment.from_file(content_path),
+        _load_content_audio(content_path),
         mutable_words,
         filler_words=filler_words,
         remove_fillers=remove_fillers,
@@ -493,47 +567,50 @@ def export_cleaned_audio_step(
     cleaned_audio: AudioSegment,
     log: List[str],
 ) -> Tuple[str, Path]:
-    """Export cleaned audio to CLEANED_DIR and return (filename, path)."""
+    """Export cleaned audio to CLEANED_DIR (lossless intermediate format) and return (filename, path)."""
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     CLEANED_DIR.mkdir(parents=True, exist_ok=True)
     out_stem = Path(main_content_filename).stem
-    cleaned_filename = f"cleaned_{out_stem}.mp3" if not out_stem.startswith("cleaned_") else f"{out_stem}.mp3"
+    cleaned_filename = intermediate_name(f"cleaned_{out_stem}" if not out_stem.startswith("cleaned_") else out_stem)
     cleaned_path = CLEANED_DIR / cleaned_filename
-    cleaned_audio.export(cleaned_path, format="mp3")
+    export_by_suffix(cleaned_audio, cleaned_path)
     log.append(f"Saved cleaned content to {cleaned_filename}")
     return cleaned_filename, cleaned_path
 
 
-def build_template_and_final_mix_step(
+def _resolve_media_file(name: Optional[str]) -> Optional[Path]:
+    # Indexed lookup (basename / suffix / stem maps) instead of globbing MEDIA_DIR
+    try:
+        return resolve_media_file(name, MEDIA_DIR)
+    except Exception:
+        return None
+
+
+def _template_json(template: Any, attr: str, default: str) -> Any:
+    try:
+        return json.loads(getattr(template, attr, default)) or json.loads(default)
+    except Exception:
+        return json.loads(default)
+
+
+def prepare_template_segments(
     template: Any,
-    cleaned_audio: AudioSegment,
-    cleaned_filename: str,
-    cleaned_path: Path,
-    main_content_filename: str,
     tts_overrides: Dict[str, Any],
     tts_provider: str,
     elevenlabs_api_key: Optional[str],
-    output_filename: str,
-    cover_image_path: Optional[str],
     log: List[str],
-) -> Tuple[Path, List[Tuple[dict, AudioSegment, int, int]]]:
-    """Prepare template segments, synthesize TTS, apply music rules, and export final mix.
-
-    Returns: (final_path, placements)
+) -> List[Tuple[dict, Optional[AudioSegment]]]:
+    """Load static segments and synthesize TTS segments of the template, loudness-matched.
+
+    Nothing here depends on the episode content, so the pipeline runs it
+    alongside the cleanup. Content segments come back with ``None`` audio and
+    are filled in by build_template_and_final_mix_step; segments that produced
+    no audio are left out. Each segment goes through the template stem cache,
+    so only new or edited segments are decoded or synthesized.
     """
-    # Parse template sections
-    try:
-        template_segments = json.loads(getattr(template, 'segments_json', '[]'))
-    except Exception:
-        template_segments = []
-    try:
-        template_background_music_rules = json.loads(getattr(template, 'background_music_rules_json', '[]'))
-    except Exception:
-        template_background_music_rules = []
-    try:
-        template_timing = json.loads(getattr(template, 'timing_json', '{}')) or {}
-    except Exception:
-        template_timing = {}
+    template_segments = _template_json(template, 'segments_json', '[]')
+    template_background_music_rules = _template_json(template, 'background_music_rules_json', '[]')
+    template_timing = _template_json(template, 'timing_json', '{}')
     try:
         log.append(
             f"[TEMPLATE_PARSE] segments={len(template_segments)} bg_rules={len(template_background_music_rules)} timing_keys={list((template_timing or {}).keys())}"
@@ -541,137 +618,223 @@ def build_template_and_final_mix_step(
     except Exception:
         pass
 
-    # Media roots: rely on centralized MEDIA_DIR only (no ad-hoc roots)
-    _MEDIA_ROOTS: List[Path] = []
-    try:
-        _MEDIA_ROOTS.append(MEDIA_DIR.resolve())
-    except Exception:
-        _MEDIA_ROOTS.append(MEDIA_DIR)
-
-    def _resolve_media_file(name: Optional[str]) -> Optional[Path]:
-        if not name:
-            return None
-        try:
-            base = Path(name).name
-            base_lower = base.lower()
-            base_noext = Path(base_lower).stem
-            best: Optional[Path] = None
-            best_mtime = -1.0
-            for root in _MEDIA_ROOTS:
-                try:
-                    direct = root / base
-                    if direct.exists():
-                        mt = direct.stat().st_mtime
-                        if mt > best_mtime:
-                            best, best_mtime = direct, mt
-                    for p in root.glob('*'):
-                        try:
-                            nm = p.name.lower()
-                            if nm.endswith(base_lower) or Path(nm).stem.endswith(base_noext):
-                                mt = p.stat().st_mtime
-                                if mt > best_mtime:
-                                    best, best_mtime = p, mt
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-            return best
-        except Exception:
-            return None
-        return None
-
-    processed_segments: List[Tuple[dict, AudioSegment]] = []
+    prepared: List[Tuple[dict, Optional[AudioSegment]]] = []
     for seg in template_segments:
-        audio = None
         seg_type = str((seg.get('segment_type') if isinstance(seg, dict) else None) or 'content').lower()
-        source = seg.get('source') if isinstance(seg, dict) else None
         if seg_type == 'content':
-            audio = match_target_dbfs(cleaned_audio)
+            prepared.append((seg, None))
+            continue
+        audio = template_stems.segment(
+            _segment_stem_inputs(seg, tts_overrides, tts_provider),
+            lambda log_, seg=seg: _render_segment(seg, tts_overrides, tts_provider, elevenlabs_api_key, log_),
+            log,
+        )
+        if audio:
+            prepared.append((seg, audio))
+    return prepared
+
+
+def _render_segment(
+    seg: dict,
+    tts_overrides: Dict[str, Any],
+    tts_provider: str,
+    elevenlabs_api_key: Optional[str],
+    log: List[str],
+) -> Optional[AudioSegment]:
+    # A static or TTS segment's audio, loudness-matched; None when it has none
+    audio = None
+    source = seg.get('source')
+    if source and source.get('source_type') == 'static':
+        raw_name = (source.get('filename') or '')
+        static_path = MEDIA_DIR / raw_name
+        if static_path.exists():
+            audio = AudioSegment.from_file(static_path)
             try:
-                log.append(f"[TEMPLATE_CONTENT] len_ms={len(audio)}")
+                log.append(f"[TEMPLATE_STATIC_OK] seg_id={seg.get('id')} file={static_path.name} len_ms={len(audio)}")
             except Exception:
                 pass
-        elif source and source.get('source_type') == 'static':
-            raw_name = (source.get('filename') or '')
-            static_path = MEDIA_DIR / raw_name
-            if static_path.exists():
-                audio = AudioSegment.from_file(static_path)
+        else:
+            alt = _resolve_media_file(raw_name)
+            if alt and alt.exists():
                 try:
-                    log.append(f"[TEMPLATE_STATIC_OK] seg_id={seg.get('id')} file={static_path.name} len_ms={len(audio)}")
-                except Exception:
-                    pass
-            else:
-                alt = _resolve_media_file(raw_name)
-                if alt and alt.exists():
-                    try:
-                        audio = AudioSegment.from_file(alt)
-                        log.append(f"[TEMPLATE_STATIC_RESOLVED] seg_id={seg.get('id')} requested={raw_name} -> {alt.name} len_ms={len(audio)}")
-                    except Exception as e:
-                        try:
-                            log.append(f"[TEMPLATE_STATIC_RESOLVE_ERROR] {type(e).__name__}: {e}")
-                        except Exception:
-                            pass
-                if not audio:
+                    audio = AudioSegment.from_file(alt)
+                    log.append(f"[TEMPLATE_STATIC_RESOLVED] seg_id={seg.get('id')} requested={raw_name} -> {alt.name} len_ms={len(audio)}")
+                except Exception as e:
                     try:
-                        log.append(f"[TEMPLATE_STATIC_MISSING] seg_id={seg.get('id')} file={raw_name}")
+                        log.append(f"[TEMPLATE_STATIC_RESOLVE_ERROR] {type(e).__name__}: {e}")
                     except Exception:
                         pass
-        elif source and source.get('source_type') == 'tts':
-            script = tts_overrides.get(str(seg.get('id')), source.get('script') or '')
-            script = str(script or '')
+            if not audio:
+                try:
+                    log.append(f"[TEMPLATE_STATIC_MISSING] seg_id={seg.get('id')} file={raw_name}")
+                except Exception:
+                    pass
+    elif source and source.get('source_type') == 'tts':
+        script = tts_overrides.get(str(seg.get('id')), source.get('script') or '')
+        script = str(script or '')
+        try:
+            log.append(f"[TEMPLATE_TTS] seg_id={seg.get('id')} len={len(script)}")
+        except Exception:
+            pass
+        try:
+            if script.strip() == "":
+                log.append("[TEMPLATE_TTS_EMPTY] empty script -> inserting 500ms silence")
+                audio = AudioSegment.silent(duration=500)
+            else:
+                _tts_cfg = {
+                    'provider': tts_provider,
+                    'api_key': elevenlabs_api_key,
+                    'voice_id': source.get('voice_id'),
+                    'max_chars_per_chunk': max(1, len(script) + 1),
+                    'pause_ms': 0,
+                    'crossfade_ms': 0,
+                    'sample_rate': None,
+                    'retries': 2,
+                    'backoff_seconds': 1.0,
+                }
+                _tmp_tts_log: List[str] = []
+                _chunks = chunk_prompt_for_tts(script, _tts_cfg, _tmp_tts_log)
+                _paths = synthesize_chunks(_chunks or [{'id': 'chunk-001', 'text': script, 'pause_ms': 0}], ai_enhancer, _tts_cfg, _tmp_tts_log)
+                if _paths:
+                    audio = AudioSegment.from_file(_paths[0])
+                else:
+                    audio = ai_enhancer.generate_speech_from_text(
+                        script,
+                        source.get('voice_id'),
+                        api_key=elevenlabs_api_key,
+                        provider=tts_provider,
+                    )
+        except ai_enhancer.AIEnhancerError as e:
             try:
-                log.append(f"[TEMPLATE_TTS] seg_id={seg.get('id')} len={len(script)}")
+                log.append(f"[TEMPLATE_TTS_ERROR] {e}; inserting 500ms silence instead")
             except Exception:
                 pass
+            audio = AudioSegment.silent(duration=500)
+        except Exception as e:
             try:
-                if script.strip() == "":
-                    log.append("[TEMPLATE_TTS_EMPTY] empty script -> inserting 500ms silence")
-                    audio = AudioSegment.silent(duration=500)
+                log.append(f"[TEMPLATE_TTS_ERROR] {type(e).__name__}: {e}; inserting 500ms silence instead")
+            except Exception:
+                pass
+            audio = AudioSegment.silent(duration=500)
+        try:
+            if audio is not None:
+                log.append(f"[TEMPLATE_TTS_OK] seg_id={seg.get('id')} len_ms={len(audio)}")
+        except Exception:
+            pass
+    return match_target_dbfs(audio) if audio else None
+
+
+def prepare_music_beds(template: Any, log: List[str]) -> List[Tuple[dict, Path, AudioSegment]]:
+    """Resolve and decode the music file of each background-music rule: ``(rule, path, audio)``.
+
+    Rules whose file is missing are skipped. A file that fails to decode ends
+    the list there, as it used to end the rule loop of the final mix. The
+    decoded beds come from the template stem cache while rules and files are
+    unchanged.
+    """
+    return template_stems.music_beds(_bed_stem_inputs(template), lambda log_: _decode_music_beds(template, log_), log)
+
+
+def _decode_music_beds(template: Any, log: List[str]) -> List[Tuple[dict, Path, AudioSegment]]:
+    beds: List[Tuple[dict, Path, AudioSegment]] = []
+    try:
+        for rule in (_template_json(template, 'background_music_rules_json', '[]') or []):
+            req_name = (rule.get('music_filename') or rule.get('music') or '')
+            music_path = MEDIA_DIR / req_name
+            if not music_path.exists():
+                altm = _resolve_media_file(req_name)
+                if altm and altm.exists():
+                    music_path = altm
+                    try:
+                        log.append(f"[MUSIC_RULE_RESOLVED] requested={req_name} -> {music_path.name}")
+                    except Exception:
+                        pass
                 else:
-                    _tts_cfg = {
-                        'provider': tts_provider,
-                        'api_key': elevenlabs_api_key,
-                        'voice_id': source.get('voice_id'),
-                        'max_chars_per_chunk': max(1, len(script) + 1),
-                        'pause_ms': 0,
-                        'crossfade_ms': 0,
-                        'sample_rate': None,
-                        'retries': 2,
-                        'backoff_seconds': 1.0,
-                    }
-                    _tmp_tts_log: List[str] = []
-                    _chunks = chunk_prompt_for_tts(script, _tts_cfg, _tmp_tts_log)
-                    _paths = synthesize_chunks(_chunks or [{'id': 'chunk-001', 'text': script, 'pause_ms': 0}], ai_enhancer, _tts_cfg, _tmp_tts_log)
-                    if _paths:
-                        audio = AudioSegment.from_file(_paths[0])
-                    else:
-                        audio = ai_enhancer.generate_speech_from_text(
-                            script,
-                            source.get('voice_id'),
-                            api_key=elevenlabs_api_key,
-                            provider=tts_provider,
-                        )
-            except ai_enhancer.AIEnhancerError as e:
-                try:
-                    log.append(f"[TEMPLATE_TTS_ERROR] {e}; inserting 500ms silence instead")
-                except Exception:
-                    pass
-                audio = AudioSegment.silent(duration=500)
-            except Exception as e:
-                try:
-                    log.append(f"[TEMPLATE_TTS_ERROR] {type(e).__name__}: {e}; inserting 500ms silence instead")
-                except Exception:
-                    pass
-                audio = AudioSegment.silent(duration=500)
+                    try:
+                        log.append(f"[MUSIC_RULE_SKIP] missing_file={req_name}")
+                    except Exception:
+                        pass
+                    continue
+            beds.append((rule, music_path, AudioSegment.from_file(music_path)))
+    except Exception as e:
+        log.append(f"[MUSIC_RULES_WARN] {type(e).__name__}: {e}")
+    return beds
+
+
+def _media_input(name: str) -> Path:
+    # The file a static segment or music rule reads, resolved as the prepare steps resolve it
+    path = MEDIA_DIR / name
+    if not path.exists():
+        alt = _resolve_media_file(name)
+        if alt and alt.exists():
+            path = alt
+    return path
+
+
+def _segment_stem_inputs(seg: dict, tts_overrides: Dict[str, Any], tts_provider: str) -> Dict[str, Any]:
+    # Everything _render_segment reads: the segment, its media file's content, its TTS provider and script
+    source = seg.get('source') or {}
+    inputs: Dict[str, Any] = {"segment": seg, "code": code_stamp(*_STEMS_CODE)}
+    if source.get('source_type') == 'static':
+        inputs["media"] = _media_input(source.get('filename') or '')
+    elif source.get('source_type') == 'tts':
+        script = tts_overrides.get(str(seg.get('id')), source.get('script') or '')
+        inputs["tts"] = {"provider": tts_provider, "script": str(script or '')}
+    return inputs
+
+
+def _bed_stem_inputs(template: Any) -> Dict[str, Any]:
+    rules = _template_json(template, 'background_music_rules_json', '[]')
+    media: Dict[str, Path] = {}
+    for rule in rules if isinstance(rules, list) else []:
+        if isinstance(rule, dict):
+            name = rule.get('music_filename') or rule.get('music') or ''
+            media[name] = _media_input(name)
+    return {"rules": rules, "media": media, "code": code_stamp(*_STEMS_CODE)}
+
+
+def build_template_and_final_mix_step(
+    template: Any,
+    cleaned_audio: AudioSegment,
+    cleaned_filename: str,
+    cleaned_path: Path,
+    main_content_filename: str,
+    tts_overrides: Dict[str, Any],
+    tts_provider: str,
+    elevenlabs_api_key: Optional[str],
+    output_filename: str,
+    cover_image_path: Optional[str],
+    log: List[str],
+    *,
+    segments: Optional[List[Tuple[dict, Optional[AudioSegment]]]] = None,
+    beds: Optional[List[Tuple[dict, Path, AudioSegment]]] = None,
+) -> Tuple[Path, List[Tuple[dict, AudioSegment, int, int]]]:
+    """Place the content among the template segments, apply music rules, and export final mix.
+
+    ``segments`` and ``beds`` are the outputs of prepare_template_segments and
+    prepare_music_beds; whichever is not given is prepared here.
+
+    Returns: (final_path, placements)
+    """
+    if segments is None:
+        segments = prepare_template_segments(template, tts_overrides, tts_provider, elevenlabs_api_key, log)
+    if beds is None:
+        beds = prepare_music_beds(template, log)
+
+    processed_segments: List[Tuple[dict, AudioSegment]] = []
+    content_audio: Optional[AudioSegment] = None
+    for seg, audio in segments:
+        if audio is None:
+            if content_audio is None:
+                content_audio = match_target_dbfs(cleaned_audio)
+            audio = content_audio
             try:
-                if audio is not None:
-                    log.append(f"[TEMPLATE_TTS_OK] seg_id={seg.get('id')} len_ms={len(audio)}")
+                log.append(f"[TEMPLATE_CONTENT] len_ms={len(audio)}")
             except Exception:
                 pass
-        if audio:
-            if seg_type != 'content':
-                audio = match_target_dbfs(audio)
-            processed_segments.append((seg, audio))
+            if not audio:
+                continue
+        processed_segments.append((seg, audio))
 
     try:
         _by_type: Dict[str, int] = {}
@@ -773,77 +936,35 @@ def build_template_and_final_mix_step(
         pass
 
     total_duration_ms = pos_ms if pos_ms > 0 else max(1, len(stitched_content))
-    final_mix = AudioSegment.silent(duration=total_duration_ms)
+    # Layers are only recorded here and rendered once below (see mixer.MixBuffer)
+    mix = MixBuffer(total_duration_ms)
     for _seg, _aud, _st, _en in placements:
         if len(_aud) > 0:
-            final_mix = final_mix.overlay(_aud, position=_st)
+            mix.add(_aud, _st)
 
     try:
-        def _loop_to_duration(seg, dur_ms: int):
-            if dur_ms <= 0:
-                return AudioSegment.silent(duration=0)
-            if len(seg) == 0:
-                return AudioSegment.silent(duration=dur_ms)
-            out = seg
-            while len(out) < dur_ms:
-                out = out + seg
-            return out[:dur_ms]
-
         def _apply(bg_seg: AudioSegment, start_ms: int, end_ms: int, *, vol_db: float, fade_in_ms: int, fade_out_ms: int, label: str) -> None:
             dur = max(0, end_ms - start_ms)
             if dur <= 0:
                 return
-            m = _loop_to_duration(bg_seg, dur)
-            try:
-                if vol_db is not None:
-                    m_seg: AudioSegment = cast(AudioSegment, m)
-                    m = m_seg.apply_gain(float(vol_db))
-            except Exception:
-                pass
-            try:
-                fi = max(0, int(fade_in_ms or 0))
-                fo = max(0, int(fade_out_ms or 0))
-                if fi + fo >= dur and dur > 0:
-                    if fi > 0 and fo > 0:
-                        total = fi + fo
-                        fi = int((fi / total) * (dur - 1))
-                        fo = max(0, (dur - 1) - fi)
-                    else:
-                        fi = 0
-                        fo = max(0, dur - 1)
-                if fi > 0:
-                    m_seg2: AudioSegment = cast(AudioSegment, m)
-                    m = m_seg2.fade_in(fi)
-                if fo > 0:
-                    m_seg3: AudioSegment = cast(AudioSegment, m)
-                    m = m_seg3.fade_out(fo)
-            except Exception:
-                pass
-            nonlocal final_mix
-            final_mix = final_mix.overlay(cast(AudioSegment, m), position=start_ms)
+            fi = max(0, int(fade_in_ms or 0))
+            fo = max(0, int(fade_out_ms or 0))
+            if fi + fo >= dur and dur > 0:
+                if fi > 0 and fo > 0:
+                    total = fi + fo
+                    fi = int((fi / total) * (dur - 1))
+                    fo = max(0, (dur - 1) - fi)
+                else:
+                    fi = 0
+                    fo = max(0, dur - 1)
+            # The bed is tiled to the interval, gained and faded while rendering
+            mix.add(bg_seg, start_ms, duration_ms=dur, gain_db=vol_db, fade_in_ms=fi, fade_out_ms=fo, loop=True)
             try:
                 log.append(f"[MUSIC_RULE_APPLY] label={label} pos_ms={start_ms} dur_ms={dur} vol_db={vol_db} fade_in_ms={fade_in_ms} fade_out_ms={fade_out_ms}")
             except Exception:
                 pass
 
-        for rule in (template_background_music_rules or []):
-            req_name = (rule.get('music_filename') or rule.get('music') or '')
-            music_path = MEDIA_DIR / req_name
-            if not music_path.exists():
-                altm = _resolve_media_file(req_name)
-                if altm and altm.exists():
-                    music_path = altm
-                    try:
-                        log.append(f"[MUSIC_RULE_RESOLVED] requested={req_name} -> {music_path.name}")
-                    except Exception:
-                        pass
-                else:
-                    try:
-                        log.append(f"[MUSIC_RULE_SKIP] missing_file={req_name}")
-                    except Exception:
-                        pass
-                    continue
-            bg = AudioSegment.from_file(music_path)
+        for rule, music_path, bg in beds:
             apply_to = [str(t).lower() for t in (rule.get('apply_to_segments') or [])]
             vol_db = float(rule.get('volume_db') if rule.get('volume_db') is not None else -15)
             fade_in_ms = int(max(0.0, float(rule.get('fade_in_s') or 0.0)) * 1000)
@@ -890,6 +1011,7 @@ def build_template_and_final_mix_step(
     except Exception as e:
         log.append(f"[MUSIC_RULES_WARN] {type(e).__name__}: {e}")
 
+    final_mix = mix.render()
     try:
         log.append(f"[FINAL_MIX] duration_ms={len(final_mix)}")
     except Exception:
@@ -915,7 +1037,7 @@ def build_template_and_final_mix_step(
         log.append(f"Saved final content to {final_path.name}")
     except Exception as e:
         log.append(f"[FINAL_EXPORT_ERROR] {e}; falling back to cleaned content export")
-        final_path = OUTPUT_DIR / cleaned_filename
+        final_path = OUTPUT_DIR / f"{Path(cleaned_filename).stem}.mp3"
         try:
             cleaned_audio.export(final_path, format="mp3")
         except Exception:
@@ -1037,6 +1159,8 @@ __all__ = [
     'execute_intern_commands_step',
     'compress_pauses_step',
     'export_cleaned_audio_step',
+    'prepare_template_segments',
+    'prepare_music_beds',
     'build_template_and_final_mix_step',
     'write_final_transcripts_and_cleanup',
 ]
@@ -1161,7 +1285,22 @@ def do_tts(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[str], *, ai_cmd
     }
 
 
-def do_export(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[str], *, template: Any, cleaned_audio: AudioSegment, main_content_filename: str, output_filename: str, cover_image_path: Optional[str], mutable_words: List[Dict[str, Any]], sanitized_output_filename: str) -> Dict[str, Any]:
+def do_template(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[str], *, template: Any) -> Dict[str, Any]:
+    segments = prepare_template_segments(
+        template,
+        cfg.get('tts_overrides', {}) or {},
+        str(cfg.get('tts_provider') or 'elevenlabs'),
+        cfg.get('elevenlabs_api_key'),
+        log,
+    )
+    return {'template_segments': segments}
+
+
+def do_music_beds(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[str], *, template: Any) -> Dict[str, Any]:
+    return {'music_beds': prepare_music_beds(template, log)}
+
+
+def do_export(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[str], *, template: Any, cleaned_audio: AudioSegment, main_content_filename: str, output_filename: str, cover_image_path: Optional[str], mutable_words: List[Dict[str, Any]], sanitized_output_filename: str, template_segments: Optional[List[Tuple[dict, Optional[AudioSegment]]]] = None, music_beds: Optional[List[Tuple[dict, Path, AudioSegment]]] = None) -> Dict[str, Any]:
     # Export cleaned audio first
     cleaned_filename, cleaned_path = export_cleaned_audio_step(main_content_filename, cleaned_audio, log)
 
@@ -1178,6 +1317,8 @@ def do_export(paths: Dict[str, Any], cfg: Dict[str, Any], log: List[str], *, tem
         output_filename,
         str(paths.get('cover_art') or '') or None if cover_image_path is None else cover_image_path,
         log,
+        segments=template_segments,
+        beds=music_beds,
     )
     write_final_transcripts_and_cleanup(sanitized_output_filename, mutable_words, placements, template, main_content_filename, log)
     return {
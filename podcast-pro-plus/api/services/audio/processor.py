@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-import json, re
+from typing import Any, Dict, List, Optional, Tuple, cast
+import json, os, queue, re, threading, time, weakref
 
 from api.services.audio.orchestrator import run_episode_pipeline
 from api.core.paths import FINAL_DIR as _FINAL_DIR, CLEANED_DIR as _CLEANED_DIR, TRANSCRIPTS_DIR as _TRANSCRIPTS_DIR, AI_SEGMENTS_DIR as _AI_SEGMENTS_DIR
@@ -37,25 +37,179 @@ def _write_nopunct_sidecar_from_main(main_json_path: Path) -> Path:
     return out_path
 
 
+_FLUSH = object()
+_CLOSE = object()
+
+
+class _LogWriter:
+    """Owns the open log file for a StreamingLog.
+
+    Lines go into a buffered handle that is flushed on request (stage
+    boundaries), whenever ``interval`` seconds passed since the last flush, and
+    by a timer so a job that crashes or is killed loses at most that window.
+    With ``background=True`` appends are handed to a writer thread via a queue
+    and the caller never touches the file.
+    """
+
+    def __init__(self, file_path: Path, interval: float, background: bool):
+        self.file_path = file_path
+        self.interval = max(0.05, float(interval))
+        self._lock = threading.Lock()
+        self._fh = None
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self._q: Optional[queue.SimpleQueue] = queue.SimpleQueue() if background else None
+        target = self._drain if background else self._tick
+        self._thread = threading.Thread(target=target, name="assembly-log-writer", daemon=True)
+        self._thread.start()
+
+    # --- file ops (caller holds _lock or is the writer thread) -------------
+    def _write_now(self, line: str) -> None:
+        if self._fh is None:
+            self._fh = open(self.file_path, 'a', encoding='utf-8', buffering=64 * 1024)
+        self._fh.write(line)
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.interval:
+            self._flush_now()
+
+    def _flush_now(self) -> None:
+        if self._fh is not None and self._dirty:
+            self._fh.flush()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    # --- threads -----------------------------------------------------------
+    def _tick(self) -> None:
+        while not self._closed.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def _drain(self) -> None:
+        q = cast(queue.SimpleQueue, self._q)
+        while True:
+            try:
+                item = q.get(timeout=self.interval)
+            except queue.Empty:
+                item = _FLUSH
+            try:
+                with self._lock:
+                    if item is _CLOSE:
+                        self._close_file()
+                        return
+                    if item is _FLUSH or isinstance(item, threading.Event):
+                        self._flush_now()
+                    else:
+                        self._write_now(cast(str, item))
+            except Exception:
+                pass
+            finally:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _close_file(self) -> None:
+        fh, self._fh = self._fh, None
+        if fh is not None:
+            fh.close()
+        self._dirty = False
+
+    # --- public --------------------------------------------------------------
+    def write(self, line: str) -> None:
+        if self._closed.is_set():
+            # Late appends after close(): plain append, same bytes as before
+            with open(self.file_path, 'a', encoding='utf-8') as fh:
+                fh.write(line)
+            return
+        if self._q is not None:
+            self._q.put(line)
+            return
+        with self._lock:
+            self._write_now(line)
+
+    def flush(self) -> None:
+        if self._closed.is_set():
+            return
+        if self._q is not None:
+            done = threading.Event()
+            self._q.put(done)
+            done.wait(timeout=5.0)
+            return
+        with self._lock:
+            self._flush_now()
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        if self._q is not None:
+            self._q.put(_CLOSE)
+            self._thread.join(timeout=5.0)
+            self._closed.set()
+            # Anything appended concurrently with close() lands after the drained lines
+            while True:
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, str):
+                    self.write(item)
+            return
+        self._closed.set()
+        with self._lock:
+            self._close_file()
+
+
 class StreamingLog(list):
-    """A list-like logger that also appends each entry to a file immediately."""
-    def __init__(self, file_path: Path):
+    """A list-like logger that also appends each entry to a file.
+
+    The file is kept open behind a buffer instead of being reopened per line;
+    call ``flush()`` at stage boundaries and ``close()`` when the job is done.
+    Unflushed lines reach disk within ``FLUSH_INTERVAL_S`` even if the job
+    crashes, and are flushed at interpreter exit. Set
+    ``ASSEMBLY_LOG_BACKGROUND=1`` (or ``background=True``) to write through a
+    queue on a dedicated thread.
+    """
+    FLUSH_INTERVAL_S = 1.0
+
+    def __init__(self, file_path: Path, *, flush_interval: Optional[float] = None, background: Optional[bool] = None):
         super().__init__()
         self.file_path = file_path
         try:
             self.file_path.parent.mkdir(parents=True, exist_ok=True)
         except Exception:
             pass
+        if background is None:
+            background = os.getenv("ASSEMBLY_LOG_BACKGROUND", "").strip().lower() in {"1", "true", "yes", "on"}
+        self._writer = _LogWriter(
+            self.file_path,
+            self.FLUSH_INTERVAL_S if flush_interval is None else flush_interval,
+            bool(background),
+        )
+        # Runs on close(), garbage collection or interpreter exit, whichever is first
+        self._finalizer = weakref.finalize(self, self._writer.close)
+
     def append(self, item: str):  # type: ignore[override]
         try:
             super().append(item)
         finally:
             try:
-                with open(self.file_path, 'a', encoding='utf-8') as fh:
-                    fh.write((str(item or '').replace('\n',' ') + '\n'))
+                self._writer.write(str(item or '').replace('\n',' ') + '\n')
             except Exception:
                 pass
 
+    def flush(self) -> None:
+        try:
+            self._writer.flush()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        try:
+            self._finalizer()
+        except Exception:
+            pass
+
 
 class AudioProcessingError(Exception):
     pass
@@ -74,6 +228,7 @@ def process_and_assemble_episode(
     mix_only: bool = False,
     words_json_path: Optional[str] = None,
     log_path: Optional[str] = None,
+    checkpoints: Optional[Any] = None,
 ) -> Tuple[Path, List[str], List[str]]:
     """Thin façade that delegates to the orchestrator (AP-8B).
 
@@ -105,6 +260,7 @@ def process_and_assemble_episode(
         "tts_provider": tts_provider,
         "elevenlabs_api_key": elevenlabs_api_key,
         "mix_only": bool(mix_only),
+        "checkpoints": checkpoints,
     }
 
     # Delegate to the orchestrator and adapt the return to the legacy tuple
@@ -136,6 +292,10 @@ def process_and_assemble_episode(
     except RuntimeError as e:
         # Preserve historical exception type surfaced by processor
         raise AudioProcessingError(str(e))
+    finally:
+        # Callers rewrite the log file once we return; make sure buffered lines are out first
+        if isinstance(log, StreamingLog):
+            log.close()
 
     fp = out.get("final_path")
     if isinstance(fp, Path):
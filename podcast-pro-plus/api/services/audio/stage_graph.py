@@ -0,0 +1,211 @@
+"""Run the assembly pipeline as a graph of stages.
+
+Each ``Stage`` declares the values it reads and the values it produces. A
+``StageGraph`` checks that the declaration order is a valid sequential order
+(every input is an initial value or the output of an earlier stage) and runs
+the stages on a thread pool: a stage starts as soon as the stages producing its
+inputs are done, so independent branches (the template's TTS and music beds
+versus the content cleanup) overlap. The stages themselves are mostly waiting
+on ffmpeg, TTS providers or NumPy, all of which release the GIL.
+
+The run looks sequential from the outside. Every stage writes its log lines to
+its own list, which is copied to the job log in declaration order: a stage
+whose predecessors are all done writes through as it goes, the others hold
+their lines until their turn. Each stage's lines end with its ``[STAGE_TIMING]``
+line. If stages fail, no stage
+declared after the first failure is started, and that failure is raised once
+everything declared before it has finished, as the sequential run would have.
+With one worker the stages simply run in order on the calling thread.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+StageFn = Callable[[Mapping[str, Any], List[str]], Mapping[str, Any]]
+
+
+def max_workers() -> int:
+    """Stage threads per assembly (``ASSEMBLY_STAGE_WORKERS``; 1 runs the stages in order)."""
+    try:
+        return max(1, int(os.getenv("ASSEMBLY_STAGE_WORKERS", "") or 3))
+    except ValueError:
+        return 3
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step: ``fn(inputs, log)`` returns a mapping with (at least) every name in ``outputs``."""
+
+    name: str
+    fn: StageFn
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    """When a stage started (seconds after the run started) and how long it took."""
+
+    name: str
+    start_s: float
+    seconds: float
+    ok: bool = True
+
+    def as_log(self) -> str:
+        status = "" if self.ok else " failed=1"
+        return f"[STAGE_TIMING] stage={self.name} start_s={self.start_s:.2f} seconds={self.seconds:.2f}{status}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"stage": self.name, "start_s": round(self.start_s, 3), "seconds": round(self.seconds, 3), "ok": self.ok}
+
+
+class _StageLog(list):
+    """A stage's log lines; once ``forward_to`` is called they are also copied to the job log."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._target: Optional[List[str]] = None
+        self._sent = 0
+
+    def append(self, item: Any) -> None:  # type: ignore[override]
+        with self._lock:
+            super().append(item)
+            self._drain()
+
+    def extend(self, items: Iterable[Any]) -> None:  # type: ignore[override]
+        for item in items:
+            self.append(item)
+
+    def forward_to(self, target: List[str]) -> None:
+        with self._lock:
+            self._target = target
+            self._drain()
+
+    def _drain(self) -> None:
+        if self._target is None:
+            return
+        while self._sent < len(self):
+            self._target.append(self[self._sent])
+            self._sent += 1
+
+
+@dataclass
+class _Outcome:
+    lines: _StageLog
+    timing: StageTiming
+    outputs: Optional[Mapping[str, Any]] = None
+    error: Optional[BaseException] = None
+
+
+class StageGraph:
+    """Stages in sequential order, with the dependencies their declarations imply."""
+
+    def __init__(self, stages: Sequence[Stage], initial: Iterable[str] = ()) -> None:
+        self.stages = list(stages)
+        producer: Dict[str, str] = {name: "" for name in initial}
+        self.deps: Dict[str, Tuple[str, ...]] = {}
+        for stage in self.stages:
+            if stage.name in self.deps:
+                raise ValueError(f"duplicate stage {stage.name!r}")
+            missing = [k for k in stage.inputs if k not in producer]
+            if missing:
+                raise ValueError(f"stage {stage.name!r} reads {missing} before any stage produces them")
+            self.deps[stage.name] = tuple(sorted({producer[k] for k in stage.inputs if producer[k]}))
+            for key in stage.outputs:
+                if key in producer:
+                    raise ValueError(f"stage {stage.name!r} produces {key!r}, which is already produced")
+                producer[key] = stage.name
+
+    def run(
+        self,
+        values: Dict[str, Any],
+        log: List[str],
+        *,
+        workers: Optional[int] = None,
+        on_stage_done: Optional[Callable[[Stage], None]] = None,
+    ) -> List[StageTiming]:
+        """Run every stage, adding their outputs to ``values``; returns the timings in declaration order."""
+        workers = max_workers() if workers is None else max(1, int(workers))
+        t0 = time.perf_counter()
+        timings: List[StageTiming] = []
+
+        def _release(stage: Stage, outcome: _Outcome) -> None:
+            outcome.lines.forward_to(log)
+            log.append(outcome.timing.as_log())
+            timings.append(outcome.timing)
+            if on_stage_done is not None:
+                on_stage_done(stage)
+            if outcome.error is not None:
+                raise outcome.error
+
+        if workers == 1:
+            for stage in self.stages:
+                lines = _StageLog()
+                lines.forward_to(log)
+                outcome = self._run_stage(stage, values, lines, t0)
+                values.update(outcome.outputs or {})
+                _release(stage, outcome)
+            return timings
+
+        by_name = {s.name: s for s in self.stages}
+        index = {s.name: i for i, s in enumerate(self.stages)}
+        done: Dict[str, _Outcome] = {}
+        buffers: Dict[str, _StageLog] = {}
+        running: Dict[Future, str] = {}
+        first_failure = len(self.stages)
+        released = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assembly-stage") as pool:
+            while released < len(self.stages):
+                started = set(done) | set(running.values())
+                for stage in self.stages[:first_failure]:
+                    if stage.name in started:
+                        continue
+                    deps = self.deps[stage.name]
+                    if all(d in done and done[d].error is None for d in deps):
+                        # Inputs are read on this thread; only it writes ``values``
+                        inputs = {k: values[k] for k in stage.inputs}
+                        buffers[stage.name] = _StageLog()
+                        running[pool.submit(self._run_stage, stage, inputs, buffers[stage.name], t0)] = stage.name
+                while released < len(self.stages) and self.stages[released].name in done:
+                    name = self.stages[released].name
+                    released += 1
+                    _release(by_name[name], done[name])
+                if released == len(self.stages):
+                    break
+                head = self.stages[released].name
+                if head in buffers:
+                    buffers[head].forward_to(log)
+                if not running:
+                    # Nothing to wait for, yet the next stage never ran: a scheduling bug, not a stage error
+                    raise RuntimeError(f"stage {self.stages[released].name!r} was never started")
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name = running.pop(fut)
+                    outcome = done[name] = fut.result()
+                    if outcome.error is not None:
+                        first_failure = min(first_failure, index[name])
+                    elif outcome.outputs is not None:
+                        values.update(outcome.outputs)
+        return timings
+
+    def _run_stage(self, stage: Stage, values: Mapping[str, Any], lines: _StageLog, t0: float) -> _Outcome:
+        start = time.perf_counter()
+        outputs: Optional[Mapping[str, Any]] = None
+        error: Optional[BaseException] = None
+        try:
+            result = stage.fn({k: values[k] for k in stage.inputs}, lines) or {}
+            missing = [k for k in stage.outputs if k not in result]
+            if missing:
+                raise ValueError(f"stage {stage.name!r} did not produce {missing}")
+            outputs = {k: result[k] for k in stage.outputs}
+        except BaseException as ex:  # noqa: BLE001 - re-raised when the stage's turn comes
+            error = ex
+        end = time.perf_counter()
+        timing = StageTiming(stage.name, start - t0, end - start, error is None)
+        return _Outcome(lines, timing, outputs, error)
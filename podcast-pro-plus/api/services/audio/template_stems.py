@@ -0,0 +1,139 @@
+"""Pre-rendered template stems.
+
+A template's intro, outro, stingers and TTS segments, and its music beds, are
+the same in every episode that uses it, yet each assembly resolved, decoded,
+synthesized and loudness-matched them again. The final-mix steps now go
+through this cache (namespace ``template_stems``): each prepared segment, and
+the decoded beds of the music rules, are stored as WAV stems together with the
+log lines their preparation wrote. They are keyed by everything they depend on:
+the segment's (or the rules') JSON, the content hash of the media files read,
+the TTS provider and script, and the code that renders them. Editing a
+segment, replacing one of its files or changing a TTS script therefore selects
+another entry for that segment only; stale entries age out of the stage cache.
+
+Stems are rendered when a template is saved (``render_template_stems`` on the
+maintenance queue, see ``enqueue``) or by the first assembly that uses it. A
+render that hit a TTS or decode error is not stored, so a transient provider
+failure is retried by the next assembly instead of being replayed.
+"""
+from __future__ import annotations
+
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydub import AudioSegment
+
+from api.core.lazy import LazyValue
+from api.services.stage_cache import StageCache, StageResult, cache_enabled
+
+log = logging.getLogger("ppp.template_stems")
+
+# Preparation log lines that mark a result which must not be reused
+TRANSIENT_MARKERS = ("[TEMPLATE_TTS_ERROR]", "[TEMPLATE_STATIC_RESOLVE_ERROR]", "[MUSIC_RULES_WARN]")
+
+_CACHE = StageCache("template_stems")
+
+Beds = List[Tuple[dict, Path, AudioSegment]]
+
+
+def _store_segment(out_dir: Path, audio: Optional[AudioSegment]) -> StageResult:
+    if audio is None:
+        return {"audio": False}, {}
+    path = out_dir / "segment.wav"
+    audio.export(path, format="wav")
+    return {"audio": True}, {"segment": path}
+
+
+def _restore_segment(data: Dict[str, Any], files: Dict[str, Path]) -> Optional[AudioSegment]:
+    return AudioSegment.from_file(files["segment"]) if data["audio"] else None
+
+
+def _store_beds(out_dir: Path, beds: Beds) -> StageResult:
+    items: List[Dict[str, Any]] = []
+    files: Dict[str, Path] = {}
+    for i, (rule, path, audio) in enumerate(beds):
+        name = f"bed_{i:03d}"
+        files[name] = out_dir / f"{name}.wav"
+        audio.export(files[name], format="wav")
+        items.append({"rule": rule, "path": str(path), "file": name})
+    return {"beds": items}, files
+
+
+def _restore_beds(data: Dict[str, Any], files: Dict[str, Path]) -> Beds:
+    return [(item["rule"], Path(item["path"]), AudioSegment.from_file(files[item["file"]])) for item in data["beds"]]
+
+
+def _cached(
+    kind: str,
+    inputs: Dict[str, Any],
+    render: Callable[[List[str]], Any],
+    log_lines: List[str],
+    store: Callable[[Path, Any], StageResult],
+    restore: Callable[[Dict[str, Any], Dict[str, Path]], Any],
+) -> Any:
+    if not cache_enabled():
+        return render(log_lines)
+    key = _CACHE.key({"kind": kind, **inputs})
+    hit = _CACHE.get(key, restore=False)
+    if hit is not None:
+        data, files = hit
+        try:
+            result = restore(data, files)
+        except (OSError, KeyError, TypeError, ValueError):
+            log.warning("[template_stems] could not restore %s/%s; rendering again", kind, key[:12], exc_info=True)
+        else:
+            for line in data.get("log") or []:
+                log_lines.append(line)
+            log_lines.append(f"[TEMPLATE_STEMS] {kind} restored from cache key={key[:12]}")
+            return result
+    first_line = len(log_lines)
+    result = render(log_lines)
+    lines = list(log_lines[first_line:])
+    if any(str(line).startswith(TRANSIENT_MARKERS) for line in lines):
+        log_lines.append(f"[TEMPLATE_STEMS] {kind} not cached (render had errors)")
+        return result
+    try:
+        with tempfile.TemporaryDirectory(prefix="template_stems_") as tmp:
+            data, files = store(Path(tmp), result)
+            _CACHE.put(key, {**data, "log": lines}, files, move=True)
+    except (OSError, TypeError, ValueError):
+        log.warning("[template_stems] could not store %s/%s", kind, key[:12], exc_info=True)
+    return result
+
+
+def segment(
+    inputs: Dict[str, Any],
+    render: Callable[[List[str]], Optional[AudioSegment]],
+    log_lines: List[str],
+) -> Optional[AudioSegment]:
+    """A prepared template segment for ``inputs``: from the cache, or ``render(log)`` (then stored)."""
+    return _cached("segment", inputs, render, log_lines, _store_segment, _restore_segment)
+
+
+def music_beds(inputs: Dict[str, Any], render: Callable[[List[str]], Beds], log_lines: List[str]) -> Beds:
+    """Decoded music beds for ``inputs``: from the cache, or ``render(log)`` (then stored)."""
+    return _cached("beds", inputs, render, log_lines, _store_beds, _restore_beds)
+
+
+def _load_task():
+    # The worker package pulls in Celery and the audio stack; load it on the first save
+    from worker.tasks.analysis import render_template_stems
+    return render_template_stems
+
+
+_task = LazyValue(_load_task, name="render_template_stems")
+
+
+def enqueue(template_id: Any) -> None:
+    """Queue rendering of a saved template's stems on the maintenance queue."""
+    _task.get().apply_async(args=[str(template_id)])
+
+
+__all__ = [
+    "TRANSIENT_MARKERS",
+    "enqueue",
+    "music_beds",
+    "segment",
+]
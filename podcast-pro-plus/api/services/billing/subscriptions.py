@@ -0,0 +1,207 @@
+"""Local snapshot of Stripe subscriptions for admin billing reporting.
+
+The ``subscription`` table is kept current by the Stripe webhook
+(``customer.subscription.*``) and by ``reconcile_subscriptions``, which a
+periodic task runs to pick up missed or out-of-order events. Admin views read
+MRR, plan mix and trial counts from SQL instead of paging through Stripe on
+every request.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import case, func
+from sqlmodel import Session, select
+
+from ...core.constants import ALLOWED_PLANS
+from ...models.subscription import Subscription
+from ...models.user import User
+
+log = logging.getLogger(__name__)
+
+LIVE_STATUSES = ("active", "trialing")
+# Columns only the snapshot maintains (the webhook's own fields are written as before)
+SNAPSHOT_COLUMNS = ("amount_cents", "billing_interval", "mrr_cents", "trial_end", "canceled_at")
+_STATUSES = {"active", "trialing", "past_due", "canceled", "incomplete", "incomplete_expired", "unpaid", "paused"}
+
+
+def _get(obj: Any, key: str, default: Any = None) -> Any:
+    """Read ``key`` from a Stripe object or plain dict (webhook payloads)."""
+    if obj is None:
+        return default
+    try:
+        value = obj[key]
+    except (KeyError, TypeError, IndexError):
+        value = getattr(obj, key, default)
+    return default if value is None else value
+
+
+def utc_from_timestamp(value: Any) -> Optional[datetime]:
+    """A Stripe epoch timestamp as naive UTC, like every other datetime column; None if absent or invalid."""
+    try:
+        return datetime.fromtimestamp(int(value), tz=timezone.utc).replace(tzinfo=None) if value else None
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def _monthly_cents(amount: int, interval: Optional[str], count: int) -> Optional[int]:
+    count = max(1, int(count or 1))
+    if interval == "month":
+        return int(round(amount / count))
+    if interval == "year":
+        return int(round(amount / (12.0 * count)))
+    return None  # unknown cadence: excluded from MRR to avoid skew
+
+
+def snapshot_fields(data: Any) -> Dict[str, Any]:
+    """Columns derived from a Stripe subscription object."""
+    items = _get(_get(data, "items"), "data", []) or []
+    amount = 0
+    mrr = 0
+    interval: Optional[str] = None
+    price_id: Optional[str] = None
+    for it in items:
+        price = _get(it, "price")
+        qty = int(_get(it, "quantity", 1) or 1)
+        unit = _get(price, "unit_amount")
+        recurring = _get(price, "recurring")
+        price_id = price_id or _get(price, "id")
+        if unit is None or recurring is None:
+            continue
+        line = int(unit) * qty
+        amount += line
+        interval = interval or _get(recurring, "interval")
+        monthly = _monthly_cents(line, _get(recurring, "interval"), _get(recurring, "interval_count", 1))
+        if monthly is not None:
+            mrr += monthly
+    status = str(_get(data, "status", "incomplete"))
+    return {
+        "status": status if status in _STATUSES else "incomplete",
+        "price_id": price_id or "unknown",
+        "amount_cents": amount if items else None,
+        "billing_interval": interval,
+        "mrr_cents": mrr if items else None,
+        "trial_end": utc_from_timestamp(_get(data, "trial_end")),
+        "canceled_at": utc_from_timestamp(_get(data, "canceled_at")),
+        "cancel_at_period_end": bool(_get(data, "cancel_at_period_end", False)),
+        "current_period_end": utc_from_timestamp(_get(data, "current_period_end")),
+    }
+
+
+def _resolve_user_id(session: Session, data: Any, existing: Optional[Subscription]) -> Optional[UUID]:
+    metadata = _get(data, "metadata", {}) or {}
+    raw = _get(metadata, "user_id")
+    if raw:
+        try:
+            return UUID(str(raw))
+        except ValueError:
+            pass
+    if existing is not None:
+        return existing.user_id
+    customer = _get(data, "customer")
+    if customer:
+        user = session.exec(select(User).where(User.stripe_customer_id == str(customer))).first()
+        if user is not None:
+            return user.id
+    return None
+
+
+def apply_stripe_subscription(session: Session, data: Any, *, commit: bool = True) -> Optional[Subscription]:
+    """Upsert the local row for a Stripe subscription object; returns None if no user matches."""
+    sub_id = _get(data, "id")
+    if not sub_id:
+        return None
+    sub = session.exec(select(Subscription).where(Subscription.stripe_subscription_id == sub_id)).first()
+    user_id = _resolve_user_id(session, data, sub)
+    if user_id is None:
+        log.info("billing.snapshot: no local user for subscription %s", sub_id)
+        return None
+    fields = snapshot_fields(data)
+    metadata = _get(data, "metadata", {}) or {}
+    plan_key = _get(metadata, "plan_key")
+    if sub is None:
+        sub = Subscription(
+            user_id=user_id,
+            stripe_subscription_id=sub_id,
+            plan_key=plan_key if plan_key in ALLOWED_PLANS else "unknown",
+            price_id=fields["price_id"],
+            billing_cycle=_get(metadata, "cycle"),
+        )
+    elif plan_key in ALLOWED_PLANS:
+        sub.plan_key = plan_key
+    for k, v in fields.items():
+        setattr(sub, k, v)
+    sub.updated_at = datetime.utcnow()
+    session.add(sub)
+    if commit:
+        session.commit()
+        session.refresh(sub)
+    return sub
+
+
+def reconcile_subscriptions(session: Session, client: Any) -> Dict[str, int]:
+    """Walk every Stripe subscription once and refresh the local snapshot.
+
+    ``client`` is the ``stripe`` module (or a stub exposing ``Subscription.list``).
+    """
+    seen = updated = skipped = 0
+    listing = client.Subscription.list(status="all", limit=100, expand=["data.items.data.price"])
+    for data in listing.auto_paging_iter():
+        seen += 1
+        if apply_stripe_subscription(session, data, commit=False) is None:
+            skipped += 1
+        else:
+            updated += 1
+        if seen % 100 == 0:
+            session.commit()
+    session.commit()
+    return {"seen": seen, "updated": updated, "skipped": skipped}
+
+
+def billing_overview(session: Session, *, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Counts, MRR and plan mix from the local snapshot (single grouped query plus one for mix)."""
+    now = now or datetime.utcnow()
+    is_active = Subscription.status == "active"
+    is_trial = Subscription.status == "trialing"
+    row = session.exec(
+        select(
+            func.sum(case((is_active, 1), else_=0)),
+            func.sum(case((is_trial, 1), else_=0)),
+            func.sum(case((is_trial & (Subscription.trial_end >= now) & (Subscription.trial_end <= now + timedelta(days=7)), 1), else_=0)),  # type: ignore[operator]
+            func.sum(case(((Subscription.status == "canceled") & (Subscription.canceled_at >= now - timedelta(days=30)), 1), else_=0)),  # type: ignore[operator]
+            func.sum(case((is_active, Subscription.mrr_cents), else_=0)),
+            func.max(Subscription.updated_at),
+        )
+    ).one()
+    active, trialing, trial_expiring, canceled_30d, mrr, updated_at = row
+    mix_rows = session.exec(
+        select(Subscription.plan_key, Subscription.status, func.count())
+        .where(Subscription.status.in_(LIVE_STATUSES))  # type: ignore[attr-defined]
+        .group_by(Subscription.plan_key, Subscription.status)
+    ).all()
+    plan_mix: Dict[str, Dict[str, int]] = {}
+    for plan_key, status, count in mix_rows:
+        plan_mix.setdefault(plan_key, {"active": 0, "trialing": 0})[status] = int(count)
+    active = int(active or 0)
+    return {
+        "active_subscriptions": active,
+        "trialing": int(trialing or 0),
+        "canceled_last_30d": int(canceled_30d or 0),
+        "trial_expiring_7d": int(trial_expiring or 0),
+        "gross_mrr_cents": int(mrr or 0) if active else None,
+        "plan_mix": plan_mix,
+        "snapshot_updated_at": updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at,
+    }
+
+
+__all__ = [
+    "SNAPSHOT_COLUMNS",
+    "apply_stripe_subscription",
+    "billing_overview",
+    "reconcile_subscriptions",
+    "snapshot_fields",
+    "utc_from_timestamp",
+]
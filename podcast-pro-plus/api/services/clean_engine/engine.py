@@ -1,6 +1,6 @@
 ﻿from __future__ import annotations
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import json
 
 from pydub import AudioSegment
@@ -8,6 +8,7 @@ from pydub.exceptions import CouldntDecodeError
 
 from .models import Word, UserSettings, SilenceSettings, InternSettings, CensorSettings
 from .words import parse_words, remap_words_after_cuts, build_filler_cuts, merge_ranges
+from .parallel import SegmentedAudio, segment_episode
 from .features import (
     ensure_ffmpeg,
     apply_flubber_cuts,
@@ -17,6 +18,20 @@ from .features import (
 )
 
 
+def filler_set(user_settings: UserSettings) -> Set[str]:
+    """Normalized filler tokens cut for these settings: the user's list (or defaults) plus aggressive ones."""
+    default_fillers = ["um","uh","er","ah"]
+    user_fillers = getattr(user_settings, 'fillerWords', None) or getattr(user_settings, 'filler_words', None)
+    if not user_fillers:
+        user_fillers = default_fillers
+    # also include any aggressive list if present on settings
+    try:
+        user_fillers = list(dict.fromkeys(list(user_fillers) + list(getattr(user_settings, 'aggressive_fillers', []))))
+    except Exception:
+        user_fillers = list(user_fillers) if isinstance(user_fillers, (list, tuple)) else default_fillers
+    return {str(f).strip().lower() for f in (user_fillers or []) if str(f).strip()}
+
+
 def run_all(
     audio_path: Path,
     words_json_path: Path,
@@ -30,21 +45,34 @@ def run_all(
     flubber_cuts_ms: Optional[List[Tuple[int,int]]] = None,
     output_name: Optional[str] = None,
     disable_intern_insertion: bool = False,
+    analysis: Optional[Any] = None,
 ) -> Dict[str, Any]:
+    """Clean one episode.
+
+    ``analysis`` is a ``preanalysis.Preanalysis`` matching ``audio_path``/``words_json_path``
+    and these settings: its decoded PCM and filler candidates replace the decode and scan.
+    """
     ensure_ffmpeg()
     work_dir = Path(work_dir)
     (work_dir / "cleaned_audio").mkdir(parents=True, exist_ok=True)
     words_raw = json.loads(Path(words_json_path).read_text())
     words = parse_words(words_raw)
+    source = audio_path
+    pcm = getattr(analysis, 'pcm', None)
+    if pcm is not None and Path(pcm).is_file():
+        source = pcm
     try:
-        audio = AudioSegment.from_file(audio_path)
+        audio = AudioSegment.from_file(source)
     except CouldntDecodeError as e:
         # Provide a clearer hint for tests that may have created an empty placeholder
         raise ValueError(
             f"Invalid or empty audio file at {audio_path}; tests should create a real WAV via make_tiny_wav"
         ) from e
     show_notes: List[str] = []
+    source_ms = len(audio)
+    flubber_ms = 0
     if flubber_cuts_ms:
+        flubber_ms = sum(max(0, int(e) - int(s)) for s, e in merge_ranges(list(flubber_cuts_ms), gap_ms=0))
         audio = apply_flubber_cuts(audio, flubber_cuts_ms)
         words = remap_words_after_cuts(words, flubber_cuts_ms)
     if synth is None:
@@ -65,24 +93,20 @@ def run_all(
     # ---- Fillers (CUT)
     # Settings with safe defaults
     remove_fillers_flag = bool(getattr(user_settings, 'removeFillers', getattr(user_settings, 'remove_fillers', True)))
-    default_fillers = ["um","uh","er","ah"]
-    user_fillers = getattr(user_settings, 'fillerWords', None) or getattr(user_settings, 'filler_words', None)
-    if not user_fillers:
-        user_fillers = default_fillers
-    # also include any aggressive list if present on settings
-    try:
-        user_fillers = list(dict.fromkeys(list(user_fillers) + list(getattr(user_settings, 'aggressive_fillers', []))))
-    except Exception:
-        user_fillers = list(user_fillers) if isinstance(user_fillers, (list, tuple)) else default_fillers
 
     filler_cuts: List[Tuple[int,int]] = []
     filler_log_tokens: List[str] = []
     if remove_fillers_flag:
-        # Build spans from current words
-        fset = {str(f).strip().lower() for f in (user_fillers or []) if str(f).strip()}
-        # capture tokens before edits for logging
-        filler_log_tokens = [(w.word or '').strip().lower() for w in words if (w.word or '').strip().lower() in fset]
-        filler_cuts = build_filler_cuts(words, fset)
+        fset = filler_set(user_settings)
+        # Pre-analysis scanned the uploaded transcript; flubber cuts have since retimed it
+        candidates = analysis.filler_candidates(fset) if (analysis is not None and not flubber_cuts_ms) else None
+        if candidates is not None:
+            filler_cuts, filler_log_tokens = candidates
+        else:
+            # Build spans from current words
+            # capture tokens before edits for logging
+            filler_log_tokens = [(w.word or '').strip().lower() for w in words if (w.word or '').strip().lower() in fset]
+            filler_cuts = build_filler_cuts(words, fset)
     else:
         filler_cuts = []
     summary["edits"]["filler_cuts"] = list(merge_ranges(filler_cuts, gap_ms=0)) if filler_cuts else []
@@ -116,6 +140,8 @@ def run_all(
     print(f"[silence] max={max_pause_ms}ms target={target_pause_ms}ms spans={len(silence_cuts)} removed_ms={total_sil_rm}")
     # Accumulate and apply all CUT spans at once
     all_cuts = merge_ranges((prior_cut_spans or []) + (filler_cuts or []) + (silence_cuts or []), gap_ms=0)
+    # Long episodes: split at silences so the cut/censor/SFX splices below run per segment in a process pool
+    audio = segment_episode(audio, words, all_cuts)
     if all_cuts:
         audio = apply_flubber_cuts(audio, all_cuts)
         words = remap_words_after_cuts(words, all_cuts)
@@ -144,9 +170,12 @@ def run_all(
         summary["edits"]["sfx_applied"] = list(sfx_map.keys())
     else:
         summary["edits"]["sfx_applied"] = []
+    if isinstance(audio, SegmentedAudio):
+        audio = audio.join()
     out_name = output_name or f"{Path(audio_path).stem}_processed.mp3"
     out_path = work_dir / "cleaned_audio" / out_name
-    audio.export(out_path, format="mp3")
+    # Format from the name: the worker asks for a lossless intermediate for the mixer
+    audio.export(out_path, format=out_path.suffix.lstrip(".").lower() or "mp3")
     try:
         tr_dir = work_dir / 'transcripts'
         tr_dir.mkdir(parents=True, exist_ok=True)
@@ -167,5 +196,17 @@ def run_all(
         pass
     summary["show_notes"] = show_notes
     summary["final_duration_ms"] = len(audio)
+    # Cleanup stats surfaced on the job status (fillers/pauses removed, time saved)
+    time_saved_ms = flubber_ms + (sum(max(0, e - s) for s, e in all_cuts) if all_cuts else 0)
+    filler_map: Dict[str, int] = {}
+    for tok in filler_log_tokens:
+        filler_map[tok] = filler_map.get(tok, 0) + 1
+    summary["stats"] = {
+        "fillers_removed": len(filler_log_tokens),
+        "pauses_compressed": len(silence_cuts),
+        "time_saved_ms": int(time_saved_ms),
+        "time_saved_pct": round(100.0 * time_saved_ms / source_ms, 1) if source_ms else 0.0,
+        "filler_map": filler_map,
+    }
     return {"final_path": str(out_path), "summary": summary}
 
@@ -10,6 +10,7 @@ from pydub import AudioSegment
 from pydub.generators import Sine
 
 from .utils import to_ms
+from ..parallel import render_stage
 
 
 _LEET_MAP = str.maketrans({
@@ -83,12 +84,21 @@ def _load_or_gen_beep(base: Optional[AudioSegment], duration_ms: int, freq_hz: i
     return seg  # type: ignore[return-value]
 
 
-def apply_censor_beep(
-    audio: AudioSegment,
+def _word_bounds_ms(w: Any) -> Tuple[int, int]:
+    s = getattr(w, "start", None)
+    e = getattr(w, "end", None)
+    if isinstance(w, dict):
+        s = w.get("start", s)
+        e = w.get("end", e)
+    return to_ms(s), to_ms(e)
+
+
+def plan_censor(
     words: List[Dict[str, Any]] | List[Any],
     cfg: Any,
     mutate_words: bool = True,
-) -> Tuple[AudioSegment, List[Tuple[int, int]]]:
+) -> List[Dict[str, Any]]:
+    """Find command prunes and taboo words; returns cut/replace ops sorted by start (ms)."""
     def _get(obj: Any, name: str, default: Any = None) -> Any:
         if isinstance(obj, dict):
             return obj.get(name, default)
@@ -131,13 +141,7 @@ def apply_censor_beep(
         return (t or "").strip()
 
     def _bounds_ms(i: int) -> Tuple[int, int]:
-        w = words[i]
-        s = getattr(w, "start", None)
-        e = getattr(w, "end", None)
-        if isinstance(w, dict):
-            s = w.get("start", s)
-            e = w.get("end", e)
-        return to_ms(s), to_ms(e)
+        return _word_bounds_ms(words[i])
 
     def _set_tok(i: int, v: str) -> None:
         w = words[i]
@@ -305,37 +309,49 @@ def apply_censor_beep(
             else:
                 idx += 1
 
-    if not ops:
-        return audio, []
-
     ops.sort(key=lambda d: int(d["s"]))
+    return ops
+
+
+def splice_censor(audio: AudioSegment, ops: List[Dict[str, Any]]) -> AudioSegment:
     new_audio = AudioSegment.silent(duration=0)
     cursor = 0
-    deltas: List[Tuple[int, int]] = []
-
     for op in ops:
         s = int(op["s"])
         e = int(op["e"])
         new_audio += audio[cursor:s]
-        if op["type"] == "cut":
-            repl_len = 0
-        else:
-            repl = op["repl"]  # type: ignore[assignment]
-            new_audio += repl
-            repl_len = len(repl)
+        if op["type"] != "cut":
+            new_audio += op["repl"]
         cursor = e
-        delta = repl_len - (e - s)
+    new_audio += audio[cursor:]
+    return new_audio
+
+
+def apply_censor_beep(
+    audio: AudioSegment,
+    words: List[Dict[str, Any]] | List[Any],
+    cfg: Any,
+    mutate_words: bool = True,
+) -> Tuple[AudioSegment, List[Tuple[int, int]]]:
+    ops = plan_censor(words, cfg, mutate_words=mutate_words)
+    if not ops:
+        return audio, []
+
+    audio = render_stage(audio, splice_censor, ops)
+
+    deltas: List[Tuple[int, int]] = []
+    for op in ops:
+        s = int(op["s"])
+        repl_len = 0 if op["type"] == "cut" else len(op["repl"])
+        delta = repl_len - (int(op["e"]) - s)
         if delta:
             deltas.append((s, delta))
 
-    new_audio += audio[cursor:]
-    audio = new_audio
-
     deltas.sort(key=lambda x: x[0])
     k = 0
     cum = 0
     for i in range(len(words)):
-        s, e = _bounds_ms(i)
+        s, e = _word_bounds_ms(words[i])
         while k < len(deltas) and deltas[k][0] <= s:
             cum += deltas[k][1]
             k += 1
@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Tuple
 from pydub import AudioSegment
 
+from ..parallel import render_stage
 from ..words import merge_ranges
 
 
@@ -21,6 +22,10 @@ def apply_flubber_cuts(audio: AudioSegment, cuts: List[Tuple[int, int]]) -> Audi
     if not cuts:
         return audio
     merged = merge_ranges(sorted([(int(s), int(e)) for s, e in cuts]), gap_ms=0)
+    return render_stage(audio, splice_cuts, merged)
+
+
+def splice_cuts(audio: AudioSegment, merged: List[Tuple[int, int]]) -> AudioSegment:
     out = AudioSegment.silent(duration=0)
     cursor = 0
     for s, e in merged:
@@ -7,16 +7,16 @@ import re
 from pydub import AudioSegment
 
 from .utils import to_ms
+from ..parallel import render_stage
 
 
-def replace_keywords_with_sfx(
-    audio: AudioSegment,
+def plan_sfx(
     words: List[Any],
     sfx_map: Dict[str, Path],
     gain_db: float = 0.0,
-) -> AudioSegment:
-    out = AudioSegment.silent(duration=0)
-    cursor = 0
+) -> List[Tuple[int, int, AudioSegment]]:
+    """Find SFX keyword phrases (marking them in ``words``); returns (start_ms, end_ms, sfx) ops."""
+    ops: List[Tuple[int, int, AudioSegment]] = []
 
     phrase_list: List[Tuple[List[str], AudioSegment]] = []
     for key, p in sfx_map.items():
@@ -66,8 +66,7 @@ def replace_keywords_with_sfx(
                 s_ms = to_ms(getattr(wi, "start", None))
                 e_ms = to_ms(getattr(wj, "end", None))
 
-                out += audio[cursor:s_ms] + seg
-                cursor = e_ms
+                ops.append((s_ms, e_ms, seg))
 
                 display = " ".join(toks)
                 w0 = words[i]
@@ -90,5 +89,23 @@ def replace_keywords_with_sfx(
         if not matched:
             i += 1
 
+    return ops
+
+
+def splice_sfx(audio: AudioSegment, ops: List[Tuple[int, int, AudioSegment]]) -> AudioSegment:
+    out = AudioSegment.silent(duration=0)
+    cursor = 0
+    for s_ms, e_ms, seg in ops:
+        out += audio[cursor:s_ms] + seg
+        cursor = e_ms
     out += audio[cursor:]
     return out
+
+
+def replace_keywords_with_sfx(
+    audio: AudioSegment,
+    words: List[Any],
+    sfx_map: Dict[str, Path],
+    gain_db: float = 0.0,
+) -> AudioSegment:
+    return render_stage(audio, splice_sfx, plan_sfx(words, sfx_map, gain_db))
@@ -3,7 +3,8 @@ from __future__ import annotations
 from typing import Any, List, Tuple
 from difflib import SequenceMatcher
 from pydub import AudioSegment
-from pydub.silence import detect_silence
+
+from api.services import analysis_proxy
 
 
 def to_ms(v: float | int | None) -> int:
@@ -29,8 +30,8 @@ def slice_ms(seg: AudioSegment, start_ms: int, end_ms: int) -> AudioSegment:
 
 def detect_silences_dbfs(audio: AudioSegment, threshold_dbfs: int, min_len_ms: int) -> List[Tuple[int, int]]:
     """Return [ (start_ms, end_ms), ... ] where audio is below (audio.dBFS + threshold_dbfs) at least min_len_ms."""
-    silence_thresh = int(audio.dBFS + threshold_dbfs)
-    spans = detect_silence(audio, min_silence_len=min_len_ms, silence_thresh=silence_thresh)
+    silence_thresh = int(analysis_proxy.dbfs(audio) + threshold_dbfs)
+    spans = analysis_proxy.detect_silence(audio, min_silence_len=min_len_ms, silence_thresh=silence_thresh)
     return [(int(s), int(e)) for s, e in spans]
 
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydub import AudioSegment
 
@@ -20,6 +20,19 @@ class UserSettings:
     filler_phrases: List[str] = field(default_factory=list)
     strict_filler_removal: bool = False
 
+    @classmethod
+    def from_cleanup_settings(cls, settings: Optional[Dict[str, Any]]) -> "UserSettings":
+        """Engine settings from a user's ``audio_cleanup_settings_json``."""
+        settings = settings or {}
+        return cls(
+            flubber_keyword=str(settings.get('flubberKeyword', 'flubber') or 'flubber'),
+            intern_keyword=str(settings.get('internKeyword', 'intern') or 'intern'),
+            filler_words=settings.get('fillerWords', ["um","uh","like","you know","sort of","kind of"]),
+            aggressive_fillers=settings.get('aggressiveFillersList', []),
+            filler_phrases=settings.get('fillerPhrases', []),
+            strict_filler_removal=bool(settings.get('strictFillerRemoval', True)),
+        )
+
 @dataclass
 class SilenceSettings:
     detect_threshold_dbfs: int = -40
@@ -0,0 +1,407 @@
+"""Silence-aligned parallel splicing for long episodes.
+
+Edit detection (fillers, pauses, censor, SFX) reads the transcript and stays in
+the calling process; it is cheap and needs the whole word timeline. The audio
+splices are what cost: each one rebuilds the episode piece by piece. For long
+episodes ``segment_episode`` splits the PCM at long silences into shared
+memory, and each splice stage then runs once per segment in a process pool.
+Assemblies run in Celery prefork children, which are daemonic: the stdlib
+refuses to start processes from them, so there the pool is billiard's (Celery's
+own multiprocessing fork). Each worker process gets its share of the cores
+(``max_workers``): the default cpu worker already runs one process per core, so
+there the splices stay in-process and the speedup applies to the single-slot
+large worker (see ``worker.tasks.app.WORKLOADS``).
+
+pydub maps a millisecond to ``int(ms * rate / 1000)`` frames from the start of
+the whole episode. A segment therefore remembers its first frame in episode
+coordinates, and ``_Window`` resolves slices exactly as the whole ``AudioSegment``
+would (including its ``len`` clamp and tail padding). The joined result is
+byte-identical to the single-process output. An edit that would straddle a
+segment boundary merges the two segments before the stage runs.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from pydub import AudioSegment
+from pydub.exceptions import TooManyMissingFrames
+
+log = logging.getLogger(__name__)
+
+# Episodes shorter than this are spliced in-process
+PARALLEL_MIN_MS = int(float(os.getenv("CLEAN_ENGINE_PARALLEL_MIN_S", "600")) * 1000)
+SEGMENT_MIN_MS = int(float(os.getenv("CLEAN_ENGINE_SEGMENT_MIN_S", "30")) * 1000)
+# Only word gaps at least this long are split candidates; the split keeps GUARD_MS clear of both words
+SPLIT_GAP_MS = int(os.getenv("CLEAN_ENGINE_SPLIT_GAP_MS", "700"))
+GUARD_MS = int(os.getenv("CLEAN_ENGINE_SPLIT_GUARD_MS", "150"))
+MP_CONTEXT = os.getenv("CLEAN_ENGINE_MP_CONTEXT", "spawn")
+# A billiard pool has no per-call timeout of its own; give up on a stage after this long
+POOL_TIMEOUT_S = float(os.getenv("CLEAN_ENGINE_POOL_TIMEOUT_S", "1800"))
+
+Splice = Callable[[Any, Sequence[Any]], AudioSegment]
+
+
+def max_workers() -> int:
+    """Segment pool size: CLEAN_ENGINE_WORKERS, else the cores divided among the worker's processes.
+
+    The Celery worker records its concurrency in CELERY_WORKER_PROCESSES (see
+    worker.tasks.app); a cpu worker already running one process per core gets
+    no pool, a single-slot large worker gets all the cores.
+    """
+    try:
+        explicit = int(os.getenv("CLEAN_ENGINE_WORKERS", "") or 0)
+    except ValueError:
+        explicit = 0
+    if explicit > 0:
+        return explicit
+    try:
+        processes = max(1, int(os.getenv("CELERY_WORKER_PROCESSES", "") or 1))
+    except ValueError:
+        processes = 1
+    return max(1, (os.cpu_count() or 1) // processes)
+
+
+def _frame_at(ms: int, frame_rate: int) -> int:
+    # Same arithmetic as AudioSegment._parse_position
+    return int(ms * (frame_rate / 1000.0))
+
+
+def _duration_ms(frames: int, frame_rate: int) -> int:
+    # Same arithmetic as AudioSegment.__len__
+    return round(1000 * (float(frames) / frame_rate))
+
+
+def _op_span(op: Any) -> Tuple[int, int]:
+    if isinstance(op, dict):
+        return int(op["s"]), int(op["e"])
+    return int(op[0]), int(op[1])
+
+
+def _op_audio(op: Any) -> Optional[AudioSegment]:
+    repl = op.get("repl") if isinstance(op, dict) else (op[2] if len(op) > 2 else None)
+    return repl if isinstance(repl, AudioSegment) else None
+
+
+def _fits(seg: AudioSegment, frame_rate: int, sample_width: int, channels: int) -> bool:
+    # pydub upgrades both sides of a concatenation to the larger format; anything larger than the
+    # episode would re-encode it mid-splice, which only the single-process path reproduces
+    return seg.frame_rate <= frame_rate and seg.sample_width <= sample_width and seg.channels <= channels
+
+
+class _Window:
+    """One segment, sliced by episode milliseconds as if it were the whole episode."""
+
+    def __init__(self, seg: AudioSegment, first_frame: int, total_ms: int, last: bool) -> None:
+        self.seg = seg
+        self.first_frame = first_frame
+        self.total_ms = total_ms
+        self.last = last
+        self.frames = int(seg.frame_count())
+
+    def __len__(self) -> int:
+        return self.total_ms
+
+    def __getitem__(self, key: slice) -> AudioSegment:
+        if not isinstance(key, slice) or key.step:
+            raise TypeError("segment windows only support plain slices")
+        start = min(key.start if key.start is not None else 0, self.total_ms)
+        end = min(key.stop if key.stop is not None else self.total_ms, self.total_ms)
+        fw = self.seg.frame_width
+        fs = max(0, _frame_at(start, self.seg.frame_rate) - self.first_frame)
+        fe = max(0, _frame_at(end, self.seg.frame_rate) - self.first_frame)
+        if not self.last:
+            # Frames past the end belong to the next segment, which emits them itself
+            fs, fe = min(fs, self.frames), min(fe, self.frames)
+        data = self.seg._data[fs * fw:fe * fw]
+        missing = (fe - fs) - len(data) // fw
+        if missing > 0:
+            # The episode's rounded length can overshoot its last frame; pydub pads with silence
+            if missing > self.seg.frame_count(ms=2):
+                raise TooManyMissingFrames(f"missing frames: {missing}")
+            data += bytes(len(data[:fw])) * missing
+        return self.seg._spawn(data)
+
+
+def _put(data: bytes) -> str:
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        shm.buf[:len(data)] = data
+        return shm.name
+    finally:
+        shm.close()
+
+
+def _get(name: str, offset: int, size: int) -> bytes:
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[offset:offset + size])
+    finally:
+        shm.close()
+
+
+def _unlink(names: Iterable[str]) -> None:
+    from multiprocessing import shared_memory
+
+    for name in names:
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _render_segment(
+    splice: Splice,
+    ops: Sequence[Any],
+    block: str,
+    offset: int,
+    frames: int,
+    first_frame: int,
+    total_ms: int,
+    last: bool,
+    fmt: Dict[str, int],
+) -> Tuple[str, int]:
+    """Pool task: splice one segment read from shared memory; the output goes to a new block."""
+    data = _get(block, offset, frames * fmt["frame_width"])
+    seg = AudioSegment(data=data, sample_width=fmt["sample_width"], frame_rate=fmt["frame_rate"],
+                       channels=fmt["channels"])
+    out = splice(_Window(seg, first_frame, total_ms, last), ops)
+    return _put(out.raw_data), int(out.frame_count())
+
+
+@dataclass
+class _Segment:
+    block: str
+    offset: int
+    frames: int
+
+
+class _BilliardExecutor:
+    """billiard's Pool behind the part of the ``Executor`` interface used here."""
+
+    def __init__(self, workers: int, ctx: Any) -> None:
+        self._pool = ctx.Pool(processes=workers)
+
+    def map(self, fn: Callable[..., Any], *iterables: Iterable[Any]) -> List[Any]:
+        return self._pool.starmap_async(fn, list(zip(*iterables))).get(timeout=POOL_TIMEOUT_S)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        if wait:
+            self._pool.join()
+
+
+def _new_pool(workers: int) -> Union[Executor, _BilliardExecutor]:
+    import multiprocessing
+
+    if multiprocessing.current_process().daemon:
+        # A Celery prefork child: only billiard may start processes from here
+        import billiard
+
+        return _BilliardExecutor(workers, billiard.get_context(MP_CONTEXT))
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(MP_CONTEXT))
+
+
+def _release(blocks: set, pool: List[Any]) -> None:
+    if pool[0] is not None:
+        pool[0].shutdown(wait=True, cancel_futures=True)
+        pool[0] = None
+    _unlink(list(blocks))
+    blocks.clear()
+
+
+class SegmentedAudio:
+    """An episode split into segments that are spliced in parallel and joined at the end."""
+
+    def __init__(self, audio: AudioSegment, split_ms: Sequence[int], workers: int) -> None:
+        self._proto = audio._spawn(b"")
+        self.workers = workers
+        self._blocks: set = set()
+        self._pool: List[Any] = [None]
+        self._finalizer = weakref.finalize(self, _release, self._blocks, self._pool)
+        total = int(audio.frame_count())
+        edges = sorted({_frame_at(ms, audio.frame_rate) for ms in split_ms} - {0})
+        edges = [0] + [f for f in edges if f < total] + [total]
+        block = _put(audio.raw_data)
+        self._blocks.add(block)
+        fw = audio.frame_width
+        self.segments = [_Segment(block, a * fw, b - a) for a, b in zip(edges, edges[1:])]
+
+    @property
+    def frame_rate(self) -> int:
+        return self._proto.frame_rate
+
+    def frame_count(self) -> int:
+        return sum(s.frames for s in self.segments)
+
+    def __len__(self) -> int:
+        return _duration_ms(self.frame_count(), self.frame_rate)
+
+    def _fmt(self) -> Dict[str, int]:
+        p = self._proto
+        return {"sample_width": p.sample_width, "frame_rate": p.frame_rate, "channels": p.channels,
+                "frame_width": p.frame_width}
+
+    def _read(self, seg: _Segment) -> bytes:
+        return _get(seg.block, seg.offset, seg.frames * self._proto.frame_width)
+
+    def _merge(self, k: int) -> None:
+        a, b = self.segments[k], self.segments[k + 1]
+        block = _put(self._read(a) + self._read(b))
+        self._blocks.add(block)
+        self.segments[k:k + 2] = [_Segment(block, 0, a.frames + b.frames)]
+
+    def _assign(self, ops: Sequence[Any], total_ms: int) -> List[List[Any]]:
+        """Group ops by segment, merging segments that an op would straddle."""
+        rate = self.frame_rate
+        while True:
+            starts, pos = [], 0
+            for s in self.segments:
+                starts.append(pos)
+                pos += s.frames
+            groups: List[List[Any]] = [[] for _ in self.segments]
+            for op in ops:
+                s_ms, e_ms = _op_span(op)
+                fs = _frame_at(min(s_ms, total_ms), rate)
+                fe = _frame_at(min(e_ms, total_ms), rate)
+                k = max(0, bisect.bisect_right(starts, fs) - 1)
+                if k + 1 < len(starts) and fe > starts[k + 1]:
+                    self._merge(k)
+                    break
+                groups[k].append(op)
+            else:
+                return groups
+
+    def _executor(self) -> Any:
+        if self._pool[0] is None:
+            try:
+                self._pool[0] = _new_pool(self.workers)
+            except Exception:
+                log.warning("[clean_engine] process pool unavailable; splicing segments in-process", exc_info=True)
+                self.workers = 1
+        return self._pool[0]
+
+    def _drop_pool(self) -> None:
+        # A pool that failed once is not retried: the remaining stages splice in-process
+        pool, self._pool[0] = self._pool[0], None
+        self.workers = 1
+        if pool is not None:
+            try:
+                pool.shutdown(wait=True, cancel_futures=True)
+            except Exception:
+                log.debug("[clean_engine] pool shutdown failed", exc_info=True)
+
+    def render(self, splice: Splice, ops: Sequence[Any]) -> "SegmentedAudio":
+        """Run ``splice(audio, ops)`` segment by segment (ops in episode milliseconds)."""
+        p = self._proto
+        if any(r is not None and not _fits(r, p.frame_rate, p.sample_width, p.channels) for r in map(_op_audio, ops)):
+            whole = splice(self.join(keep=True), ops)
+            self._reset(whole)
+            return self
+        total_ms = len(self)
+        groups = self._assign(ops, total_ms)
+        fmt, first, jobs = self._fmt(), 0, []
+        for k, (seg, group) in enumerate(zip(self.segments, groups)):
+            last = k == len(self.segments) - 1
+            jobs.append((splice, group, seg.block, seg.offset, seg.frames, first, total_ms, last, fmt))
+            first += seg.frames
+        results = None
+        pool = self._executor() if self.workers > 1 and len(jobs) > 1 else None
+        if pool is not None:
+            try:
+                results = list(pool.map(_render_segment, *zip(*jobs)))
+            except Exception:
+                log.warning("[clean_engine] parallel splice failed; splicing the rest in-process", exc_info=True)
+                self._drop_pool()
+        if results is None:
+            results = [_render_segment(*job) for job in jobs]
+        old = set(self._blocks)
+        self.segments = [_Segment(name, 0, frames) for name, frames in results]
+        self._blocks.update(name for name, _ in results)
+        _unlink(old)
+        self._blocks.difference_update(old)
+        return self
+
+    def _reset(self, audio: AudioSegment) -> None:
+        old = set(self._blocks)
+        block = _put(audio.raw_data)
+        self._proto = audio._spawn(b"")
+        self.segments = [_Segment(block, 0, int(audio.frame_count()))]
+        self._blocks.add(block)
+        _unlink(old)
+        self._blocks.difference_update(old)
+
+    def join(self, keep: bool = False) -> AudioSegment:
+        """The rendered episode; releases the pool and shared memory unless ``keep``."""
+        audio = self._proto._spawn(b"".join(self._read(s) for s in self.segments))
+        if not keep:
+            self.close()
+        return audio
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+def split_points(words: Sequence[Any], cuts: Sequence[Tuple[int, int]], total_ms: int, target_ms: int) -> List[int]:
+    """Split positions (ms) in long word gaps, roughly ``target_ms`` apart, never inside a cut."""
+    cut_starts = [int(s) for s, _ in cuts]
+    points: List[int] = []
+    last = 0
+    ws = sorted(words, key=lambda w: (w.start, w.end))
+    for prev, nxt in zip(ws, ws[1:]):
+        gap_s, gap_e = int(round(prev.end * 1000)), int(round(nxt.start * 1000))
+        lo, hi = gap_s + GUARD_MS, gap_e - GUARD_MS
+        if gap_e - gap_s < SPLIT_GAP_MS or hi < lo:
+            continue
+        point = (lo + hi) // 2
+        # Inside a pause cut: split where the cut starts so the whole cut stays in the next segment
+        k = bisect.bisect_right(cut_starts, point) - 1
+        if k >= 0 and int(cuts[k][0]) < point < int(cuts[k][1]):
+            point = int(cuts[k][0])
+        if point - last >= target_ms and total_ms - point >= target_ms // 2:
+            points.append(point)
+            last = point
+    return points
+
+
+def segment_episode(
+    audio: AudioSegment,
+    words: Sequence[Any],
+    cuts: Sequence[Tuple[int, int]] = (),
+    workers: Optional[int] = None,
+) -> Union[AudioSegment, SegmentedAudio]:
+    """Split a long episode at silences for parallel splicing; other audio is returned unchanged."""
+    workers = max_workers() if workers is None else workers
+    total_ms = len(audio)
+    if workers < 2 or total_ms < PARALLEL_MIN_MS:
+        return audio
+    if not _fits(AudioSegment.silent(duration=0), audio.frame_rate, audio.sample_width, audio.channels):
+        return audio
+    points = split_points(words, sorted(cuts), total_ms, max(SEGMENT_MIN_MS, total_ms // (workers * 2)))
+    if not points:
+        return audio
+    return SegmentedAudio(audio, points, workers)
+
+
+def render_stage(audio: Any, splice: Splice, ops: Sequence[Any]) -> Any:
+    """Apply a splice to an ``AudioSegment``, or per segment to a ``SegmentedAudio``."""
+    if isinstance(audio, SegmentedAudio):
+        return audio.render(splice, ops)
+    return splice(audio, ops)
+
+
+__all__ = ["SegmentedAudio", "segment_episode", "split_points", "render_stage", "max_workers"]
@@ -1,19 +1,18 @@
 from __future__ import annotations
 
 import time
+from importlib.util import find_spec
 from typing import Any, Dict, List, Optional
 
 import json
 
-try:
-    # Prefer httpx if present for better timeouts; fall back to requests
-    import httpx  # type: ignore
+from api.core.lazy import LazyModule
 
-    _HTTPX_AVAILABLE = True
-except Exception:  # pragma: no cover - optional dependency
-    import requests  # type: ignore
-
-    _HTTPX_AVAILABLE = False
+# Prefer httpx if present for better timeouts; fall back to requests. Either one
+# is imported on the first API call, not when the router loads.
+_HTTPX_AVAILABLE = find_spec("httpx") is not None
+httpx = LazyModule("httpx")
+requests = LazyModule("requests")
 
 
 class ElevenLabsService:
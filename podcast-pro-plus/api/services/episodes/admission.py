@@ -0,0 +1,407 @@
+"""Memory-aware admission for assembly jobs.
+
+A worker host runs several assemblies at once (one per prefork child). Each one
+holds the decoded episode in memory several times over, so a handful of long or
+high-rate uploads can push the host into swap or the OOM killer. Before a job
+starts, its peak memory is estimated from the stored probe (duration, sample
+rate, channels) and the enabled cleanup features. The estimate is then reserved
+against a per-host budget in ``HostLedger``:
+
+- jobs larger than ``large_job_mb()`` go to the ``large`` queue, whose worker runs
+  one job at a time. The API routes at enqueue time only when
+  ``ASSEMBLY_LARGE_JOB_MB`` is set explicitly: its own host's memory says nothing
+  about the workers', so otherwise the worker reroutes on arrival;
+- jobs that do not fit next to what is already running are deferred (retried
+  later) and, after ``MAX_DEFERRALS``, rerouted to the ``large`` queue;
+- a job is always admitted on an idle host, so an estimate above the budget
+  cannot block forever.
+
+``PeakRss`` samples the resident set of the worker process and its descendants
+(the clean engine's segment pool) while the job runs, and the job stats record
+the estimate next to the measured peak.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from uuid import UUID
+
+from sqlmodel import Session
+
+from api.services import media_probe
+
+try:  # POSIX only; on Windows the ledger is shared by the threads of one process
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+log = logging.getLogger("ppp.episodes.admission")
+
+LARGE_QUEUE = "large"
+ADMIT, DEFER, REROUTE = "admit", "defer", "reroute"
+
+# Interpreter, pydub, numpy, SQLAlchemy and the mixer's template clips
+BASE_MB = float(os.getenv("ASSEMBLY_BASE_MB", "350"))
+DEFER_COUNTDOWN_S = int(os.getenv("ASSEMBLY_DEFER_COUNTDOWN_S", "30"))
+MAX_DEFERRALS = int(os.getenv("ASSEMBLY_MAX_DEFERRALS", "20"))
+# Past the large queue's hard time limit a reservation can only belong to a leaked job
+RESERVATION_TTL_S = int(os.getenv("ASSEMBLY_RESERVATION_TTL_S", "7500"))
+SAMPLE_INTERVAL_S = 0.25
+_BYTES_PER_SAMPLE = 2  # pydub decodes to 16-bit PCM
+_MB = 1024 * 1024
+
+# Full-length PCM copies alive at the busiest point of each phase:
+# decoded source, spliced result and the export buffer in the clean engine ...
+_ENGINE_COPIES = 3
+# ... plus one per stage that renders the whole episode again
+_FEATURE_COPIES = {"censor": 1, "sfx": 1, "intern": 1}
+# Shared-memory segments and the joined result when the episode is split for the process pool
+_SEGMENTED_COPIES = 2
+# Mixer: cleaned content, the background bed, the overlay result and the export buffer
+_MIXER_COPIES = 4
+# Same threshold as clean_engine.parallel, read here so the API need not import the audio stack
+_SEGMENTED_MIN_S = float(os.getenv("CLEAN_ENGINE_PARALLEL_MIN_S", "600"))
+
+
+def _env_float(name: str) -> Optional[float]:
+    try:
+        value = os.getenv(name, "").strip()
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def host_memory_mb() -> float:
+    """Memory available to this host or container: cgroup limit if set, else MemTotal."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            raw = Path(path).read_text().strip()
+        except OSError:
+            continue
+        # cgroup v1 reports "no limit" as a huge number rather than "max"
+        if raw.isdigit() and int(raw) < (1 << 60):
+            return int(raw) / _MB
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemTotal:"):
+                return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 4096.0
+
+
+def budget_mb() -> float:
+    """Memory all concurrent assemblies on this host may reserve together."""
+    return _env_float("ASSEMBLY_MEMORY_BUDGET_MB") or host_memory_mb() * 0.75
+
+
+def large_job_mb() -> float:
+    """Estimates above this run on the ``large`` queue instead of sharing a cpu worker."""
+    return _env_float("ASSEMBLY_LARGE_JOB_MB") or budget_mb() / 2
+
+
+@dataclass(frozen=True)
+class Estimate:
+    peak_mb: float
+    duration_s: float
+    sample_rate: int
+    channels: int
+    features: tuple = ()
+
+    def as_stats(self) -> Dict[str, Any]:
+        return {"estimate_mb": round(self.peak_mb, 1), "duration_s": self.duration_s,
+                "sample_rate": self.sample_rate, "channels": self.channels, "features": list(self.features)}
+
+
+def estimate_peak_mb(
+    duration_s: float,
+    sample_rate: int = 44100,
+    channels: int = 2,
+    *,
+    censor: bool = False,
+    sfx: bool = False,
+    intern: bool = False,
+    segmented: Optional[bool] = None,
+) -> float:
+    """Peak resident memory of one assembly, in MB.
+
+    ``segmented`` defaults to whether the clean engine would split an episode of
+    this length across its process pool.
+    """
+    if segmented is None:
+        segmented = duration_s >= _SEGMENTED_MIN_S
+    pcm_mb = max(0.0, float(duration_s)) * int(sample_rate or 44100) * int(channels or 2) * _BYTES_PER_SAMPLE / _MB
+    enabled = {"censor": censor, "sfx": sfx, "intern": intern}
+    engine = _ENGINE_COPIES + sum(n for name, n in _FEATURE_COPIES.items() if enabled[name])
+    if segmented:
+        engine += _SEGMENTED_COPIES
+    return BASE_MB + pcm_mb * max(engine, _MIXER_COPIES)
+
+
+def _cleanup_settings(session: Session, user_id: UUID) -> Dict[str, Any]:
+    from api.core import crud
+    user = crud.get_user_by_id(session, user_id)
+    try:
+        settings = json.loads(getattr(user, "audio_cleanup_settings_json", None) or "{}")
+    except (TypeError, ValueError):
+        settings = {}
+    return settings if isinstance(settings, dict) else {}
+
+
+def estimate_for_job(
+    session: Session,
+    user_id: UUID,
+    filename: str,
+    intents: Optional[Dict[str, Any]] = None,
+) -> Estimate:
+    """Estimate an assembly of ``filename`` from its stored probe and the user's cleanup settings."""
+    item = media_probe.find_media_item(session, user_id, filename)
+    duration = float(getattr(item, "duration_s", None) or 0.0)
+    if not duration:
+        duration = media_probe.source_duration_seconds(session, user_id, filename)
+    rate = int(getattr(item, "sample_rate", None) or 44100)
+    channels = int(getattr(item, "channels", None) or 2)
+
+    settings = _cleanup_settings(session, user_id)
+    intents = intents if isinstance(intents, dict) else {}
+    intent = {k: str(intents.get(k) or "").lower() for k in ("censor", "sfx", "intern")}
+    features = {
+        "censor": intent["censor"] == "yes" or (intent["censor"] != "no" and bool(settings.get("censorEnabled"))),
+        "sfx": intent["sfx"] != "no",
+        "intern": intent["intern"] == "yes",
+    }
+    peak = estimate_peak_mb(duration, rate, channels, **features)
+    return Estimate(peak, duration, rate, channels, tuple(k for k, on in features.items() if on))
+
+
+def large_queue_options() -> Dict[str, Any]:
+    """``apply_async``/``retry`` options for the large-job queue, with its longer time limits."""
+    from worker.tasks.app import WORKLOADS
+    wl = WORKLOADS[LARGE_QUEUE]
+    return {"queue": LARGE_QUEUE, "time_limit": wl["time_limit"], "soft_time_limit": wl["soft_time_limit"]}
+
+
+def enqueue_large_job_mb() -> Optional[float]:
+    """The large-job threshold the API may route by: only an explicit ``ASSEMBLY_LARGE_JOB_MB``.
+
+    The host-relative default describes the worker's memory, which the API
+    process cannot see; ``decide`` applies it when the job reaches a worker.
+    """
+    return _env_float("ASSEMBLY_LARGE_JOB_MB")
+
+
+def enqueue_options(estimate_mb: float) -> Dict[str, Any]:
+    """Options sending an oversized job straight to the large-job queue (empty otherwise)."""
+    threshold = enqueue_large_job_mb()
+    return large_queue_options() if threshold is not None and estimate_mb > threshold else {}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class HostLedger:
+    """Memory reservations of the assemblies running on this host.
+
+    One JSON file per job in a host-local directory, guarded by a file lock, so
+    every worker process (cpu and large) draws on the same budget. Reservations
+    whose process has died are dropped on the next read.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, budget: Optional[float] = None) -> None:
+        self.directory = Path(directory or os.getenv("ASSEMBLY_ADMISSION_DIR")
+                              or Path(tempfile.gettempdir()) / "ppp-assembly-admission")
+        self._budget = budget
+        self._thread_lock = threading.Lock()
+
+    @property
+    def budget_mb(self) -> float:
+        return self._budget if self._budget is not None else budget_mb()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.directory / ".lock", "a+") as fh:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _read(self) -> Dict[str, float]:
+        held: Dict[str, float] = {}
+        for path in self.directory.glob("*.json"):
+            try:
+                entry = json.loads(path.read_text())
+                pid, mb, at = int(entry["pid"]), float(entry["mb"]), float(entry["at"])
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if not _pid_alive(pid) or time.time() - at > RESERVATION_TTL_S:
+                log.info("[admission] dropping stale reservation of %s (pid %s)", path.stem, pid)
+                path.unlink(missing_ok=True)
+                continue
+            held[path.stem] = mb
+        return held
+
+    def reserved(self) -> Dict[str, float]:
+        with self._locked():
+            return self._read()
+
+    def try_reserve(self, job_id: str, mb: float) -> bool:
+        """Reserve ``mb`` for ``job_id`` if it fits; an idle host always admits."""
+        with self._locked():
+            held = self._read()
+            held.pop(job_id, None)  # a redelivered job replaces its own reservation
+            used = sum(held.values())
+            if held and used + mb > self.budget_mb:
+                return False
+            self._path(job_id).write_text(json.dumps({"pid": os.getpid(), "mb": mb, "at": time.time()}))
+            return True
+
+    def release(self, job_id: str) -> None:
+        with self._locked():
+            self._path(job_id).unlink(missing_ok=True)
+
+
+def decide(ledger: HostLedger, job_id: str, estimate_mb: float, *, on_large_queue: bool, deferrals: int) -> str:
+    """ADMIT (reservation taken), DEFER (retry later) or REROUTE (to the large-job queue)."""
+    if not on_large_queue and estimate_mb > large_job_mb():
+        return REROUTE
+    if ledger.try_reserve(job_id, estimate_mb):
+        return ADMIT
+    if not on_large_queue and deferrals >= MAX_DEFERRALS:
+        return REROUTE
+    return DEFER
+
+
+def _rss_mb(pid: Any = "self") -> Optional[float]:
+    try:
+        pages = int(Path(f"/proc/{pid}/statm").read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / _MB
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _descendants(pid: int) -> list:
+    """Pids of ``pid``'s children, grandchildren and so on, from ``/proc/*/stat``."""
+    children: Dict[int, list] = {}
+    try:
+        entries = [p for p in Path("/proc").iterdir() if p.name.isdigit()]
+    except OSError:
+        return []
+    for entry in entries:
+        try:
+            # The parent pid follows the parenthesised command name, which may itself contain spaces
+            ppid = int(entry.joinpath("stat").read_text().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+    out, todo = [], list(children.get(pid, ()))
+    while todo:
+        child = todo.pop()
+        out.append(child)
+        todo.extend(children.get(child, ()))
+    return out
+
+
+def _tree_rss_mb() -> Optional[float]:
+    """Resident set of this process plus its descendants; pages they share count once per process."""
+    own = _rss_mb()
+    if own is None:
+        return None
+    return own + sum(_rss_mb(pid) or 0.0 for pid in _descendants(os.getpid()))
+
+
+class PeakRss:
+    """Samples the resident set of this process and its children on a background thread.
+
+    The children are the clean engine's segment pool, whose copies of the
+    episode ``_SEGMENTED_COPIES`` accounts for. Shared memory mapped by several
+    of them counts once per process, so the peak errs high. Prefork children run
+    many jobs, so the lifetime ``ru_maxrss`` would carry one job's peak into the
+    next; it is only used where ``/proc`` is unavailable.
+    """
+
+    def __init__(self, interval_s: float = SAMPLE_INTERVAL_S) -> None:
+        self.interval_s = interval_s
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        rss = _tree_rss_mb()
+        if rss is None:
+            import resource
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        self.peak_mb = max(self.peak_mb, rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def start(self) -> "PeakRss":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="assembly-rss", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> float:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s * 4)
+        self._sample()
+        return self.peak_mb
+
+
+@dataclass
+class Admission:
+    """An admitted job: its estimate, its reservation (if any) and the RSS sampler."""
+
+    job_id: Optional[str]
+    estimate: Optional[Estimate]
+    ledger: Optional[HostLedger] = None
+    rss: Optional[PeakRss] = None
+
+    def start(self) -> "Admission":
+        self.rss = PeakRss().start()
+        return self
+
+    def stats(self) -> Dict[str, Any]:
+        """``{"memory": {...}}`` for the job stats: the estimate next to the peak measured so far."""
+        memory: Dict[str, Any] = self.estimate.as_stats() if self.estimate else {}
+        if self.rss is not None:
+            self.rss._sample()
+            memory["peak_rss_mb"] = round(self.rss.peak_mb, 1)
+        if self.ledger is not None:
+            memory["budget_mb"] = round(self.ledger.budget_mb, 1)
+        return {"memory": memory}
+
+    def release(self) -> None:
+        if self.rss is not None:
+            self.rss.stop()
+        if self.ledger is not None and self.job_id:
+            try:
+                self.ledger.release(self.job_id)
+            except OSError:
+                log.warning("[admission] could not release reservation of %s", self.job_id, exc_info=True)
@@ -2,21 +2,30 @@ from __future__ import annotations
 
 import os
 from typing import Any, Dict, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from sqlalchemy.orm import Session
 
 from api.core.constants import TIER_LIMITS
+from api.core.lazy import LazyValue
 from api.models.podcast import Episode
 from api.models.settings import AppSetting
-from . import repo, dto
-from worker.tasks import create_podcast_episode
-from api.core.paths import MEDIA_DIR
+from . import repo, dto, jobs, admission
 from api.services.billing import usage as usage_svc
+from api.services import media_probe
 from math import ceil
 import time
 
 
+def _load_assembly_task():
+    # The worker package pulls in Celery and the audio stack; load it on the first assembly
+    from worker.tasks import create_podcast_episode
+    return create_podcast_episode
+
+
+_assembly_task = LazyValue(_load_assembly_task, name="create_podcast_episode")
+
+
 def _episodes_created_this_month(session: Session, user_id) -> int:
     from calendar import monthrange
     from datetime import datetime, timezone
@@ -208,29 +217,7 @@ def assemble_or_queue(
     if os.getenv("CELERY_EAGER", "").strip().lower() in {"1","true","yes","on"}:
         # EAGER path: charge immediately using source duration and inline correlation id
         try:
-            from pathlib import Path as _Path
-            src_name = _Path(str(main_content_filename)).name
-            src_path = MEDIA_DIR / src_name
-            seconds = 0.0
-            if src_path.is_file():
-                try:
-                    import subprocess, json as _json
-                    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", str(src_path)]
-                    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-                    if proc.returncode == 0:
-                        data = _json.loads(proc.stdout or '{}')
-                        dur = float(data.get('format', {}).get('duration', 0))
-                        if dur and dur > 0:
-                            seconds = float(dur)
-                except Exception:
-                    pass
-                if seconds <= 0:
-                    try:
-                        from pydub import AudioSegment as _AS
-                        seg = _AS.from_file(src_path)
-                        seconds = len(seg) / 1000.0
-                    except Exception:
-                        seconds = 0.0
+            seconds = media_probe.source_duration_seconds(session, current_user.id, main_content_filename)
             minutes = max(1, int(ceil(seconds / 60.0))) if seconds > 0 else 1
             corr = f"inline:{str(ep.id)}:{int(time.time())}"
             usage_svc.post_debit(
@@ -244,7 +231,7 @@ def assemble_or_queue(
             )
         except Exception:
             pass
-        result = create_podcast_episode(
+        result = _assembly_task.get()(
             episode_id=str(ep.id),
             template_id=str(template_id),
             main_content_filename=str(main_content_filename),
@@ -263,16 +250,32 @@ def assemble_or_queue(
             "episode_id": str(ep.id),
         }
     else:
-        async_result = create_podcast_episode.delay(
-            episode_id=str(ep.id),
-            template_id=str(template_id),
-            main_content_filename=str(main_content_filename),
-            output_filename=str(output_filename),
-            tts_values=tts_values or {},
-            episode_details=episode_details or {},
-            user_id=str(current_user.id),
-            podcast_id=str(getattr(ep, 'podcast_id', '') or ''),
-            intents=intents or None,
+        # Task id is chosen here so the job row exists before the worker can report on it
+        job_id = str(uuid4())
+        jobs.create_job(session, job_id, episode_id=ep.id, user_id=current_user.id)
+        # Oversized episodes go straight to the large-job queue instead of bouncing off a cpu worker,
+        # when a threshold is configured; the host-relative default is the worker's to apply
+        route = {}
+        if admission.enqueue_large_job_mb() is not None:
+            try:
+                estimate = admission.estimate_for_job(session, current_user.id, main_content_filename, intents)
+                route = admission.enqueue_options(estimate.peak_mb)
+            except Exception:
+                route = {}
+        async_result = _assembly_task.get().apply_async(
+            kwargs=dict(
+                episode_id=str(ep.id),
+                template_id=str(template_id),
+                main_content_filename=str(main_content_filename),
+                output_filename=str(output_filename),
+                tts_values=tts_values or {},
+                episode_details=episode_details or {},
+                user_id=str(current_user.id),
+                podcast_id=str(getattr(ep, 'podcast_id', '') or ''),
+                intents=intents or None,
+            ),
+            task_id=job_id,
+            **route,
         )
         return {
             "mode": "queued",
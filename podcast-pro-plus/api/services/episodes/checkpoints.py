@@ -0,0 +1,186 @@
+"""Stage checkpoints for assembly jobs.
+
+With ``acks_late`` a worker lost mid-assembly (hard time limit, OOM, deploy)
+gets its message redelivered under the same task id. Every expensive stage of
+``create_podcast_episode`` records its outputs in a per-job workspace
+(``ASSEMBLY_WORK_DIR/<job_id>``), together with a digest of its inputs. A
+redelivered job skips each stage whose inputs are unchanged and whose outputs
+are intact, and reruns the rest.
+
+``manifest.json``::
+
+    {"stages": {name: {"inputs": digest, "data": {...},
+                       "files": {key: {"path": original, "copy": name, "sha256": ...}}}},
+     "hashes": {path: [fingerprint, sha256]}}
+
+Output files are copied into the workspace, because later stages and cleanup
+may move or delete the originals. On resume, missing or changed originals are
+restored from the copies. File hashes are memoised by size/mtime fingerprint,
+so digesting a large upload costs one read per job. The workspace is removed
+when the job finishes. ``purge_stale`` clears workspaces of jobs that were
+never redelivered.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api.core.paths import WS_ROOT
+from api.services import stage_cache
+from api.services.media_probe import file_fingerprint, sha256_file
+
+log = logging.getLogger("ppp.episodes.checkpoints")
+
+ASSEMBLY_WORK_DIR = Path(os.getenv("ASSEMBLY_WORK_DIR") or (WS_ROOT / "assembly_work"))
+# Redelivery happens within minutes; anything older belongs to a job that will not come back
+STALE_AFTER_S = float(os.getenv("ASSEMBLY_WORK_TTL_H", "48")) * 3600
+MANIFEST = "manifest.json"
+
+StageResult = Tuple[Dict[str, Any], Dict[str, Path]]
+StageFn = Callable[[Optional[Path]], StageResult]
+
+
+class JobWorkspace:
+    """Checkpointed stage outputs of one assembly job."""
+
+    def __init__(self, job_id: str, root: Optional[Path] = None) -> None:
+        self.job_id = str(job_id)
+        self.dir = Path(root or ASSEMBLY_WORK_DIR) / self.job_id
+        self.resumed: List[str] = []
+        self.ran: List[str] = []
+        self._manifest = self._load_manifest()
+
+    @classmethod
+    def for_job(cls, job_id: Optional[str], root: Optional[Path] = None) -> Optional["JobWorkspace"]:
+        """The job's workspace, or None for direct calls that have no task id to resume under."""
+        if not job_id:
+            return None
+        try:
+            return cls(job_id, root)
+        except OSError:
+            log.warning("[checkpoints] workspace unavailable for %s; running without checkpoints", job_id, exc_info=True)
+            return None
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            manifest = json.loads((self.dir / MANIFEST).read_text(encoding="utf-8"))
+            if isinstance(manifest.get("stages"), dict) and isinstance(manifest.get("hashes"), dict):
+                return manifest
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {"stages": {}, "hashes": {}}
+
+    def _save_manifest(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.dir / f".{MANIFEST}.tmp"
+        tmp.write_text(json.dumps(self._manifest, default=str), encoding="utf-8")
+        os.replace(tmp, self.dir / MANIFEST)
+
+    # --- digests ---
+
+    def file_hash(self, path: Path) -> str:
+        path = Path(path)
+        fingerprint = file_fingerprint(path)
+        known = self._manifest["hashes"].get(str(path))
+        if known and known[0] == fingerprint:
+            return known[1]
+        digest = sha256_file(path)
+        self._manifest["hashes"][str(path)] = [fingerprint, digest]
+        return digest
+
+    def digest(self, inputs: Dict[str, Any]) -> str:
+        """Digest of a stage's inputs; ``Path`` values contribute their file's content hash."""
+        return stage_cache.digest(inputs, self.file_hash)
+
+    # --- stages ---
+
+    def stage_dir(self, name: str) -> Path:
+        path = self.dir / name
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _load(self, name: str, digest: str) -> Optional[StageResult]:
+        """Recorded outputs of ``name`` if its inputs are unchanged and its files intact."""
+        entry = self._manifest["stages"].get(name)
+        if not entry or entry.get("inputs") != digest:
+            return None
+        files: Dict[str, Path] = {}
+        for key, rec in (entry.get("files") or {}).items():
+            copy, target = self.dir / name / rec["copy"], Path(rec["path"])
+            if not copy.is_file() or self.file_hash(copy) != rec["sha256"]:
+                log.warning("[checkpoints] %s/%s: saved %s is missing or damaged; rerunning", self.job_id, name, key)
+                del self._manifest["stages"][name]
+                return None
+            if not target.is_file() or self.file_hash(target) != rec["sha256"]:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(copy, target)
+            files[key] = target
+        self.resumed.append(name)
+        log.info("[checkpoints] %s: resumed stage %s", self.job_id, name)
+        return entry.get("data") or {}, files
+
+    def _save(self, name: str, digest: str, data: Dict[str, Any], files: Dict[str, Path]) -> None:
+        records = {}
+        stage_dir = self.stage_dir(name)
+        for key, path in files.items():
+            path = Path(path)
+            copy = stage_dir / f"{key}{path.suffix}"
+            if path.resolve() != copy.resolve():
+                shutil.copyfile(path, copy)
+            records[key] = {"path": str(path), "copy": copy.name, "sha256": self.file_hash(copy)}
+        self._manifest["stages"][name] = {
+            "inputs": digest, "data": data, "files": records, "at": time.time(),
+        }
+        self._save_manifest()
+
+    def run(self, name: str, inputs: Dict[str, Any], fn: StageFn) -> StageResult:
+        """Return the checkpoint of ``name`` or run ``fn(stage_dir)`` and record what it returns.
+
+        ``fn`` returns ``(data, files)``: JSON-serialisable results and the output files to keep.
+        Files written into ``stage_dir`` are kept in place rather than copied.
+        """
+        # Digest before running: a stage may rewrite files it also reads
+        digest = self.digest(inputs)
+        hit = self._load(name, digest)
+        if hit is not None:
+            return hit
+        data, files = fn(self.stage_dir(name))
+        self.ran.append(name)
+        try:
+            self._save(name, digest, data, files)
+        except (OSError, TypeError, ValueError):
+            # A checkpoint that cannot be written only costs the resume, never the job
+            log.warning("[checkpoints] %s: could not record stage %s", self.job_id, name, exc_info=True)
+        return data, files
+
+    def discard(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def run_stage(workspace: Optional[JobWorkspace], name: str, inputs: Dict[str, Any], fn: StageFn) -> StageResult:
+    """``workspace.run``, or ``fn(None)`` when the job has no workspace (nothing to keep)."""
+    if workspace is not None:
+        return workspace.run(name, inputs, fn)
+    return fn(None)
+
+
+def purge_stale(root: Optional[Path] = None, max_age_s: float = STALE_AFTER_S) -> int:
+    """Remove workspaces untouched for ``max_age_s``; returns how many were removed."""
+    root = Path(root or ASSEMBLY_WORK_DIR)
+    if not root.is_dir():
+        return 0
+    cutoff = time.time() - max_age_s
+    removed = 0
+    for job_dir in root.iterdir():
+        try:
+            if job_dir.is_dir() and job_dir.stat().st_mtime < cutoff:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    return removed
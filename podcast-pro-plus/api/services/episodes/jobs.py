@@ -1,12 +1,111 @@
 from __future__ import annotations
 
+import json
+import logging
+from datetime import datetime
 from typing import Any, Dict, Optional
+from uuid import UUID
 
-from worker.tasks import celery_app
+from sqlmodel import Session
+
+from api.core import database
+from api.core.lazy import LazyValue
+from api.models.job import Job, JOB_ERROR, JOB_PROCESSED, JOB_PROCESSING, JOB_QUEUED
+from api.services import events
+
+log = logging.getLogger("ppp.episodes.jobs")
+
+
+def _load_celery_app():
+    from worker.tasks import celery_app  # Celery + task modules load on first job lookup
+    return celery_app
+
+
+_celery = LazyValue(_load_celery_app, name="celery_app")
+
+
+def create_job(
+    session: Session,
+    job_id: str,
+    *,
+    episode_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    kind: str = "assemble",
+) -> Job:
+    """Record a queued job before it is handed to the broker, so the first poll already finds it."""
+    job = Job(id=job_id, kind=kind, episode_id=episode_id, user_id=user_id, state=JOB_QUEUED)
+    session.add(job)
+    session.commit()
+    return job
+
+
+def get_job(session: Session, job_id: str) -> Optional[Job]:
+    return session.get(Job, job_id)
+
+
+def job_stats(job: Job) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(job.stats_json) if job.stats_json else None
+    except Exception:
+        return None
+
+
+def update_job(
+    job_id: Optional[str],
+    *,
+    state: Optional[str] = None,
+    stage: Optional[str] = None,
+    percent: Optional[int] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    message: Optional[str] = None,
+    error: Optional[str] = None,
+    episode_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+) -> None:
+    """Write a stage boundary for ``job_id`` in its own short transaction.
+
+    Called from the worker; commits independently of the assembly session and never
+    raises, since losing a progress update must not fail the job. Creates the row if
+    the job was enqueued without one (e.g. before this table existed).
+    """
+    if not job_id:
+        return
+    try:
+        now = datetime.utcnow()
+        with Session(database.engine) as session:
+            job = session.get(Job, job_id)
+            if job is None:
+                job = Job(id=job_id, episode_id=episode_id, user_id=user_id)
+            if episode_id is not None and job.episode_id is None:
+                job.episode_id = episode_id
+            if state is not None:
+                job.state = state
+                if state == JOB_PROCESSING and job.started_at is None:
+                    job.started_at = now
+                if state in (JOB_PROCESSED, JOB_ERROR):
+                    job.finished_at = now
+            if stage is not None:
+                job.stage = stage
+            if percent is not None:
+                job.percent = max(0, min(100, int(percent)))
+            if stats is not None:
+                job.stats_json = json.dumps(stats)
+            if message is not None:
+                job.message = message
+            if error is not None:
+                job.error = error[:2000]
+            job.updated_at = now
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+        # Streams open in this process see the change immediately; others get it from the relay
+        events.publish_job(job)
+    except Exception:
+        log.warning("[jobs] failed to record state for job %s", job_id, exc_info=True)
 
 
 def get_status(job_id: str) -> Dict[str, Any]:
-    task = celery_app.AsyncResult(job_id)
+    task = _celery.get().AsyncResult(job_id)
     status_val = getattr(task, "status", "PENDING")
     result = getattr(task, "result", None)
     return {"raw_status": status_val, "raw_result": result}
@@ -14,7 +113,7 @@ def get_status(job_id: str) -> Dict[str, Any]:
 
 def retry(job_id: str) -> bool:
     try:
-        task = celery_app.AsyncResult(job_id)
+        task = _celery.get().AsyncResult(job_id)
         task.retry()
         return True
     except Exception:
@@ -23,7 +122,7 @@ def retry(job_id: str) -> bool:
 
 def cancel(job_id: str) -> bool:
     try:
-        celery_app.control.revoke(job_id, terminate=True)
+        _celery.get().control.revoke(job_id, terminate=True)
         return True
     except Exception:
         return False
@@ -0,0 +1,318 @@
+"""Per-user server-sent events: job progress and new notifications.
+
+``hub`` fans events out to the SSE streams open in this process. Writers in the
+same process (``update_job`` with eager Celery, webhooks) publish directly.
+Rows written by Celery workers in other processes reach the hub through
+``DbRelay``: one thread per API process polls the ``job`` and ``notification``
+tables for users with an open stream. One poll per process replaces N polls
+per user.
+
+Event ids are the row's timestamp in microseconds, so a reconnect to any
+instance can resume from ``Last-Event-ID`` by reading the durable rows again
+(``catch_up``).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from api.core import database
+from api.models.job import Job
+from api.models.notification import Notification
+
+log = logging.getLogger(__name__)
+
+HEARTBEAT_S = float(os.getenv("EVENTS_HEARTBEAT_S", "15"))
+# Streams end after this long; EventSource reconnects with Last-Event-ID (keeps proxies and request timeouts happy)
+MAX_STREAM_S = float(os.getenv("EVENTS_MAX_STREAM_S", "300"))
+RELAY_INTERVAL_S = float(os.getenv("EVENTS_RELAY_INTERVAL_S", "1.0"))
+# Re-read this far behind the relay cursor to tolerate clock skew between worker and API hosts
+RELAY_LOOKBACK = timedelta(seconds=5)
+RETRY_MS = 3000
+CATCH_UP_LIMIT = 200
+SUBSCRIBER_QUEUE_SIZE = 256
+_EPOCH = datetime(1970, 1, 1)
+
+
+def event_id_for(ts: Optional[datetime]) -> int:
+    """Microseconds since the epoch for a naive-UTC row timestamp."""
+    return ((ts or datetime.utcnow()) - _EPOCH) // timedelta(microseconds=1)
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    user_id: str
+    type: str
+    data: Dict[str, Any]
+    key: str = field(compare=False)
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+def job_event(job: Job) -> Optional[Event]:
+    if job.user_id is None:
+        return None
+    eid = event_id_for(job.updated_at)
+    data = {
+        "job_id": job.id,
+        "episode_id": str(job.episode_id) if job.episode_id else None,
+        "status": job.state,
+        "stage": job.stage,
+        "percent": job.percent,
+    }
+    if job.error:
+        data["error"] = job.error
+    return Event(eid, str(job.user_id), "job", data, key=f"job:{job.id}:{eid}")
+
+
+def notification_event(note: Notification) -> Event:
+    eid = event_id_for(note.created_at)
+    data = {
+        "id": str(note.id),
+        "type": note.type,
+        "title": note.title,
+        "body": note.body,
+        "created_at": note.created_at.isoformat() if note.created_at else None,
+    }
+    return Event(eid, str(note.user_id), "notification", data, key=f"notification:{note.id}")
+
+
+class Subscription:
+    """One open stream. Events arrive on the subscriber's own event loop."""
+
+    def __init__(self, user_id: str, loop: asyncio.AbstractEventLoop, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        self.user_id = user_id
+        self.overflowed = False
+        self._loop = loop
+        self._queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize)
+
+    def _deliver(self, event: Event) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: end the stream; the client resumes from its Last-Event-ID
+            self.overflowed = True
+
+    async def next(self, timeout: float) -> Optional[Event]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    """In-process fanout keyed by user id, with de-duplication of recently seen events."""
+
+    def __init__(self, recent_size: int = 4096) -> None:
+        self._lock = threading.Lock()
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._recent_size = recent_size
+        self.published = 0
+
+    def subscribe(self, user_id: str) -> Subscription:
+        sub = Subscription(str(user_id), asyncio.get_running_loop())
+        with self._lock:
+            self._subs.setdefault(sub.user_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.user_id]
+
+    def subscribed_users(self) -> List[str]:
+        with self._lock:
+            return list(self._subs)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+    def publish(self, event: Optional[Event]) -> bool:
+        """Deliver to the user's open streams; False if nothing was sent (or it was a duplicate)."""
+        if event is None:
+            return False
+        with self._lock:
+            if event.key in self._recent:
+                return False
+            self._recent[event.key] = None
+            while len(self._recent) > self._recent_size:
+                self._recent.popitem(last=False)
+            subs = list(self._subs.get(event.user_id, ()))
+        for sub in subs:
+            try:
+                sub._loop.call_soon_threadsafe(sub._deliver, event)
+            except RuntimeError:  # loop already closed
+                self.unsubscribe(sub)
+        self.published += 1
+        return bool(subs)
+
+
+hub = EventHub()
+
+
+def publish_job(job: Job) -> None:
+    try:
+        hub.publish(job_event(job))
+    except Exception:
+        log.debug("[events] job publish failed", exc_info=True)
+
+
+def publish_notification(note: Notification) -> None:
+    try:
+        hub.publish(notification_event(note))
+    except Exception:
+        log.debug("[events] notification publish failed", exc_info=True)
+
+
+def _rows_since(session: Session, user_ids: Iterable[UUID], since: datetime, limit: int) -> List[Event]:
+    """Job and notification events after ``since``, oldest first.
+
+    Each table is read up to ``limit`` rows. When one of them hits the cap, the
+    merged stream stops at that table's last row: the other table's newer rows
+    come back on the next read, from a cursor that has not skipped the rows in
+    between.
+    """
+    ids = list(user_ids)
+    jobs = session.exec(
+        select(Job).where(Job.user_id.in_(ids), Job.updated_at > since)  # type: ignore[union-attr]
+        .order_by(Job.updated_at).limit(limit)
+    ).all()
+    notes = session.exec(
+        select(Notification).where(Notification.user_id.in_(ids), Notification.created_at > since)  # type: ignore[attr-defined]
+        .order_by(Notification.created_at).limit(limit)
+    ).all()
+    events = [e for e in (job_event(j) for j in jobs) if e is not None]
+    events.extend(notification_event(n) for n in notes)
+    events.sort(key=lambda e: e.id)
+    capped = []
+    if len(jobs) >= limit:
+        capped.append(event_id_for(jobs[-1].updated_at))
+    if len(notes) >= limit:
+        capped.append(event_id_for(notes[-1].created_at))
+    if capped:
+        events = [e for e in events if e.id <= min(capped)]
+    return events
+
+
+def catch_up(user_id: str, last_event_id: int, limit: int = CATCH_UP_LIMIT) -> List[Event]:
+    """Events for ``user_id`` newer than ``last_event_id``, rebuilt from the durable rows."""
+    since = _EPOCH + timedelta(microseconds=last_event_id)
+    with Session(database.engine) as session:
+        return [e for e in _rows_since(session, [UUID(str(user_id))], since, limit) if e.id > last_event_id]
+
+
+class DbRelay:
+    """Polls for rows written by other processes and publishes them into ``hub``.
+
+    Runs only while this process has open streams; the first subscriber starts it.
+    """
+
+    def __init__(self, target: EventHub, interval_s: float = RELAY_INTERVAL_S) -> None:
+        self.hub = target
+        self.interval_s = interval_s
+        self.cursor: Optional[datetime] = None
+        self.polls = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll_once(self) -> int:
+        users = self.hub.subscribed_users()
+        if not users:
+            return 0
+        if self.cursor is None:
+            self.cursor = datetime.utcnow()  # older rows are served by catch_up on reconnect
+        with Session(database.engine) as session:
+            events = _rows_since(session, [UUID(u) for u in users], self.cursor - RELAY_LOOKBACK, limit=1000)
+        self.polls += 1
+        sent = 0
+        for ev in events:
+            sent += bool(self.hub.publish(ev))
+        if events:
+            newest = _EPOCH + timedelta(microseconds=events[-1].id)
+            self.cursor = max(self.cursor, newest)
+        return sent
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.poll_once()
+            except Exception:
+                log.warning("[events] relay poll failed", exc_info=True)
+            time.sleep(self.interval_s)
+            with self._lock:
+                if not self.hub.subscriber_count():
+                    self._thread = None
+                    self.cursor = None
+                    return
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="events-relay", daemon=True)
+                self._thread.start()
+
+
+relay = DbRelay(hub)
+
+
+def _relay_enabled() -> bool:
+    return os.getenv("EVENTS_BACKEND", "db").strip().lower() == "db"
+
+
+async def event_stream(
+    user_id: str,
+    *,
+    last_event_id: Optional[int] = None,
+    heartbeat_s: Optional[float] = None,
+    max_duration_s: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """SSE frames for one client: replay after ``last_event_id``, then live events and heartbeats."""
+    from starlette.concurrency import run_in_threadpool
+
+    heartbeat_s = HEARTBEAT_S if heartbeat_s is None else heartbeat_s
+    max_duration_s = MAX_STREAM_S if max_duration_s is None else max_duration_s
+    # Subscribe before catching up so nothing published in between is missed
+    sub = hub.subscribe(user_id)
+    if _relay_enabled():
+        relay.ensure_started()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        high_water = last_event_id or 0
+        if last_event_id is not None:
+            for ev in await run_in_threadpool(catch_up, user_id, last_event_id):
+                high_water = max(high_water, ev.id)
+                yield ev.encode()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_duration_s
+        while not sub.overflowed:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            ev = await sub.next(min(heartbeat_s, remaining))
+            if ev is None:
+                if deadline - loop.time() > 0:
+                    yield ": ping\n\n"
+                continue
+            if ev.id <= high_water:
+                continue  # already replayed
+            yield ev.encode()
+    finally:
+        hub.unsubscribe(sub)
@@ -1,7 +1,6 @@
 from pathlib import Path
 from typing import List, Dict, Any
 import difflib
-from pydub import AudioSegment
 
 from api.core.paths import FLUBBER_CTX_DIR, CLEANED_DIR, MEDIA_DIR
 
@@ -35,6 +34,9 @@ def extract_flubber_contexts(
             break
     if not audio_path:
         return []
+    # pydub pulls in the audio stack; load it on first use, not at app boot
+    from pydub import AudioSegment
+
     try:
         audio = AudioSegment.from_file(audio_path)
     except Exception:
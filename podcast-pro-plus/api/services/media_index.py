@@ -0,0 +1,163 @@
+"""In-memory index of MEDIA_DIR for resolving requested media names.
+
+Templates reference uploads by the name the user saw ("intro.mp3") while files
+on disk carry a prefix ("<user>_<uuid>_intro.mp3"). Instead of globbing the
+whole directory per lookup, the index maps every basename, plus each
+``_``/``-`` separated suffix of the name and of its stem, to the newest file
+carrying it. Lookups are dict hits; the index is rebuilt when the directory
+mtime changes or when upload/delete code calls ``invalidate_media_index()``.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from api.core.paths import MEDIA_DIR
+
+log = logging.getLogger(__name__)
+
+_SEP = re.compile(r"[_-]")
+
+# key -> (mtime, path)
+_Entry = Tuple[float, str]
+
+
+def _suffix_keys(value: str) -> Iterator[str]:
+    """``value`` plus every suffix that starts right after a ``_``/``-`` separator."""
+    yield value
+    if "_" in value or "-" in value:
+        for m in _SEP.finditer(value):
+            tail = value[m.end():]
+            if tail:
+                yield tail
+
+
+def _stem(lower_name: str) -> str:
+    # Same result as Path(name).stem without building a Path per file
+    stem, dot, ext = lower_name.rpartition(".")
+    return stem if dot and ext and stem.strip(".") else lower_name
+
+
+def _put(mapping: Dict[str, _Entry], key: str, entry: _Entry) -> None:
+    cur = mapping.get(key)
+    if cur is None or entry[0] > cur[0]:
+        mapping[key] = entry
+
+
+class MediaIndex:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._dir_mtime_ns: Optional[int] = None
+        self._dirty = True
+        self._by_name: Dict[str, _Entry] = {}
+        self._by_suffix: Dict[str, _Entry] = {}
+        self._by_stem: Dict[str, _Entry] = {}
+        self.builds = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._dirty = True
+
+    def _current_dir_mtime(self) -> Optional[int]:
+        try:
+            return self.root.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _build(self, dir_mtime_ns: Optional[int]) -> None:
+        by_name: Dict[str, _Entry] = {}
+        by_suffix: Dict[str, _Entry] = {}
+        by_stem: Dict[str, _Entry] = {}
+        try:
+            with os.scandir(self.root) as it:
+                for de in it:
+                    try:
+                        if not de.is_file():
+                            continue
+                        entry = (de.stat().st_mtime, de.path)
+                    except OSError:
+                        continue
+                    name = de.name
+                    lower = name.lower()
+                    _put(by_name, name, entry)
+                    for key in _suffix_keys(lower):
+                        _put(by_suffix, key, entry)
+                    for key in _suffix_keys(_stem(lower)):
+                        _put(by_stem, key, entry)
+        except FileNotFoundError:
+            pass
+        self._by_name, self._by_suffix, self._by_stem = by_name, by_suffix, by_stem
+        self._dir_mtime_ns = dir_mtime_ns
+        self._dirty = False
+        self.builds += 1
+        log.debug("media_index: indexed %d files under %s", len(by_name), self.root)
+
+    def _ensure_fresh(self) -> None:
+        mtime = self._current_dir_mtime()
+        with self._lock:
+            if self._dirty or mtime != self._dir_mtime_ns:
+                self._build(mtime)
+
+    def _lookup(self, name: str) -> Optional[Path]:
+        base = Path(name).name
+        lower = base.lower()
+        stem = _stem(lower)
+        best: Optional[_Entry] = None
+        for entry in (self._by_name.get(base), self._by_suffix.get(lower), self._by_stem.get(stem)):
+            if entry is not None and (best is None or entry[0] > best[0]):
+                best = entry
+        return Path(best[1]) if best else None
+
+    def resolve(self, name: Optional[str]) -> Optional[Path]:
+        """Newest file in the directory whose name (or stem) ends with ``name`` at a separator."""
+        if not name or not Path(name).name:
+            return None
+        self._ensure_fresh()
+        with self._lock:
+            found = self._lookup(name)
+        if found is not None and not found.exists():
+            # Deleted within the directory mtime granularity; rebuild once.
+            self.invalidate()
+            self._ensure_fresh()
+            with self._lock:
+                found = self._lookup(name)
+        return found
+
+
+_indexes: Dict[Path, MediaIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_media_index(root: Optional[Path] = None) -> MediaIndex:
+    key = Path(root or MEDIA_DIR)
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            idx = _indexes[key] = MediaIndex(key)
+        return idx
+
+
+def resolve_media_file(name: Optional[str], root: Optional[Path] = None) -> Optional[Path]:
+    return get_media_index(root).resolve(name)
+
+
+def invalidate_media_index(root: Optional[Path] = None) -> None:
+    """Upload/delete hook: force the next lookup to rescan."""
+    with _indexes_lock:
+        targets = list(_indexes.values()) if root is None else [_indexes.get(Path(root))]
+    for idx in targets:
+        if idx is not None:
+            idx.invalidate()
+
+
+__all__ = [
+    "MediaIndex",
+    "get_media_index",
+    "invalidate_media_index",
+    "resolve_media_file",
+]
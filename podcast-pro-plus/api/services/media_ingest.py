@@ -0,0 +1,328 @@
+"""Streaming ingest for media uploads.
+
+Request bytes flow from the event loop into a storage sink (GCS resumable
+session or a local file) through a small bounded queue drained by a writer
+thread. Size limits are enforced as bytes arrive and the content hash is
+computed on the fly, so an upload never holds more than a few MB in memory and
+the storage write runs alongside the client transfer.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # pragma: no cover - older python-multipart releases
+    from multipart.multipart import MultipartParser, parse_options_header  # type: ignore
+
+log = logging.getLogger(__name__)
+
+# Chunks buffered between the request stream and the writer thread. Starlette
+# yields ~64 KiB per receive, so this caps queued data well under a few MB.
+QUEUE_CHUNKS = 16
+
+_DONE = object()
+_ABORT = object()
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class MultipartError(ValueError):
+    pass
+
+
+class LocalSink:
+    """Write to ``<directory>/<name>`` via a ``.part`` file renamed on commit."""
+
+    def __init__(self, directory: Path, name: str):
+        self.final_path = Path(directory) / name
+        self.part_path = self.final_path.with_name(self.final_path.name + ".part")
+        self._fh = None
+
+    def write(self, data: bytes) -> None:
+        if self._fh is None:
+            self.part_path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.part_path, "wb")
+        self._fh.write(data)
+
+    def commit(self) -> str:
+        if self._fh is None:
+            self.write(b"")
+        self._fh.close()
+        os.replace(self.part_path, self.final_path)
+        return self.final_path.name
+
+    def abort(self) -> None:
+        try:
+            if self._fh is not None:
+                self._fh.close()
+        finally:
+            try:
+                self.part_path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class GcsSink:
+    """Write into a GCS resumable upload session; the object exists only after commit."""
+
+    def __init__(self, bucket: str, key: str, content_type: str):
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self._writer = None
+
+    def write(self, data: bytes) -> None:
+        if self._writer is None:
+            from infrastructure.gcs import open_resumable_writer
+
+            self._writer = open_resumable_writer(self.bucket, self.key, self.content_type)
+        self._writer.write(data)
+
+    def commit(self) -> str:
+        if self._writer is None:
+            self.write(b"")
+        self._writer.close()
+        return f"gs://{self.bucket}/{self.key}"
+
+    def abort(self) -> None:
+        # Never close(): that would finalize a partial object. The abandoned
+        # resumable session expires server-side.
+        self._writer = None
+
+
+@dataclass
+class IngestResult:
+    stored_as: str
+    size: int
+    sha256: str
+
+
+class StreamingIngest:
+    """Pump chunks from the event loop into ``sink`` on a dedicated writer thread."""
+
+    def __init__(self, sink, max_bytes: int, queue_chunks: int = QUEUE_CHUNKS):
+        self.sink = sink
+        self.max_bytes = int(max_bytes)
+        self.size = 0
+        self._q: "queue.Queue[object]" = queue.Queue(maxsize=max(1, queue_chunks))
+        self._hash = hashlib.sha256()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._stored_as: Optional[str] = None
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._pump, name="media-ingest-writer", daemon=True)
+            self._thread.start()
+
+    def _pump(self) -> None:
+        try:
+            while True:
+                item = self._q.get()
+                if item is _ABORT:
+                    self.sink.abort()
+                    return
+                if item is _DONE:
+                    self._stored_as = self.sink.commit()
+                    return
+                self._hash.update(item)  # type: ignore[arg-type]
+                self.sink.write(item)
+        except BaseException as exc:  # surfaced to the producer on next feed/finish
+            self._error = exc
+            try:
+                self.sink.abort()
+            except Exception:
+                pass
+            # Keep draining so a producer blocked on a full queue can make progress
+            while self._q.get() not in (_DONE, _ABORT):
+                pass
+
+    async def _put(self, item: object) -> None:
+        self._ensure_thread()
+        try:
+            self._q.put_nowait(item)
+        except queue.Full:
+            await run_in_threadpool(self._q.put, item)
+
+    async def feed(self, data: bytes) -> None:
+        if self._error is not None:
+            raise self._error
+        if not data:
+            return
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        await self._put(data)
+
+    async def finish(self) -> IngestResult:
+        await self._put(_DONE)
+        await run_in_threadpool(self._thread.join)  # type: ignore[union-attr]
+        if self._error is not None:
+            raise self._error
+        return IngestResult(stored_as=str(self._stored_as), size=self.size, sha256=self._hash.hexdigest())
+
+    async def abort(self) -> None:
+        if self._thread is None:
+            self.sink.abort()
+            return
+        if self._thread.is_alive():
+            await self._put(_ABORT)
+            await run_in_threadpool(self._thread.join)
+
+
+@dataclass
+class IngestedFile:
+    field: str
+    filename: str
+    content_type: str
+    stored_as: str
+    size: int
+    sha256: str
+
+
+# open_sink(field_name, filename, content_type) -> (sink, max_bytes), or None to skip the part
+OpenSink = Callable[[str, str, str], Optional[Tuple[object, int]]]
+
+
+async def ingest_multipart(
+    stream: AsyncIterator[bytes],
+    content_type_header: str,
+    open_sink: OpenSink,
+    *,
+    max_field_bytes: int = 64 * 1024,
+) -> Tuple[List[IngestedFile], Dict[str, str]]:
+    """Parse multipart/form-data incrementally, streaming file parts to sinks.
+
+    Returns the stored files in request order plus the small text fields.
+    ``open_sink`` runs when a part's headers are complete, so validation errors
+    raised there reject the upload before its body is read.
+    """
+    ctype, params = parse_options_header(content_type_header or "")
+    if ctype != b"multipart/form-data" or b"boundary" not in params:
+        raise MultipartError("Expected multipart/form-data with a boundary.")
+
+    files: List[IngestedFile] = []
+    fields: Dict[str, str] = {}
+    events: list = []
+    header: dict = {"field": b"", "value": b"", "headers": {}}
+
+    def on_part_begin() -> None:
+        header["headers"] = {}
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        header["headers"][header["field"].lower()] = header["value"]
+        header["field"] = b""
+        header["value"] = b""
+
+    def on_headers_finished() -> None:
+        events.append(("begin", dict(header["headers"])))
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end() -> None:
+        events.append(("end", None))
+
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+
+    current: Optional[dict] = None
+    try:
+        async for chunk in stream:
+            try:
+                parser.write(chunk)
+            except Exception as exc:
+                raise MultipartError("Invalid multipart data.") from exc
+            for kind, payload in events:
+                if kind == "begin":
+                    _, disp = parse_options_header(payload.get(b"content-disposition", b""))
+                    name = disp.get(b"name", b"").decode("utf-8", "replace")
+                    filename = disp.get(b"filename")
+                    if filename is None:
+                        current = {"field": name, "text": bytearray()}
+                        continue
+                    fname = filename.decode("utf-8", "replace")
+                    ct = payload.get(b"content-type", b"").decode("latin-1")
+                    opened = open_sink(name, fname, ct) if fname else None
+                    current = {"field": name, "filename": fname, "content_type": ct, "ingest": None}
+                    if opened is not None:
+                        sink, max_bytes = opened
+                        current["ingest"] = StreamingIngest(sink, max_bytes)
+                elif kind == "data" and current is not None:
+                    if "text" in current:
+                        current["text"] += payload
+                        if len(current["text"]) > max_field_bytes:
+                            raise MultipartError(f"Form field '{current['field']}' is too large.")
+                    elif current["ingest"] is not None:
+                        await current["ingest"].feed(payload)
+                elif kind == "end" and current is not None:
+                    if "text" in current:
+                        fields[current["field"]] = bytes(current["text"]).decode("utf-8", "replace")
+                    elif current["ingest"] is not None:
+                        res = await current["ingest"].finish()
+                        files.append(IngestedFile(
+                            field=current["field"],
+                            filename=current["filename"],
+                            content_type=current["content_type"],
+                            stored_as=res.stored_as,
+                            size=res.size,
+                            sha256=res.sha256,
+                        ))
+                    current = None
+            events.clear()
+        try:
+            parser.finalize()
+        except Exception as exc:
+            raise MultipartError("Invalid multipart data.") from exc
+        if current is not None:
+            raise MultipartError("Upload ended before the last part was complete.")
+    except BaseException:
+        if current is not None and current.get("ingest") is not None:
+            try:
+                await current["ingest"].abort()
+            except Exception:
+                log.warning("media_ingest: abort failed for %s", current.get("filename"), exc_info=True)
+        raise
+    return files, fields
+
+
+__all__ = [
+    "GcsSink",
+    "IngestResult",
+    "IngestedFile",
+    "LocalSink",
+    "MultipartError",
+    "StreamingIngest",
+    "UploadTooLarge",
+    "ingest_multipart",
+]
@@ -0,0 +1,245 @@
+"""Media metadata probe, run once when an upload lands.
+
+Duration, sample rate, channels, codec, bitrate and a sha256 content hash are
+stored on ``MediaItem`` so billing, the assembly worker and the media library
+read them from the row instead of running ffprobe (or a full pydub decode) per
+job. ``probe_fingerprint`` records ``"<size>:<mtime_ns>"`` of the file that was
+probed; a re-probe only happens when the file on disk no longer matches it and
+its content hash differs from the stored one.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from api.core.paths import MEDIA_DIR
+from api.models.podcast import MediaItem
+
+log = logging.getLogger(__name__)
+
+FFPROBE_TIMEOUT_S = 15
+_HASH_CHUNK = 1024 * 1024
+
+
+@dataclass
+class MediaProbe:
+    duration_s: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    codec: Optional[str] = None
+    bit_rate: Optional[int] = None
+
+
+def _ffprobe_bin() -> Optional[str]:
+    return os.environ.get("FFPROBE_BIN") or shutil.which("ffprobe")
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
+        return None
+    return f if f > 0 else None
+
+
+def _probe_ffprobe(path: Path) -> Optional[MediaProbe]:
+    exe = _ffprobe_bin()
+    if not exe:
+        return None
+    cmd = [exe, "-v", "error", "-show_format", "-show_streams", "-select_streams", "a:0", "-of", "json", str(path)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=FFPROBE_TIMEOUT_S)
+    except Exception as exc:
+        log.debug("ffprobe failed for %s: %s", path, exc)
+        return None
+    if proc.returncode != 0:
+        return None
+    try:
+        data = json.loads(proc.stdout or "{}")
+    except ValueError:
+        return None
+    fmt = data.get("format") or {}
+    stream = (data.get("streams") or [{}])[0] or {}
+    probe = MediaProbe(
+        duration_s=_to_float(fmt.get("duration")) or _to_float(stream.get("duration")),
+        sample_rate=_to_int(stream.get("sample_rate")),
+        channels=_to_int(stream.get("channels")),
+        codec=stream.get("codec_name") or None,
+        bit_rate=_to_int(stream.get("bit_rate")) or _to_int(fmt.get("bit_rate")),
+    )
+    return probe if probe.duration_s else None
+
+
+def _probe_wave(path: Path) -> Optional[MediaProbe]:
+    """Header-only probe for PCM WAV when ffprobe is unavailable."""
+    try:
+        with wave.open(str(path), "rb") as wf:
+            rate = wf.getframerate()
+            channels = wf.getnchannels()
+            width = wf.getsampwidth()
+            frames = wf.getnframes()
+    except (wave.Error, EOFError, OSError):
+        return None
+    if not rate or not frames:
+        return None
+    return MediaProbe(
+        duration_s=frames / float(rate),
+        sample_rate=rate,
+        channels=channels,
+        codec=f"pcm_s{width * 8}le",
+        bit_rate=rate * channels * width * 8,
+    )
+
+
+def _probe_decode(path: Path) -> Optional[MediaProbe]:
+    """Last resort: decode once with pydub. Only ever runs at ingest."""
+    try:
+        from pydub import AudioSegment
+
+        seg = AudioSegment.from_file(path)
+    except Exception as exc:
+        log.debug("decode probe failed for %s: %s", path, exc)
+        return None
+    if not len(seg):
+        return None
+    return MediaProbe(
+        duration_s=len(seg) / 1000.0,
+        sample_rate=seg.frame_rate,
+        channels=seg.channels,
+        bit_rate=seg.frame_rate * seg.channels * seg.sample_width * 8,
+    )
+
+
+def probe_file(path: Path, *, decode: bool = True) -> MediaProbe:
+    """Probe ``path`` with ffprobe, a WAV header read, or (last, unless ``decode`` is False) a single decode."""
+    path = Path(path)
+    probes = (_probe_ffprobe, _probe_wave, _probe_decode) if decode else (_probe_ffprobe, _probe_wave)
+    for probe in probes:
+        result = probe(path)
+        if result is not None:
+            return result
+    return MediaProbe()
+
+
+def file_fingerprint(path: Path) -> str:
+    st = Path(path).stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def record_probe(item: MediaItem, path: Path, *, content_hash: Optional[str] = None) -> MediaItem:
+    """Probe ``path`` and store the results (plus fingerprint/hash) on ``item``."""
+    path = Path(path)
+    probe = probe_file(path)
+    item.duration_s = probe.duration_s
+    item.sample_rate = probe.sample_rate
+    item.channels = probe.channels
+    item.codec = probe.codec
+    item.bit_rate = probe.bit_rate
+    item.content_hash = content_hash or sha256_file(path)
+    item.probe_fingerprint = file_fingerprint(path)
+    return item
+
+
+def ensure_probe(session: Session, item: MediaItem, path: Optional[Path] = None) -> MediaItem:
+    """Return ``item`` with probe fields that match the file at ``path``.
+
+    - No local file: the stored values are trusted as-is.
+    - Fingerprint matches: nothing to do.
+    - Fingerprint differs but the content hash matches (file re-downloaded or
+      touched): only the fingerprint is refreshed.
+    - Otherwise the file is probed again and the row updated.
+    """
+    if path is None or not Path(path).is_file():
+        return item
+    path = Path(path)
+    current = file_fingerprint(path)
+    if item.probe_fingerprint == current and item.duration_s:
+        return item
+    digest = sha256_file(path)
+    if item.duration_s and item.content_hash == digest:
+        item.probe_fingerprint = current
+    else:
+        log.info("media_probe: probing %s (fingerprint %s -> %s)", path.name, item.probe_fingerprint, current)
+        record_probe(item, path, content_hash=digest)
+    session.add(item)
+    session.commit()
+    session.refresh(item)
+    return item
+
+
+def find_media_item(session: Session, user_id: UUID, filename: str) -> Optional[MediaItem]:
+    """Look up the user's MediaItem for a stored filename, gs:// URI or bare basename."""
+    name = str(filename or "")
+    if not name:
+        return None
+    stmt = select(MediaItem).where(MediaItem.user_id == user_id, MediaItem.filename == name)
+    item = session.exec(stmt).first()
+    if item is not None:
+        return item
+    base = Path(name).name
+    # Basenames often contain '_' (and may contain '%'); match them literally
+    pattern = base.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_")
+    stmt = select(MediaItem).where(
+        MediaItem.user_id == user_id,
+        (MediaItem.filename == base) | (MediaItem.filename.like(f"%/{pattern}", escape="\\")),  # type: ignore[attr-defined]
+    )
+    return session.exec(stmt).first()
+
+
+def source_duration_seconds(session: Session, user_id: UUID, filename: str) -> float:
+    """Duration of an uploaded source for billing, from the stored probe when available."""
+    path = MEDIA_DIR / Path(str(filename)).name
+    local = path if path.is_file() else None
+    item = find_media_item(session, user_id, filename)
+    if item is not None:
+        try:
+            ensure_probe(session, item, local)
+        except Exception:
+            session.rollback()
+            log.warning("media_probe: could not refresh probe for %s", filename, exc_info=True)
+        if item.duration_s:
+            return float(item.duration_s)
+    if local is None:
+        return 0.0
+    # Legacy files uploaded before probing existed and with no MediaItem row. Billing must not
+    # decode the whole file: without ffprobe (and for non-WAV) the duration is unknown (0).
+    log.info("media_probe: no stored probe for %s; probing the file without decoding", filename)
+    return float(probe_file(local, decode=False).duration_s or 0.0)
+
+
+__all__ = [
+    "MediaProbe",
+    "ensure_probe",
+    "file_fingerprint",
+    "find_media_item",
+    "probe_file",
+    "record_probe",
+    "sha256_file",
+    "source_duration_seconds",
+]
@@ -0,0 +1,175 @@
+"""Daily admin metrics computed with SQL aggregates and a persisted rollup.
+
+Each series (signups, processed episodes, active users, net processing
+minutes) is a ``GROUP BY date(<timestamp>)`` query, which works on both SQLite
+(``date()`` returns 'YYYY-MM-DD') and Postgres (``date()`` returns a DATE).
+Closed days are read from ``DailyMetricsRollup`` once the scheduled task has
+finalized them; anything not yet finalized, and always today, is computed live.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlmodel import Session, select
+
+from api.models.metrics import DailyMetricsRollup
+from api.models.podcast import Episode, EpisodeStatus
+from api.models.usage import LedgerDirection, ProcessingMinutesLedger
+from api.models.user import User
+
+SERIES = ("signups", "episodes", "active_users", "minutes")
+_DONE_STATUSES = (EpisodeStatus.processed, EpisodeStatus.published)
+
+
+@dataclass
+class DayStats:
+    signups: int = 0
+    episodes: int = 0
+    active_users: int = 0
+    minutes: int = 0
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _bounds(start: date, end: date):
+    # Timestamps are stored as naive UTC (datetime.utcnow)
+    return datetime.combine(start, time.min), datetime.combine(end, time.min)
+
+
+def _day_key(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def compute_days(session: Session, start: date, end: date) -> Dict[date, DayStats]:
+    """Aggregate every series for days in ``[start, end)`` with one grouped query each."""
+    lo, hi = _bounds(start, end)
+    out: Dict[date, DayStats] = {}
+
+    def _fill(stmt, attr: str) -> None:
+        for day, value in session.exec(stmt).all():
+            key = _day_key(day)
+            if key is not None:
+                setattr(out.setdefault(key, DayStats()), attr, int(value or 0))
+
+    signup_day = func.date(User.created_at)
+    _fill(
+        select(signup_day, func.count())
+        .where(User.created_at >= lo, User.created_at < hi)
+        .group_by(signup_day),
+        "signups",
+    )
+
+    ep_day = func.date(Episode.processed_at)
+    _fill(
+        select(ep_day, func.count())
+        .where(Episode.processed_at >= lo, Episode.processed_at < hi)  # type: ignore[operator]
+        .where(Episode.status.in_(_DONE_STATUSES))  # type: ignore[attr-defined]
+        .group_by(ep_day),
+        "episodes",
+    )
+    _fill(
+        select(ep_day, func.count(func.distinct(Episode.user_id)))
+        .where(Episode.processed_at >= lo, Episode.processed_at < hi)  # type: ignore[operator]
+        .group_by(ep_day),
+        "active_users",
+    )
+
+    ledger_day = func.date(ProcessingMinutesLedger.created_at)
+    signed = case(
+        (ProcessingMinutesLedger.direction == LedgerDirection.DEBIT, ProcessingMinutesLedger.minutes),
+        else_=-ProcessingMinutesLedger.minutes,
+    )
+    _fill(
+        select(ledger_day, func.sum(signed))
+        .where(ProcessingMinutesLedger.created_at >= lo, ProcessingMinutesLedger.created_at < hi)
+        .group_by(ledger_day),
+        "minutes",
+    )
+    return out
+
+
+def daily_series(session: Session, days: int = 30, *, today: Optional[date] = None) -> Dict[str, List[dict]]:
+    """``{series: [{date, count}, ...]}`` for the last ``days`` days inclusive, oldest first."""
+    today = today or utc_today()
+    start = today - timedelta(days=days - 1)
+    window = [start + timedelta(days=i) for i in range(days)]
+
+    rows = session.exec(
+        select(DailyMetricsRollup).where(DailyMetricsRollup.day >= start, DailyMetricsRollup.day < today)
+    ).all()
+    stats: Dict[date, DayStats] = {
+        r.day: DayStats(r.signups, r.episodes, r.active_users, r.minutes) for r in rows
+    }
+    missing = [d for d in window if d not in stats]
+    if missing:
+        # One live pass covering the earliest unfinalized day through today
+        live = compute_days(session, min(missing), today + timedelta(days=1))
+        for d in missing:
+            stats[d] = live.get(d, DayStats())
+
+    return {
+        name: [{"date": d.isoformat(), "count": getattr(stats[d], name)} for d in window]
+        for name in SERIES
+    }
+
+
+def finalize_closed_days(
+    session: Session,
+    days: int = 30,
+    *,
+    refresh_days: int = 1,
+    today: Optional[date] = None,
+) -> int:
+    """Persist rollup rows for closed days in the window that are missing.
+
+    The most recent ``refresh_days`` closed days are always recomputed so rows
+    written shortly after midnight pick up late writes. Returns rows written.
+    """
+    today = today or utc_today()
+    start = today - timedelta(days=days - 1)
+    closed = [start + timedelta(days=i) for i in range(days - 1)]
+    if not closed:
+        return 0
+    existing = {
+        r.day: r
+        for r in session.exec(
+            select(DailyMetricsRollup).where(DailyMetricsRollup.day >= start, DailyMetricsRollup.day < today)
+        ).all()
+    }
+    refresh_from = today - timedelta(days=max(0, refresh_days))
+    todo = [d for d in closed if d not in existing or d >= refresh_from]
+    if not todo:
+        return 0
+    computed = compute_days(session, min(todo), today)
+    now = datetime.utcnow()
+    for d in todo:
+        values = asdict(computed.get(d, DayStats()))
+        row = existing.get(d)
+        if row is None:
+            row = DailyMetricsRollup(day=d, **values)
+        else:
+            for k, v in values.items():
+                setattr(row, k, v)
+        row.finalized_at = now
+        session.add(row)
+    session.commit()
+    return len(todo)
+
+
+__all__ = [
+    "DayStats",
+    "compute_days",
+    "daily_series",
+    "finalize_closed_days",
+]
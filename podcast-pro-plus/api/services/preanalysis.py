@@ -0,0 +1,203 @@
+"""Speculative pre-analysis of main-content uploads.
+
+Nothing used to touch an upload until the user clicked assemble, so every
+assembly started by decoding it and scanning its transcript. ``analyze`` does
+that work ahead of time on the maintenance queue (``preanalyze_media_file``):
+once when the upload lands and again when its transcript is ready. Results go
+into the stage cache (namespace ``preanalysis``), keyed by content:
+
+- audio, keyed by the upload's content hash: the decoded PCM as WAV (not stored
+  for uploads that already are WAV) and its per-millisecond energy and peak, the
+  arrays behind ``analysis_proxy.AnalysisProxy``;
+- words, keyed by the transcript's content hash and the user's filler words:
+  filler candidates as the clean engine computes them.
+
+Assembly calls ``lookup`` with the same inputs. A record is only returned when
+upload, transcript and settings are unchanged; the clean engine then decodes
+the stored PCM and takes the filler candidates instead of recomputing them.
+When the mixer decodes the upload itself, ``Preanalysis.attach`` puts the stored
+energy on the segment, so loudness matching and pause detection read it instead
+of folding the PCM again; any edit makes a new segment without it. A miss costs
+nothing beyond the lookup: assembly works as before.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydub import AudioSegment
+
+from api.core.lazy import LazyValue
+from api.services import analysis_proxy
+from api.services.stage_cache import StageCache, StageResult, cache_enabled, code_stamp
+
+log = logging.getLogger("ppp.preanalysis")
+
+_CACHE = StageCache("preanalysis")
+
+
+def _audio_inputs(audio_path: Path) -> Dict[str, Any]:
+    return {"kind": "audio", "audio": Path(audio_path), "code": code_stamp(__name__, "api.services.analysis_proxy")}
+
+
+def _words_inputs(words_path: Path, user_settings: Any) -> Dict[str, Any]:
+    from api.services.clean_engine.engine import filler_set
+
+    return {
+        "kind": "words",
+        "words": Path(words_path),
+        "fillers": sorted(filler_set(user_settings)),
+        "code": code_stamp(__name__, "api.services.clean_engine.words"),
+    }
+
+
+# --- audio ---
+
+def analyze_audio(audio_path: Path, out_dir: Path) -> StageResult:
+    """Decode ``audio_path`` once and measure it; returns ``(data, files)`` with the files in ``out_dir``."""
+    import numpy as np
+
+    audio_path = Path(audio_path)
+    seg = AudioSegment.from_file(audio_path)
+    files = {}
+    proxy = analysis_proxy.proxy_for(seg)
+    if proxy is not None:
+        power, peak = proxy.arrays()
+        files["energy"] = Path(out_dir) / "energy.npz"
+        np.savez(files["energy"], power=power, peak=peak)
+    if audio_path.suffix.lower() != ".wav":
+        files["pcm"] = Path(out_dir) / "pcm.wav"
+        seg.export(files["pcm"], format="wav")
+    data = {
+        "duration_ms": len(seg),
+        "frame_rate": seg.frame_rate,
+        "channels": seg.channels,
+        "sample_width": seg.sample_width,
+    }
+    return data, files
+
+
+# --- words ---
+
+def analyze_words(words_path: Path, user_settings: Any) -> StageResult:
+    """Filler candidates in a transcript."""
+    from api.services.clean_engine.engine import filler_set
+    from api.services.clean_engine.words import build_filler_cuts, parse_words
+
+    words = parse_words(json.loads(Path(words_path).read_text(encoding="utf-8")))
+    fset = filler_set(user_settings)
+    data = {
+        "fillers": sorted(fset),
+        # Exactly what run_all computes on the uncut transcript
+        "filler_cuts": [list(c) for c in build_filler_cuts(words, fset)],
+        "filler_tokens": [(w.word or '').strip().lower() for w in words if (w.word or '').strip().lower() in fset],
+        "word_count": len(words),
+    }
+    return data, {}
+
+
+# --- records ---
+
+@dataclass
+class Preanalysis:
+    """A stored pre-analysis; ``words`` is None when the transcript was not analysed (yet)."""
+
+    audio: Dict[str, Any]
+    pcm: Optional[Path] = None
+    energy_path: Optional[Path] = None
+    words: Optional[Dict[str, Any]] = None
+
+    def proxy(self) -> Optional[analysis_proxy.AnalysisProxy]:
+        """The upload's analysis proxy, rebuilt from the stored energy (None if it was not stored)."""
+        import numpy as np
+
+        if self.energy_path is None:
+            return None
+        with np.load(self.energy_path) as arrays:
+            return analysis_proxy.AnalysisProxy(arrays["power"], arrays["peak"], self.audio["frame_rate"],
+                                                self.audio["channels"], self.audio["sample_width"])
+
+    def attach(self, seg: AudioSegment) -> bool:
+        """Give ``seg`` (the upload, freshly decoded) the stored proxy; False if it does not fit the segment."""
+        try:
+            proxy = self.proxy()
+        except (OSError, ValueError, KeyError):
+            log.warning("[preanalysis] unreadable energy file %s", self.energy_path, exc_info=True)
+            return False
+        return analysis_proxy.attach(seg, proxy)
+
+    def filler_candidates(self, fset: Set[str]) -> Optional[Tuple[List[Tuple[int, int]], List[str]]]:
+        """``(filler_cuts, filler_tokens)`` for the uncut transcript, if scanned for these fillers."""
+        if not self.words or self.words.get("fillers") != sorted(fset):
+            return None
+        return [tuple(c) for c in self.words["filler_cuts"]], list(self.words["filler_tokens"])  # type: ignore[misc]
+
+    def as_stats(self) -> Dict[str, Any]:
+        return {"pcm": self.pcm is not None, "words": self.words is not None}
+
+
+def _record(audio: StageResult, words: Optional[StageResult]) -> Preanalysis:
+    data, files = audio
+    return Preanalysis(data, files.get("pcm"), files.get("energy"), words[0] if words else None)
+
+
+def analyze(audio_path: Path, words_path: Optional[Path] = None, user_settings: Any = None) -> Optional[Preanalysis]:
+    """Analyse an upload (and its transcript, when given with the user's settings) through the cache."""
+    if not cache_enabled():
+        return None
+    with tempfile.TemporaryDirectory(prefix="preanalysis_") as tmp:
+        data, files = _CACHE.cached(_audio_inputs(audio_path), lambda: analyze_audio(audio_path, Path(tmp)),
+                                    restore=False, move=True)
+        # Files left in tmp were not stored (cache write failed) and go with it
+        files = {k: v for k, v in files.items() if Path(tmp) not in Path(v).parents}
+    audio = (data, files)
+    words = None
+    if words_path is not None and Path(words_path).is_file() and user_settings is not None:
+        words = _CACHE.cached(_words_inputs(words_path, user_settings), lambda: analyze_words(words_path, user_settings),
+                              restore=False)
+    return _record(audio, words)
+
+
+def lookup(audio_path: Path, words_path: Optional[Path] = None, user_settings: Any = None) -> Optional[Preanalysis]:
+    """The stored pre-analysis of this upload, or None; never analyses anything itself."""
+    if not cache_enabled() or not Path(audio_path).is_file():
+        return None
+    try:
+        audio = _CACHE.get(_CACHE.key(_audio_inputs(audio_path)), restore=False)
+        if audio is None:
+            return None
+        words = None
+        if words_path is not None and Path(words_path).is_file() and user_settings is not None:
+            words = _CACHE.get(_CACHE.key(_words_inputs(words_path, user_settings)), restore=False)
+    except (OSError, ValueError):
+        log.warning("[preanalysis] lookup failed for %s", audio_path, exc_info=True)
+        return None
+    return _record(audio, words)
+
+
+def _load_task():
+    # The worker package pulls in Celery and the audio stack; load it on the first upload
+    from worker.tasks.analysis import preanalyze_media_file
+    return preanalyze_media_file
+
+
+_task = LazyValue(_load_task, name="preanalyze_media_file")
+
+
+def enqueue(filename: str) -> None:
+    """Queue pre-analysis of an upload in ``MEDIA_DIR`` on the maintenance queue."""
+    _task.get().apply_async(args=[filename])
+
+
+__all__ = [
+    "Preanalysis",
+    "analyze",
+    "analyze_audio",
+    "analyze_words",
+    "enqueue",
+    "lookup",
+]
@@ -2,8 +2,6 @@ import json
 import os
 from typing import Any, Dict, List, Tuple, Optional
 
-import requests
-
 
 class SpreakerClient:
     """
@@ -51,6 +49,9 @@ class SpreakerClient:
             return False, str(e)
 
     def __init__(self, api_token: str):
+        # requests loads with the first client, not when the episodes router is imported
+        import requests
+
         self.api_token = api_token
         self.session = requests.Session()
         # Ensure API understands we want JSON
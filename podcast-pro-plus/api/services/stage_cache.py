@@ -0,0 +1,261 @@
+"""Content-addressed cache for deterministic pipeline stages.
+
+Re-assembling an episode with a different template or title feeds the cleaning
+stages the same audio, transcript and settings as last time. Those stages are
+keyed by a digest of their inputs, where file inputs contribute their content
+hash, plus a stamp of the code that implements them. A repeat run then restores
+the previous outputs instead of recomputing them; only the final mix reruns.
+
+Layout: ``STAGE_CACHE_DIR/<namespace>/<key>/entry.json`` next to copies of the
+entry's output files. Entries are written to a temporary directory and renamed
+into place, so concurrent workers never see a partial entry. After each write
+the cache is trimmed: entries older than ``STAGE_CACHE_MAX_AGE_D`` go first,
+then least recently used ones until the total is under ``STAGE_CACHE_MAX_MB``.
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import importlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api.core.paths import WS_ROOT
+from api.services.media_probe import file_fingerprint, sha256_file
+
+log = logging.getLogger("ppp.stage_cache")
+
+ENTRY = "entry.json"
+_HASH_MEMO_SIZE = 512
+
+StageResult = Tuple[Dict[str, Any], Dict[str, Path]]
+
+
+def cache_root() -> Path:
+    return Path(os.getenv("STAGE_CACHE_DIR") or (WS_ROOT / "stage_cache"))
+
+
+def cache_enabled() -> bool:
+    return os.getenv("STAGE_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _max_bytes() -> int:
+    return int(float(os.getenv("STAGE_CACHE_MAX_MB", "4096")) * 1024 * 1024)
+
+
+def _max_age_s() -> float:
+    return float(os.getenv("STAGE_CACHE_MAX_AGE_D", "14")) * 86400
+
+
+_hash_lock = threading.Lock()
+_hash_memo: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+
+def file_hash(path: Path) -> str:
+    """sha256 of a file, memoised per process by its size/mtime fingerprint."""
+    path = Path(path)
+    memo_key = (str(path), file_fingerprint(path))
+    with _hash_lock:
+        if memo_key in _hash_memo:
+            _hash_memo.move_to_end(memo_key)
+            return _hash_memo[memo_key]
+    digest = sha256_file(path)
+    with _hash_lock:
+        _hash_memo[memo_key] = digest
+        while len(_hash_memo) > _HASH_MEMO_SIZE:
+            _hash_memo.popitem(last=False)
+    return digest
+
+
+def canonical(value: Any, hash_file: Callable[[Path], str] = file_hash) -> Any:
+    """JSON-ready form of stage inputs; ``Path`` values become their file's content hash."""
+    if isinstance(value, Path):
+        return f"file:{hash_file(value)}" if value.is_file() else f"missing:{value}"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"bytes:{hashlib.sha256(value).hexdigest()}"
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return canonical({f.name: getattr(value, f.name) for f in dataclasses.fields(value)}, hash_file)
+    if isinstance(value, dict):
+        return {str(k): canonical(v, hash_file) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [canonical(v, hash_file) for v in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def digest(inputs: Dict[str, Any], hash_file: Callable[[Path], str] = file_hash) -> str:
+    blob = json.dumps(canonical(inputs, hash_file), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+_stamps: Dict[Tuple[str, ...], str] = {}
+
+
+def code_stamp(*modules: str) -> str:
+    """Version stamp of the code behind a stage: a hash of the named modules' sources.
+
+    A package contributes every ``.py`` file under it, so any engine change
+    invalidates the entries it produced without a hand-maintained version number.
+    """
+    if modules not in _stamps:
+        h = hashlib.sha256()
+        for name in modules:
+            mod = importlib.import_module(name)
+            if hasattr(mod, "__path__"):
+                files = sorted(p for d in mod.__path__ for p in Path(d).rglob("*.py"))
+            else:
+                files = [Path(mod.__file__)] if getattr(mod, "__file__", None) else []
+            for path in files:
+                h.update(path.name.encode("utf-8"))
+                h.update(path.read_bytes())
+        _stamps[modules] = h.hexdigest()[:16]
+    return _stamps[modules]
+
+
+class StageCache:
+    """One namespace (stage) of the content-addressed cache."""
+
+    def __init__(self, namespace: str, root: Optional[Path] = None) -> None:
+        self.namespace = namespace
+        self._root = root
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or cache_root())
+
+    @property
+    def dir(self) -> Path:
+        return self.root / self.namespace
+
+    def key(self, inputs: Dict[str, Any]) -> str:
+        return digest(inputs)
+
+    def get(self, key: str, *, restore: bool = True) -> Optional[StageResult]:
+        """The entry for ``key``, or None.
+
+        With ``restore`` the files are copied back to the paths they were produced
+        at (unless already there) and those paths are returned; otherwise the
+        returned paths point into the cache and must be treated as read-only.
+        """
+        entry_dir = self.dir / key
+        try:
+            entry = json.loads((entry_dir / ENTRY).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        files: Dict[str, Path] = {}
+        try:
+            for name, rec in (entry.get("files") or {}).items():
+                cached = entry_dir / rec["copy"]
+                if not cached.is_file() or cached.stat().st_size != rec["size"]:
+                    raise FileNotFoundError(cached)
+                target = Path(rec["path"]) if restore and rec.get("path") else cached
+                if target != cached and not (target.is_file() and file_hash(target) == rec["sha256"]):
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(cached, target)
+                files[name] = target
+        except (OSError, KeyError, TypeError):
+            log.warning("[stage_cache] %s/%s is incomplete; dropping it", self.namespace, key)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        os.utime(entry_dir / ENTRY)  # LRU clock
+        return entry.get("data") or {}, files
+
+    def put(self, key: str, data: Dict[str, Any], files: Dict[str, Path], *, move: bool = False) -> None:
+        """Store ``data`` and copies of ``files`` under ``key`` (``move`` for throwaway temp files)."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.dir / f".{key}.{os.getpid()}.{threading.get_ident()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        records: Dict[str, Any] = {}
+        size = 0
+        try:
+            for name, path in files.items():
+                path = Path(path)
+                copy = tmp / f"{name}{path.suffix}"
+                (shutil.move if move else shutil.copyfile)(str(path), str(copy))
+                records[name] = {
+                    "path": None if move else str(path), "copy": copy.name,
+                    "size": copy.stat().st_size, "sha256": file_hash(copy),
+                }
+                size += records[name]["size"]
+            entry = {"data": data, "files": records, "size": size, "at": time.time()}
+            (tmp / ENTRY).write_text(json.dumps(entry, default=str), encoding="utf-8")
+            try:
+                os.rename(tmp, self.dir / key)
+            except OSError:
+                pass  # another worker stored the same key first
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        evict(self.root)
+
+    def cached(self, inputs: Dict[str, Any], fn: Callable[[], StageResult], *,
+               restore: bool = True, move: bool = False) -> StageResult:
+        """``fn()`` through the cache: ``(data, files)`` from the entry for ``inputs`` or from a fresh run."""
+        if not cache_enabled():
+            return fn()
+        key = self.key(inputs)
+        hit = self.get(key, restore=restore)
+        if hit is not None:
+            self.hits += 1
+            log.info("[stage_cache] %s hit %s", self.namespace, key[:12])
+            return hit
+        self.misses += 1
+        data, files = fn()
+        try:
+            self.put(key, data, files, move=move)
+        except (OSError, TypeError, ValueError):
+            log.warning("[stage_cache] could not store %s/%s", self.namespace, key[:12], exc_info=True)
+            return data, files
+        if move:
+            # The originals now live in the cache
+            stored = self.get(key, restore=False)
+            if stored is not None:
+                return data, stored[1]
+        return data, files
+
+
+def _entries(root: Path) -> List[Tuple[float, int, Path]]:
+    out = []
+    for ns in root.iterdir() if root.is_dir() else ():
+        if not ns.is_dir():
+            continue
+        for entry_dir in ns.iterdir():
+            try:
+                meta = entry_dir / ENTRY
+                last_used = meta.stat().st_mtime
+                size = int(json.loads(meta.read_text(encoding="utf-8")).get("size") or 0)
+            except (OSError, ValueError):
+                continue  # in-flight temp dirs and damaged entries
+            out.append((last_used, size, entry_dir))
+    return out
+
+
+def evict(root: Optional[Path] = None, *, max_bytes: Optional[int] = None, max_age_s: Optional[float] = None) -> int:
+    """Drop expired entries, then the least recently used until the cache fits; returns how many went."""
+    root = Path(root or cache_root())
+    max_bytes = _max_bytes() if max_bytes is None else max_bytes
+    max_age_s = _max_age_s() if max_age_s is None else max_age_s
+    entries = sorted(_entries(root))
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - max_age_s
+    removed = 0
+    for last_used, size, entry_dir in entries:
+        if last_used >= cutoff and total <= max_bytes:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        removed += 1
+    if removed:
+        log.info("[stage_cache] evicted %d entries; %.1f MB left", removed, total / (1024 * 1024))
+    return removed
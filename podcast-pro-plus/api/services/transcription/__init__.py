@@ -14,8 +14,6 @@ import logging
 from pathlib import Path
 
 from ...core.paths import MEDIA_DIR
-from ..transcription_assemblyai import assemblyai_transcribe_with_speakers
-from ..transcription_google import google_transcribe_with_words
 
 
 def get_word_timestamps(filename: str) -> List[Dict[str, Any]]:
@@ -27,6 +25,10 @@ def get_word_timestamps(filename: str) -> List[Dict[str, Any]]:
 
 	Raises on failure to keep callers' error handling consistent.
 	"""
+	# The provider clients (requests, Google Speech) load with the first transcription, not at app boot
+	from ..transcription_assemblyai import assemblyai_transcribe_with_speakers
+	from ..transcription_google import google_transcribe_with_words
+
 	audio_path = MEDIA_DIR / filename
 	if not audio_path.exists():
 		raise FileNotFoundError(f"Audio file not found: {filename}")
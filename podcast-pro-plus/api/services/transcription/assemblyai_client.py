@@ -6,6 +6,10 @@ from typing import Any, Dict, Iterable, Optional, Union
 
 import requests
 
+# (connect, read) seconds. The io worker's threads pool cannot enforce Celery time limits,
+# so every request carries its own; uploads stream large files and get a longer read window.
+UPLOAD_TIMEOUT = (10, 300)
+API_TIMEOUT = (10, 30)
 
 class AssemblyAITranscriptionError(Exception):
     pass
@@ -42,7 +46,7 @@ def upload_audio(
         "authorization": api_key.strip(),
         "content-type": "application/octet-stream",
     }
-    resp = requests.post(f"{base_url}/upload", headers=headers, data=_stream_file(p))
+    resp = requests.post(f"{base_url}/upload", headers=headers, data=_stream_file(p), timeout=UPLOAD_TIMEOUT)
     if resp.status_code != 200:
         raise AssemblyAITranscriptionError(f"Upload failed: {resp.status_code} {resp.text}")
     upload_url = resp.json().get("upload_url")
@@ -98,7 +102,7 @@ def start_transcription(
         pass
 
     headers_json = {"authorization": api_key.strip()}
-    create = requests.post(f"{base_url}/transcript", json=payload, headers=headers_json)
+    create = requests.post(f"{base_url}/transcript", json=payload, headers=headers_json, timeout=API_TIMEOUT)
     if create.status_code != 200:
         raise AssemblyAITranscriptionError(
             f"Transcription request failed: {create.status_code} {create.text}"
@@ -119,7 +123,9 @@ def get_transcription(
 ) -> TranscriptResp:
     """Fetch a transcription job by id. Returns response JSON. Error texts match monolith."""
     headers_json = {"authorization": api_key.strip()}
-    poll = requests.get(f"{base_url}/transcript/{job_id}", headers=headers_json)
+    poll = requests.get(
+        f"{base_url}/transcript/{job_id}", headers=headers_json, timeout=API_TIMEOUT
+    )
     if poll.status_code != 200:
         raise AssemblyAITranscriptionError(f"Polling failed: {poll.status_code} {poll.text}")
     return poll.json()
@@ -136,7 +142,9 @@ def cancel_transcription(
     Keeps error text format consistent if API returns non-200.
     """
     headers_json = {"authorization": api_key.strip()}
-    resp = requests.delete(f"{base_url}/transcript/{job_id}", headers=headers_json)
+    resp = requests.delete(
+        f"{base_url}/transcript/{job_id}", headers=headers_json, timeout=API_TIMEOUT
+    )
     if resp.status_code not in (200, 204):
         raise AssemblyAITranscriptionError(
             f"Cancel failed: {resp.status_code} {resp.text}"
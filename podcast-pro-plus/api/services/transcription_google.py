@@ -3,12 +3,12 @@ import os
 from pathlib import Path
 from typing import List, Dict, Any
 
-from google.cloud import speech_v1p1beta1 as speech
-from pydub import AudioSegment
-
 from api.core.paths import MEDIA_DIR
+from infrastructure.google_clients import get_speech_client
 
 CHUNK_DURATION_MS = 10 * 60 * 1000  # reuse chunk size
+# Per-chunk RPC deadline in seconds; the io worker cannot enforce Celery time limits
+RECOGNIZE_TIMEOUT_S = 300
 
 class GoogleTranscriptionError(Exception):
     pass
@@ -18,7 +18,11 @@ def google_transcribe_with_words(filename: str) -> List[Dict[str, Any]]:
     if not audio_path.exists():
         raise GoogleTranscriptionError(f"Audio file not found: {filename}")
 
-    client = speech.SpeechClient()
+    # Imported here so API startup does not pay for the Speech SDK (only a fallback path uses it)
+    from google.cloud import speech_v1p1beta1 as speech
+    from pydub import AudioSegment
+
+    client = get_speech_client()
 
     try:
         audio = AudioSegment.from_file(audio_path)
@@ -43,7 +47,7 @@ def google_transcribe_with_words(filename: str) -> List[Dict[str, Any]]:
                 enable_automatic_punctuation=True,
                 model="latest_long"
             )
-            response = client.recognize(config=config, audio=audio_bytes)
+            response = client.recognize(config=config, audio=audio_bytes, timeout=RECOGNIZE_TIMEOUT_S)
             for result in response.results:
                 alt = result.alternatives[0]
                 for w in alt.words:
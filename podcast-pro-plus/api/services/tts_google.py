@@ -1,12 +1,18 @@
-from typing import Optional
-from pydub import AudioSegment
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
 import io
 
+if TYPE_CHECKING:  # pydub pulls in the audio stack; only synthesis needs it
+    from pydub import AudioSegment
+
 try:
     from google.cloud import texttospeech
 except ImportError:  # pragma: no cover
     texttospeech = None
 
+from infrastructure.google_clients import get_tts_client
+
 class GoogleTTSNotConfigured(Exception):
     pass
 
@@ -14,7 +20,7 @@ class GoogleTTSNotConfigured(Exception):
 def synthesize_google_tts(text: str, voice_name: str = "en-US-Neural2-C", speaking_rate: float = 1.0) -> AudioSegment:
     if texttospeech is None:
         raise GoogleTTSNotConfigured("google-cloud-texttospeech not installed")
-    client = texttospeech.TextToSpeechClient()
+    client = get_tts_client()
     synthesis_input = texttospeech.SynthesisInput(text=text)
     voice = texttospeech.VoiceSelectionParams(
         language_code="en-US",
@@ -30,5 +36,7 @@ def synthesize_google_tts(text: str, voice_name: str = "en-US-Neural2-C", speaki
         audio_config=audio_config
     )
     audio_bytes = response.audio_content
+    from pydub import AudioSegment
+
     buf = io.BytesIO(audio_bytes)
     return AudioSegment.from_file(buf, format="mp3")
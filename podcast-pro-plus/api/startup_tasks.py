@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import os
+import json
+import hashlib
 import logging
+import threading
+import time
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
 
-from sqlmodel import select, Session as _Session
+from sqlmodel import SQLModel, select, Session as _Session
 from sqlmodel import select
-from sqlalchemy import inspect, text
+from sqlalchemy import and_, func, inspect, or_, text
 
 from api.core.database import get_session, engine, create_db_and_tables
 from api.core.config import settings
 from api.models.podcast import Episode, Podcast
+from api.models.settings import AppSetting
 from api.core.logging import get_logger
 
 try:
@@ -20,62 +26,95 @@ except Exception:  # pragma: no cover
 
 log: logging.Logger = get_logger("api.startup_tasks")
 
+# Bump when a DDL step below changes in a way the model fingerprint cannot see
+# (raw ALTERs, indexes created outside SQLModel metadata).
+SCHEMA_VERSION = 1
+SCHEMA_VERSION_KEY = "startup.schema_version"
+BACKFILL_VERSION_KEY = "startup.backfill_version"
+PRIMARY_ADMIN_KEY = "startup.primary_admin"
+BACKFILL_BATCH_SIZE = 500
 
-def _normalize_episode_paths() -> None:
-    """Ensure Episode paths store only basenames for local files."""
-    session: _Session = next(get_session())
-    try:
-        q = select(Episode).limit(5000)
-        eps = session.exec(q).all()
-        changed = 0
-        for e in eps:
-            c = False
-            if e.final_audio_path:
-                base = os.path.basename(str(e.final_audio_path))
-                if base != e.final_audio_path:
-                    e.final_audio_path = base
-                    c = True
-            if e.cover_path and not str(e.cover_path).lower().startswith(("http://", "https://")):
-                base = os.path.basename(str(e.cover_path))
-                if base != e.cover_path:
-                    e.cover_path = base
-                    c = True
-            if c:
-                session.add(e)
-                changed += 1
-        if changed:
+_backfill_thread: Optional[threading.Thread] = None
+_backfill_lock = threading.Lock()
+
+
+def _batched_update(model: Any, needs_change: Any, fix: Callable[[Any], bool], batch_size: int) -> int:
+    """Apply ``fix`` to rows matching ``needs_change`` in id-ordered batches, committing each batch."""
+    changed = 0
+    last = None
+    while True:
+        session: _Session = next(get_session())
+        try:
+            stmt = select(model).where(needs_change)
+            if last is not None:
+                stmt = stmt.where(model.id > last)
+            rows = session.exec(stmt.order_by(model.id).limit(batch_size)).all()
+            if not rows:
+                return changed
+            last = rows[-1].id
+            for row in rows:
+                if fix(row):
+                    session.add(row)
+                    changed += 1
             session.commit()
-    except Exception as e:
-        session.rollback()
-        log.warning("_normalize_episode_paths failed: %s", e)
-    finally:
-        session.close()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        if len(rows) < batch_size:
+            return changed
+
 
+def _is_local_path(value: Any) -> bool:
+    return not str(value).lower().startswith(("http://", "https://"))
 
-def _normalize_podcast_covers() -> None:
+
+def _normalize_episode_paths(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Ensure Episode paths store only basenames for local files."""
+
+    def _fix(e: Episode) -> bool:
+        c = False
+        if e.final_audio_path:
+            base = os.path.basename(str(e.final_audio_path))
+            if base != e.final_audio_path:
+                e.final_audio_path = base
+                c = True
+        if e.cover_path and _is_local_path(e.cover_path):
+            base = os.path.basename(str(e.cover_path))
+            if base != e.cover_path:
+                e.cover_path = base
+                c = True
+        return c
+
+    needs = or_(
+        Episode.final_audio_path.contains("/"),  # type: ignore[union-attr]
+        and_(
+            Episode.cover_path.contains("/"),  # type: ignore[union-attr]
+            ~func.lower(Episode.cover_path).startswith("http://"),
+            ~func.lower(Episode.cover_path).startswith("https://"),
+        ),
+    )
+    return _batched_update(Episode, needs, _fix, batch_size)
+
+
+def _normalize_podcast_covers(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
     """Ensure Podcast.cover_path stores only a basename if it's a local path."""
-    session: _Session = next(get_session())
-    try:
-        q = select(Podcast).limit(5000)
-        pods = session.exec(q).all()
-        changed = 0
-        for p in pods:
-            try:
-                if p.cover_path and not str(p.cover_path).lower().startswith(("http://", "https://")):
-                    base = os.path.basename(str(p.cover_path))
-                    if base != p.cover_path:
-                        p.cover_path = base
-                        session.add(p)
-                        changed += 1
-            except Exception as e:
-                log.debug("skip normalize podcast cover for id=%s: %s", getattr(p, "id", "?"), e)
-        if changed:
-            session.commit()
-    except Exception as e:
-        session.rollback()
-        log.warning("_normalize_podcast_covers failed: %s", e)
-    finally:
-        session.close()
+
+    def _fix(p: Podcast) -> bool:
+        if p.cover_path and _is_local_path(p.cover_path):
+            base = os.path.basename(str(p.cover_path))
+            if base != p.cover_path:
+                p.cover_path = base
+                return True
+        return False
+
+    needs = and_(
+        Podcast.cover_path.contains("/"),  # type: ignore[union-attr]
+        ~func.lower(Podcast.cover_path).startswith("http://"),
+        ~func.lower(Podcast.cover_path).startswith("https://"),
+    )
+    return _batched_update(Podcast, needs, _fix, batch_size)
 
 
 def _ensure_user_subscription_column() -> None:
@@ -273,11 +312,11 @@ def _ensure_user_admin_column() -> None:
         log.warning("[migrate] Could not add user.is_admin column: %s", e)
 
 
-def _ensure_primary_admin() -> None:
-    """Ensure ADMIN_EMAIL user has is_admin flag set."""
+def _ensure_primary_admin() -> bool:
+    """Ensure ADMIN_EMAIL user has is_admin flag set; True once the account exists."""
     admin_email = getattr(settings, 'ADMIN_EMAIL', None)
     if not admin_email:
-        return
+        return False
     admin_email = admin_email.lower()
     try:
         with engine.begin() as conn:
@@ -289,8 +328,10 @@ def _ensure_primary_admin() -> None:
             result = conn.execute(text(stmt), {'email': admin_email})
             if result.rowcount:
                 log.info('[startup] Ensured admin account flag for %s', admin_email)
+                return True
     except Exception as e:
         log.warning('[startup] Could not ensure admin flag for %s: %s', admin_email, e)
+    return False
 
 
 def _compute_pt_expiry(created_at_utc: datetime, days: int = 14) -> datetime:
@@ -317,32 +358,24 @@ def _compute_pt_expiry(created_at_utc: datetime, days: int = 14) -> datetime:
     return expiry_pt.astimezone(ZoneInfo("UTC") if ZoneInfo else timezone.utc)
 
 
-def _backfill_mediaitem_expires_at() -> None:
-    """Set expires_at for media items missing it (idempotent)."""
-    session: _Session = next(get_session())
-    try:
-        from api.models.podcast import MediaItem, MediaCategory
+def _backfill_mediaitem_expires_at(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Set expires_at for main_content media items missing it (idempotent)."""
+    from api.models.podcast import MediaItem, MediaCategory
+
+    def _fix(m: MediaItem) -> bool:
+        ca = getattr(m, "created_at", None) or datetime.utcnow()
+        m.expires_at = _compute_pt_expiry(ca)
+        return True
+
+    needs = and_(
+        MediaItem.expires_at == None,  # type: ignore  # noqa: E711
+        MediaItem.category == MediaCategory.main_content,  # type: ignore
+    )
+    changed = _batched_update(MediaItem, needs, _fix, batch_size)
+    if changed:
+        log.info("[migrate] Backfilled expires_at for %s media items", changed)
+    return changed
 
-        q = select(MediaItem).filter((MediaItem.expires_at == None)).limit(5000)  # type: ignore
-        items = session.exec(q).all()
-        changed = 0
-        for m in items:
-            try:
-                if getattr(m, "category", None) == getattr(MediaCategory, "main_content", None):
-                    ca = getattr(m, "created_at", None) or datetime.utcnow()
-                    m.expires_at = _compute_pt_expiry(ca)
-                    session.add(m)
-                    changed += 1
-            except Exception:
-                continue
-        if changed:
-            session.commit()
-            log.info("[migrate] Backfilled expires_at for %s media items", changed)
-    except Exception as e:
-        session.rollback()
-        log.warning("_backfill_mediaitem_expires_at failed: %s", e)
-    finally:
-        session.close()
 
 def _ensure_user_terms_columns() -> None:
     """Ensure columns for tracking terms acceptance exist across engines."""
@@ -377,23 +410,145 @@ def _ensure_user_terms_columns() -> None:
             log.warning("[migrate] Unable to ensure user terms columns (%s): %s", backend, exc)
 
 
-def run_startup_tasks() -> None:
-    """Create tables and run all additive/idempotent startup tasks."""
+# Row-level backfills, in order. Append new entries with the next version number;
+# each must be idempotent and batched since it runs concurrently with traffic.
+BACKFILLS = (
+    (1, "episode_paths", _normalize_episode_paths),
+    (2, "podcast_covers", _normalize_podcast_covers),
+    (3, "mediaitem_expires_at", _backfill_mediaitem_expires_at),
+)
+BACKFILL_VERSION = BACKFILLS[-1][0]
+
+
+def _schema_fingerprint() -> str:
+    """SCHEMA_VERSION plus a hash of the model tables, columns and indexes."""
+    h = hashlib.sha1()
+    for name in sorted(SQLModel.metadata.tables):
+        table = SQLModel.metadata.tables[name]
+        h.update(name.encode())
+        for col in sorted(table.columns.keys()):
+            h.update(b"." + col.encode())
+        for ix in sorted(str(i.name) for i in table.indexes):
+            h.update(b"#" + ix.encode())
+    return f"{SCHEMA_VERSION}:{h.hexdigest()[:16]}"
+
+
+def _read_versions() -> Optional[Dict[str, Any]]:
+    """Recorded startup versions in one primary-key read; {} before the first migration, None if the DB is unreachable."""
+    try:
+        with _Session(engine) as session:
+            rows = session.exec(
+                select(AppSetting).where(
+                    AppSetting.key.in_([SCHEMA_VERSION_KEY, BACKFILL_VERSION_KEY, PRIMARY_ADMIN_KEY])  # type: ignore[attr-defined]
+                )
+            ).all()
+            return {r.key: json.loads(r.value_json or "null") for r in rows}
+    except Exception as e:
+        # Missing appsetting table on a fresh database lands here too
+        log.info("[startup] Could not read startup versions: %s", e)
+        try:
+            with engine.connect():
+                return {}
+        except Exception:
+            return None
+
+
+def _write_version(key: str, value: Any) -> None:
+    with _Session(engine) as session:
+        rec = session.get(AppSetting, key) or AppSetting(key=key)
+        rec.value_json = json.dumps(value)
+        rec.updated_at = datetime.utcnow()
+        session.add(rec)
+        session.commit()
+
+
+def _run_schema_migrations(fingerprint: str) -> None:
     try:
         create_db_and_tables()
     except Exception as e:
         log.error("[startup] create_db_and_tables failed (continuing): %s", e)
-
-    _normalize_episode_paths()
-    _normalize_podcast_covers()
+        return
     _ensure_user_admin_column()
-    _ensure_primary_admin()
     _ensure_user_terms_columns()
     _ensure_user_subscription_column()
-    _backfill_mediaitem_expires_at()
+    try:
+        _write_version(SCHEMA_VERSION_KEY, fingerprint)
+        log.info("[migrate] Schema recorded at %s", fingerprint)
+    except Exception as e:
+        log.warning("[migrate] Could not record schema version: %s", e)
+
+
+def run_pending_backfills(batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, int]:
+    """Run backfills newer than the recorded version, in order, recording each as it completes.
+
+    Idempotent and safe to run from several processes at once; a failure leaves the
+    version at the last completed step so the next run resumes there.
+    """
+    versions = _read_versions() or {}
+    done = int(versions.get(BACKFILL_VERSION_KEY) or 0)
+    report: Dict[str, int] = {}
+    for version, name, fn in BACKFILLS:
+        if version <= done:
+            continue
+        report[name] = fn(batch_size=batch_size)
+        _write_version(BACKFILL_VERSION_KEY, version)
+    if report:
+        log.info("[migrate] Backfills complete: %s", report)
+    return report
+
+
+def _run_backfills_quietly() -> None:
+    try:
+        run_pending_backfills()
+    except Exception as e:
+        log.warning("[migrate] Background backfills failed (will retry on the next run): %s", e)
+
+
+def _schedule_backfills() -> None:
+    """Start pending backfills off the request path (the maintenance.run_backfills task also retries them)."""
+    global _backfill_thread
+    if os.getenv("STARTUP_BACKFILLS", "1").strip().lower() in {"0", "false", "no", "off"}:
+        return
+    with _backfill_lock:
+        if _backfill_thread is not None and _backfill_thread.is_alive():
+            return
+        _backfill_thread = threading.Thread(target=_run_backfills_quietly, name="startup-backfills", daemon=True)
+        _backfill_thread.start()
+
+
+def run_startup_tasks() -> None:
+    """Bring the schema up to date and schedule pending row backfills.
+
+    Completed work is recorded in AppSetting, so a warm start is one primary-key
+    read: migrations run only when SCHEMA_VERSION or the model fingerprint
+    changed, and row-level backfills run out of band in batches.
+    """
+    t0 = time.perf_counter()
+    fingerprint = _schema_fingerprint()
+    versions = _read_versions()
+    if versions is None or versions.get(SCHEMA_VERSION_KEY) != fingerprint:
+        _run_schema_migrations(fingerprint)
+        versions = _read_versions()
+    if versions is None:
+        log.warning("[startup] Database unavailable; skipped admin flag and backfills")
+        return
+
+    admin_email = (getattr(settings, "ADMIN_EMAIL", None) or "").lower()
+    # Re-checked each boot until the admin account exists, then recorded
+    if admin_email and versions.get(PRIMARY_ADMIN_KEY) != admin_email and _ensure_primary_admin():
+        try:
+            _write_version(PRIMARY_ADMIN_KEY, admin_email)
+        except Exception as e:
+            log.warning("[startup] Could not record primary admin: %s", e)
+
+    if int(versions.get(BACKFILL_VERSION_KEY) or 0) < BACKFILL_VERSION:
+        _schedule_backfills()
+    log.info("[startup] Startup tasks finished in %.1f ms", (time.perf_counter() - t0) * 1000.0)
 
 
 __all__ = [
+    "BACKFILLS",
+    "run_pending_backfills",
     "run_startup_tasks",
     "_compute_pt_expiry",
     "_normalize_episode_paths",
@@ -402,5 +557,3 @@ __all__ = [
     "_ensure_user_terms_columns",
     "_backfill_mediaitem_expires_at",
 ]
-
-
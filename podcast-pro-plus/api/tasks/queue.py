@@ -6,6 +6,8 @@ import os
 from typing import Dict, Any, Optional
 from google.cloud import tasks_v2
 
+from infrastructure.google_clients import get_tasks_client
+
 
 PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT") or os.getenv("GCLOUD_PROJECT")
 LOCATION = os.getenv("TASKS_LOCATION", "us-west1")
@@ -30,7 +32,7 @@ def enqueue_task(
     Enqueue an HTTP task to POST JSON payload to the given internal path.
     path: e.g. '/internal/tasks/transcribe'
     """
-    client = tasks_v2.CloudTasksClient()
+    client = get_tasks_client()
     parent = _queue_path(client)
 
     # Cloud Run base URL — use the request host in prod if you prefer.
@@ -1,16 +1,31 @@
 import os, datetime
-from google.cloud import storage
 
-_client = storage.Client()
+from infrastructure.google_clients import get_storage_client
+
+# Resumable-upload chunk size for streamed writes; must be a multiple of 256 KiB.
+STREAM_CHUNK_SIZE = 2 * 1024 * 1024
+
+def _get_client():
+    return get_storage_client()
 
 def upload_bytes(bucket: str, key: str, data: bytes, content_type: str) -> str:
-    b = _client.bucket(bucket)
+    b = _get_client().bucket(bucket)
     blob = b.blob(key)
     blob.upload_from_string(data, content_type=content_type)
     return f"gs://{bucket}/{key}"
 
+def open_resumable_writer(bucket: str, key: str, content_type: str, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Open a file-like writer backed by a GCS resumable upload session.
+
+    Each ``chunk_size`` bytes written are sent immediately, so the object uploads
+    while the caller is still producing data. ``close()`` finalizes the object;
+    dropping the writer without closing abandons the session (no object is created).
+    """
+    blob = _get_client().bucket(bucket).blob(key)
+    return blob.open("wb", chunk_size=chunk_size, content_type=content_type)
+
 def make_signed_url(bucket: str, key: str, minutes: int = 60) -> str:
-    b = _client.bucket(bucket)
+    b = _get_client().bucket(bucket)
     blob = b.blob(key)
     return blob.generate_signed_url(
         version="v4",
@@ -0,0 +1,57 @@
+"""Process-wide Google Cloud clients.
+
+Each client is built on first use (credential discovery plus a fresh channel)
+and then reused by every caller in the process. A forked Celery worker drops the
+parent's clients and builds its own, since gRPC channels must not cross a fork.
+"""
+from api.core.lazy import LazyValue
+
+
+def _build_storage():
+    from google.cloud import storage
+    return storage.Client()
+
+
+def _build_tts():
+    from google.cloud import texttospeech
+    return texttospeech.TextToSpeechClient()
+
+
+def _build_tasks():
+    from google.cloud import tasks_v2
+    return tasks_v2.CloudTasksClient()
+
+
+def _build_speech():
+    from google.cloud import speech_v1p1beta1 as speech  # word time offsets need the beta surface
+    return speech.SpeechClient()
+
+
+_storage = LazyValue(_build_storage, name="google.storage", fork_safe=True)
+_tts = LazyValue(_build_tts, name="google.texttospeech", fork_safe=True)
+_tasks = LazyValue(_build_tasks, name="google.cloudtasks", fork_safe=True)
+_speech = LazyValue(_build_speech, name="google.speech", fork_safe=True)
+
+_REGISTRY = (_storage, _tts, _tasks, _speech)
+
+
+def get_storage_client():
+    return _storage.get()
+
+
+def get_tts_client():
+    return _tts.get()
+
+
+def get_tasks_client():
+    return _tasks.get()
+
+
+def get_speech_client():
+    return _speech.get()
+
+
+def reset_clients() -> None:
+    """Drop every cached client (tests, credential rotation); the next call rebuilds."""
+    for value in _REGISTRY:
+        value.reset()
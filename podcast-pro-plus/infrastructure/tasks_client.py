@@ -6,10 +6,12 @@ except ImportError:
     tasks_v2 = None
 from datetime import datetime
 
+from infrastructure.google_clients import get_tasks_client
+
 def enqueue_http_task(path: str, body: dict) -> dict:
     if tasks_v2 is None:
         raise ImportError("google-cloud-tasks is not installed")
-    client = tasks_v2.CloudTasksClient()
+    client = get_tasks_client()
     parent = client.queue_path(os.getenv("GOOGLE_CLOUD_PROJECT"), os.getenv("TASKS_LOCATION"), os.getenv("TASKS_QUEUE"))
     url = f"{os.getenv('TASKS_URL_BASE')}{path}"
     task = {
@@ -0,0 +1,102 @@
+import json
+import logging
+from pathlib import Path
+from uuid import UUID
+
+from sqlmodel import select
+
+from worker.tasks import celery_app
+from api.core.database import get_session
+from api.core.paths import MEDIA_DIR, WS_ROOT as PROJECT_ROOT
+from api.models.podcast import MediaItem, PodcastTemplate
+from api.models.user import User
+from api.services import preanalysis
+from api.services.audio import orchestrator_steps as steps
+from api.services.clean_engine.models import UserSettings
+from worker.tasks.audio import tts_provider_for
+
+
+def _transcript_for(filename: str):
+	"""The working transcript written by transcribe_media_file, if it exists yet."""
+	tr_dir = PROJECT_ROOT / 'transcripts'
+	stem = Path(filename).stem
+	for cand in (tr_dir / f"{stem}.json", tr_dir / f"{stem}.words.json"):
+		if cand.is_file():
+			return cand
+	return None
+
+
+def _user_settings_for(filename: str):
+	"""Engine settings of the upload's owner (defaults when the upload is not in the database)."""
+	session = next(get_session())
+	try:
+		item = session.exec(select(MediaItem).where(MediaItem.filename == filename)).first()
+		user = session.get(User, item.user_id) if item is not None else None
+		raw = getattr(user, 'audio_cleanup_settings_json', None) or '{}'
+		try:
+			cleanup_settings = json.loads(raw)
+		except Exception:
+			cleanup_settings = {}
+	finally:
+		session.close()
+	return UserSettings.from_cleanup_settings(cleanup_settings if isinstance(cleanup_settings, dict) else {})
+
+
+@celery_app.task(name="preanalyze_media_file")
+def preanalyze_media_file(filename: str) -> dict:
+	"""Speculative analysis of a main-content upload ahead of assembly (see api.services.preanalysis).
+
+	Queued when the upload lands and again when its transcript is written; the
+	second run reuses the audio analysis and adds the transcript's. Never fails
+	loudly: a missing record only means assembly does the work itself.
+	"""
+	src = MEDIA_DIR / filename
+	if not src.is_file():
+		return {"ok": False, "filename": filename, "error": "not found"}
+	try:
+		words_path = _transcript_for(filename)
+		us = _user_settings_for(filename) if words_path is not None else None
+		record = preanalysis.analyze(src, words_path, us)
+	except Exception as ex:
+		logging.warning("[preanalysis] failed for %s: %s", filename, ex, exc_info=True)
+		return {"ok": False, "filename": filename, "error": str(ex)}
+	if record is None:
+		return {"ok": False, "filename": filename, "error": "stage cache disabled"}
+	logging.info(
+		"[preanalysis] %s: duration_ms=%s energy=%s words=%s",
+		filename, record.audio.get("duration_ms"), record.energy_path is not None, record.words is not None,
+	)
+	return {"ok": True, "filename": filename, **record.as_stats()}
+
+
+@celery_app.task(name="render_template_stems")
+def render_template_stems(template_id: str) -> dict:
+	"""Render a saved template's segments and music beds into the stem cache (see api.services.audio.template_stems).
+
+	Queued when a template is created or updated, so its first assembly finds
+	them ready. TTS segments are rendered with their saved scripts; an episode
+	that overrides a script renders that segment itself. Never fails loudly.
+	"""
+	session = next(get_session())
+	try:
+		template = session.get(PodcastTemplate, UUID(str(template_id)))
+		if template is None:
+			return {"ok": False, "template_id": template_id, "error": "not found"}
+		user = session.get(User, template.user_id)
+		try:
+			cleanup_settings = json.loads(getattr(user, 'audio_cleanup_settings_json', None) or '{}')
+		except Exception:
+			cleanup_settings = {}
+		provider = tts_provider_for(user, cleanup_settings)
+		api_key = getattr(user, 'elevenlabs_api_key', None)
+	finally:
+		session.close()
+	lines = []
+	try:
+		segments = steps.prepare_template_segments(template, {}, provider, api_key, lines)
+		beds = steps.prepare_music_beds(template, lines)
+	except Exception as ex:
+		logging.warning("[template_stems] failed for %s: %s", template_id, ex, exc_info=True)
+		return {"ok": False, "template_id": template_id, "error": str(ex)}
+	logging.info("[template_stems] %s: segments=%d beds=%d", template_id, len(segments), len(beds))
+	return {"ok": True, "template_id": template_id, "segments": len(segments), "beds": len(beds)}
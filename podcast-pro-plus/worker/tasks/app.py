@@ -1,10 +1,13 @@
 import os
+import sys
 import logging
 from pathlib import Path
 
 from celery import Celery
+from celery.signals import worker_init
 from dotenv import load_dotenv
 from celery.schedules import crontab
+from kombu import Queue
 
 # Load env first
 load_dotenv()
@@ -18,6 +21,11 @@ try:
 except Exception:
     # Fallback: current working directory
     PROJECT_ROOT = Path.cwd()
+# Relative sys.path entries ('' under `python -m`/`-c`) stop resolving after the chdir;
+# pin the package root so modules first imported by tasks (e.g. infrastructure.*) still load
+_PKG_ROOT = str(Path(__file__).resolve().parents[2])
+if _PKG_ROOT not in sys.path:
+    sys.path.insert(0, _PKG_ROOT)
 os.chdir(PROJECT_ROOT)
 
 # Celery app configuration (verbatim behavior)
@@ -32,6 +40,7 @@ celery_app.conf.update(
         "worker.tasks.maintenance",
         "worker.tasks.images",
         "worker.tasks.clean",
+        "worker.tasks.analysis",
     ),
     task_serializer="json",
     result_serializer="json",
@@ -46,6 +55,145 @@ celery_app.conf.update(
     result_expires=3600,
 )
 
+# --- Workload queues ---
+# Long CPU-bound assemblies must not sit in front of short HTTP-bound tasks, so each
+# class of work has its own queue, pool and time limits. Run one worker per workload:
+#   python -m worker.tasks.app cpu|io|maintenance|large
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+WORKLOADS = {
+    # Audio assembly: pydub/ffmpeg hold the GIL, so one process per core. The clean engine's
+    # segment pool gets cores // concurrency workers (clean_engine.parallel.max_workers), i.e. none
+    # at this default: long episodes are spliced in parallel only on the large queue, or here if
+    # CELERY_CPU_CONCURRENCY is set below the core count (or CLEAN_ENGINE_WORKERS is set)
+    "cpu": {
+        "pool": "prefork",
+        "concurrency": _env_int("CELERY_CPU_CONCURRENCY", os.cpu_count() or 2),
+        "soft_time_limit": 3300,
+        "time_limit": 3600,
+    },
+    # Transcription submit/poll and publishing mostly wait on HTTP; threads are enough.
+    # The threads pool cannot enforce soft_time_limit/time_limit, so io has none: these
+    # tasks are bounded by explicit per-request HTTP timeouts and the transcription poll deadline
+    "io": {
+        "pool": "threads",
+        "concurrency": _env_int("CELERY_IO_CONCURRENCY", 16),
+    },
+    "maintenance": {
+        "pool": "prefork",
+        "concurrency": _env_int("CELERY_MAINTENANCE_CONCURRENCY", 1),
+        "soft_time_limit": 1800,
+        "time_limit": 1860,
+    },
+    # Assemblies whose memory estimate does not fit a shared cpu worker (see episodes.admission);
+    # nothing routes here by name, jobs are sent with an explicit queue. One slot per worker, so
+    # the segment pool of a long episode gets all the cores
+    "large": {
+        "pool": "prefork",
+        "concurrency": _env_int("CELERY_LARGE_CONCURRENCY", 1),
+        "soft_time_limit": 7020,
+        "time_limit": 7200,
+    },
+}
+DEFAULT_WORKLOAD = "io"
+# Messages published before the split sit in Celery's default queue; the cpu worker drains it
+LEGACY_QUEUE = "celery"
+
+TASK_WORKLOADS = {
+    "create_podcast_episode": "cpu",
+    "transcribe_media_file": "io",
+    "publish_episode_to_spreaker_task": "io",
+    # Speculative work nobody waits for; runs behind the purges, never in front of an assembly
+    "preanalyze_media_file": "maintenance",
+    "render_template_stems": "maintenance",
+    # Frequent and tiny; must not wait behind a long purge
+    "maintenance.report_queue_depths": "io",
+}
+
+
+def workload_for(task_name: str) -> str:
+    if task_name in TASK_WORKLOADS:
+        return TASK_WORKLOADS[task_name]
+    if task_name.startswith("maintenance."):
+        return "maintenance"
+    return DEFAULT_WORKLOAD
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    return {"queue": workload_for(name)}
+
+
+class WorkloadTimeLimits:
+    """Task annotation applying the time limits of each task's workload (if it has any)."""
+
+    def annotate(self, task):
+        wl = WORKLOADS[workload_for(task.name)]
+        limits = {k: wl[k] for k in ("soft_time_limit", "time_limit") if k in wl}
+        return limits or None
+
+    def annotate_any(self):
+        return None
+
+
+def configure_workloads(app: Celery, *, durable: bool = True) -> None:
+    app.conf.update(
+        task_queues=tuple(Queue(name, routing_key=name, durable=durable) for name in WORKLOADS),
+        task_default_queue=DEFAULT_WORKLOAD,
+        task_routes=(route_task,),
+        task_annotations=(WorkloadTimeLimits(),),
+    )
+
+
+@worker_init.connect
+def _record_worker_processes(sender=None, **kwargs):
+    # Inherited by the pool children: the clean engine sizes its segment pool as cores / processes
+    concurrency = getattr(sender, "concurrency", None)
+    if concurrency:
+        os.environ["CELERY_WORKER_PROCESSES"] = str(concurrency)
+
+
+def worker_argv(workload: str) -> list:
+    """Celery worker arguments for one workload (queue, pool, concurrency)."""
+    wl = WORKLOADS[workload]
+    queues = [workload] + ([LEGACY_QUEUE] if workload == "cpu" else [])
+    return [
+        "worker",
+        f"--queues={','.join(queues)}",
+        f"--pool={wl['pool']}",
+        f"--concurrency={wl['concurrency']}",
+        "--prefetch-multiplier=1",
+        f"--hostname={workload}@%h",
+        "--loglevel=INFO",
+    ]
+
+
+def queue_depths(app: Celery = None) -> dict:
+    """Ready-message count per workload queue (None where the broker could not say)."""
+    app = app or celery_app
+    depths = {}
+    with app.connection_for_read() as conn:
+        try:
+            conn.ensure_connection(max_retries=1)
+        except Exception:
+            logging.warning("[celery] broker unreachable for queue depth probe", exc_info=True)
+            return {name: None for name in WORKLOADS}
+        for name in WORKLOADS:
+            # A passive declare of a missing queue closes the channel, so use one per queue
+            try:
+                with conn.channel() as channel:
+                    depths[name] = channel.queue_declare(queue=name, passive=True).message_count
+            except Exception:
+                depths[name] = None
+    return depths
+
+
+configure_workloads(celery_app)
+
 # Optional eager mode for dev
 _eager_flag = (os.getenv("CELERY_EAGER", "").strip().lower() in {"1", "true", "yes", "on"})
 if _eager_flag:
@@ -62,12 +210,8 @@ if _eager_flag:
 # Optional dev transient queue config
 try:
     if os.getenv("DEV_TRANSIENT_QUEUE", "").strip().lower() in {"1", "true", "yes", "on"}:
-        from kombu import Exchange, Queue
-
         celery_app.conf.task_default_delivery_mode = "transient"
-        celery_app.conf.task_queues = (
-            Queue("celery", Exchange("celery"), routing_key="celery", durable=False),
-        )
+        configure_workloads(celery_app, durable=False)
         logging.warning(
             "[celery] Using TRANSIENT queue (durable=False, non-persistent messages) for dev. Set DEV_TRANSIENT_QUEUE=0 to disable."
         )
@@ -89,8 +233,42 @@ try:
         "purge-expired-uploads-2am-pt": {
             "task": "maintenance.purge_expired_uploads",
             "schedule": crontab(hour=2, minute=0),
-        }
+        },
+        # Hourly so the previous UTC day is finalized shortly after it closes in any beat timezone
+        "finalize-metrics-rollups-hourly": {
+            "task": "maintenance.finalize_metrics_rollups",
+            "schedule": crontab(minute=10),
+        },
+        # Webhooks keep the subscription snapshot current; this catches anything they missed
+        "reconcile-stripe-subscriptions-6h": {
+            "task": "maintenance.reconcile_stripe_subscriptions",
+            "schedule": crontab(minute=25, hour="*/6"),
+        },
+        # No-op once the recorded backfill version is current
+        "run-backfills-hourly": {
+            "task": "maintenance.run_backfills",
+            "schedule": crontab(minute=40),
+        },
+        # Checkpoints of assemblies whose worker was lost and that were never redelivered
+        "purge-assembly-workspaces-6h": {
+            "task": "maintenance.purge_assembly_workspaces",
+            "schedule": crontab(minute=55, hour="*/6"),
+        },
+        "report-queue-depths-1m": {
+            "task": "maintenance.report_queue_depths",
+            "schedule": 60.0,
+        },
     })
-    logging.info("[celery] Beat schedule configured for purge at 2:00 in %s", tz)
+    logging.info("[celery] Beat schedule configured for purge at 2:00, hourly metrics rollups/backfills and 6-hourly Stripe reconciliation in %s", tz)
 except Exception:
     logging.warning("[celery] Failed to configure beat schedule", exc_info=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Run against the imported module's app: tasks register there, not on this __main__ copy
+    from worker.tasks import app as _app_module
+
+    _workload = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_WORKLOAD
+    _app_module.celery_app.worker_main(_app_module.worker_argv(_workload) + sys.argv[2:])
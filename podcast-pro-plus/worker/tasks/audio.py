@@ -12,6 +12,7 @@ from api.core import crud
 from api.core.config import settings
 from api.services import audio_processor
 from api.services.audio.common import sanitize_filename
+from api.services.audio.audio_export import export_by_suffix, intermediate_name
 from api.services import transcription as trans
 from api.services import ai_enhancer
 from pydub import AudioSegment
@@ -20,17 +21,124 @@ from api.services.clean_engine.features import apply_flubber_cuts
 from api.models.podcast import MediaItem, MediaCategory, Episode
 from uuid import UUID
 from api.models.notification import Notification
-from api.core.paths import MEDIA_DIR
 from api.services.billing import usage as usage_svc
+from api.services import media_probe
+from api.services.episodes import jobs as job_state
+from api.services.episodes import admission
+from api.services.episodes import checkpoints
+from api.services import stage_cache
+from api.services import preanalysis
+from api.services import events
+from api.models.job import JOB_ERROR, JOB_PROCESSED, JOB_PROCESSING, JOB_QUEUED
 from math import ceil
 from celery import current_task
 
 
+# Cleaning results shared across jobs: re-assembling with another template or title reuses them
+_CLEAN_CACHE = stage_cache.StageCache("clean_engine")
+
 # Directory to persist large assembly logs
 ASSEMBLY_LOG_DIR = PROJECT_ROOT / "assembly_logs"
 ASSEMBLY_LOG_DIR.mkdir(exist_ok=True)
 
 
+def _report(stage: Optional[str] = None, percent: Optional[int] = None, **fields) -> None:
+	"""Record a stage boundary on the durable job row of the running task (no-op for direct calls)."""
+	try:
+		job_id = current_task.request.id if current_task else None
+	except Exception:
+		job_id = None
+	job_state.update_job(job_id, stage=stage, percent=percent, **fields)
+
+
+def _admit(user_id: str, main_content_filename: str, intents: dict | None) -> admission.Admission:
+	"""Reserve the job's estimated peak memory on this host before any audio is loaded.
+
+	Raises celery's Retry to defer the job (host full) or to move it to the large-job
+	queue. Eager and direct calls are only measured, never held back.
+	"""
+	request = getattr(current_task, 'request', None)
+	job_id = getattr(request, 'id', None)
+	estimate = None
+	session = next(get_session())
+	try:
+		estimate = admission.estimate_for_job(session, UUID(user_id), main_content_filename, intents)
+	except Exception:
+		logging.warning("[assemble] memory estimate failed; running without a reservation", exc_info=True)
+	finally:
+		session.close()
+	if estimate is None or not job_id or getattr(request, 'is_eager', False) or getattr(request, 'called_directly', True):
+		return admission.Admission(job_id, estimate).start()
+
+	ledger = admission.HostLedger()
+	on_large = ((request.delivery_info or {}).get('routing_key') == admission.LARGE_QUEUE)
+	decision = admission.decide(ledger, job_id, estimate.peak_mb, on_large_queue=on_large, deferrals=request.retries or 0)
+	logging.info(f"[assemble] admission: {decision} estimate={estimate.peak_mb:.0f}MB budget={ledger.budget_mb:.0f}MB large_queue={on_large}")
+	if decision == admission.REROUTE:
+		_report("admission", 0, state=JOB_QUEUED, message=f"Waiting for a large-job worker (~{estimate.peak_mb:.0f} MB)")
+		raise current_task.retry(countdown=0, max_retries=None, **admission.large_queue_options())
+	if decision == admission.DEFER:
+		_report("admission", 0, state=JOB_QUEUED, message="Waiting for worker memory")
+		raise current_task.retry(countdown=admission.DEFER_COUNTDOWN_S, max_retries=None)
+	return admission.Admission(job_id, estimate, ledger).start()
+
+
+def tts_provider_for(user_obj, cleanup_settings) -> str:
+	"""The user's TTS provider setting, else ElevenLabs when a user or platform key exists, else Google."""
+	provider = None
+	try:
+		provider = (cleanup_settings.get('ttsProvider') or '').strip().lower() if isinstance(cleanup_settings, dict) else None
+	except Exception:
+		provider = None
+	if provider not in {'elevenlabs','google'}:
+		# Prefer ElevenLabs if either a per-user key OR a platform env key exists
+		has_user_key = bool(getattr(user_obj, 'elevenlabs_api_key', None))
+		has_env_key = bool(getattr(settings, 'ELEVENLABS_API_KEY', None))
+		provider = 'elevenlabs' if (has_user_key or has_env_key) else 'google'
+	return provider
+
+
+def _place_engine_outputs(result: dict, files: dict, final_path: Path):
+	"""Put clean-engine outputs (fresh or from the stage cache) at this job's names and point the result at them."""
+	old_stem = Path(result['final_path']).stem
+	edits = result.setdefault('summary', {}).setdefault('edits', {})
+	targets = {'cleaned': final_path}
+	for key in ('words_json', 'words_json_original'):
+		if key in files:
+			old = Path(edits[key])
+			targets[key] = old.with_name(final_path.stem + old.name[len(old_stem):])
+	for key, target in targets.items():
+		src = Path(files[key])
+		if src.resolve() != target.resolve():
+			target.parent.mkdir(parents=True, exist_ok=True)
+			shutil.copyfile(src, target)
+		if key != 'cleaned':
+			edits[key] = str(target)
+	result['final_path'] = str(final_path)
+	return result, targets
+
+
+def _remove_intermediates(paths, keep) -> int:
+	"""Delete the cleaned_audio/ stage files once the final mix is exported; returns files removed.
+
+	The working copy in media_uploads (``working_audio_name``) stays: with the upload gone it is
+	the source for flubber re-cuts and re-assembly. ``keep`` (the final file) is never removed.
+	"""
+	keep = Path(keep).resolve()
+	gone = 0
+	for path in dict.fromkeys(Path(p) for p in paths if p):
+		try:
+			if path.resolve() == keep:
+				continue
+			path.unlink()
+			gone += 1
+		except FileNotFoundError:
+			continue
+		except Exception:
+			logging.warning("[cleanup] Unable to unlink intermediate %s", path, exc_info=True)
+	return gone
+
+
 @celery_app.task(name="create_podcast_episode")
 def create_podcast_episode(
 	episode_id: str,
@@ -49,7 +157,14 @@ def create_podcast_episode(
 	Assemble final audio from template + content. Set episode.status=processed and store final_audio_path.
 	"""
 	logging.info(f"[assemble] CWD = {os.getcwd()}")
+	admitted = _admit(user_id, main_content_filename, intents)
+	try:
+		_report("starting", 0, state=JOB_PROCESSING, episode_id=UUID(episode_id))
+	except ValueError:
+		_report("starting", 0, state=JOB_PROCESSING)
 	session = next(get_session())
+	# Redelivered after a lost worker: completed stages are picked up from here
+	workspace = checkpoints.JobWorkspace.for_job(admitted.job_id)
 	try:
 		# --- Charge processing minutes at job start (idempotent by task id) ---
 		if not skip_charge:
@@ -57,31 +172,8 @@ def create_podcast_episode(
 				from uuid import UUID as _UUID
 				uid = _UUID(user_id)
 				eid = _UUID(episode_id)
-				# Resolve source path
-				from pathlib import Path as _Path
-				src_name = _Path(str(main_content_filename)).name
-				src_path = MEDIA_DIR / src_name
-				seconds = 0.0
-				if src_path.is_file():
-					# Try ffprobe first
-					try:
-						import subprocess, json as _json
-						cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", str(src_path)]
-						proc = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-						if proc.returncode == 0:
-							data = _json.loads(proc.stdout or '{}')
-							dur = float(data.get('format', {}).get('duration', 0))
-							if dur and dur > 0:
-								seconds = float(dur)
-					except Exception:
-						pass
-					if seconds <= 0:
-						try:
-							from pydub import AudioSegment as _AS
-							seg = _AS.from_file(src_path)
-							seconds = len(seg) / 1000.0
-						except Exception:
-							seconds = 0.0
+				# Duration comes from the probe stored on the MediaItem at upload
+				seconds = media_probe.source_duration_seconds(session, uid, main_content_filename)
 				minutes = max(1, int(ceil(seconds / 60.0))) if seconds > 0 else 1
 				corr = None
 				try:
@@ -113,6 +205,7 @@ def create_podcast_episode(
 					fh.write(f"[assemble] template not found: {template_id}\n")
 			except Exception:
 				pass
+			_report(state=JOB_ERROR, error=f"template not found: {template_id}")
 			return {"dropped": True, "reason": "template not found", "template_id": template_id}
 		episode = crud.get_episode_by_id(session, UUID(episode_id))
 		if not episode:
@@ -123,11 +216,13 @@ def create_podcast_episode(
 					fh.write(f"[assemble] episode not found: {episode_id}\n")
 			except Exception:
 				pass
+			_report(state=JOB_ERROR, error=f"episode not found: {episode_id}")
 			return {"dropped": True, "reason": "episode not found", "episode_id": episode_id}
 
 		# Idempotency guard
 		if getattr(episode, 'status', None) == 'processed' and getattr(episode, 'final_audio_path', None):
 			logging.info(f"[assemble] duplicate task for already processed episode {episode_id}; skipping reassembly")
+			_report("done", 100, state=JOB_PROCESSED, message="Episode already processed (idempotent skip)")
 			return {"message": "Episode already processed (idempotent skip)", "episode_id": episode.id}
 
 		cover_image_path = (episode_details or {}).get("cover_image_path")
@@ -146,17 +241,9 @@ def create_podcast_episode(
 				cleanup_settings = {}
 
 		# Preferred TTS provider
-		preferred_tts_provider = None
-		try:
-			preferred_tts_provider = (cleanup_settings.get('ttsProvider') or '').strip().lower() if isinstance(cleanup_settings, dict) else None
-		except Exception:
-			preferred_tts_provider = None
-		if preferred_tts_provider not in {'elevenlabs','google'}:
-			# Prefer ElevenLabs if either a per-user key OR a platform env key exists
-			has_user_key = bool(getattr(user_obj, 'elevenlabs_api_key', None))
-			has_env_key = bool(getattr(settings, 'ELEVENLABS_API_KEY', None))
-			preferred_tts_provider = 'elevenlabs' if (has_user_key or has_env_key) else 'google'
+		preferred_tts_provider = tts_provider_for(user_obj, cleanup_settings)
 
+		_report("transcript", 10)
 		# Resolve transcript JSON...
 		base_stems = []
 		try:
@@ -202,6 +289,9 @@ def create_podcast_episode(
 			pass
 
 		base_audio_name = getattr(episode, 'working_audio_name', None) or main_content_filename
+		# The first run stores the cleaned audio as working_audio_name; a redelivery must clean the same source
+		_source, _ = checkpoints.run_stage(workspace, "source", {"main": main_content_filename}, lambda _d: ({"base_audio_name": base_audio_name}, {}))
+		base_audio_name = _source.get("base_audio_name") or base_audio_name
 
 		# Snapshot original transcript (*.original.json preferred)
 		try:
@@ -287,14 +377,7 @@ def create_podcast_episode(
 				logging.warning(f"[assemble] failed to generate words_json: {e_gen}; will skip clean_engine and continue to mixer-only")
 
 		# Build engine settings
-		us = clean_engine.UserSettings(
-			flubber_keyword=str((cleanup_settings or {}).get('flubberKeyword', 'flubber') or 'flubber'),
-			intern_keyword=str((cleanup_settings or {}).get('internKeyword', 'intern') or 'intern'),
-			filler_words=(cleanup_settings or {}).get('fillerWords', ["um","uh","like","you know","sort of","kind of"]),
-			aggressive_fillers=(cleanup_settings or {}).get('aggressiveFillersList', []),
-			filler_phrases=(cleanup_settings or {}).get('fillerPhrases', []),
-			strict_filler_removal=bool((cleanup_settings or {}).get('strictFillerRemoval', True)),
-		)
+		us = clean_engine.UserSettings.from_cleanup_settings(cleanup_settings)
 		ss = clean_engine.SilenceSettings(
 			detect_threshold_dbfs=int((cleanup_settings or {}).get('silenceThreshDb', -40)),
 			min_silence_ms=int(float((cleanup_settings or {}).get('maxPauseSeconds', 1.5)) * 1000),
@@ -385,31 +468,66 @@ def create_podcast_episode(
 		except Exception:
 			pass
 
+		_report("cleaning", 30)
 		# Run clean engine if transcript exists; else precut
 		engine_result = None
 		cleaned_path = None
+		intermediates = []  # cleaned_audio/ files, redundant once the final mix is exported
 		if words_json_path and Path(words_json_path).is_file():
 			try:
 				_stem = Path(base_audio_name).stem
 				_out_stem = _stem if _stem.startswith('cleaned_') else f"cleaned_{_stem}"
-				_engine_out = f"{_out_stem}.mp3"
+				_engine_out = intermediate_name(_out_stem)
 			except Exception:
-				_engine_out = f"cleaned_{Path(base_audio_name).stem}.mp3"
-			engine_result = clean_engine.run_all(
-				audio_path=PROJECT_ROOT / 'media_uploads' / base_audio_name,
-				words_json_path=words_json_path,
-				work_dir=PROJECT_ROOT,
-				user_settings=us,
-				silence_cfg=ss,
-				intern_cfg=ins,
-				censor_cfg=censor_cfg,
-				sfx_map=sfx_map if sfx_map else None,
-				synth=_synth,
-				flubber_cuts_ms=cuts_ms,
-				output_name=_engine_out,
-				disable_intern_insertion=True,
-			)
+				_engine_out = intermediate_name(f"cleaned_{Path(base_audio_name).stem}")
+			# _synth is not an input: intern insertion is disabled here, so the engine is deterministic
+			_clean_inputs = {
+				"audio": PROJECT_ROOT / 'media_uploads' / base_audio_name,
+				"words": Path(words_json_path),
+				"settings": [us, ss, ins, censor_cfg],
+				"sfx": sfx_map or None,
+				"cuts": cuts_ms,
+				"output": _engine_out,
+				"work_dir": str(PROJECT_ROOT),
+			}
+
+			def _run_engine():
+				# Decoded PCM and filler scan from the upload's pre-analysis, when it ran and still matches
+				_pre = preanalysis.lookup(PROJECT_ROOT / 'media_uploads' / base_audio_name, Path(words_json_path), us)
+				logging.info("[assemble] preanalysis %s", "hit %s" % _pre.as_stats() if _pre is not None else "miss")
+				result = clean_engine.run_all(
+					audio_path=PROJECT_ROOT / 'media_uploads' / base_audio_name,
+					words_json_path=words_json_path,
+					work_dir=PROJECT_ROOT,
+					user_settings=us,
+					silence_cfg=ss,
+					intern_cfg=ins,
+					censor_cfg=censor_cfg,
+					sfx_map=sfx_map if sfx_map else None,
+					synth=_synth,
+					flubber_cuts_ms=cuts_ms,
+					output_name=_engine_out,
+					disable_intern_insertion=True,
+					analysis=_pre,
+				)
+				outputs = {"cleaned": Path(result['final_path'])}
+				_edits = ((result.get('summary') or {}).get('edits') or {})
+				for _key in ('words_json', 'words_json_original'):
+					if _edits.get(_key) and Path(_edits[_key]).is_file():
+						outputs[_key] = Path(_edits[_key])
+				return result, outputs
+
+			def _clean(_stage_dir):
+				# Keyed by content only, so a re-upload of the same audio under a new name still hits
+				_key = {k: v for k, v in _clean_inputs.items() if k not in ("output", "work_dir")}
+				_key["engine"] = stage_cache.code_stamp("api.services.clean_engine")
+				_key["format"] = Path(_engine_out).suffix  # the name is not keyed, its encoding is
+				result, files = _CLEAN_CACHE.cached(_key, _run_engine, restore=False)
+				return _place_engine_outputs(result, files, PROJECT_ROOT / 'cleaned_audio' / _engine_out)
+
+			engine_result, _ = checkpoints.run_stage(workspace, "clean", _clean_inputs, _clean)
 			cleaned_path = engine_result.get('final_path')
+			intermediates.append(cleaned_path)
 			try:
 				edits = (((engine_result or {}).get('summary', {}) or {}).get('edits', {}) or {})
 				spans = edits.get('censor_spans_ms', [])
@@ -429,9 +547,10 @@ def create_podcast_episode(
 						precut = apply_flubber_cuts(audio, cuts_ms)
 						out_dir = (PROJECT_ROOT / 'cleaned_audio')
 						out_dir.mkdir(parents=True, exist_ok=True)
-						precut_name = f"precut_{Path(base_audio_name).stem}.mp3"
+						precut_name = intermediate_name(f"precut_{Path(base_audio_name).stem}")
 						precut_path = out_dir / precut_name
-						precut.export(precut_path, format='mp3')
+						export_by_suffix(precut, precut_path)
+						intermediates.append(precut_path)
 						dest = PROJECT_ROOT / 'media_uploads' / precut_path.name
 						try:
 							shutil.copyfile(precut_path, dest)
@@ -558,6 +677,7 @@ def create_podcast_episode(
 			except Exception:
 				session.rollback()
 
+		_report("mixing", 60)
 		# Phase 2: mixer-only
 		try:
 			import json as _json
@@ -595,20 +715,46 @@ def create_podcast_episode(
 		except Exception:
 			pass
 		stream_log_path = str(ASSEMBLY_LOG_DIR / f"{episode.id}.log")
-		final_path, log, ai_note_additions = audio_processor.process_and_assemble_episode(
-			template=template,
-			main_content_filename=episode.working_audio_name or main_content_filename,
-			output_filename=output_filename,
-			cleanup_options={**mixer_only_opts, "internIntent": intern_intent, "flubberIntent": flubber_intent},
-			tts_overrides=tts_values or {},
-			cover_image_path=cover_image_path,
-			elevenlabs_api_key=getattr(user_obj, 'elevenlabs_api_key', None),
-			tts_provider=preferred_tts_provider,
-			mix_only=True,
-			words_json_path=str(words_json_path) if words_json_path else None,
-			log_path=stream_log_path,
-		)
+		_mix_content = episode.working_audio_name or main_content_filename
+		_mix_options = {**mixer_only_opts, "internIntent": intern_intent, "flubberIntent": flubber_intent}
+		_mix_log = {}
+
+		def _mix(_stage_dir):
+			_final, _mix_log['log'], _notes = audio_processor.process_and_assemble_episode(
+				template=template,
+				main_content_filename=_mix_content,
+				output_filename=output_filename,
+				cleanup_options=_mix_options,
+				tts_overrides=tts_values or {},
+				cover_image_path=cover_image_path,
+				elevenlabs_api_key=getattr(user_obj, 'elevenlabs_api_key', None),
+				tts_provider=preferred_tts_provider,
+				mix_only=True,
+				words_json_path=str(words_json_path) if words_json_path else None,
+				log_path=stream_log_path,
+				checkpoints=workspace,
+			)
+			return {"final_path": str(_final), "ai_note_additions": list(_notes or [])}, {"final": Path(_final)}
+
+		_mixed, _ = checkpoints.run_stage(workspace, "mix", {
+			"audio": PROJECT_ROOT / 'media_uploads' / _mix_content,
+			"words": Path(words_json_path) if words_json_path else None,
+			"template": template.model_dump(),
+			"options": _mix_options,
+			"tts": tts_values or {},
+			"cover": cover_image_path,
+			"provider": preferred_tts_provider,
+			"output": output_filename,
+		}, _mix)
+		final_path, ai_note_additions = _mixed["final_path"], _mixed.get("ai_note_additions") or []
+		# The mixer saves its own cleaned-content reference (named like the engine output)
+		_mix_stem = Path(_mix_content).stem
+		intermediates.append(PROJECT_ROOT / 'cleaned_audio' / intermediate_name(
+			_mix_stem if _mix_stem.startswith('cleaned_') else f"cleaned_{_mix_stem}"))
+		# A resumed mix keeps the assembly log its first run streamed to disk
+		log = _mix_log.get('log')
 		logging.info("[assemble] processor invoked: mix_only=True words_json=%s", str(words_json_path) if words_json_path else 'None')
+		_report("finalizing", 90)
 
 		# Mark episode processed
 		try:
@@ -630,11 +776,16 @@ def create_podcast_episode(
 		session.add(episode)
 		session.commit()
 		logging.info(f"[assemble] done. final={final_path}")
+		_report(
+			"done", 100, state=JOB_PROCESSED, message="Episode assembled successfully!",
+			stats={**(((engine_result or {}).get('summary') or {}).get('stats') or {}), **admitted.stats()},
+		)
 
 		try:
 			note = Notification(user_id=episode.user_id, type="assembly", title="Episode assembled", body=f"{episode.title}")
 			session.add(note)
 			session.commit()
+			events.publish_notification(note)
 		except Exception:
 			logging.warning("[assemble] Failed to create notification", exc_info=True)
 
@@ -675,9 +826,14 @@ def create_podcast_episode(
 		except Exception:
 			logging.warning("[cleanup] Failed to remove main content media item", exc_info=True)
 
+		removed = _remove_intermediates(intermediates, keep=final_path)
+		logging.info(f"[cleanup] Removed {removed} intermediate audio file(s) after assembly")
+		if workspace is not None:
+			workspace.discard()
 		return {"message": "Episode assembled successfully!", "episode_id": episode.id}
 	except Exception as e:
 		logging.exception(f"Error during episode assembly for {output_filename}: {e}")
+		_report(state=JOB_ERROR, error=str(e) or type(e).__name__, stats=admitted.stats())
 		try:
 			episode = crud.get_episode_by_id(session, UUID(episode_id))
 			if episode:
@@ -690,7 +846,11 @@ def create_podcast_episode(
 				session.commit()
 		except Exception:
 			pass
+		# Failures are not redelivered, so nothing will resume from the workspace
+		if workspace is not None:
+			workspace.discard()
 		raise
 	finally:
 		session.close()
+		admitted.release()
 
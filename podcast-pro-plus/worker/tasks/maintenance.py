@@ -1,11 +1,16 @@
 import logging
 from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, List, Optional
+from uuid import UUID
 
 from worker.tasks import celery_app
 from api.core.database import get_session
 from api.core.paths import MEDIA_DIR
 from api.models.podcast import MediaItem, MediaCategory, Episode
-from sqlmodel import select
+from api.services.media_index import invalidate_media_index
+from sqlalchemy import and_, delete, exists, func
+from sqlmodel import Session, select
 
 try:
 	from zoneinfo import ZoneInfo  # Python 3.9+
@@ -13,8 +18,130 @@ except Exception:  # pragma: no cover
 	ZoneInfo = None  # type: ignore
 
 
+PURGE_BATCH_SIZE = 500
+PURGE_SAMPLE_SIZE = 20
+
+
+def _expired_upload_filter(now: datetime):
+	return and_(
+		MediaItem.category == MediaCategory.main_content,  # type: ignore
+		MediaItem.expires_at != None,  # type: ignore  # noqa: E711
+		MediaItem.expires_at <= now,  # type: ignore
+		MediaItem.filename != None,  # type: ignore  # noqa: E711
+		MediaItem.filename != "",
+	)
+
+
+def _unreferenced_filter():
+	"""Anti-join: no episode uses the upload as working audio or final output.
+
+	Both columns hold basenames (writers store ``Path(...).name`` and the episode_paths
+	backfill normalizes legacy final_audio_path values), so equality against the indexed
+	columns suffices.
+	"""
+	return and_(
+		~exists().where(Episode.working_audio_name == MediaItem.filename),
+		~exists().where(Episode.final_audio_path == MediaItem.filename),
+	)
+
+
+def _unlink_uploads(media_dir: Path, filenames: Iterable[str]) -> int:
+	"""Remove local upload files; missing files are tolerated. Returns files actually removed."""
+	gone = 0
+	for fn in filenames:
+		path = media_dir / fn
+		try:
+			path.unlink()
+			gone += 1
+		except FileNotFoundError:
+			continue
+		except Exception:
+			logging.warning("[purge] Failed to unlink %s", path, exc_info=True)
+	return gone
+
+
+def purge_expired_media(
+	session: Session,
+	*,
+	now: Optional[datetime] = None,
+	dry_run: bool = False,
+	batch_size: int = PURGE_BATCH_SIZE,
+	cursor: Optional[str] = None,
+	max_batches: Optional[int] = None,
+	media_dir: Optional[Path] = None,
+) -> dict:
+	"""Delete expired, unreferenced main_content uploads in keyset-ordered batches.
+
+	Each batch selects at most ``batch_size`` ids past ``cursor`` with a single anti-join,
+	deletes those rows with one statement (re-checking the anti-join so an episode that
+	started using a file in between keeps it), commits, then unlinks the files that were
+	actually deleted. When ``max_batches`` stops the run early the returned ``cursor``
+	resumes it; otherwise ``cursor`` is None. ``dry_run`` reports what would be removed
+	without touching rows or files.
+	"""
+	now = now or datetime.utcnow()
+	media_dir = media_dir or MEDIA_DIR
+	expired = _expired_upload_filter(now)
+	unreferenced = _unreferenced_filter()
+	start = UUID(cursor) if cursor else None
+
+	in_use_stmt = select(func.count()).select_from(MediaItem).where(expired, ~unreferenced)
+	if start is not None:
+		in_use_stmt = in_use_stmt.where(MediaItem.id > start)
+	skipped_in_use = int(session.exec(in_use_stmt).one() or 0)
+
+	candidates = removed = files_removed = batches = freed_bytes = 0
+	sample: List[str] = []
+	last = start
+	exhausted = False
+	while max_batches is None or batches < max_batches:
+		stmt = select(MediaItem.id, MediaItem.filename, MediaItem.filesize).where(expired, unreferenced)
+		if last is not None:
+			stmt = stmt.where(MediaItem.id > last)
+		rows = session.exec(stmt.order_by(MediaItem.id).limit(batch_size)).all()
+		if not rows:
+			exhausted = True
+			break
+		batches += 1
+		last = rows[-1][0]
+		candidates += len(rows)
+		freed_bytes += sum(int(size or 0) for _, _, size in rows)
+		sample.extend(fn for _, fn, _ in rows[: max(0, PURGE_SAMPLE_SIZE - len(sample))])
+		if not dry_run:
+			ids = [mid for mid, _, _ in rows]
+			session.execute(delete(MediaItem).where(MediaItem.id.in_(ids), unreferenced))  # type: ignore[attr-defined]
+			session.commit()
+			kept = set(session.exec(select(MediaItem.id).where(MediaItem.id.in_(ids))).all())  # type: ignore[attr-defined]
+			deleted = [fn for mid, fn, _ in rows if mid not in kept]
+			removed += len(deleted)
+			files_removed += _unlink_uploads(media_dir, deleted)
+		if len(rows) < batch_size:
+			exhausted = True
+			break
+
+	if removed:
+		invalidate_media_index(media_dir)
+	return {
+		"dry_run": dry_run,
+		"checked": candidates + skipped_in_use,
+		"candidates": candidates,
+		"removed": removed,
+		"files_removed": files_removed,
+		"skipped_in_use": skipped_in_use,
+		"bytes": freed_bytes,
+		"batches": batches,
+		"sample": sample,
+		"cursor": None if exhausted or last is None else str(last),
+	}
+
+
 @celery_app.task(name="maintenance.purge_expired_uploads")
-def purge_expired_uploads() -> dict:
+def purge_expired_uploads(
+	dry_run: bool = False,
+	batch_size: int = PURGE_BATCH_SIZE,
+	cursor: Optional[str] = None,
+	max_batches: Optional[int] = None,
+) -> dict:
 	"""Delete raw uploads that have expired (expires_at <= now) and are not used by any episode.
 
 	Safety:
@@ -22,59 +149,120 @@ def purge_expired_uploads() -> dict:
 	- Skips items missing filename.
 	- Idempotent: deleting missing files is tolerated.
 	- Does not remove media referenced by Episode.working_audio_name or Episode.final_audio_path.
+
+	See ``purge_expired_media`` for batching, the resume cursor and dry-run reporting.
 	"""
 	session = next(get_session())
-	now = datetime.utcnow()
-	removed = 0
-	skipped_in_use = 0
-	checked = 0
+	result = {"checked": 0, "removed": 0, "skipped_in_use": 0}
 	try:
-		# Fetch candidates: expired main_content
-		q = (
-			select(MediaItem)
-			.where(MediaItem.category == MediaCategory.main_content)  # type: ignore
-			.where(MediaItem.expires_at != None)  # type: ignore
-			.where(MediaItem.expires_at <= now)  # type: ignore
-			.limit(10000)
+		result = purge_expired_media(
+			session, dry_run=dry_run, batch_size=batch_size, cursor=cursor, max_batches=max_batches
 		)
-		items = session.exec(q).all()
-		# Build a set of in-use basenames from episodes to avoid deleting source files that are still referenced
-		q_eps = select(Episode)
-		eps = session.exec(q_eps).all()
-		in_use = set()
-		for e in eps:
-			for name in (getattr(e, 'working_audio_name', None), getattr(e, 'final_audio_path', None)):
-				if name:
-					try:
-						from pathlib import Path
-						in_use.add(Path(str(name)).name)
-					except Exception:
-						in_use.add(str(name))
-		for m in items:
-			checked += 1
-			fn = getattr(m, 'filename', None)
-			if not fn:
-				continue
-			if fn in in_use:
-				skipped_in_use += 1
-				continue
-			try:
-				path = MEDIA_DIR / fn
-				if path.exists():
-					try:
-						path.unlink()
-					except Exception:
-						logging.warning("[purge] Failed to unlink %s", path, exc_info=True)
-				session.delete(m)
-				removed += 1
-			except Exception:
-				logging.warning("[purge] Failed to delete MediaItem %s", getattr(m, 'id', None), exc_info=True)
-		if removed:
-			session.commit()
 	except Exception:
 		session.rollback()
 		logging.warning("[purge] purge_expired_uploads failed", exc_info=True)
 	finally:
 		session.close()
-	logging.info("[purge] expired uploads: checked=%s removed=%s skipped_in_use=%s", checked, removed, skipped_in_use)
-	return {"checked": checked, "removed": removed, "skipped_in_use": skipped_in_use}
+	logging.info(
+		"[purge] expired uploads%s: checked=%s removed=%s skipped_in_use=%s cursor=%s",
+		" (dry run)" if dry_run else "",
+		result.get("checked"), result.get("removed"), result.get("skipped_in_use"), result.get("cursor"),
+	)
+	return result
+
+
+@celery_app.task(name="maintenance.finalize_metrics_rollups")
+def finalize_metrics_rollups(days: int = 30) -> dict:
+	"""Persist DailyMetricsRollup rows for closed UTC days so admin metrics only compute today live.
+
+	Idempotent: missing days in the window are filled and the most recent closed day is refreshed.
+	"""
+	from api.services.metrics_rollup import finalize_closed_days
+
+	session = next(get_session())
+	written = 0
+	try:
+		written = finalize_closed_days(session, days=days)
+	except Exception:
+		session.rollback()
+		logging.warning("[metrics] finalize_metrics_rollups failed", exc_info=True)
+	finally:
+		session.close()
+	logging.info("[metrics] finalized daily rollups: rows=%s", written)
+	return {"rows": written}
+
+
+@celery_app.task(name="maintenance.run_backfills")
+def run_backfills() -> dict:
+	"""Run pending row-level backfills registered in api.startup_tasks.BACKFILLS.
+
+	API instances also start them in a background thread when they see a stale
+	backfill version; this periodic run covers instances that exit first.
+	"""
+	from api.startup_tasks import run_pending_backfills
+
+	report: dict = {}
+	try:
+		report = run_pending_backfills()
+	except Exception:
+		logging.warning("[migrate] run_backfills failed", exc_info=True)
+	logging.info("[migrate] backfills run: %s", report or "up to date")
+	return report
+
+
+@celery_app.task(name="maintenance.reconcile_stripe_subscriptions")
+def reconcile_stripe_subscriptions() -> dict:
+	"""Refresh the local Subscription snapshot from Stripe to catch missed or out-of-order webhooks.
+
+	Skipped (returns {"skipped": True}) when the stripe library or STRIPE_SECRET_KEY is unavailable.
+	"""
+	import os
+
+	try:
+		import stripe  # type: ignore
+	except Exception:  # pragma: no cover
+		stripe = None  # type: ignore
+	if stripe is None or not (os.getenv("STRIPE_SECRET_KEY") or getattr(stripe, "api_key", None)):
+		logging.info("[billing] reconcile_stripe_subscriptions skipped: Stripe not configured")
+		return {"skipped": True}
+	if not getattr(stripe, "api_key", None):
+		stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
+
+	from api.services.billing.subscriptions import reconcile_subscriptions
+
+	session = next(get_session())
+	result = {"seen": 0, "updated": 0, "skipped": 0}
+	try:
+		result = reconcile_subscriptions(session, stripe)
+	except Exception:
+		session.rollback()
+		logging.warning("[billing] reconcile_stripe_subscriptions failed", exc_info=True)
+	finally:
+		session.close()
+	logging.info("[billing] subscription snapshot reconciled: %s", result)
+	return result
+
+
+@celery_app.task(name="maintenance.purge_assembly_workspaces")
+def purge_assembly_workspaces() -> dict:
+	"""Remove checkpoint workspaces of assemblies that were lost and never redelivered."""
+	from api.services.episodes import checkpoints
+
+	removed = checkpoints.purge_stale()
+	logging.info("[purge] stale assembly workspaces removed=%s", removed)
+	return {"removed": removed}
+
+
+@celery_app.task(name="maintenance.report_queue_depths")
+def report_queue_depths() -> dict:
+	"""Log ready-message counts per workload queue (cpu/io/maintenance) for log-based metrics."""
+	from worker.tasks.app import queue_depths
+
+	depths: dict = {}
+	try:
+		depths = queue_depths()
+	except Exception:
+		logging.warning("[celery] queue depth probe failed", exc_info=True)
+	for queue, depth in depths.items():
+		logging.info("event=celery.queue_depth queue=%s depth=%s", queue, depth)
+	return depths
@@ -183,9 +183,11 @@ def publish_episode_to_spreaker_task(
 			logging.info(f"Published to Spreaker: {episode.title} (id={episode.spreaker_episode_id})")
 			try:
 				from api.models.notification import Notification
+				from api.services import events
 				note = Notification(user_id=episode.user_id, type='publish', title='Episode published', body=f"{episode.title}")
 				session.add(note)
 				session.commit()
+				events.publish_notification(note)
 			except Exception:
 				logging.warning("[publish] Failed to create notification", exc_info=True)
 
@@ -71,6 +71,13 @@ def transcribe_media_file(filename: str) -> dict:
 				(f", mirrored -> {orig_legacy.name}, {work_legacy.name}" if mirror_legacy else "")
 			)
 
+		# Transcript is ready: pre-analyse it for assembly (best-effort)
+		try:
+			from api.services import preanalysis
+			preanalysis.enqueue(filename)
+		except Exception:
+			logging.warning("[transcribe] could not queue pre-analysis for %s", filename, exc_info=True)
+
 		return {"ok": True, "filename": filename, "original": orig_new.name, "working": work_new.name}
 	except Exception as ex:
 		logging.warning("[transcribe] failed for %s: %s", filename, ex, exc_info=True)
@@ -44,6 +44,12 @@ def ensure_ffmpeg_on_path():
             pass
 
 
+@pytest.fixture(autouse=True)
+def isolated_stage_cache(tmp_path_factory, monkeypatch):
+    """Keep the content-addressed stage cache out of the workspace and separate per test."""
+    monkeypatch.setenv("STAGE_CACHE_DIR", str(tmp_path_factory.mktemp("stage_cache")))
+
+
 @pytest.fixture(scope="function")
 def db_engine(tmp_path: Path):
     """Provide a temporary SQLite engine with app migrations applied.
@@ -102,6 +108,8 @@ def env_test():
     # Disable rate limiting in tests to prevent SlowAPI decorator import-time errors
     # on endpoints that don't accept a `request` parameter.
     "DISABLE_RATE_LIMITS": "1",
+    # Row backfills run explicitly in tests, never from a background thread at app import
+    "STARTUP_BACKFILLS": "0",
     }
     prev = {k: os.environ.get(k) for k in keys}
     for k, v in keys.items():
@@ -0,0 +1,107 @@
+from datetime import date, datetime, time, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlmodel import select
+
+from api.models.metrics import DailyMetricsRollup
+from api.models.podcast import Episode, EpisodeStatus
+from api.models.usage import LedgerDirection, ProcessingMinutesLedger
+from api.models.user import User
+from api.services import metrics_rollup
+
+TODAY = datetime.now(timezone.utc).date()
+
+
+def _at(day: date, hour: int = 12) -> datetime:
+    return datetime.combine(day, time(hour=hour))
+
+
+@pytest.fixture
+def seeded(session):
+    users = []
+    for offset, n in ((0, 2), (1, 3), (5, 1), (40, 4)):
+        for i in range(n):
+            u = User(email=f"u{offset}_{i}@example.com", hashed_password="x",
+                     created_at=_at(TODAY - timedelta(days=offset), hour=1 + i))
+            session.add(u)
+            users.append(u)
+    session.commit()
+    a, b = users[0].id, users[1].id
+    pod = uuid4()
+    eps = [
+        (a, 0, EpisodeStatus.processed),
+        (a, 0, EpisodeStatus.published),
+        (b, 0, EpisodeStatus.error),
+        (b, 1, EpisodeStatus.processed),
+        (a, 3, EpisodeStatus.processed),
+        (a, 45, EpisodeStatus.processed),
+    ]
+    for uid, offset, st in eps:
+        session.add(Episode(user_id=uid, podcast_id=pod, status=st, processed_at=_at(TODAY - timedelta(days=offset))))
+    for offset, minutes, direction in ((0, 7, LedgerDirection.DEBIT), (1, 10, LedgerDirection.DEBIT),
+                                       (1, 4, LedgerDirection.CREDIT), (60, 99, LedgerDirection.DEBIT)):
+        session.add(ProcessingMinutesLedger(user_id=a, minutes=minutes, direction=direction,
+                                            created_at=_at(TODAY - timedelta(days=offset))))
+    session.commit()
+    return session
+
+
+def _by_date(series):
+    return {row["date"]: row["count"] for row in series if row["count"]}
+
+
+def test_live_series_from_group_by(seeded):
+    series = metrics_rollup.daily_series(seeded)
+    d = lambda n: (TODAY - timedelta(days=n)).isoformat()  # noqa: E731
+    assert len(series["signups"]) == 30 and series["signups"][-1]["date"] == TODAY.isoformat()
+    assert _by_date(series["signups"]) == {d(0): 2, d(1): 3, d(5): 1}
+    assert _by_date(series["episodes"]) == {d(0): 2, d(1): 1, d(3): 1}
+    assert _by_date(series["active_users"]) == {d(0): 2, d(1): 1, d(3): 1}
+    assert _by_date(series["minutes"]) == {d(0): 7, d(1): 6}
+
+
+def test_finalized_days_are_read_from_rollup(seeded, monkeypatch):
+    live = metrics_rollup.daily_series(seeded)
+    assert metrics_rollup.finalize_closed_days(seeded) == 29
+    rows = seeded.exec(select(DailyMetricsRollup)).all()
+    assert len(rows) == 29 and TODAY not in {r.day for r in rows}
+    # Only yesterday is refreshed on the next run
+    assert metrics_rollup.finalize_closed_days(seeded) == 1
+
+    ranges = []
+    real = metrics_rollup.compute_days
+
+    def _spy(session, start, end):
+        ranges.append((start, end))
+        return real(session, start, end)
+
+    monkeypatch.setattr(metrics_rollup, "compute_days", _spy)
+    assert metrics_rollup.daily_series(seeded) == live
+    assert ranges == [(TODAY, TODAY + timedelta(days=1))]
+
+    # A finalized row is authoritative for its day
+    row = seeded.get(DailyMetricsRollup, TODAY - timedelta(days=5))
+    row.signups = 42
+    seeded.add(row)
+    seeded.commit()
+    series = metrics_rollup.daily_series(seeded)
+    assert _by_date(series["signups"])[(TODAY - timedelta(days=5)).isoformat()] == 42
+
+
+def test_admin_metrics_route(app, client, seeded, monkeypatch):
+    from api.routers import admin as admin_router
+
+    monkeypatch.setattr(admin_router, "_stripe", None)
+    admin = User(id=uuid4(), email="admin@example.com", hashed_password="x", is_admin=True)
+    app.dependency_overrides[admin_router.get_current_admin_user] = lambda: admin
+    try:
+        r = client.get("/api/admin/metrics")
+    finally:
+        app.dependency_overrides.pop(admin_router.get_current_admin_user, None)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    for key in ("daily_signups_30d", "daily_active_users_30d", "daily_episodes_30d", "daily_minutes_30d"):
+        assert len(body[key]) == 30
+    assert body["daily_signups_30d"][-1] == {"date": TODAY.isoformat(), "count": 2}
+    assert body["mrr_cents"] is None
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+
+from api.models.podcast import Episode, EpisodeStatus, Podcast
+from api.models.user import User
+
+BASE = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@contextmanager
+def _count_statements(engine):
+    statements = []
+
+    def _before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+@pytest.fixture
+def as_admin(app):
+    from api.routers import admin as admin_router
+
+    admin = User(id=uuid4(), email="admin@example.com", hashed_password="x", is_admin=True)
+    app.dependency_overrides[admin_router.get_current_admin_user] = lambda: admin
+    yield admin
+    app.dependency_overrides.pop(admin_router.get_current_admin_user, None)
+
+
+def _seed(session, episodes_per_podcast):
+    owner = User(email="owner@example.com", hashed_password="x")
+    other = User(email="someone@else.org", hashed_password="x")
+    session.add_all([owner, other])
+    session.commit()
+    pods = []
+    for i in range(6):
+        pod = Podcast(name=f"Show {i}", user_id=owner.id if i < 4 else other.id)
+        session.add(pod)
+        pods.append(pod)
+    session.commit()
+    for i, pod in enumerate(pods):
+        for j in range(episodes_per_podcast * i):
+            session.add(Episode(user_id=pod.user_id, podcast_id=pod.id,
+                                status=EpisodeStatus.published if j % 3 == 0 else EpisodeStatus.processed,
+                                processed_at=BASE + timedelta(days=i, hours=j)))
+    session.commit()
+    return owner, pods
+
+
+@pytest.mark.parametrize("episodes_per_podcast", [1, 40])
+def test_podcast_page_uses_fixed_statement_count(client, db_engine, session, as_admin, episodes_per_podcast):
+    owner, pods = _seed(session, episodes_per_podcast)
+    with _count_statements(db_engine) as statements:
+        r = client.get("/api/admin/podcasts", params={"limit": 3, "offset": 1})
+    assert r.status_code == 200, r.text
+    assert len(statements) == 2, statements
+
+    body = r.json()
+    assert body["total"] == 6
+    # Podcast has no created_at, so pages are ordered by id desc
+    expected = sorted(pods, key=lambda p: p.id, reverse=True)[1:4]
+    assert [it["name"] for it in body["items"]] == [p.name for p in expected]
+    for item in body["items"]:
+        i = int(item["name"].split()[-1])
+        n = episodes_per_podcast * i
+        assert item["episode_count"] == n
+        assert item["published_count"] == len(range(0, n, 3))
+        last = BASE + timedelta(days=i, hours=n - 1)
+        assert item["last_episode_at"] == (last.isoformat() if n else None)
+        assert item["owner_email"] == ("owner@example.com" if i < 4 else "someone@else.org")
+
+
+def test_podcast_page_owner_filter_and_empty_podcast(client, session, as_admin):
+    _seed(session, 2)
+    r = client.get("/api/admin/podcasts", params={"owner_email": "ELSE.org"})
+    body = r.json()
+    assert body["total"] == 2 and sorted(it["name"] for it in body["items"]) == ["Show 4", "Show 5"]
+
+    r = client.get("/api/admin/podcasts", params={"limit": 10})
+    show0 = next(it for it in r.json()["items"] if it["name"] == "Show 0")
+    assert show0["episode_count"] == 0 and show0["published_count"] == 0 and show0["last_episode_at"] is None
+
+
+def test_user_stats_are_batched(client, db_engine, session, as_admin):
+    owner, _ = _seed(session, 5)
+    with _count_statements(db_engine) as statements:
+        r = client.get("/api/admin/users/full")
+    assert r.status_code == 200, r.text
+    assert len(statements) == 2  # grouped episode stats + user list
+    by_email = {u["email"]: u for u in r.json()}
+    assert by_email["owner@example.com"]["episode_count"] == 5 * (0 + 1 + 2 + 3)
+    assert by_email["someone@else.org"]["episode_count"] == 5 * (4 + 5)
+
+    r = client.patch(f"/api/admin/users/{owner.id}", json={"is_active": False})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["episode_count"] == 30 and body["is_active"] is False
+    assert body["last_activity"] == (BASE + timedelta(days=3, hours=14)).isoformat()
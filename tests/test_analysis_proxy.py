@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+
+from api.services import analysis_proxy
+from api.services.audio import cleanup
+from api.services.audio.common import match_target_dbfs
+from api.services.clean_engine.feature_modules.utils import detect_silences_dbfs
+
+FORMATS = [
+    # (seconds, frame_rate, channels, sample_width)
+    (20.0, 44100, 2, 2),
+    (17.3, 16000, 1, 2),
+    (9.7, 22050, 2, 1),
+    (8.1, 48000, 1, 4),
+    (12.34, 11025, 1, 2),
+]
+
+
+def _talk(seconds, rate, channels, width, seed=1):
+    """Noise bursts of varying level separated by gaps of varying length."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate)
+    x = np.zeros((n, channels))
+    t = 0
+    while t < n:
+        length = min(int(rng.uniform(0.2, 2.5) * rate), n - t)
+        level = rng.choice([0, 20, 3000, 12000])
+        x[t:t + length] = rng.normal(0, level, (length, channels)) if level else 0
+        t += length + int(rng.uniform(0.05, 2.0) * rate)
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}[width]
+    top = np.iinfo(dtype).max
+    pcm = np.clip(x * top / 32767, -top, top).astype(dtype)
+    return AudioSegment(data=pcm.tobytes(), sample_width=width, frame_rate=rate, channels=channels)
+
+
+def _max_boundary_error_ms(expected, actual):
+    assert len(expected) == len(actual)
+    return max((abs(a - b) for e, g in zip(expected, actual) for a, b in zip(e, g)), default=0)
+
+
+@pytest.mark.parametrize("fmt", FORMATS, ids=lambda f: f"{f[1]}Hz-{f[2]}ch-{8 * f[3]}bit")
+def test_detection_matches_pydub_on_the_full_rate_audio(fmt):
+    seg = _talk(*fmt)
+    proxy = analysis_proxy.AnalysisProxy.from_segment(seg)
+    assert len(proxy) == len(seg)
+    assert (proxy.rms, proxy.max) == (seg.rms, seg.max)
+    assert proxy.dBFS == pytest.approx(seg.dBFS) and proxy.max_dBFS == pytest.approx(seg.max_dBFS)
+    for min_len, thresh, step in [(1500, -40, 1), (500, -30, 10), (300, -50, 7)]:
+        expected = detect_silence(seg, min_len, thresh, step)
+        # Window edges are pydub's own slice boundaries, so the timing error is bounded by zero
+        assert _max_boundary_error_ms(expected, proxy.detect_silence(min_len, thresh, step)) == 0
+    assert proxy.envelope(50) == [float(seg[i:i + 50].rms) for i in range(0, len(seg), 50)]
+    assert int(proxy.to_frames(len(seg) - 1)) == seg[:len(seg) - 1].frame_count()
+
+
+def test_passes_share_one_proxy_per_segment(monkeypatch):
+    seg = _talk(6.0, 16000, 1, 2)
+    builds = []
+    real = analysis_proxy.AnalysisProxy.from_segment.__func__
+
+    def counting(cls, s):
+        builds.append(len(s))
+        return real(cls, s)
+
+    monkeypatch.setattr(analysis_proxy.AnalysisProxy, "from_segment", classmethod(counting))
+    spans = detect_silences_dbfs(seg, threshold_dbfs=-40, min_len_ms=300)
+    assert spans == [tuple(s) for s in detect_silence(seg, 300, int(seg.dBFS - 40))]
+    assert match_target_dbfs(seg).raw_data == seg.apply_gain(max(-9.0, min(9.0, -18.0 - seg.dBFS))).raw_data
+    cleanup._energy_envelope(seg)
+    assert builds == [len(seg)]
+
+
+def test_segments_without_pcm_fall_back_to_pydub():
+    seg = _talk(3.0, 16000, 1, 2)
+    # Under one frame per millisecond there are no millisecond bins; pydub answers directly
+    low = seg.set_frame_rate(800)
+    assert analysis_proxy.proxy_for(low) is None
+    assert analysis_proxy.detect_silence(low, 300, -40) == detect_silence(low, 300, -40)
+    assert analysis_proxy.dbfs(low) == low.dBFS
+    silent = AudioSegment.silent(duration=0, frame_rate=16000)
+    assert analysis_proxy.dbfs(silent) == -float("inf") and analysis_proxy.energy_envelope(silent) == []
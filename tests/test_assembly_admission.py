@@ -0,0 +1,199 @@
+import json
+import os
+
+import pytest
+from celery.exceptions import Retry
+
+from api.models.job import Job
+from api.models.podcast import MediaCategory, MediaItem
+from api.models.user import User
+from api.services.episodes import admission
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    monkeypatch.setenv("ASSEMBLY_ADMISSION_DIR", str(tmp_path))
+    monkeypatch.setenv("ASSEMBLY_MEMORY_BUDGET_MB", "2000")
+    monkeypatch.setenv("ASSEMBLY_LARGE_JOB_MB", "1200")
+    return admission.HostLedger()
+
+
+@pytest.fixture
+def upload(session):
+    user = User(email="long@example.com", hashed_password="x",
+                audio_cleanup_settings_json=json.dumps({"censorEnabled": True}))
+    session.add(user)
+    session.commit()
+    item = MediaItem(filename="talk.wav", user_id=user.id, category=MediaCategory.main_content,
+                     duration_s=1800.0, sample_rate=48000, channels=2)
+    session.add(item)
+    session.commit()
+    return user, item
+
+
+def test_estimate_scales_with_pcm_size_and_features():
+    base = admission.BASE_MB
+    mono = admission.estimate_peak_mb(600, 44100, 1, segmented=False) - base
+    assert admission.estimate_peak_mb(600, 44100, 2, segmented=False) - base == pytest.approx(2 * mono)
+    assert admission.estimate_peak_mb(1200, 44100, 1, segmented=False) - base == pytest.approx(2 * mono)
+    assert admission.estimate_peak_mb(600, 88200, 1, segmented=False) - base == pytest.approx(2 * mono)
+    # The mixer's copies dominate until the clean engine renders more than four
+    assert admission.estimate_peak_mb(600, 44100, 1, censor=True, segmented=False) - base == pytest.approx(mono)
+    full = admission.estimate_peak_mb(600, 44100, 1, censor=True, sfx=True, intern=True, segmented=True) - base
+    assert full == pytest.approx(mono * 8 / 4)
+
+
+def test_estimate_for_job_reads_probe_settings_and_intents(session, upload):
+    user, item = upload
+    est = admission.estimate_for_job(session, user.id, "talk.wav", {"intern": "yes"})
+    assert (est.duration_s, est.sample_rate, est.channels) == (1800.0, 48000, 2)
+    assert est.features == ("censor", "sfx", "intern")
+    assert est.peak_mb == pytest.approx(admission.estimate_peak_mb(1800, 48000, 2, censor=True, sfx=True, intern=True))
+
+    opted_out = admission.estimate_for_job(session, user.id, "talk.wav", {"censor": "no", "sfx": "no"})
+    assert opted_out.features == () and opted_out.peak_mb < est.peak_mb
+
+
+def test_ledger_admits_within_budget_and_always_on_an_idle_host(ledger):
+    assert ledger.try_reserve("huge", 5000)  # nothing else running
+    assert not ledger.try_reserve("small", 100)
+    ledger.release("huge")
+    assert ledger.try_reserve("a", 1200) and ledger.try_reserve("b", 800)
+    assert not ledger.try_reserve("c", 1)
+    assert ledger.reserved() == {"a": 1200, "b": 800}
+    # A redelivered job replaces its own reservation rather than counting twice
+    assert ledger.try_reserve("a", 1100)
+
+
+def test_ledger_drops_reservations_of_dead_or_leaked_jobs(ledger):
+    ledger.try_reserve("live", 1500)
+    ledger.directory.joinpath("dead.json").write_text(json.dumps({"pid": 2 ** 22 + 12345, "mb": 1500, "at": 0}))
+    stale = {"pid": os.getpid(), "mb": 1500, "at": 1.0}
+    ledger.directory.joinpath("leaked.json").write_text(json.dumps(stale))
+    assert ledger.reserved() == {"live": 1500}
+    assert not ledger.directory.joinpath("dead.json").exists()
+
+
+def test_decide(ledger, monkeypatch):
+    assert admission.decide(ledger, "big", 1500, on_large_queue=False, deferrals=0) == admission.REROUTE
+    assert admission.decide(ledger, "big", 1500, on_large_queue=True, deferrals=0) == admission.ADMIT
+    assert admission.decide(ledger, "j1", 900, on_large_queue=False, deferrals=0) == admission.DEFER
+    assert admission.decide(ledger, "j1", 900, on_large_queue=False, deferrals=admission.MAX_DEFERRALS) == admission.REROUTE
+    ledger.release("big")
+    assert admission.decide(ledger, "j1", 900, on_large_queue=False, deferrals=3) == admission.ADMIT
+
+
+def test_enqueue_options_route_oversized_jobs(ledger):
+    from worker.tasks.app import WORKLOADS
+
+    assert admission.enqueue_options(1000) == {}
+    opts = admission.enqueue_options(1500)
+    assert opts["queue"] == "large" and opts["time_limit"] == WORKLOADS["large"]["time_limit"]
+
+
+def test_enqueue_ignores_the_api_hosts_memory(ledger, monkeypatch):
+    # A small web instance must not send ordinary jobs to the single-slot large queue
+    monkeypatch.delenv("ASSEMBLY_LARGE_JOB_MB")
+    monkeypatch.delenv("ASSEMBLY_MEMORY_BUDGET_MB")
+    monkeypatch.setattr(admission, "host_memory_mb", lambda: 512.0)
+    assert admission.enqueue_large_job_mb() is None
+    assert admission.enqueue_options(5000) == {}
+    assert admission.decide(ledger, "j", 5000, on_large_queue=False, deferrals=0) == admission.REROUTE
+
+
+@pytest.fixture
+def running_task(monkeypatch):
+    """Run ``_admit`` as if a worker had received the job from the broker."""
+    from worker.tasks import audio
+
+    task = audio.create_podcast_episode
+    retries = []
+
+    def _retry(**options):
+        retries.append(options)
+        return Retry("deferred")
+
+    monkeypatch.setattr(audio, "current_task", task)
+    monkeypatch.setattr(task, "retry", _retry)
+
+    def _start(job_id, *, queue="cpu", attempt=0):
+        task.push_request(id=job_id, is_eager=False, called_directly=False,
+                          delivery_info={"routing_key": queue}, retries=attempt)
+
+    yield audio, _start, retries
+    while task.request_stack.top is not None:
+        task.pop_request()
+
+
+def test_worker_defers_reroutes_and_reports_memory(session, upload, ledger, running_task):
+    audio, start, retries = running_task
+    user, item = upload
+    item.duration_s = 300.0  # ~625 MB: under the large-job threshold, over what is left
+    session.add(item)
+    session.commit()
+    ledger.try_reserve("other", 1500)
+
+    start("job-a")
+    with pytest.raises(Retry):
+        audio._admit(str(user.id), "talk.wav", None)
+    assert retries[-1]["countdown"] == admission.DEFER_COUNTDOWN_S and "queue" not in retries[-1]
+    row = session.get(Job, "job-a")
+    assert row.state == "queued" and row.stage == "admission"
+
+    start("job-a", attempt=admission.MAX_DEFERRALS)
+    with pytest.raises(Retry):
+        audio._admit(str(user.id), "talk.wav", None)
+    assert retries[-1]["queue"] == "large"
+
+    ledger.release("other")
+    start("job-a", queue="large", attempt=admission.MAX_DEFERRALS + 1)
+    admitted = audio._admit(str(user.id), "talk.wav", None)
+    try:
+        assert "job-a" in ledger.reserved()
+        memory = admitted.stats()["memory"]
+        assert memory["estimate_mb"] == round(admitted.estimate.peak_mb, 1)
+        assert memory["peak_rss_mb"] > 0 and memory["budget_mb"] == 2000
+    finally:
+        admitted.release()
+    assert ledger.reserved() == {}
+
+
+def test_eager_runs_are_measured_but_never_held_back(session, upload, ledger):
+    from worker.tasks import audio
+
+    user, _ = upload
+    ledger.try_reserve("other", 1999)
+    admitted = audio._admit(str(user.id), "talk.wav", None)  # no task request: a direct call
+    try:
+        assert admitted.ledger is None and admitted.estimate is not None
+    finally:
+        admitted.release()
+    assert ledger.reserved() == {"other": 1999}
+
+
+def test_peak_rss_sees_a_transient_allocation():
+    rss = admission.PeakRss(interval_s=0.01).start()
+    before = rss.peak_mb
+    block = bytearray(64 * 1024 * 1024)
+    block[::4096] = b"\x01" * len(block[::4096])
+    rss._sample()
+    del block
+    assert rss.stop() - before >= 48
+
+
+def test_peak_rss_counts_child_processes():
+    import subprocess
+    import sys
+
+    rss = admission.PeakRss(interval_s=10).start()
+    own = rss.peak_mb
+    code = ("import time; b = bytearray(96 << 20); b[::4096] = b'\\x01' * len(b[::4096]); "
+            "print(1, flush=True); time.sleep(30)")
+    child = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE)
+    try:
+        child.stdout.readline()
+        rss._sample()
+    finally:
+        child.kill()
+        child.wait()
+    assert rss.stop() - own >= 80
@@ -0,0 +1,253 @@
+import json
+import os
+import time
+import types
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from api.models.job import Job
+from api.models.notification import Notification  # noqa: F401  (table for the worker's "assembled" notice)
+from api.models.podcast import Episode, PodcastTemplate
+from api.models.user import User
+from api.services.audio import orchestrator
+from api.services.episodes import checkpoints
+
+
+class WorkerLost(BaseException):
+    """Stands in for the worker process dying: nothing in the task gets to handle it."""
+
+
+@pytest.fixture
+def work_root(tmp_path, monkeypatch):
+    root = tmp_path / "work"
+    monkeypatch.setattr(checkpoints, "ASSEMBLY_WORK_DIR", root)
+    return root
+
+
+def _stages(calls, out_dir, crash_in=None):
+    def stage(name, produces):
+        def fn(stage_dir):
+            calls.append(name)
+            if name == crash_in:
+                raise WorkerLost(name)
+            path = out_dir / produces
+            path.write_text(f"{name} output")
+            return {"name": name}, {"out": path}
+        return fn
+    return stage
+
+
+def test_crash_between_stages_reruns_only_the_remaining_ones(tmp_path, work_root):
+    src = tmp_path / "source.wav"
+    src.write_bytes(b"RIFF" + os.urandom(4096))
+    calls = []
+
+    ws = checkpoints.JobWorkspace("job-1")
+    stage = _stages(calls, tmp_path, crash_in="mix")
+    ws.run("clean", {"audio": src, "cuts": [(1, 2)]}, stage("clean", "cleaned.mp3"))
+    with pytest.raises(WorkerLost):
+        ws.run("mix", {"audio": tmp_path / "cleaned.mp3"}, stage("mix", "final.mp3"))
+
+    # Redelivery: a fresh process opens the same workspace
+    retry = checkpoints.JobWorkspace("job-1")
+    stage = _stages(calls, tmp_path)
+    data, files = retry.run("clean", {"audio": src, "cuts": [(1, 2)]}, stage("clean", "cleaned.mp3"))
+    retry.run("mix", {"audio": files["out"]}, stage("mix", "final.mp3"))
+    assert calls == ["clean", "mix", "mix"]
+    assert retry.resumed == ["clean"] and retry.ran == ["mix"] and data == {"name": "clean"}
+
+
+def test_changed_inputs_rerun_and_lost_outputs_are_restored(tmp_path, work_root):
+    src = tmp_path / "source.wav"
+    src.write_bytes(b"one")
+    calls = []
+    stage = _stages(calls, tmp_path)
+
+    checkpoints.JobWorkspace("job-2").run("clean", {"audio": src}, stage("clean", "cleaned.mp3"))
+    (tmp_path / "cleaned.mp3").unlink()  # e.g. removed by the mixer's cleanup
+    _, files = checkpoints.JobWorkspace("job-2").run("clean", {"audio": src}, stage("clean", "cleaned.mp3"))
+    assert calls == ["clean"] and files["out"].read_text() == "clean output"
+
+    src.write_bytes(b"two")  # same path, different content
+    checkpoints.JobWorkspace("job-2").run("clean", {"audio": src}, stage("clean", "cleaned.mp3"))
+    assert calls == ["clean", "clean"]
+
+    (work_root / "job-2" / "clean" / "out.mp3").write_text("truncated")
+    checkpoints.JobWorkspace("job-2").run("clean", {"audio": src}, stage("clean", "cleaned.mp3"))
+    assert calls == ["clean", "clean", "clean"]
+
+
+def test_no_job_id_means_no_workspace(work_root):
+    assert checkpoints.JobWorkspace.for_job(None) is None
+    calls = []
+    data, _ = checkpoints.run_stage(None, "clean", {}, lambda stage_dir: (calls.append(stage_dir) or {"ok": 1}, {}))
+    assert data == {"ok": 1} and calls == [None] and not work_root.exists()
+
+
+def test_purge_stale_workspaces(work_root):
+    old, fresh = work_root / "old-job", work_root / "new-job"
+    old.mkdir(parents=True)
+    fresh.mkdir()
+    past = time.time() - checkpoints.STALE_AFTER_S - 60
+    os.utime(old, (past, past))
+    assert checkpoints.purge_stale() == 1
+    assert not old.exists() and fresh.exists()
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """The workspace directories the assembly task reads and writes, moved under ``tmp_path``."""
+    from api.core import paths
+    from worker.tasks import audio
+
+    root = tmp_path / "ws"
+    dirs = types.SimpleNamespace(
+        root=root, media=root / "media_uploads", cleaned=root / "cleaned_audio",
+        transcripts=root / "transcripts", final=root / "final_episodes", logs=root / "assembly_logs",
+    )
+    for d in vars(dirs).values():
+        d.mkdir(parents=True, exist_ok=True)
+    for name, path in (("WS_ROOT", root), ("MEDIA_DIR", dirs.media), ("CLEANED_DIR", dirs.cleaned),
+                       ("TRANSCRIPTS_DIR", dirs.transcripts), ("FINAL_DIR", dirs.final)):
+        monkeypatch.setattr(paths, name, path)
+    monkeypatch.setattr(audio, "PROJECT_ROOT", root)
+    monkeypatch.setattr(audio, "ASSEMBLY_LOG_DIR", dirs.logs)
+    return dirs
+
+
+@pytest.fixture
+def assembly(session, monkeypatch, work_root, workspace):
+    """A user, template, episode and transcript for create_podcast_episode, with the heavy stages counted."""
+    from worker.tasks import audio
+
+    user = User(email=f"{uuid4().hex}@example.com", hashed_password="x")
+    session.add(user)
+    session.commit()
+    template = PodcastTemplate(name="Show", user_id=user.id)
+    episode = Episode(user_id=user.id, podcast_id=uuid4(), title="Resumable")
+    session.add(template)
+    session.add(episode)
+    session.commit()
+
+    stem = f"ckpt_{uuid4().hex[:8]}"
+    upload = workspace.media / f"{stem}.wav"
+    upload.write_bytes(b"RIFF" + os.urandom(2048))
+    (workspace.transcripts / f"{stem}.json").write_text(json.dumps([{"word": "hello", "start": 0.0, "end": 0.4}]))
+    calls = {"clean": 0, "mix": 0}
+
+    def run_all(*, audio_path, output_name, work_dir, **kwargs):
+        calls["clean"] += 1
+        out = Path(work_dir) / "cleaned_audio" / output_name
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_bytes(Path(audio_path).read_bytes()[:1024])
+        return {"final_path": str(out), "summary": {"stats": {"fillers_removed": 3}, "edits": {}}}
+
+    def process_and_assemble_episode(*, main_content_filename, output_filename, checkpoints, **kwargs):
+        calls["mix"] += 1
+        assert checkpoints is not None
+        if calls.pop("crash_mix", False):
+            raise WorkerLost("killed during the final mix")
+        out = workspace.final / f"{output_filename}.mp3"
+        out.write_bytes((workspace.media / main_content_filename).read_bytes())
+        return out, [], []
+
+    monkeypatch.setattr(audio.clean_engine, "run_all", run_all)
+    monkeypatch.setattr(audio.audio_processor, "process_and_assemble_episode", process_and_assemble_episode)
+    kwargs = dict(
+        episode_id=str(episode.id), template_id=str(template.id), main_content_filename=f"{stem}.wav",
+        output_filename=stem, tts_values={}, episode_details={}, user_id=str(user.id), podcast_id="",
+        skip_charge=True,
+    )
+    def another_episode(filename):
+        """A new episode of the same user and upload, as the assembler creates for a re-run."""
+        ep = Episode(user_id=user.id, podcast_id=uuid4(), title="Take two")
+        session.add(ep)
+        session.commit()
+        (workspace.media / filename).write_bytes(upload.read_bytes())
+        return ep
+
+    return audio.create_podcast_episode, kwargs, calls, episode, another_episode
+
+
+def test_redelivered_assembly_skips_the_clean_engine(session, assembly, work_root, workspace):
+    task, kwargs, calls, episode, _ = assembly
+    calls["crash_mix"] = True
+    with pytest.raises(WorkerLost):
+        task.apply(kwargs=kwargs, task_id="job-ckpt")
+    assert calls == {"clean": 1, "mix": 1}
+    assert (work_root / "job-ckpt" / "clean").is_dir()
+
+    # acks_late redelivers the same message (same task id) to another worker
+    assert task.apply(kwargs=kwargs, task_id="job-ckpt").get()["message"].startswith("Episode assembled")
+    assert calls == {"clean": 1, "mix": 2}
+
+    session.expire_all()
+    assert session.get(Episode, episode.id).final_audio_path == f"{kwargs['output_filename']}.mp3"
+    row = session.get(Job, "job-ckpt")
+    assert row.state == "processed" and json.loads(row.stats_json)["fillers_removed"] == 3
+    assert not (work_root / "job-ckpt").exists()
+    # Only the working copy of the cleaned audio outlives the job
+    assert not any(workspace.cleaned.iterdir())
+    assert (workspace.media / session.get(Episode, episode.id).working_audio_name).is_file()
+
+
+def test_assembled_notification_is_published(assembly, monkeypatch):
+    from worker.tasks import audio
+
+    task, kwargs, _, episode, _ = assembly
+    published = []
+    monkeypatch.setattr(audio.events, "publish_notification", lambda n: published.append((n.type, n.user_id)))
+    task.apply(kwargs=kwargs, task_id="job-notify").get()
+    assert published == [("assembly", episode.user_id)]
+
+
+def test_template_change_reuses_the_cleaned_audio(session, assembly, workspace):
+    task, kwargs, calls, episode, another_episode = assembly
+    task.apply(kwargs=kwargs, task_id="job-first").get()
+
+    # Same audio re-uploaded under a new name, same transcript, different template
+    stem = f"{kwargs['output_filename']}_again"
+    retake = another_episode(f"{stem}.wav")
+    transcript = workspace.transcripts / f"{stem}.json"
+    transcript.write_bytes((workspace.transcripts / f"{kwargs['output_filename']}.json").read_bytes())
+    template = session.get(PodcastTemplate, UUID(kwargs["template_id"]))
+    template.segments_json = json.dumps([{"segment_type": "intro"}])
+    session.add(template)
+    session.commit()
+    task.apply(kwargs={**kwargs, "episode_id": str(retake.id), "main_content_filename": f"{stem}.wav",
+                       "output_filename": stem}, task_id="job-second").get()
+    assert calls == {"clean": 1, "mix": 2}
+    session.expire_all()
+    assert session.get(Episode, retake.id).working_audio_name == f"cleaned_{stem}.wav"
+
+
+def test_intern_tts_is_not_synthesized_twice(tmp_path, work_root, monkeypatch):
+    content = tmp_path / "content.wav"
+    AudioSegment.silent(2000, frame_rate=16000).export(content, format="wav")
+    synthesized = []
+
+    def do_tts(paths, cfg, log, *, ai_cmds, cleaned_audio, content_path, mutable_words):
+        synthesized.append(len(ai_cmds))
+        mutable_words.append({"word": "answer", "start": 2.0, "end": 2.5})
+        return {"cleaned_audio": cleaned_audio + Sine(440).to_audio_segment(500).set_frame_rate(16000),
+                "ai_note_additions": ["note"]}
+
+    monkeypatch.setattr(orchestrator, "do_tts", do_tts)
+
+    def run():
+        words = [{"word": "intern", "start": 0.1, "end": 0.4}]
+        cfg = {"checkpoints": checkpoints.JobWorkspace("job-tts"), "tts_provider": "google"}
+        out = orchestrator._intern_stage({}, cfg, [], ai_cmds=[{"command": "what is up"}],
+                                         cleaned_audio=AudioSegment.from_file(content), content_path=content,
+                                         mutable_words=words)
+        return out, words
+
+    first, first_words = run()
+    second, second_words = run()
+    assert synthesized == [1]
+    assert second["cleaned_audio"].raw_data == first["cleaned_audio"].raw_data
+    assert second_words == first_words and second["ai_note_additions"] == ["note"]
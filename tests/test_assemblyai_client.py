@@ -32,9 +32,10 @@ def test_upload_audio_success(tmp_path, monkeypatch, caplog):
 
     captured = {}
 
-    def fake_post(url, headers=None, data=None):
+    def fake_post(url, headers=None, data=None, timeout=None):
         captured["url"] = url
         captured["headers"] = dict(headers or {})
+        captured["timeout"] = timeout
         # Ensure data is an iterable/generator of bytes
         chunks = list(data)
         assert all(isinstance(c, (bytes, bytearray)) for c in chunks)
@@ -50,6 +51,7 @@ def test_upload_audio_success(tmp_path, monkeypatch, caplog):
     assert captured["url"] == "https://mock/upload/123".replace("upload/123", "upload")
     assert captured["headers"].get("authorization") == "KEY"
     assert captured["headers"].get("content-type") == "application/octet-stream"
+    assert captured["timeout"] is not None
     # upload_audio does not log in production; verify no [assemblyai] logs were emitted here
     assert not any("[assemblyai]" in r.getMessage() for r in caplog.records)
 
@@ -58,7 +60,7 @@ def test_upload_audio_failure(tmp_path, monkeypatch):
     audio = tmp_path / "a.wav"
     audio.write_bytes(b"RIFF....WAVE")
 
-    def fake_post(url, headers=None, data=None):
+    def fake_post(url, headers=None, data=None, timeout=None):
         return FakeResponse(500, {"error": "oops"})
 
     monkeypatch.setattr("requests.post", fake_post)
@@ -72,7 +74,7 @@ def test_start_transcription_success(monkeypatch, caplog):
     caplog.set_level("INFO")
     captured = {}
 
-    def fake_post(url, json=None, headers=None):
+    def fake_post(url, json=None, headers=None, timeout=None):
         captured["url"] = url
         captured["json"] = dict(json or {})
         captured["headers"] = dict(headers or {})
@@ -101,7 +103,7 @@ def test_start_transcription_success(monkeypatch, caplog):
 
 
 def test_start_transcription_failure(monkeypatch):
-    def fake_post(url, json=None, headers=None):
+    def fake_post(url, json=None, headers=None, timeout=None):
         return FakeResponse(400, {"error": "bad"})
 
     monkeypatch.setattr("requests.post", fake_post)
@@ -121,7 +123,7 @@ def test_get_transcription_success(monkeypatch, caplog):
     caplog.set_level("INFO")
     captured = {}
 
-    def fake_get(url, headers=None):
+    def fake_get(url, headers=None, timeout=None):
         captured["url"] = url
         captured["headers"] = dict(headers or {})
         return FakeResponse(200, {"id": "job_1", "status": "completed", "text": "hello"})
@@ -137,7 +139,7 @@ def test_get_transcription_success(monkeypatch, caplog):
 
 
 def test_get_transcription_failure(monkeypatch):
-    def fake_get(url, headers=None):
+    def fake_get(url, headers=None, timeout=None):
         return FakeResponse(503, {"error": "down"})
 
     monkeypatch.setattr("requests.get", fake_get)
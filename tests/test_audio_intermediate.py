@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+
+from api.services.audio import audio_export
+from api.services.audio import orchestrator_steps as steps
+from api.services.clean_engine import engine
+from api.services.clean_engine.models import InternSettings, SilenceSettings, UserSettings
+
+
+@pytest.fixture
+def exports(monkeypatch):
+    """Formats passed to AudioSegment.export, in call order."""
+    calls = []
+    real = AudioSegment.export
+
+    def counting(self, out_f=None, format="mp3", *args, **kwargs):
+        calls.append(format)
+        return real(self, out_f, format, *args, **kwargs)
+
+    monkeypatch.setattr(AudioSegment, "export", counting)
+    return calls
+
+
+def _speech(path, seconds=3.0, rate=16000):
+    rng = np.random.default_rng(7)
+    pcm = rng.integers(-9000, 9000, size=int(seconds * rate), dtype=np.int16)
+    seg = AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=rate, channels=1)
+    seg.export(path, format="wav")
+    return seg
+
+
+def test_engine_hands_the_mixer_a_lossless_file(tmp_path, exports):
+    src = _speech(tmp_path / "take.wav")
+    words = [{"word": "hello", "start": 0.1, "end": 0.6}, {"word": "um", "start": 1.0, "end": 1.5},
+             {"word": "there", "start": 2.0, "end": 2.6}]
+    (tmp_path / "take.json").write_text(json.dumps(words))
+    us = UserSettings(filler_words=["um"])
+    exports.clear()
+    out = engine.run_all(
+        audio_path=tmp_path / "take.wav", words_json_path=tmp_path / "take.json", work_dir=tmp_path,
+        user_settings=us, silence_cfg=SilenceSettings(), intern_cfg=InternSettings(), censor_cfg=None,
+        sfx_map=None, synth=None, flubber_cuts_ms=None,
+        output_name=audio_export.intermediate_name("cleaned_take"), disable_intern_insertion=True,
+    )
+    assert exports == ["wav"] and out["final_path"].endswith("cleaned_take.wav")
+    cleaned = AudioSegment.from_file(out["final_path"])
+    (start, end), = out["summary"]["edits"]["filler_cuts"]
+    # Bit-exact: the kept audio is the source's samples, not a re-decoded approximation
+    assert cleaned.raw_data == (src[:start] + src[end:]).raw_data
+
+
+def test_final_mix_encodes_the_published_file_once(tmp_path, exports):
+    master = tmp_path / "master.wav"
+    _speech(master)
+    final = tmp_path / "episode.wav"  # the suffix picks the format; wav keeps ffmpeg out of the test
+    exports.clear()
+    audio_export.normalize_master(master, final, {}, [])
+    audio_export.mux_tracks(final, None, final, {}, [])
+    written = audio_export.write_derivatives(final, {"mp3": final}, {}, [])
+    assert exports == ["wav"] and written["written"] == [{"label": "mp3", "path": str(final)}]
+
+
+def test_cleaned_reference_uses_the_intermediate_format(tmp_path, monkeypatch, exports):
+    monkeypatch.setattr(steps, "CLEANED_DIR", tmp_path / "cleaned")
+    monkeypatch.setattr(steps, "OUTPUT_DIR", tmp_path / "final")
+    seg = AudioSegment.silent(500, frame_rate=16000)
+    name, path = steps.export_cleaned_audio_step("take.mp3", seg, [])
+    assert (name, exports) == ("cleaned_take.wav", ["wav"]) and path.read_bytes()[:4] == b"RIFF"
+    assert steps.export_cleaned_audio_step("cleaned_take.wav", seg, [])[0] == "cleaned_take.wav"
+
+    monkeypatch.setenv("AUDIO_INTERMEDIATE_FORMAT", "flac")
+    assert audio_export.intermediate_name("cleaned_take") == "cleaned_take.flac"
+    monkeypatch.setenv("AUDIO_INTERMEDIATE_FORMAT", "ogg")  # not lossless-or-legacy: ignored
+    assert audio_export.intermediate_format() == "wav"
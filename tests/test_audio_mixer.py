@@ -0,0 +1,87 @@
+import time
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+
+from api.services.audio.mixer import MixBuffer
+
+
+def _tone(ms, rate=16000, channels=1, amp=3000, freq=220):
+    frames = int(ms * rate / 1000)
+    t = np.arange(frames) / rate
+    wave = (amp * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+    data = np.repeat(wave[:, None], channels, axis=1)
+    return AudioSegment(data=data.tobytes(), sample_width=2, frame_rate=rate, channels=channels)
+
+
+def _samples(seg):
+    return np.array(seg.get_array_of_samples(), dtype=np.int64)
+
+
+def test_placements_match_pydub_overlays():
+    intro, content, outro = _tone(700, freq=330), _tone(2000), _tone(600, freq=440)
+    ref = AudioSegment.silent(duration=3000)
+    mix = MixBuffer(3000)
+    for seg, pos in ((intro, 0), (content, 500), (outro, 2400)):
+        ref = ref.overlay(seg, position=pos)
+        mix.add(seg, pos)
+    out = mix.render()
+    assert (out.frame_rate, out.channels, out.sample_width) == (ref.frame_rate, ref.channels, ref.sample_width)
+    assert len(out) == len(ref)
+    assert np.array_equal(_samples(out), _samples(ref))
+
+
+def test_looped_bed_with_gain_and_fades_matches_pydub():
+    bed = _tone(300, freq=110)
+    ref = AudioSegment.silent(duration=2000)
+    looped = bed
+    while len(looped) < 1700:
+        looped = looped + bed
+    ref = ref.overlay(looped[:1700].apply_gain(-6).fade_in(200).fade_out(400), position=250)
+
+    mix = MixBuffer(2000)
+    mix.add(bed, 250, duration_ms=1700, gain_db=-6, fade_in_ms=200, fade_out_ms=400, loop=True)
+    out = mix.render()
+    assert len(out) == len(ref)
+    diff = np.abs(_samples(out) - _samples(ref))
+    # pydub steps long fades once per millisecond; the mixer ramps per frame
+    assert diff.max() <= 15
+    assert not _samples(out)[:int(0.25 * 16000)].any()
+
+
+def test_sums_clip_once_and_format_is_the_largest():
+    loud = _tone(500, rate=22050, channels=2, amp=30000)
+    quiet = _tone(500, rate=8000, amp=100)
+    mix = MixBuffer(800)
+    mix.add(loud, 0)
+    mix.add(loud, 100)
+    mix.add(quiet, 300)
+    out = mix.render()
+    assert (out.frame_rate, out.channels, out.sample_width) == (22050, 2, 2)
+    samples = _samples(out)
+    assert samples.max() == 32767 and samples.min() == -32768
+
+
+def test_layers_past_the_end_are_cut():
+    mix = MixBuffer(1000)
+    mix.add(_tone(800), 600)
+    mix.add(_tone(300, freq=330), 1200)
+    out = mix.render()
+    assert len(out) == 1000
+    assert _samples(out)[int(0.6 * 16000):].any()
+
+
+@pytest.mark.parametrize("minutes", [10])
+def test_long_mix_is_fast(minutes):
+    content = _tone(minutes * 60_000, rate=44100, channels=2)
+    bed = _tone(7000, rate=44100, channels=2, freq=110)
+    mix = MixBuffer(len(content) + 30_000)
+    mix.add(_tone(15_000, rate=44100, channels=2), 0)
+    mix.add(content, 15_000)
+    for i in range(8):
+        mix.add(bed, 15_000 + i * 60_000, duration_ms=45_000, gain_db=-15, fade_in_ms=2000, fade_out_ms=2000, loop=True)
+    started = time.perf_counter()
+    out = mix.render()
+    assert len(out) == len(content) + 30_000
+    assert time.perf_counter() - started < 10
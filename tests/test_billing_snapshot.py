@@ -0,0 +1,162 @@
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlmodel import select
+
+from api.models.subscription import Subscription
+from api.models.user import User
+from api.services.billing import subscriptions
+
+NOW = int(time.time())
+DAY = 86400
+
+
+def _sub(sub_id, customer, status, *, unit=1900, interval="month", qty=1, plan="pro", user_id=None, **extra):
+    return {
+        "id": sub_id,
+        "customer": customer,
+        "status": status,
+        "metadata": {"plan_key": plan, **({"user_id": str(user_id)} if user_id else {})},
+        "items": {"data": [{"quantity": qty, "price": {"id": f"price_{plan}_{interval}", "unit_amount": unit,
+                                                         "recurring": {"interval": interval, "interval_count": 1}}}]},
+        "current_period_end": NOW + 20 * DAY,
+        "cancel_at_period_end": False,
+        **extra,
+    }
+
+
+class _StubStripe:
+    """Just enough of the stripe module for reconcile_subscriptions."""
+
+    def __init__(self, objects):
+        self.calls = []
+        objects = list(objects)
+
+        def _list(**kwargs):
+            self.calls.append(kwargs)
+            return SimpleNamespace(auto_paging_iter=lambda: iter(objects))
+
+        self.Subscription = SimpleNamespace(list=_list)
+
+
+class _ExplodingStripe:
+    def __getattr__(self, name):
+        raise AssertionError(f"Stripe must not be called (stripe.{name})")
+
+
+@pytest.fixture
+def users(session):
+    a = User(email="a@example.com", hashed_password="x", stripe_customer_id="cus_a")
+    b = User(email="b@example.com", hashed_password="x", stripe_customer_id="cus_b")
+    c = User(email="c@example.com", hashed_password="x", stripe_customer_id="cus_c")
+    session.add_all([a, b, c])
+    session.commit()
+    return a, b, c
+
+
+@pytest.fixture
+def reconciled(session, users):
+    a, b, c = users
+    stub = _StubStripe([
+        _sub("sub_1", "cus_a", "active", unit=1900, plan="pro"),
+        _sub("sub_2", "cus_b", "active", unit=12000, interval="year", qty=2, plan="creator"),
+        _sub("sub_3", "cus_c", "trialing", plan="pro", trial_end=NOW + 3 * DAY),
+        _sub("sub_4", "cus_c", "trialing", plan="free", trial_end=NOW + 20 * DAY),
+        _sub("sub_5", "cus_a", "canceled", canceled_at=NOW - 5 * DAY),
+        _sub("sub_6", "cus_a", "canceled", canceled_at=NOW - 60 * DAY),
+        _sub("sub_7", "cus_unknown", "active"),
+    ])
+    result = subscriptions.reconcile_subscriptions(session, stub)
+    assert stub.calls == [{"status": "all", "limit": 100, "expand": ["data.items.data.price"]}]
+    assert result == {"seen": 7, "updated": 6, "skipped": 1}
+    return session
+
+
+def test_snapshot_fields_normalize_to_monthly():
+    fields = subscriptions.snapshot_fields(_sub("s", "c", "active", unit=12000, interval="year", qty=2))
+    assert fields["amount_cents"] == 24000
+    assert fields["mrr_cents"] == 2000
+    assert fields["billing_interval"] == "year"
+    assert subscriptions.snapshot_fields(_sub("s", "c", "bogus"))["status"] == "incomplete"
+
+
+def test_reconcile_upserts_and_overview(reconciled):
+    rows = {s.stripe_subscription_id: s for s in reconciled.exec(select(Subscription)).all()}
+    assert set(rows) == {"sub_1", "sub_2", "sub_3", "sub_4", "sub_5", "sub_6"}
+    assert rows["sub_1"].mrr_cents == 1900 and rows["sub_1"].plan_key == "pro"
+
+    out = subscriptions.billing_overview(reconciled)
+    assert out["active_subscriptions"] == 2
+    assert out["trialing"] == 2
+    assert out["trial_expiring_7d"] == 1
+    assert out["canceled_last_30d"] == 1
+    assert out["gross_mrr_cents"] == 1900 + 2000
+    assert out["plan_mix"] == {
+        "pro": {"active": 1, "trialing": 1},
+        "creator": {"active": 1, "trialing": 0},
+        "free": {"active": 0, "trialing": 1},
+    }
+
+    # A second pass updates in place (status change) without duplicating rows
+    stub = _StubStripe([_sub("sub_1", "cus_a", "canceled", canceled_at=NOW)])
+    subscriptions.reconcile_subscriptions(reconciled, stub)
+    assert len(reconciled.exec(select(Subscription)).all()) == 6
+    out = subscriptions.billing_overview(reconciled)
+    assert out["active_subscriptions"] == 1 and out["canceled_last_30d"] == 2
+    assert out["gross_mrr_cents"] == 2000
+
+
+def test_empty_snapshot_has_no_mrr(session):
+    out = subscriptions.billing_overview(session)
+    assert out["active_subscriptions"] == 0 and out["gross_mrr_cents"] is None and out["plan_mix"] == {}
+
+
+def test_admin_overview_reads_snapshot_without_stripe(app, client, reconciled, monkeypatch):
+    from api.routers import admin as admin_router
+
+    monkeypatch.setattr(admin_router, "_stripe", _ExplodingStripe())
+    monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test_x")
+    admin = User(id=uuid4(), email="admin@example.com", hashed_password="x", is_admin=True)
+    app.dependency_overrides[admin_router.get_current_admin_user] = lambda: admin
+    try:
+        r = client.get("/api/admin/billing/overview")
+    finally:
+        app.dependency_overrides.pop(admin_router.get_current_admin_user, None)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["active_subscriptions"] == 2 and body["gross_mrr_cents"] == 3900
+    assert body["plan_mix"]["pro"] == {"active": 1, "trialing": 1}
+
+
+@pytest.fixture
+def pacific_time(monkeypatch):
+    """Run with a local timezone that is not UTC, so local-time conversions show up."""
+    monkeypatch.setenv("TZ", "America/Los_Angeles")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_webhook_writes_snapshot_columns(app, client, session, users, monkeypatch, pacific_time):
+    from api.routers import billing_webhook
+
+    a = users[0]
+    obj = _sub("sub_wh", "cus_a", "trialing", unit=4900, plan="pro", user_id=a.id, trial_end=NOW + 2 * DAY)
+    monkeypatch.setattr(billing_webhook.stripe, "api_key", "sk_test_x")
+    monkeypatch.setattr(billing_webhook, "WEBHOOK_SECRET", "whsec_x")
+    monkeypatch.setattr(billing_webhook.stripe.Webhook, "construct_event",
+                        lambda **kw: {"type": "customer.subscription.updated", "data": {"object": obj}})
+    r = client.post("/api/billing/webhook", content=b"{}", headers={"stripe-signature": "t=1"})
+    assert r.status_code == 200, r.text
+
+    session.expire_all()
+    row = session.exec(select(Subscription).where(Subscription.stripe_subscription_id == "sub_wh")).one()
+    assert row.status == "trialing" and row.mrr_cents == 4900 and row.billing_interval == "month"
+    assert row.trial_end is not None and row.trial_end - datetime.utcnow() < timedelta(days=3)
+    # Same naive-UTC conversion as the reconciler, whatever the host's timezone
+    period_end = datetime.fromtimestamp(NOW + 20 * DAY, tz=timezone.utc).replace(tzinfo=None)
+    assert row.current_period_end == period_end == subscriptions.utc_from_timestamp(NOW + 20 * DAY)
@@ -0,0 +1,99 @@
+import pytest
+from celery import Celery
+
+from worker.tasks import app as worker_app
+
+ROUTES = {
+    "create_podcast_episode": "cpu",
+    "transcribe_media_file": "io",
+    "publish_episode_to_spreaker_task": "io",
+    "maintenance.purge_expired_uploads": "maintenance",
+    "maintenance.finalize_metrics_rollups": "maintenance",
+    "maintenance.report_queue_depths": "io",
+    "preanalyze_media_file": "maintenance",
+    "render_template_stems": "maintenance",
+    "some.new_task": worker_app.DEFAULT_WORKLOAD,
+}
+
+
+@pytest.fixture
+def memory_app():
+    """A separate app on the in-memory broker with the production workload configuration."""
+    app = Celery("workloads-test", broker="memory://", backend="cache+memory://")
+    worker_app.configure_workloads(app)
+    def noop(*args, **kwargs):
+        return None
+
+    for name in ROUTES:
+        app.task(name=name)(noop)
+    yield app
+    with app.connection_for_write() as conn:
+        for queue in worker_app.WORKLOADS:
+            try:
+                conn.default_channel.queue_purge(queue)
+            except Exception:
+                pass
+
+
+def test_real_tasks_route_to_their_workload_queue():
+    from worker.tasks import celery_app
+    import worker.tasks.maintenance  # noqa: F401  (registers maintenance tasks)
+
+    router = celery_app.amqp.router
+    for name, queue in ROUTES.items():
+        assert router.route({}, name)["queue"].name == queue, name
+
+
+def test_time_limits_follow_the_workload():
+    from worker.tasks import celery_app
+    import worker.tasks.maintenance  # noqa: F401
+
+    for name, queue in ROUTES.items():
+        task = celery_app.tasks.get(name)
+        if task is None:
+            continue
+        assert task.time_limit == worker_app.WORKLOADS[queue].get("time_limit"), name
+        assert task.soft_time_limit == worker_app.WORKLOADS[queue].get("soft_time_limit"), name
+
+
+def test_threads_pool_workload_declares_no_time_limits():
+    # Celery's threads pool ignores soft_time_limit/time_limit; declaring them would mislead
+    for name, wl in worker_app.WORKLOADS.items():
+        if wl["pool"] == "threads":
+            assert "time_limit" not in wl and "soft_time_limit" not in wl, name
+
+
+def test_queue_depths_on_memory_broker(memory_app):
+    # Nothing has declared the queues yet: the probe reports "unknown", not zero
+    assert worker_app.queue_depths(memory_app) == {"cpu": None, "io": None, "maintenance": None, "large": None}
+    # send_task: once worker.tasks is imported its shared tasks replace the stubs, with real signatures
+    memory_app.send_task("create_podcast_episode", kwargs={"episode_id": "e1"})
+    memory_app.send_task("transcribe_media_file", args=["a.wav"])
+    memory_app.send_task("publish_episode_to_spreaker_task", args=["e1"])
+    memory_app.send_task("maintenance.purge_expired_uploads")
+    # Explicit queue overrides the route (e.g. a one-off rerun on the cpu pool)
+    memory_app.send_task("some.new_task", queue="cpu")
+    # Oversized assemblies are sent to the large-job queue explicitly
+    memory_app.send_task("create_podcast_episode", kwargs={"episode_id": "e2"}, queue="large")
+    assert worker_app.queue_depths(memory_app) == {"cpu": 2, "io": 2, "maintenance": 1, "large": 1}
+
+
+def test_eager_mode_ignores_routing(celery_eager):
+    from worker.tasks import celery_app
+
+    @celery_app.task(name="maintenance.test_echo")
+    def echo(x):
+        return x
+
+    assert echo.delay(7).get() == 7
+
+
+def test_worker_argv_per_workload():
+    cpu = worker_app.worker_argv("cpu")
+    io = worker_app.worker_argv("io")
+    maint = worker_app.worker_argv("maintenance")
+    assert "--queues=cpu,celery" in cpu and "--pool=prefork" in cpu
+    assert "--queues=io" in io and "--pool=threads" in io
+    assert f"--concurrency={worker_app.WORKLOADS['io']['concurrency']}" in io
+    assert "--queues=maintenance" in maint and "--concurrency=1" in maint
+    assert all("--prefetch-multiplier=1" in argv for argv in (cpu, io, maint))
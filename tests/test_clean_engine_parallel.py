@@ -0,0 +1,208 @@
+import copy
+import os
+import random
+import time
+import wave
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+
+from api.services.clean_engine import parallel
+from api.services.clean_engine.features import apply_censor_beep, apply_flubber_cuts, replace_keywords_with_sfx
+from api.services.clean_engine.feature_modules.flubber import splice_cuts
+from api.services.clean_engine.models import CensorSettings, Word
+from api.services.clean_engine.words import build_filler_cuts, merge_ranges, remap_words_after_cuts
+
+VOCAB = ["so", "today", "we", "talk", "about", "shows", "and", "darn", "um", "uh", "applause", "really"]
+
+
+def _episode(seconds, rate=44100, channels=1, extra_frames=0, seed=7):
+    """Noise bursts for words and digital silence between them, with a long pause every ~8 s."""
+    rng = random.Random(seed)
+    words, t = [], 0.3
+    while t < seconds - 2:
+        dur = rng.uniform(0.15, 0.45)
+        words.append(Word(word=rng.choice(VOCAB), start=round(t, 3), end=round(t + dur, 3)))
+        t += dur + (rng.uniform(1.6, 3.0) if rng.random() < 0.06 else rng.uniform(0.05, 0.3))
+    frames = int(seconds * rate) + extra_frames
+    pcm = np.zeros((frames, channels), dtype=np.int16)
+    noise = np.random.default_rng(seed)
+    for w in words:
+        a, b = int(w.start * rate), int(w.end * rate)
+        pcm[a:b] = noise.integers(-8000, 8000, size=(b - a, channels), dtype=np.int16)
+    audio = AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=rate, channels=channels)
+    return audio, words
+
+
+def _pause_cuts(words, max_pause_ms=1500, target_pause_ms=500):
+    cuts, prev_end = [], int(round(words[0].end * 1000))
+    for w in words[1:]:
+        start_ms = int(round(w.start * 1000))
+        if start_ms - prev_end > max_pause_ms:
+            cuts.append((prev_end + target_pause_ms, start_ms))
+        prev_end = int(round(w.end * 1000))
+    return cuts
+
+
+def _write_wav(path, ms, rate, channels):
+    frames = int(rate * ms / 1000)
+    with wave.open(str(path), "wb") as fh:
+        fh.setnchannels(channels)
+        fh.setsampwidth(2)
+        fh.setframerate(rate)
+        fh.writeframes((np.arange(frames * channels, dtype=np.int16) % 2000).tobytes())
+    return path
+
+
+def _clean(audio, words, sfx_map, *, workers=None):
+    """The clean engine's splice chain: filler + pause cuts, censor beeps, SFX."""
+    words = copy.deepcopy(words)
+    all_cuts = merge_ranges(build_filler_cuts(words, {"um", "uh"}) + _pause_cuts(words), gap_ms=0)
+    if workers:
+        audio = parallel.segment_episode(audio, words, all_cuts, workers=workers)
+    audio = apply_flubber_cuts(audio, all_cuts)
+    words = remap_words_after_cuts(words, all_cuts)
+    audio, spans = apply_censor_beep(audio, words, CensorSettings(enabled=True, words=["darn"]), mutate_words=False)
+    audio = replace_keywords_with_sfx(audio, words, sfx_map)
+    segments = len(audio.segments) if isinstance(audio, parallel.SegmentedAudio) else 1
+    if isinstance(audio, parallel.SegmentedAudio):
+        audio = audio.join()
+    return audio, [(w.word, w.start, w.end) for w in words], spans, segments
+
+
+@pytest.fixture
+def short_segments(monkeypatch):
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_MS", 0)
+    monkeypatch.setattr(parallel, "SEGMENT_MIN_MS", 5_000)
+
+
+@pytest.fixture
+def inline(monkeypatch):
+    """Render segments in-process; parity does not depend on where a segment is spliced."""
+    monkeypatch.setattr(parallel.SegmentedAudio, "_executor", lambda self: None)
+
+
+@pytest.mark.parametrize("rate,channels,extra_frames", [(44100, 1, 0), (44100, 2, 29), (48000, 1, 24), (48000, 2, 13)])
+def test_segmented_output_matches_serial(tmp_path, short_segments, inline, rate, channels, extra_frames):
+    audio, words = _episode(75, rate, channels, extra_frames)
+    sfx_map = {"applause": _write_wav(tmp_path / "applause.wav", 400, 22050, 1)}
+
+    serial = _clean(audio, words, sfx_map)
+    split = _clean(audio, words, sfx_map, workers=4)
+
+    assert split[3] > 1
+    assert split[0].raw_data == serial[0].raw_data
+    assert (split[0].frame_rate, split[0].channels) == (rate, channels)
+    assert split[1:3] == serial[1:3]
+
+
+def test_wider_sfx_falls_back_to_whole_episode_splice(tmp_path, short_segments, inline):
+    audio, words = _episode(40)
+    # A 48 kHz stereo effect would re-encode a 44.1 kHz mono episode mid-splice
+    sfx_map = {"applause": _write_wav(tmp_path / "wide.wav", 300, 48000, 2)}
+    serial = _clean(audio, words, sfx_map)
+    split = _clean(audio, words, sfx_map, workers=4)
+    assert split[0].raw_data == serial[0].raw_data and split[3] == 1
+
+
+def test_edit_straddling_a_boundary_merges_segments(short_segments, inline):
+    audio, words = _episode(30)
+    seg = parallel.SegmentedAudio(audio, [10_000, 20_000], workers=2)
+    cuts = [(2_000, 2_500), (9_900, 10_100), (25_000, 26_000)]
+    out = seg.render(splice_cuts, cuts)
+    assert len(out.segments) == 2
+    assert out.join().raw_data == splice_cuts(audio, cuts).raw_data
+
+
+def test_short_episodes_are_not_split(short_segments):
+    audio, words = _episode(20)
+    assert parallel.segment_episode(audio, words, [], workers=1) is audio
+    narrow = AudioSegment.silent(20_000, frame_rate=8000)
+    assert parallel.segment_episode(narrow, words, [], workers=4) is narrow
+
+
+def test_process_pool_parity(tmp_path, short_segments):
+    audio, words = _episode(30, 48000, 2)
+    sfx_map = {"applause": _write_wav(tmp_path / "applause.wav", 400, 44100, 1)}
+    serial = _clean(audio, words, sfx_map)
+    split = _clean(audio, words, sfx_map, workers=2)
+    assert split[3] > 1 and split[0].raw_data == serial[0].raw_data and split[1] == serial[1]
+
+
+def _render_in_child(seconds):
+    """Runs in a billiard pool child, which is daemonic like a Celery prefork child."""
+    audio, words = _episode(seconds)
+    cuts = _pause_cuts(words)
+    seg = parallel.SegmentedAudio(audio, [seconds * 1000 // 3, seconds * 2000 // 3], workers=2)
+    parallel.render_stage(seg, splice_cuts, cuts)
+    pool, workers = type(seg._pool[0]).__name__, seg.workers
+    return seg.join().raw_data == splice_cuts(audio, cuts).raw_data, pool, workers
+
+
+def test_render_stage_in_a_prefork_child():
+    import billiard
+
+    pool = billiard.get_context("fork").Pool(1)
+    try:
+        same, used, workers = pool.apply_async(_render_in_child, (30,)).get(timeout=120)
+    finally:
+        pool.terminate()
+        pool.join()
+    assert same and used == "_BilliardExecutor" and workers == 2
+
+
+def test_failed_pool_is_not_retried(short_segments, monkeypatch, caplog):
+    made = []
+
+    class Broken:
+        def map(self, *args):
+            raise OSError("cannot start processes")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            made.append("shutdown")
+
+    def new_pool(workers):
+        made.append("pool")
+        return Broken()
+
+    monkeypatch.setattr(parallel, "_new_pool", new_pool)
+    audio, words = _episode(30)
+    seg = parallel.SegmentedAudio(audio, [10_000, 20_000], workers=2)
+    for cuts in ([(2_000, 2_500)], [(12_000, 12_400)], [(21_000, 21_300)]):
+        audio = splice_cuts(audio, cuts)
+        parallel.render_stage(seg, splice_cuts, cuts)
+    assert made == ["pool", "shutdown"] and seg._pool == [None] and seg.workers == 1
+    assert sum("parallel splice failed" in r.getMessage() for r in caplog.records) == 1
+    assert seg.join().raw_data == audio.raw_data
+
+
+def test_workers_share_the_cores(monkeypatch):
+    monkeypatch.delenv("CLEAN_ENGINE_WORKERS", raising=False)
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    monkeypatch.setenv("CELERY_WORKER_PROCESSES", "16")
+    assert parallel.max_workers() == 1
+    monkeypatch.setenv("CELERY_WORKER_PROCESSES", "4")
+    assert parallel.max_workers() == 4
+    monkeypatch.delenv("CELERY_WORKER_PROCESSES")
+    assert parallel.max_workers() == 16
+    monkeypatch.setenv("CLEAN_ENGINE_WORKERS", "3")
+    assert parallel.max_workers() == 3
+
+
+def test_benchmark_serial_vs_segmented(tmp_path, monkeypatch):
+    """A 6-minute episode through the clean engine's splices; prints the speedup."""
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_MS", 0)
+    audio, words = _episode(float(os.getenv("CLEAN_BENCH_S", "360")), 44100, 2)
+    sfx_map = {"applause": _write_wav(tmp_path / "applause.wav", 400, 44100, 1)}
+    workers = max(2, parallel.max_workers())
+
+    t0 = time.perf_counter()
+    serial = _clean(audio, words, sfx_map)
+    t1 = time.perf_counter()
+    split = _clean(audio, words, sfx_map, workers=workers)
+    t2 = time.perf_counter()
+
+    print(f"\n{len(audio) / 1000:.0f}s episode: serial {t1 - t0:.2f}s, {split[3]} segments on {workers} "
+          f"workers {t2 - t1:.2f}s ({(t1 - t0) / (t2 - t1):.1f}x)")
+    assert split[0].raw_data == serial[0].raw_data and split[1] == serial[1]
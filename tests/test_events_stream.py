@@ -0,0 +1,234 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.models.job import Job
+from api.models.notification import Notification
+from api.models.user import User
+from api.services import events
+from api.services.episodes import jobs
+
+STAGES = [("starting", 0), ("transcript", 10), ("cleaning", 30), ("mixing", 60), ("finalizing", 90)]
+
+
+@pytest.fixture
+def memory_backend(monkeypatch):
+    monkeypatch.setenv("EVENTS_BACKEND", "memory")
+
+
+@pytest.fixture
+def user(session):
+    u = User(email="listener@example.com", hashed_password="x")
+    session.add(u)
+    session.commit()
+    session.refresh(u)
+    return u
+
+
+async def _collect(gen, n, timeout=3.0):
+    """Next ``n`` non-comment frames from an SSE generator, as (event, id, raw)."""
+    frames = []
+
+    async def _run():
+        async for frame in gen:
+            if frame.startswith(("retry:", ":")):
+                continue
+            lines = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+            frames.append((lines["event"], int(lines["id"]), lines["data"]))
+            if len(frames) == n:
+                return
+
+    await asyncio.wait_for(_run(), timeout)
+    await gen.aclose()
+    return frames
+
+
+def test_job_updates_reach_the_stream_in_process(db_engine, session, user, memory_backend):
+    jobs.create_job(session, "job-sse", user_id=user.id)
+
+    async def scenario():
+        gen = events.event_stream(str(user.id), heartbeat_s=5)
+        assert (await gen.__anext__()).startswith("retry:")
+        pending = asyncio.ensure_future(_collect(gen, 2))
+        await asyncio.sleep(0.05)
+        await asyncio.to_thread(jobs.update_job, "job-sse", state="processing", stage="cleaning", percent=30)
+        await asyncio.to_thread(jobs.update_job, "job-sse", state="processed", stage="done", percent=100)
+        return await pending
+
+    frames = asyncio.run(scenario())
+    assert [f[0] for f in frames] == ["job", "job"]
+    assert '"stage": "cleaning"' in frames[0][2] and '"status": "processed"' in frames[1][2]
+    assert frames[0][1] < frames[1][1]
+    assert events.hub.subscriber_count() == 0
+
+
+def test_heartbeat_and_stream_deadline(memory_backend):
+    async def scenario():
+        out = []
+        async for frame in events.event_stream("u-1", heartbeat_s=0.05, max_duration_s=0.18):
+            out.append(frame)
+        return out
+
+    frames = asyncio.run(scenario())
+    assert frames[0] == f"retry: {events.RETRY_MS}\n\n"
+    assert frames.count(": ping\n\n") >= 2
+
+
+def test_last_event_id_replays_missed_rows(db_engine, session, user, memory_backend):
+    base = datetime.utcnow() - timedelta(minutes=5)
+    notes = [Notification(user_id=user.id, type="info", title=f"n{i}", created_at=base + timedelta(seconds=i))
+             for i in range(4)]
+    session.add_all(notes)
+    session.commit()
+    seen_id = events.event_id_for(notes[1].created_at)
+
+    frames = asyncio.run(_collect(events.event_stream(str(user.id), last_event_id=seen_id, heartbeat_s=5), 2))
+    assert [f[0] for f in frames] == ["notification", "notification"]
+    assert '"title": "n2"' in frames[0][2] and '"title": "n3"' in frames[1][2]
+
+
+def test_capped_table_does_not_skip_the_other_tables_rows(db_engine, session, user):
+    base = datetime.utcnow() - timedelta(minutes=5)
+    session.add_all([Job(id=f"job-cap-{i}", user_id=user.id, updated_at=base + timedelta(seconds=i))
+                     for i in range(3)])
+    # The job table hits the cap while the notification table already has a newer row
+    session.add_all([Notification(user_id=user.id, type="info", title=f"n{s}",
+                                  created_at=base + timedelta(seconds=s)) for s in (0.5, 10)])
+    session.commit()
+
+    seen, since = [], base - timedelta(seconds=1)
+    for _ in range(6):
+        batch = events._rows_since(session, [user.id], since, limit=2)
+        if not batch:
+            break
+        seen.extend(batch)
+        since = events._EPOCH + timedelta(microseconds=batch[-1].id)
+    assert [e.key.rsplit(":", 1)[0] if e.type == "job" else e.data["title"] for e in seen] == [
+        "job:job-cap-0", "n0.5", "job:job-cap-1", "job:job-cap-2", "n10"]
+
+
+def test_relay_publishes_rows_from_other_processes(db_engine, session, user, memory_backend):
+    relay = events.DbRelay(events.hub, interval_s=0.01)
+
+    async def scenario():
+        gen = events.event_stream(str(user.id), heartbeat_s=5)
+        await gen.__anext__()
+        pending = asyncio.ensure_future(_collect(gen, 1))
+        await asyncio.sleep(0.02)
+        assert await asyncio.to_thread(relay.poll_once) == 0
+        # A worker process commits a notification; only the relay can see it
+        session.add(Notification(user_id=user.id, type="assembly", title="Episode assembled"))
+        session.commit()
+        assert await asyncio.to_thread(relay.poll_once) == 1
+        assert await asyncio.to_thread(relay.poll_once) == 0  # same row is not re-sent
+        return await pending
+
+    frames = asyncio.run(scenario())
+    assert frames[0][0] == "notification" and "Episode assembled" in frames[0][2]
+
+
+def test_stream_endpoint_auth_and_framing(client, user, monkeypatch, memory_backend):
+    from api.routers.auth import create_access_token
+
+    monkeypatch.setattr(events, "MAX_STREAM_S", 0.25)
+    monkeypatch.setattr(events, "HEARTBEAT_S", 0.1)
+    assert client.get("/api/events/stream").status_code == 401
+
+    token = create_access_token({"sub": user.email})
+    # The long-lived access token is not accepted in the URL
+    assert client.get("/api/events/stream", params={"access_token": token}).status_code == 401
+    assert client.post("/api/events/ticket").status_code == 401
+
+    ticket = client.post("/api/events/ticket", headers={"Authorization": f"Bearer {token}"}).json()["ticket"]
+    with client.stream("GET", "/api/events/stream", params={"ticket": ticket}) as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/event-stream")
+        body = "".join(r.iter_text())
+    assert body.startswith("retry: ") and ": ping" in body
+    # A ticket opens the stream and nothing else
+    assert client.get("/api/notifications/", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert client.get("/api/notifications/", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+    assert client.get("/api/events/stream", params={"ticket": ticket + "x"}).status_code == 401
+
+    r = client.get("/api/events/stream", headers={"Authorization": f"Bearer {token}", "Last-Event-ID": "x"})
+    assert r.status_code == 400
+
+
+def test_stream_ticket_expires(client, user, monkeypatch, memory_backend):
+    from datetime import timedelta
+
+    from api.routers import events as events_router
+    from api.routers.auth import create_access_token
+
+    monkeypatch.setattr(events_router, "TICKET_TTL", timedelta(seconds=-1))
+    token = create_access_token({"sub": user.email})
+    ticket = client.post("/api/events/ticket", headers={"Authorization": f"Bearer {token}"}).json()["ticket"]
+    assert client.get("/api/events/stream", params={"ticket": ticket}).status_code == 401
+
+
+def test_load_sse_vs_polling(app, session, user, memory_backend):
+    """20 clients follow one assembly: SSE uses one request each and sees stages sooner than 0.25 s polling."""
+    import httpx
+
+    clients, poll_s, stage_gap_s = 20, 0.25, 0.15
+    jobs.create_job(session, "job-load", user_id=user.id)
+    published = {}
+
+    def _worker():
+        for stage, pct in STAGES:
+            time.sleep(stage_gap_s)
+            published[stage] = time.perf_counter()
+            jobs.update_job("job-load", state="processing", stage=stage, percent=pct)
+        time.sleep(stage_gap_s)
+        published["done"] = time.perf_counter()
+        jobs.update_job("job-load", state="processed", stage="done", percent=100)
+
+    async def poller(http, seen):
+        requests = 0
+        while True:
+            requests += 1
+            body = (await http.get("/api/episodes/status/job-load")).json()
+            seen.setdefault(body.get("stage"), time.perf_counter())
+            if body["status"] == "processed":
+                return requests
+            await asyncio.sleep(poll_s)
+
+    async def listener(seen, ready):
+        gen = events.event_stream(str(user.id), heartbeat_s=5)
+        await gen.__anext__()
+        ready.set()
+        async for frame in gen:
+            if frame.startswith("id:"):
+                stage = frame.split('"stage": "', 1)[1].split('"', 1)[0]
+                seen.setdefault(stage, time.perf_counter())
+                if stage == "done":
+                    await gen.aclose()
+                    return 1
+
+    async def run(mode):
+        seen = [dict() for _ in range(clients)]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            if mode == "poll":
+                tasks = [asyncio.ensure_future(poller(http, s)) for s in seen]
+            else:
+                readies = [asyncio.Event() for _ in seen]
+                tasks = [asyncio.ensure_future(listener(s, e)) for s, e in zip(seen, readies)]
+                await asyncio.gather(*(e.wait() for e in readies))
+            worker = threading.Thread(target=_worker)
+            worker.start()
+            counts = await asyncio.wait_for(asyncio.gather(*tasks), 20)
+            worker.join()
+        lat = [s[st] - published[st] for s in seen for st in published if st in s]
+        return sum(counts), sum(lat) / len(lat)
+
+    poll_requests, poll_latency = asyncio.run(run("poll"))
+    jobs.update_job("job-load", state="queued", stage=None, percent=0)
+    sse_requests, sse_latency = asyncio.run(run("sse"))
+    print(f"\n{clients} clients: polling {poll_requests} requests, mean stage latency {poll_latency * 1000:.0f} ms; "
+          f"SSE {sse_requests} requests, mean stage latency {sse_latency * 1000:.0f} ms")
+    assert sse_requests == clients < poll_requests
+    assert sse_latency < poll_latency
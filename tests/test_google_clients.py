@@ -0,0 +1,91 @@
+import os
+import sys
+import types
+
+import pytest
+
+from api.core import lazy
+from infrastructure import google_clients
+
+
+class _Counter:
+    def __init__(self):
+        self.built = 0
+
+    def factory(self, name):
+        counter = self
+
+        class _Client:
+            def __init__(self, *args, **kwargs):
+                counter.built += 1
+
+            def __getattr__(self, attr):
+                raise AssertionError(f"{name}.{attr} should not be called in this test")
+
+        return _Client
+
+
+@pytest.fixture
+def sdk(monkeypatch):
+    """Counting stand-ins for each SDK constructor, installed where the registry imports them."""
+    counts = {k: _Counter() for k in ("storage", "tts", "tasks", "speech")}
+    modules = {
+        "google.cloud.storage": ("Client", "storage"),
+        "google.cloud.texttospeech": ("TextToSpeechClient", "tts"),
+        "google.cloud.tasks_v2": ("CloudTasksClient", "tasks"),
+        "google.cloud.speech_v1p1beta1": ("SpeechClient", "speech"),
+    }
+    import google.cloud
+
+    for mod_name, (cls_name, key) in modules.items():
+        mod = types.ModuleType(mod_name)
+        setattr(mod, cls_name, counts[key].factory(cls_name))
+        monkeypatch.setitem(sys.modules, mod_name, mod)
+        monkeypatch.setattr(google.cloud, mod_name.rsplit(".", 1)[1], mod, raising=False)
+    google_clients.reset_clients()
+    yield counts
+    google_clients.reset_clients()
+
+
+def test_each_client_is_built_once_per_process(sdk):
+    from infrastructure import gcs
+
+    getters = {
+        "storage": [google_clients.get_storage_client, gcs._get_client],
+        "tts": [google_clients.get_tts_client],
+        "tasks": [google_clients.get_tasks_client],
+        "speech": [google_clients.get_speech_client],
+    }
+    for key, fns in getters.items():
+        seen = {id(fn()) for _ in range(5) for fn in fns}
+        assert len(seen) == 1
+        assert sdk[key].built == 1, key
+
+    google_clients.reset_clients()
+    google_clients.get_storage_client()
+    assert sdk["storage"].built == 2
+
+
+def test_after_fork_hook_drops_clients(sdk):
+    first = google_clients.get_tasks_client()
+    lazy._reset_after_fork()
+    assert not google_clients._tasks.built
+    assert google_clients.get_tasks_client() is not first
+    assert sdk["tasks"].built == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="POSIX fork only")
+def test_forked_child_builds_its_own_client(sdk):
+    google_clients.get_storage_client()
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child: report whether the parent's client survived the fork
+        os.close(r)
+        os.write(w, b"1" if google_clients._storage.built else b"0")
+        os._exit(0)
+    os.close(w)
+    inherited = os.read(r, 1)
+    os.close(r)
+    os.waitpid(pid, 0)
+    assert inherited == b"0"
+    assert google_clients._storage.built and sdk["storage"].built == 1
@@ -0,0 +1,112 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from api.core.lazy import LazyModule, LazyValue
+
+PKG_ROOT = Path(__file__).resolve().parents[1] / "podcast-pro-plus"
+
+# SDKs that must load on first use, not when the web app boots
+DEFERRED_MODULES = (
+    "google.cloud.storage",
+    "google.cloud.speech",
+    "celery",
+    "worker.tasks",
+    "authlib.integrations.starlette_client",
+    "stripe",
+    "httpx",
+    "requests",
+    # The audio stack: only assembly, flubber cuts and TTS need it
+    "pydub",
+    "numpy",
+)
+
+# Cumulative import time budgets (ms, as reported by -X importtime); IMPORT_BUDGET_SCALE widens them on slow hosts.
+# api.main took about 1.8-1.9 s before the heavy imports were deferred and about 1.2-1.4 s after.
+IMPORT_BUDGETS_MS = {
+    "api.main": 1500,
+    "api.routers.health": 50,
+    "api.routers.auth": 150,
+}
+# Best of this many probes, so one slow run on a busy host does not fail the budget
+PROBE_RUNS = 5
+
+_PROBE = """
+import json, sys
+import api.main
+print(json.dumps({"loaded": [m for m in %r if m in sys.modules]}))
+"""
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)\s*$")
+
+
+def _cumulative_ms(stderr):
+    """Cumulative import time per module from ``python -X importtime`` output."""
+    out = {}
+    for line in stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m:
+            out[m.group(3)] = int(m.group(2)) / 1000.0
+    return out
+
+
+def test_app_import_defers_heavy_sdks():
+    env = dict(os.environ, PPP_ENV=os.environ.get("PPP_ENV", "test"), STARTUP_BACKFILLS="0")
+    times = {}
+    for _ in range(PROBE_RUNS):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _PROBE % (DEFERRED_MODULES,)], cwd=PKG_ROOT,
+                              env=env, capture_output=True, text=True, timeout=120)
+        assert proc.returncode == 0, f"import api.main failed:\n{proc.stderr[-2000:]}"
+        out = json.loads(proc.stdout.strip().splitlines()[-1])
+        assert out["loaded"] == []
+        for name, ms in _cumulative_ms(proc.stderr).items():
+            times[name] = min(ms, times.get(name, ms))
+
+    scale = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+    print("\n" + ", ".join(f"{name}: {times.get(name, 0):.0f} ms" for name in IMPORT_BUDGETS_MS))
+    for name, budget in IMPORT_BUDGETS_MS.items():
+        assert name in times, f"{name} was not imported by api.main"
+        assert times[name] <= budget * scale, f"{name} took {times[name]:.0f} ms (budget {budget * scale:.0f} ms)"
+
+
+def test_lazy_value_builds_once_under_contention():
+    calls = []
+    gate = threading.Barrier(8)
+
+    def _factory():
+        calls.append(1)
+        return object()
+
+    value = LazyValue(_factory, name="probe")
+    results = []
+
+    def _worker():
+        gate.wait()
+        results.append(value.get())
+
+    threads = [threading.Thread(target=_worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len({id(r) for r in results}) == 1
+    assert value.built
+
+    value.reset()
+    assert not value.built and value() is not results[0] and len(calls) == 2
+
+
+def test_lazy_module_imports_on_first_attribute():
+    seen = []
+    mod = LazyModule("colorsys", seen.append)
+    assert not seen
+    assert mod.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    mod.marker = 1
+    import colorsys
+
+    assert seen == [colorsys] and colorsys.marker == 1
+    del mod.marker
+    assert not hasattr(colorsys, "marker")
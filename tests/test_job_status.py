@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+
+from api.models.job import Job
+from api.models.podcast import Episode, EpisodeStatus
+from api.models.user import User
+from api.services.episodes import jobs
+
+
+@contextmanager
+def _count_statements(engine):
+    statements = []
+
+    def _before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+@pytest.fixture
+def no_result_backend(monkeypatch):
+    def _boom(job_id):
+        raise AssertionError("the result backend must not be consulted for tracked jobs")
+
+    monkeypatch.setattr(jobs, "get_status", _boom)
+
+
+@pytest.fixture
+def episode(session):
+    user = User(email="owner@example.com", hashed_password="x")
+    session.add(user)
+    session.commit()
+    ep = Episode(user_id=user.id, podcast_id=uuid4(), title="Pilot", status=EpisodeStatus.processed,
+                 final_audio_path="pilot.mp3")
+    session.add(ep)
+    session.commit()
+    return ep
+
+
+def test_progress_is_one_primary_key_read(client, db_engine, session, episode, no_result_backend):
+    jobs.create_job(session, "job-1", episode_id=episode.id, user_id=episode.user_id)
+    assert client.get("/api/episodes/status/job-1").json()["status"] == "queued"
+
+    jobs.update_job("job-1", state="processing", stage="cleaning", percent=30)
+    with _count_statements(db_engine) as statements:
+        body = client.get("/api/episodes/status/job-1").json()
+    assert len(statements) == 1
+    assert body["status"] == "processing" and body["stage"] == "cleaning" and body["percent"] == 30
+
+
+def test_processed_job_returns_episode_and_stats(client, session, episode, no_result_backend):
+    jobs.create_job(session, "job-2", episode_id=episode.id)
+    stats = {"fillers_removed": 4, "pauses_compressed": 2, "time_saved_ms": 1800, "time_saved_pct": 3.0,
+             "filler_map": {"um": 3, "uh": 1}}
+    jobs.update_job("job-2", state="processing", stage="mixing", percent=60)
+    jobs.update_job("job-2", state="processed", stage="done", percent=150, stats=stats, message="ok")
+
+    body = client.get("/api/episodes/status/job-2").json()
+    assert body["status"] == "processed" and body["percent"] == 100
+    assert body["episode"]["id"] == str(episode.id) and body["episode"]["title"] == "Pilot"
+    assert body["cleanup_stats"] == stats and body["message"] == "ok"
+
+    session.expire_all()
+    row = session.get(Job, "job-2")
+    assert row.started_at is not None and row.finished_at >= row.started_at
+
+
+def test_error_and_untracked_jobs(client, session, monkeypatch):
+    jobs.update_job("job-3", state="error", error="template not found")  # upserts a missing row
+    body = client.get("/api/episodes/status/job-3").json()
+    assert body["status"] == "error" and body["error"] == "template not found"
+
+    # Jobs queued before the table existed still resolve through the result backend
+    monkeypatch.setattr(jobs, "get_status", lambda job_id: {"raw_status": "STARTED", "raw_result": None})
+    assert client.get("/api/episodes/status/legacy").json() == {"job_id": "legacy", "status": "processing"}
+
+
+def test_worker_reports_failure_on_the_job_row(db_engine, session, tmp_path, monkeypatch):
+    from worker.tasks import audio
+    from worker.tasks.audio import create_podcast_episode
+
+    # The dropped job still writes its assembly log
+    monkeypatch.setattr(audio, "ASSEMBLY_LOG_DIR", tmp_path)
+    template_id = str(uuid4())
+    result = create_podcast_episode.apply(kwargs=dict(
+        episode_id=str(uuid4()), template_id=template_id, main_content_filename="x.wav",
+        output_filename="out", tts_values={}, episode_details={}, user_id=str(uuid4()), podcast_id="",
+        skip_charge=True,
+    ), task_id="job-4")
+    assert result.get()["dropped"] is True
+
+    row = session.get(Job, "job-4")
+    assert row.state == "error" and template_id in row.error and row.started_at is not None
+    assert template_id in "".join(p.read_text() for p in tmp_path.glob("*.log"))
@@ -0,0 +1,103 @@
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from api.services.media_index import MediaIndex, invalidate_media_index, resolve_media_file
+
+
+def _touch(path: Path, mtime: Optional[float] = None) -> Path:
+    path.write_bytes(b"")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def _glob_resolve(root: Path, name: str) -> Optional[Path]:
+    """The per-lookup directory scan the orchestrators used before the index."""
+    base = Path(name).name
+    base_lower = base.lower()
+    base_noext = Path(base_lower).stem
+    best, best_mtime = None, -1.0
+    direct = root / base
+    if direct.exists():
+        best, best_mtime = direct, direct.stat().st_mtime
+    for p in root.glob("*"):
+        nm = p.name.lower()
+        if nm.endswith(base_lower) or Path(nm).stem.endswith(base_noext):
+            mt = p.stat().st_mtime
+            if mt > best_mtime:
+                best, best_mtime = p, mt
+    return best
+
+
+def test_resolves_like_directory_scan(tmp_path):
+    root = tmp_path / "media"
+    root.mkdir()
+    _touch(root / "u1_aaa_Intro.mp3", 1000)
+    _touch(root / "u2_bbb_intro.mp3", 2000)
+    _touch(root / "u1_ccc_my_outro.wav", 1000)
+    _touch(root / "u1_ddd_bed-music.mp3", 1000)
+    _touch(root / "cover.png", 1000)
+    idx = MediaIndex(root)
+    for name in ["intro.mp3", "INTRO.MP3", "my_outro.wav", "outro.wav", "my_outro.mp3",
+                 "bed-music.mp3", "music.mp3", "cover.png", "u1_aaa_Intro.mp3", "missing.mp3"]:
+        assert idx.resolve(name) == _glob_resolve(root, name), name
+    assert idx.resolve("intro.mp3").name == "u2_bbb_intro.mp3"  # newest wins
+    assert idx.resolve("") is None and idx.resolve(None) is None
+
+
+def test_rebuilds_on_dir_change_and_hooks(tmp_path):
+    root = tmp_path / "media"
+    root.mkdir()
+    idx = MediaIndex(root)
+    assert idx.resolve("jingle.mp3") is None
+    builds = idx.builds
+    assert idx.resolve("other.mp3") is None
+    assert idx.builds == builds  # unchanged directory: no rescan
+
+    _touch(root / "u_x_jingle.mp3")
+    assert idx.resolve("jingle.mp3") == root / "u_x_jingle.mp3"
+
+    # Deleted file: never returned, even if the dir mtime did not move
+    st = root.stat()
+    (root / "u_x_jingle.mp3").unlink()
+    os.utime(root, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert idx.resolve("jingle.mp3") is None
+
+    # Module-level hook used by upload/delete routes
+    _touch(root / "u_y_sting.mp3")
+    os.utime(root, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert resolve_media_file("nothing.mp3", root) is None
+    _touch(root / "u_z_sting2.mp3")
+    os.utime(root, ns=(st.st_atime_ns, st.st_mtime_ns))
+    invalidate_media_index(root)
+    assert resolve_media_file("sting2.mp3", root) == root / "u_z_sting2.mp3"
+
+
+def test_benchmark_50k_files(tmp_path):
+    root = tmp_path / "media"
+    root.mkdir()
+    for i in range(50_000):
+        fd = os.open(root / f"{i:08x}_{i % 977:04x}_clip{i}.mp3", os.O_CREAT | os.O_WRONLY)
+        os.close(fd)
+    idx = MediaIndex(root)
+
+    t0 = time.perf_counter()
+    assert idx.resolve("clip123.mp3") is not None
+    build_s = time.perf_counter() - t0
+
+    names = [f"clip{i}.mp3" for i in range(0, 50_000, 50)]
+    t0 = time.perf_counter()
+    for n in names:
+        assert idx.resolve(n) is not None
+    per_lookup = (time.perf_counter() - t0) / len(names)
+
+    t0 = time.perf_counter()
+    _glob_resolve(root, "clip123.mp3")
+    scan_s = time.perf_counter() - t0
+
+    print(f"\n50k files: build {build_s * 1000:.0f} ms, lookup {per_lookup * 1e6:.1f} us, glob scan {scan_s * 1000:.0f} ms")
+    assert idx.builds == 1
+    # One scan's worth of time buys well over a hundred indexed lookups
+    assert per_lookup * 100 < scan_s
@@ -0,0 +1,156 @@
+import os
+import wave
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from api.models.podcast import MediaCategory, MediaItem
+from api.services import media_probe
+
+BOUNDARY = "----pppProbeBoundary"
+
+
+def _write_wav(path: Path, seconds: float, rate: int = 16000, channels: int = 1, fill: bytes = b"\0\0") -> Path:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(fill * int(seconds * rate) * channels)
+    return path
+
+
+@pytest.fixture
+def no_ffprobe(monkeypatch):
+    monkeypatch.setattr(media_probe, "_ffprobe_bin", lambda: None)
+
+
+@pytest.fixture
+def probe_calls(monkeypatch):
+    calls = []
+    real = media_probe.probe_file
+
+    def _counting(path, **kwargs):
+        calls.append(Path(path).name)
+        return real(path, **kwargs)
+
+    monkeypatch.setattr(media_probe, "probe_file", _counting)
+    return calls
+
+
+def _item(session, path: Path, **kw) -> MediaItem:
+    item = MediaItem(filename=path.name, user_id=uuid4(), category=MediaCategory.main_content, **kw)
+    session.add(item)
+    session.commit()
+    session.refresh(item)
+    return item
+
+
+def test_probe_reads_wav_header_without_ffprobe(tmp_path, no_ffprobe):
+    wav = _write_wav(tmp_path / "a.wav", 2.5, rate=22050, channels=2)
+    probe = media_probe.probe_file(wav)
+    assert probe.duration_s == pytest.approx(2.5)
+    assert (probe.sample_rate, probe.channels, probe.codec) == (22050, 2, "pcm_s16le")
+    assert probe.bit_rate == 22050 * 2 * 16
+
+
+def test_ensure_probe_skips_matching_fingerprint_and_hash(session, tmp_path, no_ffprobe, probe_calls):
+    wav = _write_wav(tmp_path / "b.wav", 1.0)
+    item = _item(session, wav)
+    media_probe.record_probe(item, wav)
+    session.add(item)
+    session.commit()
+    assert probe_calls == ["b.wav"]
+
+    media_probe.ensure_probe(session, item, wav)
+    assert probe_calls == ["b.wav"]
+
+    # Same bytes, new mtime (e.g. re-downloaded): fingerprint refreshed, no re-probe
+    st = wav.stat()
+    os.utime(wav, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    media_probe.ensure_probe(session, item, wav)
+    assert probe_calls == ["b.wav"]
+    assert item.probe_fingerprint == media_probe.file_fingerprint(wav)
+
+
+def test_ensure_probe_reprobes_when_content_changes(session, tmp_path, no_ffprobe, probe_calls):
+    wav = _write_wav(tmp_path / "c.wav", 1.0)
+    item = _item(session, wav)
+    media_probe.record_probe(item, wav)
+    old_hash = item.content_hash
+
+    _write_wav(wav, 3.0, fill=b"\1\0")
+    media_probe.ensure_probe(session, item, wav)
+    assert probe_calls == ["c.wav", "c.wav"]
+    assert item.duration_s == pytest.approx(3.0)
+    assert item.content_hash != old_hash
+
+
+def test_source_duration_uses_stored_probe_without_local_file(session, probe_calls):
+    uid = uuid4()
+    item = MediaItem(
+        filename=f"gs://bkt/{uid}/main_content/abc_show.mp3",
+        user_id=uid,
+        category=MediaCategory.main_content,
+        duration_s=125.0,
+    )
+    session.add(item)
+    session.commit()
+
+    assert media_probe.source_duration_seconds(session, uid, "abc_show.mp3") == 125.0
+    assert media_probe.source_duration_seconds(session, uuid4(), "abc_show.mp3") == 0.0
+    assert probe_calls == []
+
+
+def test_legacy_source_duration_never_decodes(session, tmp_path, monkeypatch, no_ffprobe):
+    monkeypatch.setattr(media_probe, "MEDIA_DIR", tmp_path)
+    monkeypatch.setattr(media_probe, "_probe_decode", lambda path: pytest.fail("decoded for billing"))
+    _write_wav(tmp_path / "legacy.wav", 2.0)
+    (tmp_path / "legacy.mp3").write_bytes(b"\xff\xfb" + os.urandom(4096))
+
+    assert media_probe.source_duration_seconds(session, uuid4(), "legacy.wav") == pytest.approx(2.0)
+    assert media_probe.source_duration_seconds(session, uuid4(), "legacy.mp3") == 0.0
+
+
+def test_find_media_item_matches_basename_literally(session):
+    uid = uuid4()
+    session.add(MediaItem(filename=f"gs://bkt/{uid}/main_content/abcXshow.mp3", user_id=uid,
+                          category=MediaCategory.main_content, duration_s=90.0))
+    session.commit()
+
+    # '_' and '%' are LIKE wildcards; they must not match another stored object
+    assert media_probe.find_media_item(session, uid, "abc_show.mp3") is None
+    assert media_probe.find_media_item(session, uid, "abc%show.mp3") is None
+    assert media_probe.find_media_item(session, uid, "abcXshow.mp3").duration_s == 90.0
+
+
+def test_upload_route_stores_probe(app, client, tmp_path, monkeypatch, no_ffprobe):
+    from api.models.user import User
+    from api.routers.auth import get_current_user
+    from api.routers.media import write as media_write
+
+    monkeypatch.setenv("MEDIA_STORAGE_BACKEND", "local")
+    media_dir = tmp_path / "media"
+    media_dir.mkdir()
+    monkeypatch.setattr(media_write, "MEDIA_DIR", media_dir)
+    user = User(id=uuid4(), email="probe@example.com", hashed_password="x")
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        data = _write_wav(tmp_path / "src.wav", 1.5, rate=8000).read_bytes()
+        body = (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="files"; filename="episode.wav"\r\n'
+            "Content-Type: audio/wav\r\n\r\n"
+        ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+        r = client.post(
+            "/api/media/upload/main_content",
+            content=body,
+            headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+    assert r.status_code == 201, r.text
+    item = r.json()[0]
+    assert item["duration_s"] == pytest.approx(1.5)
+    assert item["sample_rate"] == 8000 and item["channels"] == 1
+    assert item["content_hash"] and item["probe_fingerprint"]
@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import time
+import tracemalloc
+from uuid import uuid4
+
+import pytest
+
+from api.services.media_ingest import (
+    GcsSink,
+    StreamingIngest,
+    UploadTooLarge,
+    ingest_multipart,
+)
+
+BOUNDARY = "----pppTestBoundary"
+
+
+def _part_header(name: str, filename: str | None = None, content_type: str | None = None) -> bytes:
+    disp = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+    lines = [f"--{BOUNDARY}", f"Content-Disposition: {disp}"]
+    if content_type:
+        lines.append(f"Content-Type: {content_type}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+def _multipart(parts) -> bytes:
+    body = b""
+    for name, filename, ctype, data in parts:
+        body += _part_header(name, filename, ctype) + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+class _CountingSink:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.size = 0
+        self.first_write_at = None
+        self.committed = False
+        self.aborted = False
+
+    def write(self, data: bytes) -> None:
+        if self.first_write_at is None:
+            self.first_write_at = time.monotonic()
+        if self.delay:
+            time.sleep(self.delay)
+        self.size += len(data)
+
+    def commit(self) -> str:
+        self.committed = True
+        return "counted"
+
+    def abort(self) -> None:
+        self.aborted = True
+
+
+def test_ingest_hashes_and_streams_while_feeding():
+    sink = _CountingSink(delay=0.01)
+    payload = [bytes([i]) * 65536 for i in range(20)]
+
+    async def run():
+        ing = StreamingIngest(sink, max_bytes=10 * 1024 * 1024, queue_chunks=4)
+        for chunk in payload:
+            await ing.feed(chunk)
+        fed_done = time.monotonic()
+        res = await ing.finish()
+        return res, fed_done
+
+    res, fed_done = asyncio.run(run())
+    assert sink.committed and not sink.aborted
+    assert res.size == sink.size == 20 * 65536
+    assert res.sha256 == hashlib.sha256(b"".join(payload)).hexdigest()
+    # Storage writes started before the producer finished sending
+    assert sink.first_write_at is not None and sink.first_write_at < fed_done
+
+
+def test_ingest_enforces_limit_incrementally_and_aborts():
+    sink = _CountingSink()
+
+    async def run():
+        ing = StreamingIngest(sink, max_bytes=100_000)
+        with pytest.raises(UploadTooLarge):
+            for _ in range(10):
+                await ing.feed(b"x" * 65536)
+        await ing.abort()
+
+    asyncio.run(run())
+    assert sink.aborted and not sink.committed
+    assert sink.size <= 100_000
+
+
+def test_gcs_sink_uses_resumable_writer_and_never_finalizes_on_abort(monkeypatch):
+    import infrastructure.gcs as gcs
+
+    writers = []
+
+    class _FakeWriter:
+        def __init__(self):
+            self.data = bytearray()
+            self.closed = False
+
+        def write(self, b):
+            self.data.extend(b)
+
+        def close(self):
+            self.closed = True
+
+    def _open(bucket, key, content_type, chunk_size=gcs.STREAM_CHUNK_SIZE):
+        w = _FakeWriter()
+        writers.append((bucket, key, content_type, w))
+        return w
+
+    monkeypatch.setattr(gcs, "open_resumable_writer", _open)
+
+    ok = GcsSink("bkt", "u/music/a.mp3", "audio/mpeg")
+    ok.write(b"abc")
+    assert ok.commit() == "gs://bkt/u/music/a.mp3"
+    bad = GcsSink("bkt", "u/music/b.mp3", "audio/mpeg")
+    bad.write(b"abc")
+    bad.abort()
+    assert writers[0][3].closed is True
+    assert writers[1][3].closed is False
+
+
+def test_multipart_ingest_memory_is_bounded():
+    total = 48 * 1024 * 1024
+    chunk = b"\0" * 65536
+
+    async def body():
+        yield _part_header("friendly_names", None, None) + b'["Big"]\r\n'
+        yield _part_header("files", "big.wav", "audio/wav")
+        for _ in range(total // len(chunk)):
+            yield chunk
+        yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+    sink = _CountingSink()
+
+    async def run():
+        return await ingest_multipart(
+            body(),
+            f"multipart/form-data; boundary={BOUNDARY}",
+            lambda field, fname, ct: (sink, total + 1),
+        )
+
+    tracemalloc.start()
+    try:
+        files, fields = asyncio.run(run())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert fields == {"friendly_names": '["Big"]'}
+    assert [f.size for f in files] == [total]
+    assert peak < 8 * 1024 * 1024, f"peak {peak / 1e6:.1f} MB"
+
+
+@pytest.fixture
+def local_upload(app, client, tmp_path, monkeypatch):
+    from api.models.user import User
+    from api.routers.auth import get_current_user
+    from api.routers.media import write as media_write
+
+    monkeypatch.setenv("MEDIA_STORAGE_BACKEND", "local")
+    media_dir = tmp_path / "media"
+    media_dir.mkdir()
+    monkeypatch.setattr(media_write, "MEDIA_DIR", media_dir)
+    user = User(id=uuid4(), email="upload@example.com", hashed_password="x")
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        yield client, media_dir, media_write
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_upload_route_streams_to_local_backend(local_upload):
+    client, media_dir, _ = local_upload
+    data = bytes(range(256)) * 8192  # 2 MiB
+    body = _multipart([
+        ("files", "My_Intro.mp3", "audio/mpeg", data),
+        ("friendly_names", None, None, b'["Show Intro"]'),
+    ])
+    r = client.post(
+        "/api/media/upload/intro",
+        content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+    assert r.status_code == 201, r.text
+    items = r.json()
+    assert len(items) == 1
+    item = items[0]
+    assert item["friendly_name"] == "Show Intro"
+    assert item["filesize"] == len(data)
+    stored = media_dir / item["filename"]
+    assert stored.read_bytes() == data
+    assert not list(media_dir.glob("*.part"))
+
+
+def test_upload_route_rejects_oversize_without_leftovers(local_upload, monkeypatch):
+    client, media_dir, media_write = local_upload
+    from api.models.podcast import MediaCategory
+
+    monkeypatch.setitem(media_write.CATEGORY_SIZE_LIMITS, MediaCategory.sfx, 256 * 1024)
+    body = _multipart([("files", "boom.wav", "audio/wav", b"\1" * (1024 * 1024))])
+    r = client.post(
+        "/api/media/upload/sfx",
+        content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+    assert r.status_code == 413
+    assert list(media_dir.iterdir()) == []
+
+
+def test_upload_route_validates_type_before_reading_body(local_upload):
+    client, media_dir, _ = local_upload
+    body = _multipart([("files", "notes.txt", "text/plain", b"hello")])
+    r = client.post(
+        "/api/media/upload/music",
+        content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+    assert r.status_code == 400
+    assert list(media_dir.iterdir()) == []
+
+
+def test_upload_route_queues_preanalysis_after_commit(local_upload, monkeypatch):
+    client, media_dir, media_write = local_upload
+    from sqlmodel import Session, select
+
+    from api.core import database
+    from api.models.podcast import MediaItem
+    from api.services import preanalysis
+
+    seen = []
+
+    def enqueue(filename):
+        # The task looks the item up in its own session: it must already be committed
+        with Session(database.engine) as other:
+            seen.append(other.exec(select(MediaItem).where(MediaItem.filename == filename)).first() is not None)
+
+    monkeypatch.setattr(preanalysis, "enqueue", enqueue)
+    monkeypatch.setattr(media_write, "enqueue_http_task", lambda *a, **k: {"name": "t"})
+    body = _multipart([("files", "episode.wav", "audio/wav", b"RIFF" + b"\0" * 4096)])
+    r = client.post(
+        "/api/media/upload/main_content",
+        content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+    assert r.status_code == 201, r.text
+    assert seen == [True]
@@ -80,7 +80,7 @@ def test_do_export_shape_and_logs(monkeypatch, log):
         log_.append('Saved cleaned content to cleaned_foo.mp3')
         return 'cleaned_foo.mp3', Path('cleaned/cleaned_foo.mp3')
 
-    def fake_build_mix(template, cleaned_audio, cleaned_filename, cleaned_path, main_content_filename, tts_overrides, tts_provider, api_key, output_filename, cover_image_path, log_):
+    def fake_build_mix(template, cleaned_audio, cleaned_filename, cleaned_path, main_content_filename, tts_overrides, tts_provider, api_key, output_filename, cover_image_path, log_, segments=None, beds=None):
         log_.append('[FINAL_MIX] duration_ms=1234')
         return Path('finals/episode.mp3'), [({'segment_type': 'content'}, FakeAudio(), 0, 1000)]
 
@@ -98,3 +98,49 @@ def test_do_export_shape_and_logs(monkeypatch, log):
     assert any('Saved cleaned content' in s for s in log)
     assert any('[FINAL_MIX]' in s for s in log)
     assert any('[TRANSCRIPTS]' in s for s in log)
+
+
+def _noise(ms, rate=8000):
+    import os
+    return steps.AudioSegment(data=os.urandom(rate * ms // 1000 * 2), sample_width=2, frame_rate=rate, channels=1)
+
+
+def test_prepared_template_parts_mix_like_inline(monkeypatch, tmp_path):
+    media = tmp_path / 'media'
+    media.mkdir()
+    for name, ms in (('intro.wav', 700), ('outro.wav', 500), ('bed.wav', 300)):
+        _noise(ms).export(media / name, format='wav')
+    monkeypatch.setattr(steps, 'MEDIA_DIR', media)
+    monkeypatch.setattr(steps, 'OUTPUT_DIR', tmp_path)
+    masters = []
+    monkeypatch.setattr(steps, 'normalize_master', lambda src, dst, cfg, log_: masters.append(Path(src).read_bytes()))
+    monkeypatch.setattr(steps, 'mux_tracks', lambda *a: None)
+    monkeypatch.setattr(steps, 'write_derivatives', lambda *a: None)
+    monkeypatch.setattr(steps, 'embed_metadata', lambda *a: None)
+    monkeypatch.setenv('STAGE_CACHE', '0')  # both runs render the template
+    template = types.SimpleNamespace(
+        segments_json='[{"segment_type": "intro", "source": {"source_type": "static", "filename": "intro.wav"}},'
+                      ' {"segment_type": "content"},'
+                      ' {"segment_type": "outro", "source": {"source_type": "static", "filename": "outro.wav"}}]',
+        background_music_rules_json='[{"music_filename": "bed.wav", "apply_to_segments": ["content"], "fade_in_s": 0.1}]',
+        timing_json='{"content_start_offset_s": -0.2}',
+    )
+    content = _noise(1500)
+
+    def mix(prepared):
+        log = []
+        kwargs = {}
+        if prepared:
+            kwargs = {'segments': steps.prepare_template_segments(template, {}, 'elevenlabs', None, log),
+                      'beds': steps.prepare_music_beds(template, log)}
+        _, placements = steps.build_template_and_final_mix_step(
+            template, content, 'cleaned_x.wav', tmp_path / 'cleaned_x.wav', 'x.wav', {}, 'elevenlabs', None,
+            'episode', None, log, **kwargs)
+        return [(s.get('segment_type'), st, en) for s, _a, st, en in placements], log
+
+    inline, inline_log = mix(False)
+    prepared, prepared_log = mix(True)
+    assert prepared == inline == [('intro', 0, 700), ('content', 500, 2000), ('outro', 2000, 2500)]
+    assert masters[0] == masters[1]
+    assert prepared_log == inline_log
+    assert any('[MUSIC_RULE_APPLY] label=content' in line for line in prepared_log)
@@ -0,0 +1,131 @@
+import json
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from api.models.podcast import MediaCategory, MediaItem
+from api.models.user import User
+from api.services import analysis_proxy, preanalysis
+from api.services.audio import orchestrator_steps as steps
+from api.services.audio.cleanup import compress_long_pauses_guarded, rebuild_audio_from_words
+from api.services.audio.common import match_target_dbfs
+from api.services.clean_engine.models import UserSettings
+from api.services.clean_engine.words import build_filler_cuts, parse_words
+
+# The module's own binding: test modules collected earlier replace pydub in sys.modules
+AudioSegment = steps.AudioSegment
+
+RATE = 16000
+WORDS = [
+    {"word": "so", "start": 0.2, "end": 0.5},
+    {"word": "um", "start": 0.8, "end": 1.1},
+    {"word": "Flubber", "start": 1.4, "end": 1.7},
+    {"word": "today", "start": 4.0, "end": 4.3},
+    {"word": "uh", "start": 4.6, "end": 4.9},
+]
+
+
+def _speech(path, seed=5):
+    """Noise bursts at the word times and a long silent gap from 1.7 s to 4.0 s."""
+    rng = np.random.default_rng(seed)
+    pcm = np.zeros(RATE * 5, dtype=np.int16)
+    for w in WORDS:
+        a, b = int(w["start"] * RATE), int(w["end"] * RATE)
+        pcm[a:b] = rng.integers(-8000, 8000, size=b - a, dtype=np.int16)
+    AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=RATE, channels=1).export(path, format="wav")
+    return path
+
+
+@pytest.fixture
+def upload(tmp_path):
+    words = tmp_path / "take.json"
+    words.write_text(json.dumps(WORDS))
+    return _speech(tmp_path / "take.wav"), words
+
+
+def test_audio_record_matches_pydub(upload):
+    audio, _ = upload
+    rec = preanalysis.analyze(audio)
+    seg = AudioSegment.from_file(audio)
+    assert rec.audio["duration_ms"] == len(seg) and rec.pcm is None  # already WAV
+    stored, fresh = rec.proxy(), analysis_proxy.AnalysisProxy.from_segment(seg)
+    assert (stored.rms, stored.max, stored.dBFS) == (fresh.rms, fresh.max, fresh.dBFS)
+    thresh = int(fresh.dBFS - 16)
+    assert stored.detect_silence(1500, thresh, 10) == fresh.detect_silence(1500, thresh, 10) == [[1690, 4010]]
+    assert stored.envelope(50) == fresh.envelope(50)
+    # Another decode of the same file takes it; a different segment does not
+    assert rec.attach(AudioSegment.from_file(audio)) and not rec.attach(seg[:4000])
+
+
+def test_mixer_reads_the_record_until_the_audio_is_edited(upload, monkeypatch):
+    audio, _ = upload
+    preanalysis.analyze(audio)
+    folded = []
+    fold = analysis_proxy.AnalysisProxy.from_segment
+    monkeypatch.setattr(analysis_proxy.AnalysisProxy, "from_segment",
+                        classmethod(lambda cls, seg: folded.append(len(seg)) or fold(seg)))
+    content = steps._load_content_audio(audio)
+
+    # Mix-only rebuild keeps every sample in place: same segment, record still attached
+    kept, _, _ = rebuild_audio_from_words(content, [dict(w) for w in WORDS], {"um"}, remove_fillers=False)
+    assert kept is content
+    match_target_dbfs(kept, -20)
+    out = compress_long_pauses_guarded(kept, max_pause_s=1.5, min_target_s=0.5, ratio=0.4, rel_db=16.0,
+                                       removal_guard_pct=0.5, similarity_guard=0.0, log=[])
+    assert len(out) == len(content) - (2320 - 928)  # the 2.32 s pause kept at 40%
+    # Only the compressed output was measured from its PCM
+    assert folded == [len(out)]
+
+    cut, _, removed = rebuild_audio_from_words(content, [dict(w) for w in WORDS], {"um"}, remove_fillers=True)
+    assert removed == 1 and cut is not content
+    match_target_dbfs(cut, -20)
+    assert folded[-1] == len(cut)
+
+
+def test_lookup_only_returns_a_matching_record(upload):
+    audio, words = upload
+    us = UserSettings.from_cleanup_settings({"fillerWords": ["um", "uh"]})
+    assert preanalysis.lookup(audio, words, us) is None
+    preanalysis.analyze(audio, words, us)
+
+    rec = preanalysis.lookup(audio, words, us)
+    parsed = parse_words(WORDS)
+    cuts, tokens = rec.filler_candidates({"um", "uh"})
+    assert cuts == build_filler_cuts(parsed, {"um", "uh"}) and tokens == ["um", "uh"]
+    assert rec.filler_candidates({"um"}) is None
+
+    # Other filler words: audio still matches, the transcript scan does not
+    other = UserSettings.from_cleanup_settings({"fillerWords": ["um"]})
+    assert preanalysis.lookup(audio, words, other).words is None
+    # Command keywords are not part of the scan
+    renamed = UserSettings.from_cleanup_settings({"fillerWords": ["um", "uh"], "flubberKeyword": "oops"})
+    assert preanalysis.lookup(audio, words, renamed).words is not None
+    # Re-recorded upload under the same name
+    _speech(audio, seed=6)
+    assert preanalysis.lookup(audio, words, us) is None
+
+
+def test_task_analyses_with_the_owners_settings(session, tmp_path, monkeypatch):
+    from api.core.paths import MEDIA_DIR, WS_ROOT
+    from worker.tasks import analysis
+
+    user = User(email=f"{uuid4().hex}@example.com", hashed_password="x",
+                audio_cleanup_settings_json=json.dumps({"fillerWords": ["so"]}))
+    session.add(user)
+    session.commit()
+    name = f"pre_{uuid4().hex[:8]}.wav"
+    session.add(MediaItem(filename=name, user_id=user.id, category=MediaCategory.main_content))
+    session.commit()
+    audio, transcript = _speech(MEDIA_DIR / name), WS_ROOT / "transcripts" / f"{name[:-4]}.json"
+    transcript.parent.mkdir(exist_ok=True)
+    transcript.write_text(json.dumps(WORDS))
+    try:
+        out = analysis.preanalyze_media_file.apply(args=[name]).get()
+        assert out == {"ok": True, "filename": name, "pcm": False, "words": True}
+        us = UserSettings.from_cleanup_settings({"fillerWords": ["so"]})
+        assert preanalysis.lookup(audio, transcript, us).words["filler_tokens"] == ["so"]
+    finally:
+        audio.unlink(missing_ok=True)
+        transcript.unlink(missing_ok=True)
+    assert analysis.preanalyze_media_file.apply(args=["gone.wav"]).get()["ok"] is False
@@ -5,7 +5,9 @@ import shutil
 import tempfile
 import types
 import unittest
+from contextlib import ExitStack
 from pathlib import Path
+from unittest import mock
 
 
 # Ensure import path for app package
@@ -69,15 +71,25 @@ sys.modules['pydub.silence'] = pydub_silence
 from tests.helpers.audio import make_tiny_wav
 
 
-def _ensure_media_uploads_sample():
+def _workspace_under(stack, root):
+    """Point the pipeline's workspace directories at ``root`` for the life of ``stack``."""
+    from api.services.audio import common, orchestrator, orchestrator_steps, processor
+
+    dirs = {name: root / sub for name, sub in (
+        ("MEDIA_DIR", "media_uploads"), ("CLEANED_DIR", "cleaned_audio"),
+        ("TRANSCRIPTS_DIR", "transcripts"), ("OUTPUT_DIR", "final_episodes"),
+    )}
+    for path in dirs.values():
+        path.mkdir(parents=True, exist_ok=True)
+    for mod in (common, orchestrator, orchestrator_steps, processor):
+        for name, path in dirs.items():
+            if hasattr(mod, name):
+                stack.enter_context(mock.patch.object(mod, name, path))
+    return dirs
+
+
+def _ensure_media_uploads_sample(media_dir):
     try:
-        # Prefer the actual constant if exported
-        try:
-            from api.core.config import MEDIA_UPLOADS_DIR
-            media_dir = Path(MEDIA_UPLOADS_DIR)
-        except Exception:
-            # Fallback: default project location used by the app
-            media_dir = Path.cwd() / "media_uploads"
         media_dir.mkdir(parents=True, exist_ok=True)
         make_tiny_wav(media_dir / "in.wav", ms=800)
         return media_dir / "in.wav"
@@ -89,7 +101,7 @@ class TestProcessorTranscriptIntegration(unittest.TestCase):
 
     def test_processor_writes_transcripts_and_logs(self):
         from types import SimpleNamespace
-        from api.services.audio.processor import process_and_assemble_episode, TRANSCRIPTS_DIR
+        from api.services.audio.processor import process_and_assemble_episode
 
         words = [
             {'word': 'Hello,', 'start': 0.0, 'end': 0.1, 'speaker': 'A'},
@@ -98,15 +110,16 @@ class TestProcessorTranscriptIntegration(unittest.TestCase):
 
         tmp = Path(tempfile.mkdtemp())
         try:
-            wjson = tmp / 'w.json'
-            wjson.write_text(json.dumps(words), encoding='utf-8')
-            logfile = tmp / 'log.txt'
-            prev = os.environ.get('TRANSCRIPTS_DEBUG')
-            os.environ['TRANSCRIPTS_DEBUG'] = '1'
-            try:
+            with ExitStack() as stack:
+                # Everything the pipeline writes lands under tmp, not the real workspace
+                dirs = _workspace_under(stack, tmp / 'ws')
+                wjson = tmp / 'w.json'
+                wjson.write_text(json.dumps(words), encoding='utf-8')
+                logfile = tmp / 'log.txt'
+                stack.enter_context(mock.patch.dict(os.environ, {'TRANSCRIPTS_DEBUG': '1'}))
                 tpl = SimpleNamespace(segments_json='[]', background_music_rules_json='[]', timing_json='{}')
                 # Ensure the main input exists under media_uploads as expected by the app
-                _ensure_media_uploads_sample()
+                _ensure_media_uploads_sample(dirs['MEDIA_DIR'])
                 _fp, log, _notes = process_and_assemble_episode(
                     tpl,
                     'in.wav',
@@ -117,12 +130,8 @@ class TestProcessorTranscriptIntegration(unittest.TestCase):
                     words_json_path=str(wjson),
                     log_path=str(logfile),
                 )
-            finally:
-                if prev is None:
-                    os.environ.pop('TRANSCRIPTS_DEBUG', None)
-                else:
-                    os.environ['TRANSCRIPTS_DEBUG'] = prev
 
+            TRANSCRIPTS_DIR = dirs['TRANSCRIPTS_DIR']
             wj = TRANSCRIPTS_DIR / 'verify-ep.json'
             nj = TRANSCRIPTS_DIR / 'verify-ep.nopunct.json'
             # Optional: quick debug listing if files are missing
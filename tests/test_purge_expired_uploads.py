@@ -0,0 +1,152 @@
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import select
+
+from api.models.podcast import Episode, MediaCategory, MediaItem
+from api.models.user import User
+
+NOW = datetime(2026, 3, 1, 10, 0, 0)
+
+
+def _legacy_purge_ids(session, now):
+    """Candidate selection of the previous implementation (all episodes loaded into a set)."""
+    items = session.exec(
+        select(MediaItem)
+        .where(MediaItem.category == MediaCategory.main_content)
+        .where(MediaItem.expires_at != None)  # noqa: E711
+        .where(MediaItem.expires_at <= now)
+    ).all()
+    in_use = set()
+    for e in session.exec(select(Episode)).all():
+        for name in (e.working_audio_name, e.final_audio_path):
+            if name:
+                in_use.add(Path(str(name)).name)
+    return {m.id for m in items if m.filename and m.filename not in in_use}
+
+
+@pytest.fixture
+def media_dir(tmp_path):
+    d = tmp_path / "media"
+    d.mkdir()
+    return d
+
+
+@pytest.fixture
+def maintenance(db_engine):
+    from worker.tasks import maintenance
+
+    return maintenance
+
+
+def _seed(session, media_dir: Path, *, expired=40, live=5, episodes=0):
+    user = User(email="p@example.com", hashed_password="x")
+    session.add(user)
+    session.commit()
+    rows, eps = [], []
+    for i in range(expired + live):
+        fn = f"{user.id.hex}_{i:06d}_raw.wav"
+        (media_dir / fn).write_bytes(b"x" * 10)
+        rows.append({
+            "id": uuid4(), "user_id": user.id, "filename": fn, "filesize": 10,
+            "category": MediaCategory.main_content,
+            "expires_at": NOW - timedelta(hours=1) if i < expired else NOW + timedelta(days=1),
+        })
+    # Other categories never expire through this task
+    rows.append({"id": uuid4(), "user_id": user.id, "filename": "bed.mp3", "category": MediaCategory.music,
+                 "expires_at": NOW - timedelta(days=1)})
+    # Every 4th expired upload is still in use (working audio or final output)
+    for i in range(0, expired, 4):
+        fn = rows[i]["filename"]
+        col = "working_audio_name" if i % 8 == 0 else "final_audio_path"
+        eps.append({"id": uuid4(), "user_id": user.id, "podcast_id": uuid4(), col: fn})
+    for i in range(episodes):
+        eps.append({"id": uuid4(), "user_id": user.id, "podcast_id": uuid4(),
+                    "working_audio_name": f"other_{i}.wav", "final_audio_path": f"final_{i}.mp3"})
+    session.execute(insert(MediaItem), rows)
+    if eps:
+        session.execute(insert(Episode), eps)
+    session.commit()
+    return user
+
+
+def test_matches_legacy_selection_and_deletes(session, media_dir, maintenance):
+    _seed(session, media_dir)
+    expected = _legacy_purge_ids(session, NOW)
+    assert len(expected) == 30
+
+    out = maintenance.purge_expired_media(session, now=NOW, batch_size=7, media_dir=media_dir)
+    assert out["removed"] == 30 and out["files_removed"] == 30
+    assert out["skipped_in_use"] == 10 and out["checked"] == 40
+    assert out["batches"] == 5 and out["cursor"] is None
+    assert not session.exec(select(MediaItem).where(MediaItem.id.in_(expected))).all()
+    remaining = {p.name for p in media_dir.iterdir()}
+    assert len(remaining) == 15  # 10 in use + 5 not yet expired
+    # Second run is a no-op
+    again = maintenance.purge_expired_media(session, now=NOW, media_dir=media_dir)
+    assert again["removed"] == 0 and again["skipped_in_use"] == 10
+
+
+def test_dry_run_reports_without_touching(session, media_dir, maintenance):
+    _seed(session, media_dir)
+    before = len(session.exec(select(MediaItem)).all())
+    out = maintenance.purge_expired_media(session, now=NOW, dry_run=True, batch_size=8, media_dir=media_dir)
+    assert out["dry_run"] is True and out["removed"] == 0
+    assert out["candidates"] == 30 and out["bytes"] == 300
+    assert len(out["sample"]) == maintenance.PURGE_SAMPLE_SIZE
+    assert len(session.exec(select(MediaItem)).all()) == before
+    assert len(list(media_dir.iterdir())) == 45
+
+
+def test_cursor_resumes_a_bounded_run(session, media_dir, maintenance):
+    _seed(session, media_dir)
+    first = maintenance.purge_expired_media(session, now=NOW, batch_size=10, max_batches=2, media_dir=media_dir)
+    assert first["removed"] == 20 and first["cursor"] is not None
+    rest = maintenance.purge_expired_media(session, now=NOW, batch_size=10, cursor=first["cursor"], media_dir=media_dir)
+    assert rest["removed"] == 10 and rest["cursor"] is None
+    assert maintenance.purge_expired_media(session, now=NOW, media_dir=media_dir)["removed"] == 0
+
+
+def test_reference_added_between_select_and_delete_is_kept(session, media_dir, maintenance, monkeypatch):
+    user = _seed(session, media_dir, expired=3, live=0)  # upload 0 is already in use
+    target = session.exec(select(MediaItem).where(MediaItem.filename.endswith("_000002_raw.wav"))).one()
+    real_execute = session.execute
+
+    def _claim_then_execute(statement, *args, **kwargs):
+        if getattr(statement, "is_delete", False):
+            # An assembly picks up the upload after the batch was selected
+            session.add(Episode(user_id=user.id, podcast_id=uuid4(), working_audio_name=target.filename))
+            session.flush()
+        return real_execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(session, "execute", _claim_then_execute)
+    out = maintenance.purge_expired_media(session, now=NOW, media_dir=media_dir)
+    assert out["candidates"] == 2 and out["removed"] == 1
+    assert (media_dir / target.filename).exists()
+    assert session.get(MediaItem, target.id) is not None
+
+
+def test_benchmark_100k_episodes(session, media_dir, maintenance):
+    _seed(session, media_dir, expired=2000, live=100, episodes=100_000)
+
+    t0 = time.perf_counter()
+    legacy = _legacy_purge_ids(session, NOW)
+    legacy_s = time.perf_counter() - t0
+    session.expunge_all()
+
+    t0 = time.perf_counter()
+    report = maintenance.purge_expired_media(session, now=NOW, dry_run=True, media_dir=media_dir)
+    dry_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    out = maintenance.purge_expired_media(session, now=NOW, media_dir=media_dir)
+    purge_s = time.perf_counter() - t0
+
+    print(f"\n100k episodes: legacy selection {legacy_s * 1000:.0f} ms, dry run {dry_s * 1000:.0f} ms, "
+          f"purge {purge_s * 1000:.0f} ms ({out['batches']} batches)")
+    assert report["candidates"] == len(legacy) == out["removed"] == 1500
+    assert purge_s < legacy_s
@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from api.services import stage_cache
+from api.services.audio import orchestrator_steps as steps
+
+# The module's own binding: test modules collected later replace pydub in sys.modules
+AudioSegment = steps.AudioSegment
+
+
+def _produce(tmp_path, calls, name="out.bin", payload=b"x" * 1000):
+    def fn():
+        calls.append(name)
+        path = tmp_path / name
+        path.write_bytes(payload)
+        return {"n": len(calls)}, {"out": path}
+    return fn
+
+
+def test_hit_restores_outputs_and_respects_the_code_stamp(tmp_path):
+    cache = stage_cache.StageCache("unit")
+    src = tmp_path / "in.wav"
+    src.write_bytes(b"abc")
+    calls = []
+
+    cache.cached({"src": src, "code": "v1"}, _produce(tmp_path, calls))
+    (tmp_path / "out.bin").unlink()
+    data, files = cache.cached({"src": tmp_path / "in.wav", "code": "v1"}, _produce(tmp_path, calls))
+    assert calls == ["out.bin"] and data == {"n": 1}
+    assert files["out"] == tmp_path / "out.bin" and files["out"].read_bytes() == b"x" * 1000
+
+    cache.cached({"src": src, "code": "v2"}, _produce(tmp_path, calls))  # engine changed
+    src.write_bytes(b"abd")  # input changed
+    cache.cached({"src": src, "code": "v2"}, _produce(tmp_path, calls))
+    assert len(calls) == 3 and (cache.hits, cache.misses) == (1, 3)
+
+
+def test_eviction_by_size_is_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("STAGE_CACHE_MAX_MB", str(2.5 * 1000 / (1024 * 1024)))  # room for two entries
+    cache = stage_cache.StageCache("unit")
+    calls = []
+    for name in ("a", "b"):
+        cache.cached({"k": name}, _produce(tmp_path, calls, name))
+    time.sleep(0.01)
+    cache.cached({"k": "a"}, _produce(tmp_path, calls, "a"))  # a is now the most recently used
+    cache.cached({"k": "c"}, _produce(tmp_path, calls, "c"))  # evicts b
+    assert calls == ["a", "b", "c"]
+    cache.cached({"k": "a"}, _produce(tmp_path, calls, "a"))
+    cache.cached({"k": "b"}, _produce(tmp_path, calls, "b"))
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_expired_and_damaged_entries_are_dropped(tmp_path):
+    cache = stage_cache.StageCache("unit")
+    calls = []
+    cache.cached({"k": 1}, _produce(tmp_path, calls, "one"))
+    cache.cached({"k": 2}, _produce(tmp_path, calls, "two"))
+    old = cache.dir / cache.key({"k": 1}) / stage_cache.ENTRY
+    past = time.time() - 30 * 86400
+    os.utime(old, (past, past))
+    assert stage_cache.evict() == 1
+
+    (cache.dir / cache.key({"k": 2}) / "out").write_bytes(b"short")
+    assert cache.get(cache.key({"k": 2})) is None
+    assert not (cache.dir / cache.key({"k": 2})).exists()
+
+
+def test_disabled_cache_always_runs(tmp_path, monkeypatch):
+    monkeypatch.setenv("STAGE_CACHE", "0")
+    cache = stage_cache.StageCache("unit")
+    calls = []
+    for _ in range(2):
+        cache.cached({"k": 1}, _produce(tmp_path, calls))
+    assert len(calls) == 2 and not cache.dir.exists()
+
+
+@pytest.fixture
+def content(tmp_path):
+    rate = 16000
+    rng = np.random.default_rng(3)
+    pcm = np.zeros(rate * 3, dtype=np.int16)
+    words = []
+    for i, (word, start) in enumerate([("so", 0.2), ("um", 0.8), ("today", 1.4), ("uh", 2.0), ("shows", 2.5)]):
+        a, b = int(start * rate), int((start + 0.3) * rate)
+        pcm[a:b] = rng.integers(-6000, 6000, size=b - a, dtype=np.int16)
+        words.append({"word": word, "start": start, "end": start + 0.3})
+    path = tmp_path / "content.wav"
+    AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=rate, channels=1).export(path, format="wav")
+    return path, words
+
+
+def test_primary_cleanup_is_rebuilt_once_per_content_and_settings(content, monkeypatch):
+    path, words = content
+    rebuilds = []
+    real = steps.rebuild_audio_from_words
+
+    def counting(*args, **kwargs):
+        rebuilds.append(1)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(steps, "rebuild_audio_from_words", counting)
+    opts = {"fillerWords": ["um", "uh"], "removeFillers": True, "commands": {"intern": {}}}
+
+    def run(options, log):
+        return steps.primary_cleanup_and_rebuild(path, json.loads(json.dumps(words)), options, False, log)
+
+    first_log, second_log = [], []
+    first = run(opts, first_log)
+    # Options the rebuild does not read (e.g. commands for a different template) still hit
+    second = run({**opts, "commands": {}}, second_log)
+    assert len(rebuilds) == 1
+    assert second[0].raw_data == first[0].raw_data and len(second[0]) < len(AudioSegment.from_file(path))
+    assert second[1:] == first[1:] and first[3] == 2
+    assert second_log[:-1] == first_log and "[STAGE_CACHE]" in second_log[-1]
+
+    run({**opts, "fillerWords": ["um"]}, [])
+    assert len(rebuilds) == 2
+    monkeypatch.setattr(steps, "code_stamp", lambda *modules: "next-release")
+    run(opts, [])
+    assert len(rebuilds) == 3
+    assert not list(Path(stage_cache.cache_root()).glob("primary_cleanup/.*"))
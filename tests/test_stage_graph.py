@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from api.services.audio import orchestrator
+from api.services.audio.stage_graph import Stage, StageGraph
+
+
+def _timed(name, seconds=0.0, produces=(), fail=False):
+    def fn(inputs, log):
+        log.append(f"{name} start inputs={sorted(inputs)}")
+        time.sleep(seconds)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        log.append(f"{name} end")
+        return {k: f"{name}:{k}" for k in produces}
+    return fn
+
+
+def _graph(**kw):
+    # content: a -> b -> mix; template: t (independent, quick) -> mix
+    return StageGraph([
+        Stage("a", _timed("a", 0.15, ("x",)), outputs=("x",)),
+        Stage("b", _timed("b", 0.05, ("y",), fail=kw.get("b_fails", False)), inputs=("x",), outputs=("y",)),
+        Stage("t", _timed("t", 0.0, ("z",)), outputs=("z",)),
+        Stage("mix", _timed("mix", 0.0, ("out",)), inputs=("y", "z"), outputs=("out",)),
+    ])
+
+
+def _without_timings(log):
+    return [line for line in log if not line.startswith("[STAGE_TIMING]")]
+
+
+def test_parallel_run_matches_sequential_run():
+    seq_log, par_log = [], []
+    seq_values, par_values = {}, {}
+    _graph().run(seq_values, seq_log, workers=1)
+    timings = _graph().run(par_values, par_log, workers=3)
+
+    assert par_values == seq_values and par_values["out"] == "mix:out"
+    assert _without_timings(par_log) == _without_timings(seq_log)
+    assert [t.name for t in timings] == ["a", "b", "t", "mix"]
+    by_name = {t.name: t for t in timings}
+    # The template branch did not wait for the content branch
+    assert by_name["t"].start_s < by_name["a"].start_s + by_name["a"].seconds
+
+
+def test_independent_stages_run_at_the_same_time():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(inputs, log):
+        barrier.wait()
+        return {}
+
+    graph = StageGraph([Stage("one", meet), Stage("two", meet)])
+    timings = graph.run({}, [], workers=2)
+    assert [t.ok for t in timings] == [True, True]
+
+
+def test_first_failure_is_raised_after_earlier_stages_finish():
+    log = []
+    with pytest.raises(RuntimeError, match="b failed"):
+        _graph(b_fails=True).run({}, log, workers=3)
+    assert "a end" in log and "b start inputs=['x']" in log
+    assert not any(line.startswith("mix") for line in log)
+    assert log[-1].startswith("[STAGE_TIMING] stage=b") and log[-1].endswith("failed=1")
+
+
+def test_stage_log_is_a_plain_list_to_the_stage():
+    def counts(inputs, log):
+        first = len(log)
+        log.append("one")
+        log.extend(["two", "three"])
+        return {"mine": list(log[first:])}
+
+    values = {}
+    log = ["before"]
+    StageGraph([Stage("s", counts, outputs=("mine",))]).run(values, log, workers=2)
+    assert values["mine"] == ["one", "two", "three"]
+    assert log[:4] == ["before", "one", "two", "three"]
+
+
+@pytest.mark.parametrize("stages, message", [
+    ([Stage("a", _timed("a"), inputs=("x",))], "before any stage produces"),
+    ([Stage("a", _timed("a"), outputs=("x",)), Stage("b", _timed("b"), outputs=("x",))], "already produced"),
+    ([Stage("a", _timed("a")), Stage("a", _timed("a"))], "duplicate stage"),
+])
+def test_invalid_declarations(stages, message):
+    with pytest.raises(ValueError, match=message):
+        StageGraph(stages)
+
+
+def test_missing_output_fails_the_stage():
+    graph = StageGraph([Stage("a", lambda inputs, log: {}, outputs=("x",))])
+    with pytest.raises(ValueError, match="did not produce"):
+        graph.run({}, [], workers=1)
+
+
+@pytest.fixture
+def fake_steps(monkeypatch):
+    """The orchestrator's steps replaced by stand-ins that log what they were given."""
+
+    def step(name, result, delay=0.0):
+        def fn(paths, cfg, log, **kwargs):
+            time.sleep(delay)
+            log.append(f"[{name}] " + ", ".join(f"{k}={kwargs[k]!r}" for k in sorted(kwargs) if k != "template"))
+            return result(kwargs) if callable(result) else dict(result)
+        return fn
+
+    monkeypatch.setattr(orchestrator, "do_transcript_io", step("load", {
+        "content_path": "content.wav", "words": [{"word": "hi"}], "sanitized_output_filename": "ep"}))
+    monkeypatch.setattr(orchestrator, "do_intern_sfx", step("commands", lambda kw: {
+        "mutable_words": [dict(w) for w in kw["words"]], "ai_cmds": []}))
+    monkeypatch.setattr(orchestrator, "do_flubber", step("flubber", {}))
+    monkeypatch.setattr(orchestrator, "do_fillers", step("fillers", lambda kw: {
+        "cleaned_audio": "filled", "mutable_words": kw["mutable_words"]}, delay=0.2))
+    monkeypatch.setattr(orchestrator, "do_tts", step("tts", lambda kw: {"cleaned_audio": kw["cleaned_audio"]}))
+    monkeypatch.setattr(orchestrator, "do_silence", step("silence", lambda kw: {
+        "cleaned_audio": kw["cleaned_audio"] + "+compressed", "mutable_words": kw["mutable_words"]}))
+    monkeypatch.setattr(orchestrator, "do_template", step("template", {"template_segments": ["intro", "content"]}))
+    monkeypatch.setattr(orchestrator, "do_music_beds", step("music", {"music_beds": ["bed"]}))
+    monkeypatch.setattr(orchestrator, "do_export", step("export", {"final_path": "final/ep.mp3"}))
+
+
+def test_pipeline_prepares_the_template_while_cleaning(fake_steps):
+    def run(workers):
+        log = []
+        out = orchestrator.run_episode_pipeline(
+            {"audio_in": "content.wav", "output_name": "ep"}, {"stage_workers": workers}, log)
+        return out, [line for line in _without_timings(log) if not line.startswith(("Workflow started", "[TIMING]"))]
+
+    seq, seq_log = run(1)
+    par, par_log = run(3)
+    assert par_log == seq_log
+    assert par["final_path"] == seq["final_path"] == "final/ep.mp3"
+    export = [line for line in par_log if line.startswith("[export]")]
+    assert export and "cleaned_audio='filled+compressed'" in export[0]
+    assert "template_segments=['intro', 'content']" in export[0] and "music_beds=['bed']" in export[0]
+
+    timings = {t["stage"]: t for t in par["stage_timings"]}
+    assert list(timings) == ["transcript_io", "commands", "fillers", "intern", "silence",
+                             "template_segments", "music_beds", "export"]
+    assert timings["template_segments"]["start_s"] < timings["fillers"]["start_s"] + timings["fillers"]["seconds"]
@@ -0,0 +1,130 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, insert
+from sqlmodel import Session, create_engine, select
+
+from api.models.podcast import Episode, MediaCategory, MediaItem, Podcast
+from api.models.settings import AppSetting
+from api.models.user import User
+
+
+@contextmanager
+def _count_statements(engine):
+    statements = []
+
+    def _before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    from api.core import database
+    from api import startup_tasks
+
+    engine = create_engine(f"sqlite:///{(tmp_path / 'boot.db').as_posix()}",
+                           connect_args={"check_same_thread": False})
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(startup_tasks, "engine", engine)
+    monkeypatch.setattr(startup_tasks.settings, "ADMIN_EMAIL", "root@example.com", raising=False)
+    monkeypatch.setenv("STARTUP_BACKFILLS", "0")
+    return engine, startup_tasks
+
+
+def _seed_legacy_rows(engine, n):
+    with Session(engine) as s:
+        user = User(email="owner@example.com", hashed_password="x")
+        s.add(user)
+        s.commit()
+        pod = Podcast(name="Show", user_id=user.id, cover_path="/srv/media/covers/show.png")
+        s.add(pod)
+        s.commit()
+        s.execute(insert(Episode), [
+            {"id": uuid4(), "user_id": user.id, "podcast_id": pod.id,
+             "final_audio_path": f"/srv/final/ep{i}.mp3" if i % 2 else f"ep{i}.mp3",
+             "cover_path": "https://cdn.example.com/c.png" if i % 3 == 0 else f"/srv/covers/c{i}.png"}
+            for i in range(n)
+        ])
+        s.execute(insert(MediaItem), [
+            {"id": uuid4(), "user_id": user.id, "filename": f"raw{i}.wav", "category": MediaCategory.main_content,
+             "created_at": datetime(2026, 1, 1, 12)}
+            for i in range(n // 10)
+        ])
+        s.commit()
+
+
+def test_warm_start_is_a_single_read(fresh_db):
+    engine, startup_tasks = fresh_db
+
+    t0 = time.perf_counter()
+    startup_tasks.run_startup_tasks()
+    cold_s = time.perf_counter() - t0
+
+    with Session(engine) as s:
+        s.add(User(email="root@example.com", hashed_password="x"))
+        s.commit()
+    _seed_legacy_rows(engine, 5000)
+    startup_tasks.run_startup_tasks()  # flags the admin account once it exists
+    with Session(engine) as s:
+        assert s.exec(select(User).where(User.email == "root@example.com")).one().is_admin
+
+    with _count_statements(engine) as statements:
+        t0 = time.perf_counter()
+        startup_tasks.run_startup_tasks()
+        warm_s = time.perf_counter() - t0
+    print(f"\ncold start {cold_s * 1000:.1f} ms, warm start {warm_s * 1000:.1f} ms ({len(statements)} statement)")
+    assert len(statements) == 1 and "appsetting" in statements[0].lower()
+    assert warm_s < cold_s
+
+    # Boot never touched the legacy rows; that is the backfill's job
+    with Session(engine) as s:
+        assert s.exec(select(Episode).where(Episode.final_audio_path.contains("/"))).first() is not None
+
+
+def test_backfills_are_batched_versioned_and_idempotent(fresh_db, monkeypatch):
+    engine, startup_tasks = fresh_db
+    startup_tasks.run_startup_tasks()
+    _seed_legacy_rows(engine, 1200)
+    scheduled = []
+    monkeypatch.setattr(startup_tasks, "_schedule_backfills", lambda: scheduled.append(True))
+    startup_tasks.run_startup_tasks()
+    assert scheduled  # stale backfill version -> handed off, not run inline
+
+    report = startup_tasks.run_pending_backfills(batch_size=250)
+    # Rows with an even index and a CDN cover (i % 6 == 0) are already normalized
+    assert report == {"episode_paths": 1000, "podcast_covers": 1, "mediaitem_expires_at": 120}
+    with Session(engine) as s:
+        eps = s.exec(select(Episode)).all()
+        assert all("/" not in e.final_audio_path for e in eps)
+        assert {e.cover_path for e in eps if e.cover_path.startswith("https://")} == {"https://cdn.example.com/c.png"}
+        assert s.exec(select(Podcast)).one().cover_path == "show.png"
+        assert all(m.expires_at is not None for m in s.exec(select(MediaItem)).all())
+        rec = s.get(AppSetting, startup_tasks.BACKFILL_VERSION_KEY)
+        assert int(rec.value_json) == startup_tasks.BACKFILL_VERSION
+
+    assert startup_tasks.run_pending_backfills() == {}
+    scheduled.clear()
+    startup_tasks.run_startup_tasks()
+    assert not scheduled
+
+
+def test_schema_change_reruns_migrations(fresh_db, monkeypatch):
+    engine, startup_tasks = fresh_db
+    startup_tasks.run_startup_tasks()
+    calls = []
+    real = startup_tasks.create_db_and_tables
+    monkeypatch.setattr(startup_tasks, "create_db_and_tables", lambda: calls.append(True) or real())
+    startup_tasks.run_startup_tasks()
+    assert calls == []
+    monkeypatch.setattr(startup_tasks, "SCHEMA_VERSION", startup_tasks.SCHEMA_VERSION + 1)
+    startup_tasks.run_startup_tasks()
+    assert calls == [True]
@@ -0,0 +1,90 @@
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+from api.services.audio import processor
+from api.services.audio.processor import StreamingLog
+
+LINES = ["Workflow started", "multi\nline entry", None, "", "unicode ✓ café", "[TIMING] done"]
+
+
+def _legacy_bytes(path: Path, lines) -> bytes:
+    # The previous implementation: open/append/close per entry
+    for item in lines:
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(str(item or "").replace("\n", " ") + "\n")
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_output_is_byte_identical(tmp_path, background):
+    expected = _legacy_bytes(tmp_path / "legacy.log", LINES * 50)
+    log = StreamingLog(tmp_path / "new.log", background=background)
+    for item in LINES * 50:
+        log.append(item)
+    log.close()
+    assert (tmp_path / "new.log").read_bytes() == expected
+    assert list(log) == LINES * 50
+
+
+def test_file_is_opened_once(tmp_path, monkeypatch):
+    opened = []
+    real_open = open
+
+    def _counting_open(*a, **kw):
+        opened.append(a[0])
+        return real_open(*a, **kw)
+
+    monkeypatch.setattr(processor, "open", _counting_open, raising=False)
+    log = StreamingLog(tmp_path / "a.log", flush_interval=60)
+    for i in range(5000):
+        log.append(f"word {i}")
+    log.flush()
+    assert len(opened) == 1
+    assert (tmp_path / "a.log").read_text(encoding="utf-8").count("\n") == 5000
+    log.close()
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_timer_flushes_without_explicit_flush(tmp_path, background):
+    path = tmp_path / "t.log"
+    log = StreamingLog(path, flush_interval=0.1, background=background)
+    log.append("first")
+    deadline = time.monotonic() + 3.0
+    while time.monotonic() < deadline:
+        if path.exists() and path.read_bytes() == b"first\n":
+            break
+        time.sleep(0.02)
+    assert path.read_bytes() == b"first\n"
+    log.close()
+
+
+def test_appends_after_close_still_reach_the_file(tmp_path):
+    path = tmp_path / "c.log"
+    log = StreamingLog(path, flush_interval=60)
+    log.append("a")
+    log.close()
+    log.append("b")
+    assert path.read_text(encoding="utf-8") == "a\nb\n"
+
+
+def test_buffered_lines_survive_a_crashing_job(tmp_path):
+    path = tmp_path / "crash.log"
+    script = textwrap.dedent(
+        f"""
+        from pathlib import Path
+        from api.services.audio.processor import StreamingLog
+        log = StreamingLog(Path({str(path)!r}), flush_interval=3600)
+        for i in range(100):
+            log.append(f"step {{i}}")
+        raise RuntimeError("job crashed mid-stage")
+        """
+    )
+    pkg_root = Path(__file__).resolve().parents[1] / "podcast-pro-plus"
+    proc = subprocess.run([sys.executable, "-c", script], cwd=pkg_root, capture_output=True, text=True, timeout=60)
+    assert proc.returncode != 0 and "job crashed" in proc.stderr
+    assert path.read_text(encoding="utf-8").splitlines() == [f"step {i}" for i in range(100)]
@@ -0,0 +1,125 @@
+import json
+import os
+import types
+from uuid import uuid4
+
+import pytest
+
+from api.models.podcast import PodcastTemplate
+from api.models.user import User
+from api.services.audio import orchestrator_steps as steps
+
+
+def _noise(ms, rate=8000):
+    return steps.AudioSegment(data=os.urandom(rate * ms // 1000 * 2), sample_width=2, frame_rate=rate, channels=1)
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    media = tmp_path / 'media'
+    media.mkdir()
+    _noise(600).export(media / 'intro.wav', format='wav')
+    _noise(400).export(media / 'bed.wav', format='wav')
+    monkeypatch.setattr(steps, 'MEDIA_DIR', media)
+    return media
+
+
+@pytest.fixture
+def tts(tmp_path, monkeypatch):
+    """TTS that writes a clip per call and counts the calls; ``tts.fail`` makes the provider error out."""
+    state = types.SimpleNamespace(calls=0, fail=False)
+
+    def synthesize(chunks, enhancer, cfg, log_):
+        state.calls += 1
+        if state.fail:
+            raise steps.ai_enhancer.AIEnhancerError("provider down")
+        out = tmp_path / f"tts_{state.calls}.wav"
+        _noise(300).export(out, format='wav')
+        return [str(out)]
+
+    monkeypatch.setattr(steps, 'synthesize_chunks', synthesize)
+    return state
+
+
+def _template(script='Welcome to the show'):
+    return types.SimpleNamespace(
+        segments_json=json.dumps([
+            {'id': 'i', 'segment_type': 'intro', 'source': {'source_type': 'static', 'filename': 'intro.wav'}},
+            {'id': 'v', 'segment_type': 'intro', 'source': {'source_type': 'tts', 'script': script, 'voice_id': 'x'}},
+            {'id': 'c', 'segment_type': 'content'},
+        ]),
+        background_music_rules_json=json.dumps([{'music_filename': 'bed.wav', 'apply_to_segments': ['content']}]),
+        timing_json='{}',
+    )
+
+
+def _render(template, overrides=None):
+    log = []
+    segments = steps.prepare_template_segments(template, overrides or {}, 'elevenlabs', None, log)
+    beds = steps.prepare_music_beds(template, log)
+    return segments, beds, log
+
+
+def _raw(segments):
+    return [(seg['id'], audio.raw_data if audio is not None else None) for seg, audio in segments]
+
+
+def test_second_use_restores_stems_without_rendering(media, tts):
+    first, first_beds, first_log = _render(_template())
+    second, second_beds, second_log = _render(_template())
+
+    assert tts.calls == 1
+    assert _raw(second) == _raw(first) and second[2] == (first[2][0], None)
+    assert [b[2].raw_data for b in second_beds] == [b[2].raw_data for b in first_beds]
+    assert second_beds[0][1].name == 'bed.wav'
+    assert sum('[TEMPLATE_STEMS]' in line for line in second_log) == 3
+    assert [line for line in second_log if '[TEMPLATE_STEMS]' not in line] == first_log
+
+
+def test_template_and_media_edits_render_again(media, tts):
+    _render(_template())
+    _render(_template(script='A new welcome'))
+    assert tts.calls == 2
+    _render(_template(), overrides={'v': 'Episode-specific welcome'})
+    assert tts.calls == 3
+
+    # Same name, new content: the intro is decoded again, the TTS is not
+    _noise(800).export(media / 'intro.wav', format='wav')
+    segments, _, log = _render(_template())
+    assert tts.calls == 3 and len(segments[0][1]) == 800
+    assert [line for line in log if 'restored from cache' in line][0].startswith('[TEMPLATE_STEMS] segment')
+    assert sum('restored from cache' in line for line in log) == 2  # the TTS segment and the beds
+
+
+def test_tts_errors_are_not_cached(media, tts):
+    tts.fail = True
+    segments, _, log = _render(_template())
+    assert len(segments[1][1]) == 500  # silence stands in for the failed TTS
+    assert any('not cached' in line for line in log)
+    tts.fail = False
+    segments, _, _ = _render(_template())
+    assert tts.calls == 2 and len(segments[1][1]) == 300
+
+
+def test_saving_a_template_renders_its_stems(session, media, tts):
+    from worker.tasks import analysis
+
+    user = User(email=f"{uuid4().hex}@example.com", hashed_password="x",
+                audio_cleanup_settings_json=json.dumps({"ttsProvider": "google"}))
+    session.add(user)
+    session.commit()
+    saved = _template()
+    template = PodcastTemplate(name="Show", user_id=user.id, segments_json=saved.segments_json,
+                               background_music_rules_json=saved.background_music_rules_json)
+    session.add(template)
+    session.commit()
+
+    out = analysis.render_template_stems.apply(args=[str(template.id)]).get()
+    assert out == {"ok": True, "template_id": str(template.id), "segments": 3, "beds": 1}
+    assert tts.calls == 1
+
+    # The first assembly with the same provider finds every stem ready
+    log = []
+    steps.prepare_template_segments(template, {}, "google", None, log)
+    assert tts.calls == 1 and sum('segment restored' in line for line in log) == 2
+    assert analysis.render_template_stems.apply(args=[str(uuid4())]).get()["ok"] is False
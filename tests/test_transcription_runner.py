@@ -25,7 +25,7 @@ def test_runner_happy_path(tmp_path, monkeypatch, caplog):
     calls: List[str] = []
 
     # Monkeypatch HTTP layer used by client so client logging runs
-    def fake_post(url, headers=None, data=None, json=None):
+    def fake_post(url, headers=None, data=None, json=None, timeout=None):
         if url.endswith("/upload"):
             calls.append("post_upload")
             headers = headers or {}
@@ -45,7 +45,7 @@ def test_runner_happy_path(tmp_path, monkeypatch, caplog):
         {"status": "completed", "text": "hi", "words": [{"text": "hi", "start": 0, "end": 1000}]},
     ]
 
-    def fake_get(url, headers=None):
+    def fake_get(url, headers=None, timeout=None):
         headers = headers or {}
         assert headers.get("authorization") == "k"
         assert url.endswith("/transcript/job_1")